@@ -10,7 +10,6 @@ from __future__ import annotations
 
 import argparse
 import json
-import re
 import sys
 from collections import defaultdict
 from pathlib import Path
@@ -37,15 +36,12 @@ except ImportError:
 
 # 공통 tool spec 가져오기
 sys.path.insert(0, str(Path(__file__).parent.parent))
+from datagen.tool_parsing import find_tool_call, find_tool_response
 from datagen.tool_specs import tools as TOOLS_SPEC
 
 
 # ── 파싱 유틸 ──────────────────────────────────────────────────────────────
 
-_TOOL_CALL_RE = re.compile(r"<tool_call>\s*(.*?)\s*</tool_call>", re.DOTALL)
-_TOOL_RESPONSE_RE = re.compile(r"<tool_response>\s*(.*?)\s*</tool_response>", re.DOTALL)
-
-
 def load_records(target_dir: Path) -> list[dict]:
     """target_dir 내 모든 *.jsonl 레코드를 로드한다.
     messages 키가 없는 레코드(배치 입력 등)는 건너뛴다.
@@ -63,18 +59,13 @@ def load_records(target_dir: Path) -> list[dict]:
 
 
 def _parse_tool_call(content: str) -> dict | None:
-    m = _TOOL_CALL_RE.search(content)
-    if not m:
-        return None
-    try:
-        return json.loads(m.group(1))
-    except json.JSONDecodeError:
-        return None
+    block = find_tool_call(content)
+    return block.value if block is not None and block.ok else None
 
 
 def _parse_tool_response_raw(content: str) -> str | None:
-    m = _TOOL_RESPONSE_RE.search(content)
-    return m.group(1) if m else None
+    block = find_tool_response(content)
+    return block.raw if block is not None else None
 
 
 # ── optional 파라미터 추출 ──────────────────────────────────────────────────
@@ -118,7 +109,7 @@ def analyze_sequential_calls(records: list[dict]) -> list[int]:
             if (msg["role"] == "assistant"
                     and _parse_tool_call(msg["content"])
                     and i + 1 < len(messages)
-                    and _TOOL_RESPONSE_RE.search(messages[i + 1]["content"])):
+                    and find_tool_response(messages[i + 1]["content"]) is not None):
                 current_chain += 1
                 max_chain = max(max_chain, current_chain)
                 i += 2
@@ -138,7 +129,7 @@ def analyze_turn_counts(records: list[dict]) -> list[int]:
         count = sum(
             1
             for m in rec["messages"]
-            if m["role"] == "user" and not _TOOL_RESPONSE_RE.search(m["content"])
+            if m["role"] == "user" and find_tool_response(m["content"]) is None
         )
         result.append(count)
     return result
@@ -214,12 +205,12 @@ def analyze_token_by_role(records: list[dict], tokenizer) -> dict[str, list[int]
             content = msg["content"]
             n = len(tokenizer.encode(content, add_special_tokens=False))
             if msg["role"] == "assistant":
-                if _TOOL_CALL_RE.search(content):
+                if find_tool_call(content) is not None:
                     buckets["tool_call"].append(n)
                 else:
                     buckets["assistant_plain"].append(n)
             elif msg["role"] == "user":
-                if _TOOL_RESPONSE_RE.search(content):
+                if find_tool_response(content) is not None:
                     buckets["tool_response"].append(n)
                 else:
                     buckets["user_plain"].append(n)
@@ -9,27 +9,21 @@
 from __future__ import annotations
 
 import argparse
+import copy
 import json
-import re
 from pathlib import Path
 
-
-_TOOL_CALL_RE = re.compile(r"<tool_call>\s*(.*?)\s*</tool_call>", re.DOTALL)
-_TOOL_RESPONSE_RE = re.compile(r"<tool_response>\s*(.*?)\s*</tool_response>", re.DOTALL)
+from datagen.tool_parsing import find_tool_call, find_tool_response
 
 
 def _strip_pagination_from_content(content: str) -> tuple[str, bool]:
     """assistant content 안의 search_restaurants tool_call에서 page/page_size를 제거한다."""
-    match = _TOOL_CALL_RE.search(content)
-    if not match:
-        return content, False
-
-    raw = match.group(1)
-    try:
-        tool_call = json.loads(raw)
-    except json.JSONDecodeError:
+    block = find_tool_call(content)
+    if block is None or not block.ok:
         return content, False
 
+    # 파싱 결과는 공통 파서 memo와 공유되므로 복사본을 수정한다
+    tool_call = copy.deepcopy(block.value)
     if tool_call.get("name") != "search_restaurants":
         return content, False
 
@@ -47,20 +41,16 @@ def _strip_pagination_from_content(content: str) -> tuple[str, bool]:
         return content, False
 
     replacement = "<tool_call>\n" + json.dumps(tool_call, ensure_ascii=False) + "\n</tool_call>"
-    return content[: match.start()] + replacement + content[match.end() :], True
+    return content[: block.start] + replacement + content[block.end :], True
 
 
 def _normalize_pagination_in_response(content: str) -> tuple[str, bool]:
     """user content 안의 tool_response pagination.page_size를 20으로 통일한다."""
-    match = _TOOL_RESPONSE_RE.search(content)
-    if not match:
+    block = find_tool_response(content)
+    if block is None or not block.ok:
         return content, False
 
-    raw = match.group(1)
-    try:
-        payload = json.loads(raw)
-    except json.JSONDecodeError:
-        return content, False
+    payload = copy.deepcopy(block.value)
 
     changed = False
 
@@ -82,7 +72,7 @@ def _normalize_pagination_in_response(content: str) -> tuple[str, bool]:
         return content, False
 
     replacement = "<tool_response>\n" + json.dumps(payload, ensure_ascii=False) + "\n</tool_response>"
-    return content[: match.start()] + replacement + content[match.end() :], True
+    return content[: block.start] + replacement + content[block.end :], True
 
 
 def main() -> None:
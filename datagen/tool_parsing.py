@@ -0,0 +1,222 @@
+"""<tool_call> / <tool_response> 블록 공통 파서.
+
+evaluations.metrics / latency / simulation, train.tool_eval, datavalidator.rules.schema / content,
+dataanalyzer.analyze, datagen.strip_search_pagination이 같은 메시지 content를 여러 번 파싱하므로
+정규식과 json.loads를 이 모듈 한 곳에서 처리한다.
+
+- 정규식은 모듈 로드 시 한 번만 컴파일한다.
+- 여는 태그가 없는 content(일반 발화)는 정규식 없이 바로 None을 반환한다.
+- 태그가 있는 content는 content 문자열을 키로 LRU 캐시에 파싱 결과를 memo한다.
+  캐시된 TagBlock.value는 호출한 곳끼리 공유하므로 수정하지 말 것
+  (수정이 필요하면 copy.deepcopy 후 사용).
+
+사용법 (eval 데이터셋으로 기존 방식 대비 파싱 속도 측정):
+    python -m datagen.tool_parsing --dataset eval_data/dataset.jsonl --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+TOOL_CALL_OPEN = "<tool_call>"
+TOOL_RESPONSE_OPEN = "<tool_response>"
+
+# 본문 앞뒤 공백은 정규식(\s*)이 아니라 str.strip으로 제거한다 (\s* 역추적이 없어 2배가량 빠름)
+TOOL_CALL_RE = re.compile(r"<tool_call>(.*?)</tool_call>", re.DOTALL)
+TOOL_RESPONSE_RE = re.compile(r"<tool_response>(.*?)</tool_response>", re.DOTALL)
+
+# 파싱 결과를 memo할 content 수 (eval / 학습 데이터셋 메시지 수보다 충분히 크게)
+_MEMO_SIZE = 65536
+
+
+@dataclass(frozen=True)
+class TagBlock:
+    """content 안 첫 번째 태그 블록의 파싱 결과."""
+
+    raw: str                                    # 태그 안 본문 (앞뒤 공백 제거)
+    start: int                                  # 태그 포함 블록 시작 오프셋
+    end: int                                    # 태그 포함 블록 끝 오프셋
+    value: Any = None                           # json.loads(raw) 결과 (실패하면 None)
+    error: json.JSONDecodeError | None = None   # JSON 파싱 실패 시 예외
+
+    @property
+    def ok(self) -> bool:
+        """본문이 유효한 JSON인지 여부."""
+        return self.error is None
+
+
+def _parse_block(pattern: re.Pattern, content: str) -> TagBlock | None:
+    match = pattern.search(content)
+    if not match:
+        return None
+    raw = match.group(1).strip()
+    try:
+        value = json.loads(raw)
+    except json.JSONDecodeError as e:
+        return TagBlock(raw, match.start(), match.end(), error=e)
+    return TagBlock(raw, match.start(), match.end(), value=value)
+
+
+@lru_cache(maxsize=_MEMO_SIZE)
+def _cached_tool_call(content: str) -> TagBlock | None:
+    return _parse_block(TOOL_CALL_RE, content)
+
+
+@lru_cache(maxsize=_MEMO_SIZE)
+def _cached_tool_response(content: str) -> TagBlock | None:
+    return _parse_block(TOOL_RESPONSE_RE, content)
+
+
+def find_tool_call(content: str) -> TagBlock | None:
+    """content의 첫 <tool_call> 블록 (닫는 태그까지 없으면 None)."""
+    if TOOL_CALL_OPEN not in content:
+        return None
+    return _cached_tool_call(content)
+
+
+def find_tool_response(content: str) -> TagBlock | None:
+    """content의 첫 <tool_response> 블록 (닫는 태그까지 없으면 None)."""
+    if TOOL_RESPONSE_OPEN not in content:
+        return None
+    return _cached_tool_response(content)
+
+
+def has_tool_call_tag(content: str) -> bool:
+    """여는 <tool_call> 태그 존재 여부 (닫는 태그·JSON 유효성은 보지 않음)."""
+    return TOOL_CALL_OPEN in content
+
+
+def parse_tool_call(content: str) -> dict | None:
+    """
+    name과 dict arguments를 갖춘 tool_call JSON을 반환한다.
+
+    블록이 없거나, JSON 파싱에 실패하거나, name / arguments(dict)가 없으면 None.
+    """
+    block = find_tool_call(content)
+    if block is None or not block.ok:
+        return None
+    call = block.value
+    if not isinstance(call, dict) or "name" not in call or not isinstance(call.get("arguments"), dict):
+        return None
+    return call
+
+
+def cache_info() -> dict[str, Any]:
+    """tool_call / tool_response memo의 functools cache_info."""
+    return {
+        "tool_call": _cached_tool_call.cache_info()._asdict(),
+        "tool_response": _cached_tool_response.cache_info()._asdict(),
+    }
+
+
+def clear_cache() -> None:
+    """memo를 비운다 (벤치마크 cold 측정, 장시간 프로세스 메모리 회수용)."""
+    _cached_tool_call.cache_clear()
+    _cached_tool_response.cache_clear()
+
+
+# ── 마이크로벤치마크 ────────────────────────────────────────────────────────
+
+def _legacy_parse(content: str) -> tuple[Any, Any]:
+    """공통 모듈 도입 전 방식: 호출마다 re.search(패턴 문자열) + json.loads."""
+    results = []
+    for pattern in (r"<tool_call>(.*?)</tool_call>", r"<tool_response>(.*?)</tool_response>"):
+        match = re.search(pattern, content, re.DOTALL)
+        value = None
+        if match:
+            try:
+                value = json.loads(match.group(1).strip())
+            except json.JSONDecodeError:
+                pass
+        results.append(value)
+    return results[0], results[1]
+
+
+def _shared_parse(content: str) -> tuple[Any, Any]:
+    call = find_tool_call(content)
+    response = find_tool_response(content)
+    return (
+        call.value if call is not None else None,
+        response.value if response is not None else None,
+    )
+
+
+def _time_passes(parse, contents: list[str], repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for content in contents:
+            parse(content)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_benchmark(contents: list[str], repeat: int = 20) -> dict[str, Any]:
+    """
+    같은 content 목록을 repeat번 파싱하는 시간을 기존 방식과 비교한다.
+
+    한 run에서 같은 메시지를 scorer / latency / step_table / simulation 등이 반복 파싱하는
+    상황을 repeat번 순회로 재현한다. shared_cold는 memo가 빈 첫 순회,
+    shared_warm은 나머지 순회의 평균이다.
+    """
+    legacy = _time_passes(_legacy_parse, contents, repeat)
+    clear_cache()
+    shared = _time_passes(_shared_parse, contents, repeat)
+
+    for content in contents:
+        if _legacy_parse(content) != _shared_parse(content):
+            raise AssertionError(f"파싱 결과 불일치: {content[:80]!r}")
+
+    legacy_pass = sum(legacy) / len(legacy)
+    cold = shared[0]
+    warm = sum(shared[1:]) / max(len(shared) - 1, 1)
+    return {
+        "contents": len(contents),
+        "repeat": repeat,
+        "legacy_us_per_content": legacy_pass / len(contents) * 1e6,
+        "shared_cold_us_per_content": cold / len(contents) * 1e6,
+        "shared_warm_us_per_content": warm / len(contents) * 1e6,
+        "speedup_cold": legacy_pass / cold,
+        "speedup_warm": legacy_pass / warm,
+        "speedup_total": sum(legacy) / sum(shared),
+        "cache": cache_info(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="tool_call / tool_response 파서 마이크로벤치마크")
+    parser.add_argument("--dataset", default="eval_data/dataset.jsonl", help="messages가 있는 jsonl 경로")
+    parser.add_argument("--repeat", type=int, default=20, help="전체 content 순회 횟수")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로 (선택)")
+    args = parser.parse_args()
+
+    with open(args.dataset, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    contents = [message["content"] for record in records for message in record.get("messages", [])]
+
+    result = run_benchmark(contents, repeat=args.repeat)
+    print(f"[완료] content {result['contents']}개 × {result['repeat']}회")
+    print(f"  → 기존 (re.search + json.loads) : {result['legacy_us_per_content']:.2f} us/content")
+    print(
+        f"  → 공통 파서 첫 순회 (memo 없음)  : {result['shared_cold_us_per_content']:.2f} us/content "
+        f"(x{result['speedup_cold']:.2f})"
+    )
+    print(
+        f"  → 공통 파서 반복 순회 (memo 히트): {result['shared_warm_us_per_content']:.2f} us/content "
+        f"(x{result['speedup_warm']:.2f})"
+    )
+    print(f"  → 전체 {result['repeat']}회 합계 속도 향상 : x{result['speedup_total']:.2f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"[저장] {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,10 +11,10 @@ tool_call의 파라미터 값이 대화 컨텍스트에서 추론 가능한지 
 """
 from __future__ import annotations
 
-import json
 import re
 from dataclasses import dataclass
 
+from datagen.tool_parsing import find_tool_call
 from datavalidator.utils import Block
 
 
@@ -34,8 +34,6 @@ _UUID_RE = re.compile(
     r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}",
     re.IGNORECASE,
 )
-_TOOL_CALL_RE = re.compile(r"<tool_call>\s*(.*?)\s*</tool_call>", re.DOTALL)
-_TOOL_RESPONSE_RE = re.compile(r"<tool_response>\s*(.*?)\s*</tool_response>", re.DOTALL)
 _NUMBER_RE = re.compile(r"\d+\.?\d*")
 _JOSA_RE = re.compile(
     r"(으로|에서|까지|부터|처럼|보다|에게|한테|로|를|은|는|이|가|만|도|에|의|와|과)$"
@@ -283,14 +281,10 @@ def check_inferability(blocks: list[Block]) -> list[ContentError]:
         if block.role != "assistant":
             continue
 
-        match = _TOOL_CALL_RE.search(block.content)
-        if not match:
-            continue
-
-        try:
-            call = json.loads(match.group(1))
-        except json.JSONDecodeError:
+        tool_call = find_tool_call(block.content)
+        if tool_call is None or not tool_call.ok:
             continue
+        call = tool_call.value
 
         user_msg = _get_preceding_user_message(blocks, i)
         all_prior_msgs = _get_all_prior_user_messages(blocks, i)
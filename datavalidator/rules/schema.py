@@ -2,12 +2,11 @@
 from __future__ import annotations
 
 import inspect
-import json
-import re
 from dataclasses import dataclass
 from typing import Any, get_args, get_origin, get_type_hints
 
 from datagen import tool_specs as _tool_specs
+from datagen.tool_parsing import find_tool_call, find_tool_response
 
 # 함수 이름 → 함수 객체 매핑
 FUNCTIONS: dict[str, Any] = {
@@ -89,22 +88,17 @@ class SchemaError:
 
 # ── Rule 2 ────────────────────────────────────────────────────────────────────
 
-_TOOL_CALL_RE = re.compile(r"<tool_call>\s*(.*?)\s*</tool_call>", re.DOTALL)
-
-
 def check_tool_call(block_content: str, block_index: int, line_start: int = 0) -> list[SchemaError]:
     """assistant 블록의 <tool_call> JSON을 검증한다."""
     errors: list[SchemaError] = []
-    match = _TOOL_CALL_RE.search(block_content)
-    if not match:
+    block = find_tool_call(block_content)
+    if block is None:
         return errors  # tool_call 없는 assistant 블록은 정상
 
-    raw = match.group(1)
-    try:
-        data = json.loads(raw)
-    except json.JSONDecodeError as e:
-        errors.append(SchemaError("tool_call", block_index, f"JSON 파싱 실패: {e}", line_start))
+    if not block.ok:
+        errors.append(SchemaError("tool_call", block_index, f"JSON 파싱 실패: {block.error}", line_start))
         return errors
+    data = block.value
 
     name = data.get("name")
     arguments = data.get("arguments", {})
@@ -141,9 +135,6 @@ def check_tool_call(block_content: str, block_index: int, line_start: int = 0) -
 
 # ── Rule 3 ────────────────────────────────────────────────────────────────────
 
-_TOOL_RESPONSE_RE = re.compile(r"<tool_response>\s*(.*?)\s*</tool_response>", re.DOTALL)
-
-
 def check_tool_response(
     block_content: str,
     block_index: int,
@@ -152,8 +143,8 @@ def check_tool_response(
 ) -> list[SchemaError]:
     """user 블록의 <tool_response> JSON을 검증한다."""
     errors: list[SchemaError] = []
-    match = _TOOL_RESPONSE_RE.search(block_content)
-    if not match:
+    block = find_tool_response(block_content)
+    if block is None:
         return errors  # tool_response 없는 user 블록은 정상
 
     if last_called_func is None:
@@ -167,15 +158,11 @@ def check_tool_response(
     if last_called_func not in FUNCTIONS:
         return errors  # 함수명 자체가 틀린 건 Rule 2에서 이미 잡힘
 
-    raw = match.group(1)
     return_hint = _get_return_hint(FUNCTIONS[last_called_func])
 
     # 반환 타입이 str인 함수 (upsert_address, place_order)
     if return_hint is str:
-        try:
-            value = json.loads(raw)
-        except json.JSONDecodeError:
-            value = raw.strip()
+        value = block.value if block.ok else block.raw.strip()
         if not isinstance(value, str):
             errors.append(SchemaError(
                 "tool_response", block_index,
@@ -185,11 +172,10 @@ def check_tool_response(
         return errors
 
     # 나머지: JSON dict 또는 list
-    try:
-        data = json.loads(raw)
-    except json.JSONDecodeError as e:
-        errors.append(SchemaError("tool_response", block_index, f"JSON 파싱 실패: {e}", line_start))
+    if not block.ok:
+        errors.append(SchemaError("tool_response", block_index, f"JSON 파싱 실패: {block.error}", line_start))
         return errors
+    data = block.value
 
     # list 반환 타입 (list_addresses, get_cart 등)
     import typing
@@ -252,11 +238,7 @@ def check_tool_response(
 
 def extract_called_func_name(block_content: str) -> str | None:
     """assistant 블록에서 호출된 함수 이름을 추출한다."""
-    match = _TOOL_CALL_RE.search(block_content)
-    if not match:
-        return None
-    try:
-        data = json.loads(match.group(1))
-        return data.get("name")
-    except json.JSONDecodeError:
+    block = find_tool_call(block_content)
+    if block is None or not block.ok:
         return None
+    return block.value.get("name")
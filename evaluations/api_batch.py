@@ -0,0 +1,299 @@
+"""
+OpenAI Batch API 기반 평가 추론.
+
+InferenceInput을 /v1/chat/completions Batch JSONL로 직렬화해 제출하고,
+완료까지 폴링한 뒤 결과를 custom_id로 원래 step에 매핑한다.
+제출·폴링 흐름은 datagen.submit_batch / datagen.retrieve_batch와 동일하다.
+
+custom_id 형식: conv-{conversation_id}-turn-{turn_index}-step-{step_index}
+
+배치 하나의 한도(50,000건 / 200 MB)를 넘으면 여러 배치로 나눠 제출하고 함께 폴링한다.
+로컬 확인은 evaluations.api_stub의 Files / Batches 흉내 엔드포인트로 할 수 있다 (tests/test_api_batch.py).
+"""
+
+import json
+import re
+import time
+from pathlib import Path
+from typing import Callable
+
+from openai import OpenAI
+
+from evaluations.prediction_log import input_key
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+_CUSTOM_ID_PATTERN = re.compile(r"^conv-(\d+)-turn-(\d+)-step-(\d+)$")
+# 배치 하나의 한도 (요청 수 / 입력 파일 크기). 넘는 요청은 여러 배치로 나눠 제출한다
+MAX_BATCH_REQUESTS = 50_000
+MAX_BATCH_BYTES = 200 * 1024 * 1024
+
+
+def make_custom_id(inp) -> str:
+    """InferenceInput의 (conversation_id, turn_index, step_index)를 custom_id로 인코딩한다."""
+    return f"conv-{inp.conversation_id}-turn-{inp.turn_index}-step-{inp.step_index}"
+
+
+def parse_custom_id(custom_id: str) -> tuple[int, int, int]:
+    """custom_id를 (conversation_id, turn_index, step_index)로 디코딩한다."""
+    match = _CUSTOM_ID_PATTERN.match(custom_id)
+    if not match:
+        raise ValueError(f"알 수 없는 custom_id 형식입니다: {custom_id}")
+    conv_id, turn_idx, step_idx = match.groups()
+    return (int(conv_id), int(turn_idx), int(step_idx))
+
+
+def build_batch_requests(
+    inference_inputs: list,
+    model_name: str,
+    max_new_tokens: int | list[int] = 512,
+) -> list[dict]:
+    """
+    InferenceInput 리스트를 Batch API 요청 라인 리스트로 변환한다.
+
+    max_new_tokens가 리스트면 step별 토큰 예산(DecodingPolicy)으로 본다.
+    """
+    budgets = max_new_tokens
+    if not isinstance(budgets, list):
+        budgets = [max_new_tokens] * len(inference_inputs)
+    return [
+        {
+            "custom_id": make_custom_id(inp),
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": {
+                "model": model_name,
+                "messages": inp.messages,
+                "temperature": 0.0,
+                "max_tokens": budget,
+            },
+        }
+        for inp, budget in zip(inference_inputs, budgets)
+    ]
+
+
+def parse_batch_output(
+    raw_text: str,
+    finish_reasons: dict[str, str] | None = None,
+    token_counts: dict[str, tuple[int, int]] | None = None,
+) -> tuple[dict[str, str], list[dict]]:
+    """
+    Batch 결과 파일(JSONL)을 파싱한다.
+
+    finish_reasons를 넘기면 {custom_id: finish_reason}을,
+    token_counts를 넘기면 응답 usage가 있는 요청의 {custom_id: (prompt 토큰 수, completion 토큰 수)}를 기록한다.
+
+    Returns
+    -------
+    ({custom_id: 생성 텍스트}, 에러 리스트)
+    """
+    outputs: dict[str, str] = {}
+    errors: list[dict] = []
+
+    for line in raw_text.strip().split("\n"):
+        if not line.strip():
+            continue
+        try:
+            obj = json.loads(line)
+        except json.JSONDecodeError as e:
+            errors.append({"line": line[:100], "error": str(e)})
+            continue
+
+        custom_id = obj.get("custom_id", "unknown")
+        if obj.get("error"):
+            errors.append({"custom_id": custom_id, "error": obj["error"]})
+            continue
+
+        response = obj.get("response") or {}
+        if response.get("status_code", 200) != 200:
+            errors.append({"custom_id": custom_id, "error": response.get("body")})
+            continue
+
+        body = response.get("body") or {}
+        choices = body.get("choices") or []
+        if not choices:
+            errors.append({"custom_id": custom_id, "error": "no choices"})
+            continue
+        outputs[custom_id] = (choices[0].get("message") or {}).get("content") or ""
+        if finish_reasons is not None:
+            finish_reasons[custom_id] = choices[0].get("finish_reason") or ""
+        usage = body.get("usage")
+        if token_counts is not None and usage:
+            token_counts[custom_id] = (usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0)
+
+    return outputs, errors
+
+
+def split_batch_requests(
+    requests: list[dict],
+    max_requests: int = MAX_BATCH_REQUESTS,
+    max_bytes: int = MAX_BATCH_BYTES,
+) -> list[list[bytes]]:
+    """
+    요청을 JSONL 라인으로 직렬화해 배치 하나의 한도(요청 수 / 입력 파일 크기) 안에 들어가는 묶음으로 나눈다.
+
+    Returns
+    -------
+    배치별 JSONL 라인(bytes) 리스트
+    """
+    parts: list[list[bytes]] = []
+    current: list[bytes] = []
+    current_bytes = 0
+    for request in requests:
+        line = (json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8")
+        if len(line) > max_bytes:
+            raise ValueError(f"요청 하나가 배치 입력 크기 한도({max_bytes} bytes)를 넘습니다: {request['custom_id']}")
+        if current and (len(current) >= max_requests or current_bytes + len(line) > max_bytes):
+            parts.append(current)
+            current, current_bytes = [], 0
+        current.append(line)
+        current_bytes += len(line)
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _write_status(status_path: Path, batches: list) -> None:
+    status_info = {
+        "batches": [
+            {
+                "batch_id": batch.id,
+                "input_file_id": batch.input_file_id,
+                "status": batch.status,
+                "created_at": str(batch.created_at),
+                "output_file_id": batch.output_file_id,
+                "error_file_id": batch.error_file_id,
+            }
+            for batch in batches
+        ]
+    }
+    with open(status_path, "w", encoding="utf-8") as f:
+        json.dump(status_info, f, ensure_ascii=False, indent=2)
+
+
+def run_batch_inference(
+    inference_inputs: list,
+    model_name: str,
+    work_dir: Path,
+    max_new_tokens: int | list[int] = 512,
+    poll_interval: int = 60,
+    on_result: Callable[[int, str], None] | None = None,
+    finish_reasons: dict[int, str] | None = None,
+    token_counts: dict[int, tuple[int, int]] | None = None,
+    max_requests: int = MAX_BATCH_REQUESTS,
+    max_bytes: int = MAX_BATCH_BYTES,
+) -> list[str]:
+    """
+    Batch API로 inference_inputs 전체를 추론한다.
+
+    요청이 배치 하나의 한도(max_requests건 / max_bytes)를 넘으면 여러 배치로 나눠 모두 제출한 뒤 함께 폴링한다.
+    work_dir에 batch_input.jsonl(여러 배치면 batch_input.part-NNN.jsonl) / batch_status.json /
+    batch_errors.json을 남긴다.
+    완료된 배치의 성공한 step은 on_result로 먼저 흘려보낸 뒤, 실패·미완료 step이 있으면 RuntimeError를 발생시킨다.
+    (predictions.partial.jsonl에 성공분이 남으므로 --resume으로 실패분만 다시 제출할 수 있다.)
+
+    Parameters
+    ----------
+    inference_inputs : InferenceInput 리스트
+    model_name : OpenAI 모델명
+    work_dir : Batch 입력·상태 파일 저장 디렉토리
+    max_new_tokens : 최대 생성 토큰 수 (리스트면 step별 예산)
+    poll_interval : 폴링 간격 (초)
+    on_result : 결과가 매핑될 때마다 (입력 인덱스, 예측)으로 호출되는 콜백
+    finish_reasons : 지정하면 {입력 인덱스: finish_reason}을 기록한다 ("length"면 토큰 예산 도달)
+    token_counts : 지정하면 응답 usage의 {입력 인덱스: (prompt 토큰 수, completion 토큰 수)}를 기록한다
+    max_requests : 배치 하나의 최대 요청 수 (기본값: Batch API 한도 50,000)
+    max_bytes : 배치 입력 파일 하나의 최대 크기 (기본값: Batch API 한도 200 MB)
+
+    Returns
+    -------
+    inference_inputs와 같은 순서의 생성 텍스트 리스트
+    """
+    client = OpenAI()
+    work_dir.mkdir(parents=True, exist_ok=True)
+    status_path = work_dir / "batch_status.json"
+
+    requests = build_batch_requests(inference_inputs, model_name, max_new_tokens)
+    parts = split_batch_requests(requests, max_requests=max_requests, max_bytes=max_bytes)
+
+    # 파일 업로드 + 배치 생성 (제출할 때마다 상태 파일 갱신)
+    batches = []
+    for part_index, lines in enumerate(parts):
+        if len(parts) == 1:
+            input_path = work_dir / "batch_input.jsonl"
+        else:
+            input_path = work_dir / f"batch_input.part-{part_index:03d}.jsonl"
+        with open(input_path, "wb") as f:
+            f.writelines(lines)
+        print(f"  Batch 입력 저장: {input_path} ({len(lines)}건)")
+
+        with open(input_path, "rb") as f:
+            uploaded_file = client.files.create(file=f, purpose="batch")
+        batch = client.batches.create(
+            input_file_id=uploaded_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+            metadata={"description": f"Function calling 평가 추론 ({model_name}, {part_index + 1}/{len(parts)})"},
+        )
+        print(f"  배치 ID: {batch.id} (파일 ID: {uploaded_file.id})")
+        batches.append(batch)
+        _write_status(status_path, batches)
+
+    # 모든 배치가 끝날 때까지 폴링
+    while any(batch.status not in _TERMINAL_STATUSES for batch in batches):
+        time.sleep(poll_interval)
+        for part_index, batch in enumerate(batches):
+            if batch.status in _TERMINAL_STATUSES:
+                continue
+            batch = batches[part_index] = client.batches.retrieve(batch.id)
+            counts = batch.request_counts
+            print(f"  [{part_index + 1}/{len(batches)}] 상태: {batch.status} | "
+                  f"완료: {counts.completed}/{counts.total} | 실패: {counts.failed}")
+    _write_status(status_path, batches)
+
+    # 결과 파일이 있는 배치(만료·취소된 배치의 부분 결과 포함)를 모두 읽는다
+    outputs: dict[str, str] = {}
+    errors: list[dict] = []
+    reasons: dict[str, str] = {}
+    usages: dict[str, tuple[int, int]] = {}
+    for batch in batches:
+        if batch.status != "completed":
+            errors.append({"batch_id": batch.id, "error": f"배치가 완료되지 않았습니다 (상태: {batch.status})"})
+        if batch.output_file_id:
+            batch_outputs, batch_errors = parse_batch_output(
+                client.files.content(batch.output_file_id).text, finish_reasons=reasons, token_counts=usages
+            )
+            outputs.update(batch_outputs)
+            errors.extend(batch_errors)
+        if batch.error_file_id:
+            _, request_errors = parse_batch_output(client.files.content(batch.error_file_id).text)
+            errors.extend(request_errors)
+
+    # custom_id → 원래 입력 순서로 매핑
+    index_by_key = {input_key(inp): index for index, inp in enumerate(inference_inputs)}
+    predictions: list[str | None] = [None] * len(inference_inputs)
+    for custom_id, prediction in outputs.items():
+        index = index_by_key.get(parse_custom_id(custom_id))
+        if index is None:
+            continue
+        predictions[index] = prediction
+        if finish_reasons is not None:
+            finish_reasons[index] = reasons.get(custom_id, "")
+        if token_counts is not None and custom_id in usages:
+            token_counts[index] = usages[custom_id]
+        if on_result is not None:
+            on_result(index, prediction)
+
+    missing = [make_custom_id(inp) for inp, pred in zip(inference_inputs, predictions) if pred is None]
+    if missing:
+        error_path = work_dir / "batch_errors.json"
+        with open(error_path, "w", encoding="utf-8") as f:
+            json.dump(errors, f, ensure_ascii=False, indent=2)
+        incomplete = [f"{batch.id}({batch.status})" for batch in batches if batch.status != "completed"]
+        raise RuntimeError(
+            f"배치 결과 중 {len(missing)}개 step이 누락되었습니다 (예: {missing[:3]}"
+            + (f", 미완료 배치: {incomplete}" if incomplete else "")
+            + f"). 에러 로그: {error_path} — --resume으로 누락분만 다시 제출할 수 있습니다."
+        )
+
+    return predictions
@@ -16,65 +16,265 @@ GT 히스토리 기반 싱글턴 분할 → OpenAI API 추론 → 메트릭 계
         --dataset eval_data/dataset.jsonl \
         --output eval_output_api \
         --inference-only
+
+    # 비동기 동시 요청 (최대 16개 in-flight, 429 시 AIMD로 자동 감속)
+    python -m evaluations.api_runner \
+        --model gpt-4o \
+        --dataset eval_data/dataset.jsonl \
+        --output eval_output_api \
+        --concurrency 16
+
+    # 예측 캐시 사용 (동일 모델·messages·샘플링 조건의 step은 재요청하지 않음)
+    python -m evaluations.api_runner \
+        --model gpt-4o \
+        --dataset eval_data/dataset.jsonl \
+        --output eval_output_api \
+        --cache eval_cache/predictions.sqlite
+
+    # 중단된 실행 이어서 수행 (predictions.partial.jsonl의 완료 step은 건너뜀)
+    python -m evaluations.api_runner \
+        --model gpt-4o \
+        --dataset eval_data/dataset.jsonl \
+        --output eval_output_api \
+        --resume
+
+    # Batch API 모드 (비용 약 50%, client 측 rate limit 없음, 완료까지 폴링)
+    python -m evaluations.api_runner \
+        --model gpt-4o \
+        --dataset eval_data/dataset.jsonl \
+        --output eval_output_api \
+        --mode batch
+
+    # step 유형별 토큰 예산 (GT 길이 × margin, 예산 도달 수는 eval_results.json에 기록)
+    python -m evaluations.api_runner \
+        --model gpt-4o \
+        --dataset eval_data/dataset.jsonl \
+        --output eval_output_api \
+        --decoding-policy
+
+    # API 키별로 샤드를 나눠 실행 후 합쳐서 스코어링 (evaluations.merge)
+    OPENAI_API_KEY=... python -m evaluations.api_runner \
+        --model gpt-4o \
+        --dataset eval_data/dataset.jsonl \
+        --output eval_output_api \
+        --num-shards 2 --shard-id 0
+
+    # 스트리밍으로 요청해 step별 TTFT / </tool_call> 도달 / 전체 지연 시간 기록 (evaluations.latency)
+    python -m evaluations.api_runner \
+        --model gpt-4o \
+        --dataset eval_data/dataset.jsonl \
+        --output eval_output_api \
+        --stream-latency
+
+OPENAI_BASE_URL 환경변수로 엔드포인트를 바꾸면 로컬 stub 서버(evaluations.api_stub 등)에 대해서도 실행할 수 있다.
 """
 
 import argparse
-import json
-import os
+import asyncio
+import re
 import time
 from pathlib import Path
+from typing import Callable
 
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, OpenAI, RateLimitError
 from tqdm import tqdm
 
-load_dotenv()
+from evaluations.api_batch import run_batch_inference
+from evaluations.latency import StreamTimer
+from evaluations.pipeline import run_pipeline
+from evaluations.prediction_cache import make_cache_key
 
+load_dotenv()
 
-def _load_conversations(dataset_path: str) -> list[dict]:
-    """JSONL 파일 또는 HuggingFace 데이터셋 ID에서 대화 목록을 로드한다."""
-    if os.path.exists(dataset_path):
-        with open(dataset_path, encoding="utf-8") as f:
-            return [json.loads(line) for line in f if line.strip()]
-    else:
-        from datasets import load_dataset
-        ds = load_dataset(dataset_path, split="test")
-        return list(ds)
 
+class OpenAIBackend:
+    """
+    OpenAI chat completions InferenceBackend (evaluations.backends).
+
+    mode="batch"이면 Batch API로 제출 후 폴링, concurrency가 2 이상이면 AsyncOpenAI 동시 요청,
+    그 외에는 동기 클라이언트로 순차 요청한다.
+    API는 일치한 stop 문자열을 응답에서 잘라내므로 유형별 stop sequence는 적용하지 않고(supports_stop=False)
+    디코딩 정책의 step별 토큰 예산만 max_tokens로 사용한다.
+    stream_latency=True이면 stream=True로 요청해 step별 지연 시간(evaluations.latency)을 latencies에 기록한다
+    (Batch API는 스트리밍을 지원하지 않는다).
+    """
 
-def _run_api_inference(
+    name = "openai"
+    supports_token_ids = False
+    supports_lora = False
+    supports_logprobs = False
+    supports_streaming = True
+    supports_stop = False
+
+    def __init__(
+        self,
+        model_name: str,
+        mode: str = "sync",
+        concurrency: int | None = None,
+        batch_dir: Path | None = None,
+        poll_interval: int = 60,
+        stream_latency: bool = False,
+    ):
+        if stream_latency and mode == "batch":
+            raise ValueError("--stream-latency는 Batch API 모드(--mode batch)와 함께 사용할 수 없습니다")
+        self.model_name = model_name
+        self.mode = mode
+        self.concurrency = concurrency
+        self.batch_dir = batch_dir
+        self.poll_interval = poll_interval
+        self.stream_latency = stream_latency
+
+    def token_counter(self) -> Callable[[str], int] | None:
+        # API 모델의 토크나이저는 알 수 없으므로 UTF-8 바이트 수(토큰 수 상한)로 센다
+        return None
+
+    def prepare(self, inference_inputs, pending, budgets, inference_stats) -> list[int]:
+        return []
+
+    def cache_keys(self, inference_inputs, budgets, stops) -> list[str]:
+        return [
+            make_cache_key(
+                backend=self.name,
+                model=self.model_name,
+                prompt=inp.messages,
+                max_new_tokens=budget,
+                temperature=0.0,
+            )
+            for inp, budget in zip(inference_inputs, budgets)
+        ]
+
+    def generate(
+        self,
+        inference_inputs,
+        budgets,
+        stops=None,
+        on_result=None,
+        finish_reasons=None,
+        inference_stats=None,
+        token_counts=None,
+        latencies=None,
+    ) -> list[str]:
+        if self.mode == "batch":
+            return run_batch_inference(
+                inference_inputs,
+                self.model_name,
+                work_dir=self.batch_dir or Path("batch"),
+                max_new_tokens=budgets,
+                poll_interval=self.poll_interval,
+                on_result=on_result,
+                finish_reasons=finish_reasons,
+                token_counts=token_counts,
+            )
+        if not self.stream_latency:
+            latencies = None
+        if self.concurrency is not None and self.concurrency > 1:
+            return asyncio.run(_run_api_inference_async(
+                inference_inputs, self.model_name, budgets, concurrency=self.concurrency,
+                on_result=on_result, finish_reasons=finish_reasons, token_counts=token_counts,
+                stream=self.stream_latency, latencies=latencies, inference_stats=inference_stats,
+            ))
+        return _generate_sequential(
+            inference_inputs, self.model_name, budgets, on_result=on_result, finish_reasons=finish_reasons,
+            token_counts=token_counts, stream=self.stream_latency, latencies=latencies,
+        )
+
+
+def _step_budgets(max_new_tokens: int | list[int], count: int) -> list[int]:
+    """max_new_tokens를 step별 예산 리스트로 맞춘다 (정수면 모든 step 공통)."""
+    if isinstance(max_new_tokens, list):
+        return max_new_tokens
+    return [max_new_tokens] * count
+
+
+def _usage_counts(usage) -> tuple[int, int] | None:
+    """chat completions 응답 usage의 (prompt 토큰 수, completion 토큰 수). usage가 없으면 None."""
+    if usage is None:
+        return None
+    return getattr(usage, "prompt_tokens", None) or 0, getattr(usage, "completion_tokens", None) or 0
+
+
+# 스트리밍 요청 인자 (마지막 chunk에 usage를 받아 토큰 수를 기록한다)
+_STREAM_KWARGS = {"stream": True, "stream_options": {"include_usage": True}}
+
+
+def _read_chunk(chunk, timer: StreamTimer) -> tuple[str | None, object]:
+    """스트림 chunk 하나를 타이머에 반영하고 (finish_reason, usage)를 반환한다 (없으면 None)."""
+    finish_reason = None
+    if chunk.choices:
+        choice = chunk.choices[0]
+        timer.on_text(getattr(choice.delta, "content", None) or "")
+        finish_reason = choice.finish_reason
+    return finish_reason, getattr(chunk, "usage", None)
+
+
+def _consume_stream(stream, timer: StreamTimer) -> tuple[str, str, object]:
+    """동기 스트림을 끝까지 읽어 (응답 텍스트, finish_reason, usage)를 반환한다."""
+    finish_reason, usage = "", None
+    for chunk in stream:
+        chunk_reason, chunk_usage = _read_chunk(chunk, timer)
+        finish_reason = chunk_reason or finish_reason
+        usage = chunk_usage or usage
+    return timer.text, finish_reason, usage
+
+
+async def _consume_stream_async(stream, timer: StreamTimer) -> tuple[str, str, object]:
+    """비동기 스트림을 끝까지 읽어 (응답 텍스트, finish_reason, usage)를 반환한다."""
+    finish_reason, usage = "", None
+    async for chunk in stream:
+        chunk_reason, chunk_usage = _read_chunk(chunk, timer)
+        finish_reason = chunk_reason or finish_reason
+        usage = chunk_usage or usage
+    return timer.text, finish_reason, usage
+
+
+def _generate_sequential(
     inference_inputs: list,
     model_name: str,
-    max_new_tokens: int = 512,
+    max_new_tokens: int | list[int],
+    on_result: Callable[[int, str], None] | None = None,
+    finish_reasons: dict[int, str] | None = None,
+    token_counts: dict[int, tuple[int, int]] | None = None,
+    stream: bool = False,
+    latencies: dict[int, dict] | None = None,
 ) -> list[str]:
     """
-    OpenAI API를 사용해 순차 추론을 수행한다.
+    동기 OpenAI 클라이언트로 한 건씩 순차 추론한다 (max_new_tokens가 리스트면 step별 예산).
 
-    Parameters
-    ----------
-    inference_inputs : InferenceInput 리스트
-    model_name : OpenAI 모델명 (gpt-4o, gpt-4o-mini 등)
-    max_new_tokens : 최대 생성 토큰 수
-
-    Returns
-    -------
-    생성된 텍스트 리스트
+    stream=True이면 스트리밍으로 받아 latencies에 {인덱스: {"ttft", "tool_call", "total"}}를 기록한다.
     """
     client = OpenAI()
+    budgets = _step_budgets(max_new_tokens, len(inference_inputs))
     predictions = []
     max_retries = 5
 
-    for inp in tqdm(inference_inputs, desc="API 추론"):
+    for index, inp in enumerate(tqdm(inference_inputs, desc="API 추론")):
         for attempt in range(max_retries):
             try:
+                timer = StreamTimer()
                 response = client.chat.completions.create(
                     model=model_name,
                     messages=inp.messages,
                     temperature=0.0,
-                    max_tokens=max_new_tokens,
+                    max_tokens=budgets[index],
+                    **(_STREAM_KWARGS if stream else {}),
                 )
-                prediction = response.choices[0].message.content or ""
+                if stream:
+                    prediction, finish_reason, usage = _consume_stream(response, timer)
+                else:
+                    prediction = response.choices[0].message.content or ""
+                    finish_reason = response.choices[0].finish_reason or ""
+                    usage = getattr(response, "usage", None)
                 predictions.append(prediction)
+                if finish_reasons is not None:
+                    finish_reasons[index] = finish_reason
+                counts = _usage_counts(usage)
+                if token_counts is not None and counts is not None:
+                    token_counts[index] = counts
+                if stream and latencies is not None:
+                    latencies[index] = timer.finish()
+                if on_result is not None:
+                    on_result(index, prediction)
                 break
             except Exception as e:
                 if "rate_limit" in str(e).lower() or "429" in str(e):
@@ -87,16 +287,212 @@ def _run_api_inference(
     return predictions
 
 
-def _save_predictions(records: list[dict], output_dir: Path) -> Path:
-    """predictions.jsonl 저장."""
-    output_dir.mkdir(parents=True, exist_ok=True)
-    pred_path = output_dir / "predictions.jsonl"
+_RESET_PART_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_RESET_UNIT_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
 
-    with open(pred_path, "w", encoding="utf-8") as f:
-        for record in records:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
 
-    return pred_path
+def _parse_reset_seconds(value: str | None) -> float | None:
+    """'1s', '6m0s', '20ms' 형태의 rate limit reset 헤더 값을 초 단위로 변환한다."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _RESET_PART_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(num) * _RESET_UNIT_SECONDS[unit] for num, unit in parts)
+
+
+class _AIMDRateController:
+    """
+    동시 요청 상한을 AIMD(Additive Increase / Multiplicative Decrease)로 조절한다.
+
+    - 성공 1회마다 상한을 1/limit 만큼 증가 (상한 크기만큼 성공하면 +1)
+    - 429 응답 시 상한을 decrease_factor 배로 감소
+      (직전 감소 이전에 시작된 요청의 429는 같은 혼잡으로 보고 중복 감소하지 않음)
+    - retry-after / x-ratelimit-* 헤더가 있으면 reset 시점까지 새 요청 시작을 보류
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        decrease_factor: float = 0.5,
+    ):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.decrease_factor = decrease_factor
+        self.limit = float(max_limit)
+        self.rate_limit_hits = 0
+
+        self._in_flight = 0
+        self._pause_until = 0.0
+        self._last_decrease = float("-inf")
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> float:
+        """슬롯을 확보하고 요청 시작 시각(monotonic)을 반환한다."""
+        async with self._cond:
+            await self._cond.wait_for(
+                lambda: self._in_flight < max(int(self.limit), self.min_limit)
+            )
+            self._in_flight += 1
+        delay = self._pause_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return time.monotonic()
+
+    async def release(self) -> None:
+        async with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _pause(self, seconds: float) -> None:
+        self._pause_until = max(self._pause_until, time.monotonic() + seconds)
+
+    def on_success(self, headers) -> None:
+        self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        if remaining is not None and remaining.isdigit() and int(remaining) <= self._in_flight:
+            reset = _parse_reset_seconds(headers.get("x-ratelimit-reset-requests"))
+            if reset:
+                self._pause(reset)
+
+    def on_rate_limit(self, headers, attempt: int, started_at: float) -> float:
+        """429 응답을 반영하고 재시도 전 대기 시간(초)을 반환한다."""
+        self.rate_limit_hits += 1
+        if started_at >= self._last_decrease:
+            self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+            self._last_decrease = time.monotonic()
+
+        wait = _parse_reset_seconds(headers.get("retry-after"))
+        if wait is None:
+            wait = _parse_reset_seconds(headers.get("x-ratelimit-reset-requests"))
+        if wait is None:
+            wait = float(2 ** attempt)
+        self._pause(wait)
+        return wait
+
+
+# 429 외에 재시도하는 일시적 오류 (APITimeoutError는 APIConnectionError의 하위 클래스)
+_TRANSIENT_ERRORS = (APIConnectionError, InternalServerError)
+
+
+async def _run_api_inference_async(
+    inference_inputs: list,
+    model_name: str,
+    max_new_tokens: int | list[int] = 512,
+    concurrency: int = 8,
+    on_result: Callable[[int, str], None] | None = None,
+    finish_reasons: dict[int, str] | None = None,
+    token_counts: dict[int, tuple[int, int]] | None = None,
+    stream: bool = False,
+    latencies: dict[int, dict] | None = None,
+    inference_stats: dict | None = None,
+) -> list[str]:
+    """
+    AsyncOpenAI로 최대 concurrency개 요청을 동시에 보내 추론한다.
+
+    BoundedSemaphore가 in-flight 요청 수의 상한을, _AIMDRateController가
+    429 / rate limit 헤더에 따른 실제 동시성을 조절한다.
+    결과는 inference_inputs와 같은 순서로 반환한다.
+    max_new_tokens가 리스트면 step별 예산으로 보고, finish_reasons에는 {인덱스: finish_reason}을,
+    token_counts에는 응답 usage의 {인덱스: (prompt 토큰 수, completion 토큰 수)}를 기록한다.
+    stream=True이면 스트리밍으로 받아 latencies에 {인덱스: {"ttft", "tool_call", "total"}}를 기록한다
+    (요청 시작 시각은 동시성 슬롯을 확보한 뒤 기준이므로 concurrency가 클수록 서버 측 대기가 섞인다).
+
+    SDK 내부 재시도는 끄고 직접 재시도한다. 429는 controller에 반영해 동시성을 줄이고,
+    연결 오류 / 타임아웃 / 5xx는 동시성은 그대로 두고 지수 백오프 후 재시도한다.
+    inference_stats가 주어지면 {"rate_limit": {"hits", "transient_retries", "final_limit"}}를 기록한다.
+    """
+    budgets = _step_budgets(max_new_tokens, len(inference_inputs))
+    client = AsyncOpenAI(max_retries=0)
+    semaphore = asyncio.BoundedSemaphore(concurrency)
+    controller = _AIMDRateController(max_limit=concurrency)
+    predictions: list[str | None] = [None] * len(inference_inputs)
+    max_retries = 5
+    transient_retries = 0
+    progress = tqdm(total=len(inference_inputs), desc=f"API 추론 (concurrency={concurrency})")
+
+    async def _infer(index: int, inp) -> None:
+        nonlocal transient_retries
+        async with semaphore:
+            backoff = 0.0
+            for attempt in range(max_retries):
+                if backoff:
+                    # 일시적 오류 백오프는 controller 슬롯을 반납한 뒤 기다린다
+                    await asyncio.sleep(backoff)
+                    backoff = 0.0
+                started_at = await controller.acquire()
+                timer = StreamTimer()
+                try:
+                    raw = await client.chat.completions.with_raw_response.create(
+                        model=model_name,
+                        messages=inp.messages,
+                        temperature=0.0,
+                        max_tokens=budgets[index],
+                        **(_STREAM_KWARGS if stream else {}),
+                    )
+                except RateLimitError as e:
+                    wait = controller.on_rate_limit(e.response.headers, attempt, started_at)
+                    tqdm.write(
+                        f"  Rate limit 도달, 동시성 {controller.limit:.1f}로 감소, "
+                        f"{wait:.1f}초 대기 후 재시도..."
+                    )
+                    if attempt == max_retries - 1:
+                        raise
+                    continue
+                except _TRANSIENT_ERRORS as e:
+                    if attempt == max_retries - 1:
+                        raise
+                    transient_retries += 1
+                    backoff = float(2 ** attempt)
+                    tqdm.write(f"  {type(e).__name__}: {e}, {backoff:.0f}초 대기 후 재시도...")
+                    continue
+                finally:
+                    await controller.release()
+
+                controller.on_success(raw.headers)
+                response = raw.parse()
+                if stream:
+                    predictions[index], finish_reason, usage = await _consume_stream_async(response, timer)
+                else:
+                    predictions[index] = response.choices[0].message.content or ""
+                    finish_reason = response.choices[0].finish_reason or ""
+                    usage = getattr(response, "usage", None)
+                if finish_reasons is not None:
+                    finish_reasons[index] = finish_reason
+                counts = _usage_counts(usage)
+                if token_counts is not None and counts is not None:
+                    token_counts[index] = counts
+                if stream and latencies is not None:
+                    latencies[index] = timer.finish()
+                if on_result is not None:
+                    on_result(index, predictions[index])
+                progress.update(1)
+                return
+
+    try:
+        await asyncio.gather(*(_infer(i, inp) for i, inp in enumerate(inference_inputs)))
+    finally:
+        progress.close()
+        await client.close()
+
+    if controller.rate_limit_hits:
+        print(f"  Rate limit 응답: {controller.rate_limit_hits}회 (최종 동시성 {controller.limit:.1f})")
+    if transient_retries:
+        print(f"  일시적 오류 재시도: {transient_retries}회")
+    if inference_stats is not None:
+        inference_stats["rate_limit"] = {
+            "hits": controller.rate_limit_hits,
+            "transient_retries": transient_retries,
+            "final_limit": round(controller.limit, 2),
+        }
+    return predictions
 
 
 def run_evaluation(
@@ -105,66 +501,59 @@ def run_evaluation(
     output_dir: str,
     max_new_tokens: int = 512,
     inference_only: bool = False,
+    concurrency: int | None = None,
+    cache_path: str | None = None,
+    resume: bool = False,
+    mode: str = "sync",
+    poll_interval: int = 60,
+    decoding_policy: bool = False,
+    budget_margin: float = 1.5,
+    num_shards: int = 1,
+    shard_id: int = 0,
+    stream_latency: bool = False,
 ) -> None:
     """
-    OpenAI API 기반 전체 평가 파이프라인 실행.
+    OpenAI API 기반 전체 평가 파이프라인 실행 (OpenAIBackend로 evaluations.pipeline.run_pipeline 호출).
 
     1. 데이터 로드 → 싱글턴 분할
-    2. OpenAI API 추론
-    3. predictions.jsonl 저장
+    2. OpenAI API 추론 (concurrency 지정 시 비동기 동시 요청, mode="batch"이면 Batch API,
+       완료 step은 predictions.partial.jsonl에 즉시 기록)
+    3. 정렬·중복 제거한 predictions.jsonl 저장
     4. 메트릭 계산 + 결과 저장 (inference_only=True이면 생략)
-    """
-    from evaluations.turn_splitter import split_conversations
-    from evaluations.preprocessing import extract_tool_schemas
-    from evaluations.scorer import score_predictions
-
-    output_path = Path(output_dir)
-
-    # 1. 데이터 로드 및 싱글턴 분할
-    print(f"[1/4] 데이터셋 로드: {dataset_path}")
-    conversations = _load_conversations(dataset_path)
-    print(f"  총 대화 수: {len(conversations)}")
-
-    inference_inputs = split_conversations(conversations)
-    print(f"  총 InferenceInput 수: {len(inference_inputs)}")
-
-    # 2. OpenAI API 추론
-    print(f"[2/4] OpenAI API 추론 시작: {model_name}")
-    predictions = _run_api_inference(inference_inputs, model_name, max_new_tokens)
-    print(f"  추론 완료: {len(predictions)}개 예측")
-
-    # 3. 예측 저장
-    records = [
-        {
-            "conversation_id": inp.conversation_id,
-            "turn_index": inp.turn_index,
-            "step_index": inp.step_index,
-            "is_tool_call": inp.is_tool_call,
-            "gt_response": inp.gt_response,
-            "prediction": pred,
-        }
-        for inp, pred in zip(inference_inputs, predictions)
-    ]
-    pred_path = _save_predictions(records, output_path)
-    print(f"[3/4] 예측 저장: {pred_path}")
 
-    if inference_only:
-        print("--inference-only 지정: 스코어링 생략")
-        return
+    decoding_policy=True이면 GT 길이 × budget_margin으로 정한 step 유형별 토큰 예산으로 요청한다.
+    API 모델의 토크나이저는 알 수 없으므로 길이는 UTF-8 바이트 수(토큰 수 상한)로 센다.
+    예산에 걸려 잘린 step은 relevance / format 판정이 정책 없이 요청한 경우와 달라질 수 있으므로
+    eval_results.json inference.decoding.budget_hits에 step 키를 기록한다.
 
-    # 4. 메트릭 계산
-    print("[4/4] 메트릭 계산")
+    num_shards > 1이면 conversation_id 해시로 나눈 shard_id 샤드만 추론하고 샤드 predictions 파일만
+    저장한다 (API 키·머신별로 나눠 실행한 뒤 evaluations.merge로 합쳐 스코어링).
 
-    tool_schemas = None
-    if conversations and conversations[0].get("tools"):
-        tool_schemas = extract_tool_schemas(conversations[0]["tools"])
-
-    score_predictions(
-        records=records,
-        tool_schemas=tool_schemas,
-        output_dir=output_path,
-        model_name=model_name,
-        dataset_name=dataset_path,
+    stream_latency=True이면 스트리밍으로 요청해 step별 TTFT / </tool_call> 도달 / 전체 지연 시간을
+    predictions.jsonl의 latency 필드에 기록하고, 스코어링 시 분위수 요약을 eval_results.json에 남긴다.
+    """
+    # 같은 output 디렉토리를 공유하는 샤드끼리 Batch 입력·상태 파일이 겹치지 않게 한다
+    batch_dirname = "batch" if num_shards == 1 else f"batch.shard-{shard_id:05d}-of-{num_shards:05d}"
+    backend = OpenAIBackend(
+        model_name,
+        mode=mode,
+        concurrency=concurrency,
+        batch_dir=Path(output_dir) / batch_dirname,
+        poll_interval=poll_interval,
+        stream_latency=stream_latency,
+    )
+    run_pipeline(
+        backend,
+        dataset_path,
+        output_dir,
+        max_new_tokens=max_new_tokens,
+        inference_only=inference_only,
+        cache_path=cache_path,
+        resume=resume,
+        decoding_policy=decoding_policy,
+        budget_margin=budget_margin,
+        num_shards=num_shards,
+        shard_id=shard_id,
     )
 
 
@@ -198,7 +587,65 @@ def main():
         action="store_true",
         help="predictions.jsonl 저장까지만 수행하고 스코어링 생략",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="최대 동시 요청 수 (지정하면 AsyncOpenAI + AIMD rate 제어로 병렬 추론)",
+    )
+    parser.add_argument(
+        "--cache",
+        default=None,
+        help="예측 캐시 SQLite 경로 (지정하면 동일 조건의 step은 재요청하지 않음)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="output 디렉토리의 predictions.partial.jsonl에 기록된 step을 건너뛰고 이어서 추론",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["sync", "batch"],
+        default="sync",
+        help="sync: chat completions 직접 호출 / batch: OpenAI Batch API 제출 후 폴링",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=int,
+        default=60,
+        help="batch 모드 폴링 간격 (초, 기본값: 60)",
+    )
+    parser.add_argument(
+        "--decoding-policy",
+        action="store_true",
+        help="GT 길이 기반 step 유형별 토큰 예산으로 요청 (예산에 걸린 step은 판정이 바뀔 수 있어 결과에 step 키를 기록)",
+    )
+    parser.add_argument(
+        "--budget-margin",
+        type=float,
+        default=1.5,
+        help="--decoding-policy 토큰 예산의 안전 계수 (GT 유형별 최대 길이 × margin, 기본값: 1.5)",
+    )
+    parser.add_argument(
+        "--num-shards",
+        type=int,
+        default=1,
+        help="eval 세트를 conversation_id 해시로 나눌 샤드 수 (샤드별 예측은 evaluations.merge로 합침)",
+    )
+    parser.add_argument(
+        "--shard-id",
+        type=int,
+        default=0,
+        help="이 프로세스가 추론할 샤드 번호 (0 ~ num_shards-1)",
+    )
+    parser.add_argument(
+        "--stream-latency",
+        action="store_true",
+        help="스트리밍으로 요청해 step별 TTFT / </tool_call> 도달 / 전체 지연 시간 기록 (sync 모드 전용)",
+    )
     args = parser.parse_args()
+    if args.stream_latency and args.mode == "batch":
+        parser.error("--stream-latency는 Batch API 모드(--mode batch)와 함께 사용할 수 없습니다")
 
     run_evaluation(
         model_name=args.model,
@@ -206,6 +653,16 @@ def main():
         output_dir=args.output,
         max_new_tokens=args.max_new_tokens,
         inference_only=args.inference_only,
+        concurrency=args.concurrency,
+        cache_path=args.cache,
+        resume=args.resume,
+        mode=args.mode,
+        poll_interval=args.poll_interval,
+        decoding_policy=args.decoding_policy,
+        budget_margin=args.budget_margin,
+        num_shards=args.num_shards,
+        shard_id=args.shard_id,
+        stream_latency=args.stream_latency,
     )
 
 
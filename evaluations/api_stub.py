@@ -0,0 +1,558 @@
+"""
+OpenAI chat completions 호환 로컬 stub 서버 (지연 시간 주입).
+
+api_runner를 OPENAI_BASE_URL로 이 서버에 붙이면 API 비용 없이 스트리밍 지연 측정
+(--stream-latency)과 동시 요청 경로를 확인할 수 있다. 응답 텍스트는 --dataset의 GT 응답을
+(요청 messages가 같은 step) 그대로 돌려주고, 없으면 --default-response를 돌려준다.
+
+응답은 --chunk-chars 글자씩 나눈 chunk를 토큰으로 보고 아래 지연을 넣어 보낸다.
+  첫 chunk 전    : --ttft 초
+  chunk 사이     : --token-delay 초
+  --jitter       : 각 지연에 곱하는 (1 ± jitter) 균등 난수 (--seed로 고정)
+max_tokens를 넘는 chunk는 보내지 않고 finish_reason을 "length"로 둔다.
+
+rate limit / 서버 오류도 주입할 수 있다 (api_runner --concurrency의 AIMD 제어·재시도 확인용).
+  --requests-per-window : --window 초 고정 창당 허용 요청 수. 넘으면 429, 성공 응답에는
+                          x-ratelimit-limit-requests / remaining-requests / reset-requests 헤더
+  --rate-limit-prob     : 창과 무관하게 요청을 429로 거절할 확률
+  --retry-after         : 429 응답의 retry-after 헤더 값 (초, 없으면 헤더 생략)
+  --error-prob          : 500 응답을 돌려줄 확률
+
+Batch API(api_runner --mode batch)도 흉내 낸다. 업로드한 입력 파일은 배치 생성 시 바로 처리하고
+(요청 라인마다 위 429 / 500 주입 적용, 결과 파일은 입력과 다른 순서), retrieve를 --batch-polls번
+받은 뒤 completed가 된다. --batch-max-requests를 넘는 입력 파일은 배치 생성을 400으로 거절한다.
+
+API:
+  POST /v1/chat/completions   stream=true면 SSE chunk, 아니면 한 번에 응답
+                              (stream_options.include_usage면 마지막에 usage chunk)
+  POST /v1/files              multipart 업로드 (purpose=batch)
+  GET  /v1/files/{id}/content
+  POST /v1/batches
+  GET  /v1/batches/{id}
+  GET  /health
+
+실행:
+    python -m evaluations.api_stub --dataset eval_data/dataset.jsonl \\
+        --port 8766 --ttft 0.2 --token-delay 0.01
+
+    # 1초에 20건까지 허용, 넘으면 retry-after: 0.5 와 함께 429
+    python -m evaluations.api_stub --dataset eval_data/dataset.jsonl \\
+        --port 8766 --ttft 0.05 --requests-per-window 20 --window 1 --retry-after 0.5
+
+    OPENAI_BASE_URL=http://127.0.0.1:8766/v1 OPENAI_API_KEY=stub python -m evaluations.api_runner \\
+        --model stub --dataset eval_data/dataset.jsonl --output eval_output_stub --stream-latency
+"""
+
+import argparse
+import email.parser
+import email.policy
+import http.server
+import json
+import random
+import threading
+import time
+import uuid
+
+
+def _messages_key(messages: list[dict]) -> str:
+    return json.dumps(
+        [{"role": m.get("role"), "content": m.get("content")} for m in messages],
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+
+
+def load_responses(dataset_path: str) -> dict[str, str]:
+    """데이터셋을 싱글턴 분할해 {messages 키: GT 응답}을 만든다."""
+    from evaluations.pipeline import load_conversations
+    from evaluations.turn_splitter import split_conversations
+
+    return {
+        _messages_key(inp.messages): inp.gt_response
+        for inp in split_conversations(load_conversations(dataset_path))
+    }
+
+
+class StubResponder:
+    """요청 messages → 응답 chunk와 지연 시간을 정한다 (서버 스레드 간 공유)."""
+
+    def __init__(
+        self,
+        responses: dict[str, str] | None = None,
+        default_response: str = "",
+        ttft: float = 0.0,
+        token_delay: float = 0.0,
+        jitter: float = 0.0,
+        chunk_chars: int = 4,
+        seed: int = 42,
+        requests_per_window: int | None = None,
+        window: float = 1.0,
+        rate_limit_prob: float = 0.0,
+        retry_after: float | None = None,
+        error_prob: float = 0.0,
+    ):
+        self.responses = responses or {}
+        self.default_response = default_response
+        self.ttft = ttft
+        self.token_delay = token_delay
+        self.jitter = jitter
+        self.chunk_chars = chunk_chars
+        self.requests_per_window = requests_per_window
+        self.window = window
+        self.rate_limit_prob = rate_limit_prob
+        self.retry_after = retry_after
+        self.error_prob = error_prob
+        # 응답 상태별 요청 수 (/health에도 표시)
+        self.served = 0
+        self.rate_limited = 0
+        self.server_errors = 0
+        self._window_end = 0.0
+        self._window_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def admit(self) -> tuple[int, dict[str, str]]:
+        """요청 하나의 (HTTP 상태, 추가 응답 헤더)를 정한다 (200 / 429 / 500)."""
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._window_end:
+                self._window_end = now + self.window
+                self._window_count = 0
+            if self._random.random() < self.error_prob:
+                self.server_errors += 1
+                return 500, {}
+
+            limited = self._random.random() < self.rate_limit_prob
+            if self.requests_per_window is not None and self._window_count >= self.requests_per_window:
+                limited = True
+            if not limited:
+                self._window_count += 1
+
+            headers = {}
+            if self.requests_per_window is not None:
+                headers["x-ratelimit-limit-requests"] = str(self.requests_per_window)
+                headers["x-ratelimit-remaining-requests"] = str(
+                    max(self.requests_per_window - self._window_count, 0)
+                )
+                headers["x-ratelimit-reset-requests"] = f"{self._window_end - now:.3f}s"
+            if limited:
+                self.rate_limited += 1
+                if self.retry_after is not None:
+                    headers["retry-after"] = f"{self.retry_after:g}"
+                return 429, headers
+            self.served += 1
+            return 200, headers
+
+    def counters(self) -> dict[str, int]:
+        return {"served": self.served, "rate_limited": self.rate_limited, "server_errors": self.server_errors}
+
+    def chunks(self, messages: list[dict], max_tokens: int | None) -> tuple[list[str], str]:
+        """(보낼 chunk 리스트, finish_reason)."""
+        text = self.responses.get(_messages_key(messages), self.default_response)
+        chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        if max_tokens is not None and len(chunks) > max_tokens:
+            return chunks[:max_tokens], "length"
+        return chunks, "stop"
+
+    def usage(self, messages: list[dict], chunks: list[str]) -> dict[str, int]:
+        """chunk 하나를 토큰 하나로 센 usage."""
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // self.chunk_chars
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(chunks),
+            "total_tokens": prompt_tokens + len(chunks),
+        }
+
+    def delay(self, seconds: float) -> float:
+        if seconds <= 0:
+            return 0.0
+        with self._lock:
+            factor = 1.0 + self._random.uniform(-self.jitter, self.jitter)
+        return seconds * max(factor, 0.0)
+
+
+def _completion(completion_id: str, model: str, chunks: list[str], finish_reason: str, usage: dict) -> dict:
+    """비스트리밍 chat.completion 응답 본문."""
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "".join(chunks)},
+            "finish_reason": finish_reason,
+        }],
+        "usage": usage,
+    }
+
+
+def _error_body(status: int) -> dict:
+    """주입한 429 / 500 응답 본문."""
+    if status == 429:
+        return {"error": {
+            "message": "Rate limit reached for requests (stub)",
+            "type": "requests",
+            "code": "rate_limit_exceeded",
+        }}
+    return {"error": {"message": "injected server error (stub)", "type": "server_error"}}
+
+
+class StubBatchStore:
+    """
+    Files / Batches API 상태 (서버 스레드 간 공유).
+
+    배치 생성 시 입력 파일의 요청을 responder로 바로 처리해 결과·에러 파일을 만들어 두고,
+    retrieve를 polls번 받으면 completed로 바꾼다.
+    """
+
+    def __init__(self, responder: StubResponder, polls: int = 1, max_requests: int | None = None):
+        self.responder = responder
+        self.polls = polls
+        self.max_requests = max_requests
+        self.files: dict[str, dict] = {}
+        self.batches: dict[str, dict] = {}
+        self._remaining_polls: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add_file(self, filename: str, content: bytes, purpose: str) -> dict:
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        file_object = {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+        with self._lock:
+            self.files[file_id] = {**file_object, "content": content}
+        return file_object
+
+    def file_content(self, file_id: str) -> bytes | None:
+        with self._lock:
+            file = self.files.get(file_id)
+        return None if file is None else file["content"]
+
+    def _run_request(self, request: dict) -> tuple[bool, dict]:
+        """Batch 요청 라인 하나를 처리해 (성공 여부, 결과 라인)을 반환한다."""
+        status, _ = self.responder.admit()
+        line = {"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": request.get("custom_id"), "error": None}
+        if status != 200:
+            line["response"] = {"status_code": status, "body": _error_body(status)}
+            return False, line
+        body = request.get("body") or {}
+        messages = body.get("messages") or []
+        chunks, finish_reason = self.responder.chunks(messages, body.get("max_tokens"))
+        line["response"] = {
+            "status_code": 200,
+            "body": _completion(
+                f"chatcmpl-{uuid.uuid4().hex[:12]}", body.get("model", "stub"), chunks, finish_reason,
+                self.responder.usage(messages, chunks),
+            ),
+        }
+        return True, line
+
+    def create_batch(self, request: dict) -> dict:
+        """배치를 만들고 입력을 처리한다 (입력 파일이 없거나 한도를 넘으면 ValueError)."""
+        content = self.file_content(request.get("input_file_id", ""))
+        if content is None:
+            raise ValueError(f"입력 파일이 없습니다: {request.get('input_file_id')}")
+        lines = [json.loads(line) for line in content.decode("utf-8").splitlines() if line.strip()]
+        if self.max_requests is not None and len(lines) > self.max_requests:
+            raise ValueError(f"배치당 요청 수 한도({self.max_requests})를 넘었습니다: {len(lines)}건")
+
+        outputs, errors = [], []
+        for line in lines:
+            ok, result = self._run_request(line)
+            (outputs if ok else errors).append(result)
+        # 실제 Batch API처럼 결과 파일 순서는 입력 순서를 보장하지 않는다
+        outputs.reverse()
+
+        def _result_file(results: list[dict], kind: str) -> str | None:
+            if not results:
+                return None
+            content = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in results).encode("utf-8")
+            return self.add_file(f"batch_{kind}.jsonl", content, "batch_output")["id"]
+
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": request.get("endpoint"),
+            "input_file_id": request["input_file_id"],
+            "completion_window": request.get("completion_window", "24h"),
+            "metadata": request.get("metadata"),
+            "status": "validating",
+            "created_at": int(time.time()),
+            "output_file_id": _result_file(outputs, "output"),
+            "error_file_id": _result_file(errors, "error"),
+            "request_counts": {"total": len(lines), "completed": len(outputs), "failed": len(errors)},
+        }
+        with self._lock:
+            self.batches[batch_id] = batch
+            self._remaining_polls[batch_id] = self.polls
+        return self._visible(batch)
+
+    def retrieve(self, batch_id: str) -> dict | None:
+        with self._lock:
+            batch = self.batches.get(batch_id)
+            if batch is None:
+                return None
+            if self._remaining_polls[batch_id] > 0:
+                self._remaining_polls[batch_id] -= 1
+                batch["status"] = "in_progress"
+            else:
+                batch["status"] = "completed"
+        return self._visible(batch)
+
+    @staticmethod
+    def _visible(batch: dict) -> dict:
+        """완료 전에는 결과 파일 ID와 처리 건수를 감춘다."""
+        if batch["status"] == "completed":
+            return dict(batch)
+        total = batch["request_counts"]["total"]
+        return {
+            **batch,
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": total, "completed": 0, "failed": 0},
+        }
+
+
+def _parse_multipart(content_type: str, body: bytes) -> dict[str, tuple[str | None, bytes]]:
+    """multipart/form-data 본문을 {필드명: (파일명, 값)}으로 파싱한다."""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + body
+    )
+    return {
+        part.get_param("name", header="content-disposition"): (part.get_filename(), part.get_payload(decode=True))
+        for part in message.iter_parts()
+    }
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """chat completions / Files / Batches 요청 처리. self.server.responder, self.server.batches를 사용한다."""
+
+    def _send_json(self, status: int, payload, headers: dict[str, str] | None = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self) -> list[str]:
+        """/v1 접두어를 뗀 경로 조각 (예: "/v1/batches/b1" → ["batches", "b1"])."""
+        parts = [part for part in self.path.split("?")[0].split("/") if part]
+        return parts[1:] if parts[:1] == ["v1"] else parts
+
+    def _not_found(self) -> None:
+        self._send_json(404, {"error": {"message": f"알 수 없는 경로: {self.path}"}})
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_GET(self) -> None:
+        route = self._route()
+        batches: StubBatchStore = self.server.batches
+        if route == ["health"]:
+            responder: StubResponder = self.server.responder
+            self._send_json(200, {"responses": len(responder.responses), **responder.counters()})
+        elif len(route) == 2 and route[0] == "batches":
+            batch = batches.retrieve(route[1])
+            if batch is None:
+                self._not_found()
+            else:
+                self._send_json(200, batch)
+        elif len(route) == 3 and route[0] == "files" and route[2] == "content":
+            content = batches.file_content(route[1])
+            if content is None:
+                self._not_found()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        else:
+            self._not_found()
+
+    def do_POST(self) -> None:
+        route = self._route()
+        if route == ["files"]:
+            self._create_file()
+        elif route == ["batches"]:
+            self._create_batch()
+        elif route == ["chat", "completions"]:
+            self._chat_completion()
+        else:
+            self._not_found()
+
+    def _create_file(self) -> None:
+        try:
+            fields = _parse_multipart(self.headers.get("Content-Type", ""), self._read_body())
+            filename, content = fields["file"]
+            purpose = fields.get("purpose", (None, b""))[1].decode("utf-8")
+        except (KeyError, ValueError, AttributeError) as e:
+            self._send_json(400, {"error": {"message": f"잘못된 업로드: {e}"}})
+            return
+        self._send_json(200, self.server.batches.add_file(filename or "upload.jsonl", content, purpose))
+
+    def _create_batch(self) -> None:
+        try:
+            batch = self.server.batches.create_batch(json.loads(self._read_body() or b"{}"))
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": {"message": f"잘못된 배치 요청: {e}"}})
+            return
+        self._send_json(200, batch)
+
+    def _chat_completion(self) -> None:
+        try:
+            request = json.loads(self._read_body() or b"{}")
+            messages = request["messages"]
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": {"message": f"잘못된 요청: {e}"}})
+            return
+
+        responder: StubResponder = self.server.responder
+        status, headers = responder.admit()
+        if status != 200:
+            self._send_json(status, _error_body(status), headers)
+            return
+
+        chunks, finish_reason = responder.chunks(messages, request.get("max_tokens"))
+        model = request.get("model", "stub")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        usage = responder.usage(messages, chunks)
+
+        if not request.get("stream"):
+            time.sleep(responder.delay(responder.ttft) + sum(
+                responder.delay(responder.token_delay) for _ in chunks[1:]
+            ))
+            self._send_json(200, _completion(completion_id, model, chunks, finish_reason, usage), headers)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        def _send_chunk(choices: list[dict], chunk_usage: dict | None = None) -> None:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": choices,
+            }
+            if chunk_usage is not None:
+                payload["usage"] = chunk_usage
+            self.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        time.sleep(responder.delay(responder.ttft))
+        for position, chunk in enumerate(chunks):
+            if position:
+                time.sleep(responder.delay(responder.token_delay))
+            delta = {"content": chunk} if position else {"role": "assistant", "content": chunk}
+            _send_chunk([{"index": 0, "delta": delta, "finish_reason": None}])
+        _send_chunk([{"index": 0, "delta": {}, "finish_reason": finish_reason}])
+        if (request.get("stream_options") or {}).get("include_usage"):
+            _send_chunk([], usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args) -> None:
+        if self.server.verbose:
+            print(f"[api_stub] {self.address_string()} {format % args}")
+
+
+class _HTTPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    # 기본 listen backlog(5)로는 동시 요청이 몰릴 때 연결이 거부된다
+    request_queue_size = 128
+
+
+def make_server(
+    responder: StubResponder,
+    host: str = "127.0.0.1",
+    port: int = 8766,
+    verbose: bool = False,
+    batch_polls: int = 1,
+    batch_max_requests: int | None = None,
+):
+    """
+    stub 서버를 만든다 (serve_forever는 호출하는 쪽에서 실행, port=0이면 빈 포트).
+
+    server.batches(StubBatchStore)에서 업로드 파일과 배치 상태를 확인할 수 있다.
+    """
+    server = _HTTPServer((host, port), _Handler)
+    server.responder = responder
+    server.batches = StubBatchStore(responder, polls=batch_polls, max_requests=batch_max_requests)
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI chat completions 호환 stub 서버 (지연 시간 주입)")
+    parser.add_argument("--dataset", default=None, help="GT 응답을 돌려줄 평가 데이터셋 (없으면 --default-response)")
+    parser.add_argument("--default-response", default="", help="데이터셋에 없는 요청의 응답 텍스트")
+    parser.add_argument("--ttft", type=float, default=0.0, help="첫 chunk까지 지연 (초)")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="chunk 사이 지연 (초)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="지연에 곱하는 (1 ± jitter) 균등 난수 폭")
+    parser.add_argument("--chunk-chars", type=int, default=4, help="chunk(토큰) 하나의 글자 수")
+    parser.add_argument("--seed", type=int, default=42, help="jitter 난수 시드")
+    parser.add_argument(
+        "--requests-per-window", type=int, default=None,
+        help="--window 초 고정 창당 허용 요청 수 (넘으면 429, 성공 응답에 x-ratelimit-* 헤더)",
+    )
+    parser.add_argument("--window", type=float, default=1.0, help="rate limit 창 길이 (초)")
+    parser.add_argument("--rate-limit-prob", type=float, default=0.0, help="요청을 429로 거절할 확률")
+    parser.add_argument("--retry-after", type=float, default=None, help="429 응답의 retry-after 헤더 값 (초)")
+    parser.add_argument("--error-prob", type=float, default=0.0, help="500 응답을 돌려줄 확률")
+    parser.add_argument("--batch-polls", type=int, default=1, help="배치가 completed가 되기까지 retrieve 횟수")
+    parser.add_argument(
+        "--batch-max-requests", type=int, default=None, help="배치당 요청 수 한도 (넘으면 배치 생성 400)",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP 바인드 주소")
+    parser.add_argument("--port", type=int, default=8766, help="HTTP 포트")
+    parser.add_argument("--verbose", action="store_true", help="요청 로그 출력")
+    args = parser.parse_args()
+
+    responses = load_responses(args.dataset) if args.dataset else {}
+    responder = StubResponder(
+        responses,
+        default_response=args.default_response,
+        ttft=args.ttft,
+        token_delay=args.token_delay,
+        jitter=args.jitter,
+        chunk_chars=args.chunk_chars,
+        seed=args.seed,
+        requests_per_window=args.requests_per_window,
+        window=args.window,
+        rate_limit_prob=args.rate_limit_prob,
+        retry_after=args.retry_after,
+        error_prob=args.error_prob,
+    )
+    server = make_server(
+        responder, host=args.host, port=args.port, verbose=args.verbose,
+        batch_polls=args.batch_polls, batch_max_requests=args.batch_max_requests,
+    )
+    print(f"api stub 대기 중: http://{args.host}:{server.server_port}/v1 (응답 {len(responses)}개)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"[api_stub] 응답 상태별 요청 수: {responder.counters()}")
+
+
+if __name__ == "__main__":
+    main()
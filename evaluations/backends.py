@@ -0,0 +1,369 @@
+"""
+추론 백엔드 인터페이스와 모델 없이 쓰는 백엔드 구현.
+
+evaluations.pipeline은 데이터 로드·샤딩·resume·디코딩 정책·예측 캐시·예측 로그·스코어링을 맡고,
+백엔드는 InferenceInput batch를 받아 예측 텍스트를 돌려주는 일만 한다.
+
+  vllm   : runner.VLLMBackend     (GPU, 토큰 id 입력, LoRA, prefix 스케줄, 길이 검사)
+  openai : api_runner.OpenAIBackend (chat completions sync/async, Batch API)
+  hf     : HFBackend              (transformers generate, CPU에서 작은 모델 확인용)
+  replay : ReplayBackend          (predictions 파일 또는 GT를 그대로 반환, 모델 없이 파이프라인 처리량 측정용)
+
+실행 (백엔드 공통 CLI, 백엔드별 세부 옵션은 runner / api_runner CLI 사용):
+    python -m evaluations.pipeline --backend replay --replay gt \\
+        --dataset eval_data/dataset.jsonl --output eval_output_replay
+"""
+
+import json
+from typing import Callable, Protocol, runtime_checkable
+
+from evaluations.prediction_cache import hash_lora_adapter, make_cache_key
+from evaluations.prediction_log import input_key, record_key
+from evaluations.preprocessing import render_step_prompts
+
+BACKENDS = ("vllm", "openai", "hf", "replay")
+
+
+@runtime_checkable
+class InferenceBackend(Protocol):
+    """
+    InferenceInput batch → 예측 텍스트 리스트를 만드는 추론 백엔드.
+
+    capability 플래그
+    -----------------
+    supports_token_ids : 토큰 id 프롬프트 입력 (길이 검사·사전 토큰화 가능)
+    supports_lora : LoRA 어댑터 적용
+    supports_logprobs : 토큰 logprob 반환 (generate가 실제로 logprob을 요청·반환하는 백엔드만 True)
+    supports_streaming : 토큰 단위 스트리밍 응답 (generate의 latencies에 스트리밍 지연 시간 기록 가능)
+    supports_stop : 임의 stop sequence (DecodingPolicy의 step 유형별 stop 적용 여부)
+
+    선택 속성 variants : 한 번에 평가할 변형 리스트 (예: VLLMBackend의 LoRA 어댑터 경로).
+    있으면 run_pipeline이 입력마다 variant별 요청을 만들고, cache_keys / generate에
+    요청별 variant 인덱스 리스트를 variants 인자로 넘긴다. 없는 백엔드에는 넘기지 않는다.
+    """
+
+    name: str
+    model_name: str
+    supports_token_ids: bool
+    supports_lora: bool
+    supports_logprobs: bool
+    supports_streaming: bool
+    supports_stop: bool
+
+    def token_counter(self) -> Callable[[str], int] | None:
+        """DecodingPolicy GT 길이를 셀 토큰 수 함수 (None이면 UTF-8 바이트 수로 센다)."""
+        ...
+
+    def prepare(
+        self,
+        inference_inputs: list,
+        pending: list[int],
+        budgets: list[int],
+        inference_stats: dict,
+    ) -> list[int]:
+        """추론 전 검사. 생성하지 않고 빈 예측으로 기록할 입력 인덱스를 반환한다."""
+        ...
+
+    def cache_keys(
+        self,
+        inference_inputs: list,
+        budgets: list[int],
+        stops: list[list[str]] | None,
+    ) -> list[str]:
+        """입력별 예측 캐시 키."""
+        ...
+
+    def generate(
+        self,
+        inference_inputs: list,
+        budgets: list[int],
+        stops: list[list[str]] | None = None,
+        on_result: Callable[[int, str], None] | None = None,
+        finish_reasons: dict[int, str] | None = None,
+        inference_stats: dict | None = None,
+        token_counts: dict[int, tuple[int, int]] | None = None,
+        latencies: dict[int, dict] | None = None,
+    ) -> list[str]:
+        """
+        inference_inputs 순서대로 예측을 생성한다.
+
+        budgets는 입력별 최대 생성 토큰 수, stops는 입력별 stop sequence (None이면 기본 <|im_end|>).
+        stop 문자열은 예측에 남긴다 (<|im_end|>는 제외). on_result는 (입력 인덱스, 예측)으로 호출하고
+        finish_reasons에는 {입력 인덱스: finish_reason}을 기록한다 ("length"면 토큰 예산 도달).
+        token_counts에는 토큰 수를 아는 백엔드만 {입력 인덱스: (prompt 토큰 수, completion 토큰 수)}를 기록한다.
+        latencies에는 스트리밍으로 지연 시간을 잰 백엔드만 {입력 인덱스: {"ttft", "tool_call", "total"}}을
+        on_result 호출 전에 기록한다 (evaluations.latency).
+        """
+        ...
+
+
+def capabilities(backend: InferenceBackend) -> dict:
+    """eval_results.json inference.backend에 기록할 백엔드 이름·capability."""
+    return {
+        "name": backend.name,
+        "model": backend.model_name,
+        "token_ids": backend.supports_token_ids,
+        "lora": backend.supports_lora,
+        "logprobs": backend.supports_logprobs,
+        "streaming": backend.supports_streaming,
+        "stop": backend.supports_stop,
+    }
+
+
+def truncate_at_stop(text: str, stops: list[str]) -> tuple[str, bool]:
+    """
+    첫 stop 문자열까지 자른다 (stop 문자열은 남김, vLLM include_stop_str_in_output과 같음).
+
+    Returns
+    -------
+    (잘린 텍스트, stop 일치 여부)
+    """
+    hits = [(text.find(stop), stop) for stop in stops if stop in text]
+    if not hits:
+        return text, False
+    position, stop = min(hits)
+    return text[:position + len(stop)], True
+
+
+class ReplayBackend:
+    """
+    저장된 예측 또는 GT를 그대로 돌려주는 결정적 백엔드.
+
+    source가 "gt"면 각 step의 gt_response를, 그 외에는 predictions.jsonl 경로로 보고
+    (conversation_id, turn_index, step_index)가 같은 레코드의 prediction을 반환한다.
+    모델 호출이 없으므로 분할·캐시·로그·스코어링 등 모델 외 구간의 처리량 측정과
+    기존 predictions를 다른 설정(샤딩, 디코딩 정책 예산 등)으로 다시 흘려보내는 데 쓴다.
+    """
+
+    name = "replay"
+    supports_token_ids = False
+    supports_lora = False
+    supports_logprobs = False
+    supports_streaming = False
+    supports_stop = True
+
+    def __init__(self, source: str = "gt", predictions: dict[tuple[int, int, int], str] | None = None):
+        self.source = source
+        self.model_name = f"replay:{source}"
+        # predictions를 직접 넘기면 source는 이름으로만 쓴다 (evaluations.benchmark의 합성 데이터셋 등)
+        self._predictions = predictions
+        if predictions is None and source != "gt":
+            with open(source, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+            self._predictions = {record_key(r): r["prediction"] for r in records}
+
+    def token_counter(self) -> Callable[[str], int] | None:
+        return None
+
+    def prepare(self, inference_inputs, pending, budgets, inference_stats) -> list[int]:
+        if self._predictions is None:
+            return []
+        keys = [input_key(inference_inputs[i]) for i in pending]
+        missing = [key for key in keys if key not in self._predictions]
+        if missing:
+            raise ValueError(
+                f"replay 파일({self.source})에 없는 step {len(missing)}개 (예: {missing[:3]})"
+            )
+        return []
+
+    def cache_keys(self, inference_inputs, budgets, stops) -> list[str]:
+        return [
+            make_cache_key(
+                backend=self.name,
+                model=self.model_name,
+                prompt=list(input_key(inp)),
+                max_new_tokens=budget,
+                stop=stops[i] if stops is not None else None,
+            )
+            for i, (inp, budget) in enumerate(zip(inference_inputs, budgets))
+        ]
+
+    def generate(
+        self,
+        inference_inputs,
+        budgets,
+        stops=None,
+        on_result=None,
+        finish_reasons=None,
+        inference_stats=None,
+        token_counts=None,
+        latencies=None,
+    ) -> list[str]:
+        predictions = []
+        for index, inp in enumerate(inference_inputs):
+            if self._predictions is None:
+                prediction = inp.gt_response
+            else:
+                prediction = self._predictions[input_key(inp)]
+            if stops is not None:
+                prediction, _ = truncate_at_stop(prediction, stops[index])
+            predictions.append(prediction)
+            if finish_reasons is not None:
+                finish_reasons[index] = "stop"
+            if on_result is not None:
+                on_result(index, prediction)
+        return predictions
+
+
+class HFBackend:
+    """
+    transformers AutoModelForCausalLM으로 greedy 생성하는 백엔드 (CPU에서 작은 모델 확인용).
+
+    프롬프트를 길이순으로 정렬해 batch_size개씩 left padding으로 생성하고
+    <|im_end|> / eos 토큰에서 멈춘다 (train.tool_eval.ToolCallEvaluator와 같은 방식).
+    batch 안에서는 가장 큰 예산만큼 생성한 뒤 입력별 예산과 stop sequence로 자른다.
+    """
+
+    name = "hf"
+    supports_token_ids = True
+    supports_lora = True
+    supports_logprobs = False
+    supports_streaming = False
+    supports_stop = True
+
+    def __init__(
+        self,
+        model_name: str,
+        lora_path: str | None = None,
+        batch_size: int = 8,
+        device: str = "cpu",
+    ):
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        self.model_name = model_name
+        self.lora_path = lora_path
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, trust_remote_code=True)
+        model = AutoModelForCausalLM.from_pretrained(
+            model_name, torch_dtype=torch.float32, trust_remote_code=True
+        )
+        if lora_path:
+            from peft import PeftModel
+
+            model = PeftModel.from_pretrained(model, lora_path)
+        self.model = model.to(device).eval()
+        self.stop_token_ids = [
+            token_id
+            for token_id in (
+                self.tokenizer.convert_tokens_to_ids("<|im_end|>"),
+                self.tokenizer.eos_token_id,
+            )
+            if token_id is not None and token_id != self.tokenizer.unk_token_id
+        ]
+
+    def token_counter(self) -> Callable[[str], int] | None:
+        return lambda text: len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def prepare(self, inference_inputs, pending, budgets, inference_stats) -> list[int]:
+        return []
+
+    def cache_keys(self, inference_inputs, budgets, stops) -> list[str]:
+        lora_hash = hash_lora_adapter(self.lora_path)
+        return [
+            make_cache_key(
+                backend=self.name,
+                model=self.model_name,
+                prompt=prompt,
+                max_new_tokens=budget,
+                lora_hash=lora_hash,
+                stop=stops[i] if stops is not None else None,
+            )
+            for i, (prompt, budget) in enumerate(zip(render_step_prompts(inference_inputs), budgets))
+        ]
+
+    def _decode(self, token_ids: list[int], budget: int) -> tuple[str, str, int]:
+        """첫 stop 토큰 앞까지(최대 budget 토큰) 디코딩하고 finish_reason과 생성 토큰 수를 함께 반환한다."""
+        token_ids = token_ids[:budget]
+        for index, token_id in enumerate(token_ids):
+            if token_id in self.stop_token_ids:
+                text = self.tokenizer.decode(token_ids[:index], skip_special_tokens=False)
+                return text, "stop", index + 1
+        text = self.tokenizer.decode(token_ids, skip_special_tokens=False)
+        return text, "length" if len(token_ids) == budget else "stop", len(token_ids)
+
+    def generate(
+        self,
+        inference_inputs,
+        budgets,
+        stops=None,
+        on_result=None,
+        finish_reasons=None,
+        inference_stats=None,
+        token_counts=None,
+        latencies=None,
+    ) -> list[str]:
+        import torch
+
+        tokenizer = self.tokenizer
+        padding_side, pad_token = tokenizer.padding_side, tokenizer.pad_token
+        tokenizer.padding_side = "left"
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+
+        prompts = render_step_prompts(inference_inputs)
+        order = sorted(range(len(prompts)), key=lambda i: len(prompts[i]))
+        predictions = [""] * len(prompts)
+        try:
+            for start in range(0, len(order), self.batch_size):
+                batch = order[start:start + self.batch_size]
+                encoded = tokenizer(
+                    [prompts[i] for i in batch],
+                    return_tensors="pt",
+                    padding=True,
+                    add_special_tokens=False,
+                ).to(self.model.device)
+                with torch.no_grad():
+                    outputs = self.model.generate(
+                        **encoded,
+                        max_new_tokens=max(budgets[i] for i in batch),
+                        do_sample=False,
+                        use_cache=True,
+                        pad_token_id=tokenizer.pad_token_id,
+                        eos_token_id=self.stop_token_ids,
+                    )
+                new_tokens = outputs[:, encoded["input_ids"].shape[1]:].tolist()
+                prompt_lengths = encoded["attention_mask"].sum(dim=1).tolist()
+                for index, token_ids, prompt_length in zip(batch, new_tokens, prompt_lengths):
+                    prediction, reason, generated = self._decode(token_ids, budgets[index])
+                    if token_counts is not None:
+                        token_counts[index] = (prompt_length, generated)
+                    if stops is not None:
+                        prediction, stopped = truncate_at_stop(prediction, stops[index])
+                        reason = "stop" if stopped else reason
+                    predictions[index] = prediction
+                    if finish_reasons is not None:
+                        finish_reasons[index] = reason
+                    if on_result is not None:
+                        on_result(index, prediction)
+        finally:
+            tokenizer.padding_side, tokenizer.pad_token = padding_side, pad_token
+        return predictions
+
+
+def load_backend(
+    name: str,
+    model_name: str = "",
+    lora_path: str | None = None,
+    replay: str = "gt",
+    **options,
+) -> InferenceBackend:
+    """
+    이름으로 백엔드를 만든다 (vllm / openai는 해당 runner 모듈에서 import).
+
+    options는 백엔드 생성자에 그대로 넘긴다
+    (vllm: max_model_len, seed, prefix_schedule, ... / openai: mode, concurrency, ... / hf: batch_size, device).
+    """
+    if name == "replay":
+        return ReplayBackend(replay)
+    if name == "hf":
+        return HFBackend(model_name, lora_path=lora_path, **options)
+    if name == "vllm":
+        from evaluations.runner import VLLMBackend
+
+        return VLLMBackend(model_name, lora_path=lora_path, **options)
+    if name == "openai":
+        from evaluations.api_runner import OpenAIBackend
+
+        return OpenAIBackend(model_name, **options)
+    raise ValueError(f"알 수 없는 백엔드: {name} (사용 가능: {', '.join(BACKENDS)})")
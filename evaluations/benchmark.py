@@ -0,0 +1,352 @@
+"""
+평가 파이프라인 확장성 벤치마크.
+
+eval_data/dataset.jsonl의 턴을 재조합해 10² ~ 10⁵개 대화의 합성 eval 세트를 만들고
+split → replay 추론 → 스코어링 경로를 단계별로 측정해 JSON 리포트로 저장한다.
+
+합성 방식:
+  - 대화당 턴 수는 원본 대화의 턴 수 분포에서, 각 턴(user 발화 + 이어지는 tool_call/tool_response/응답)은
+    원본 턴 풀에서 복원 추출한다. 턴 안의 step 수·tool call 비율·메시지 길이 분포가 원본과 같고,
+    GT 히스토리 길이(프롬프트 길이)는 턴 수에 따라 자연스럽게 늘어난다.
+  - system_prompt와 tools는 임의의 원본 대화에서 가져온다.
+
+측정 단계 (단계별 wall time과 steps/sec):
+  split_conversations → replay (ReplayBackend.generate + make_record)
+  → score_steps (step마다 evaluate_function_call_step) → group_turn_passes → evaluate_multi_turn
+
+규모마다 새 프로세스(spawn)에서 실행해 peak RSS(ru_maxrss)가 규모별로 분리되도록 한다.
+리포트에는 git commit이 함께 기록되므로 --baseline으로 이전 commit의 리포트와 비교할 수 있다.
+
+실행:
+    # 기본 규모 (10², 10³, 10⁴, 10⁵ 대화)
+    python -m evaluations.benchmark --output benchmark/eval_scaling.json
+
+    # 작은 규모만 + 이전 commit 리포트와 비교
+    python -m evaluations.benchmark --scales 100 1000 \\
+        --output benchmark/new.json --baseline benchmark/old.json
+
+    # GT 대신 실제 모델 예측을 재생 (실패 step이 섞인 스코어링 비용 측정)
+    python -m evaluations.benchmark --replay eval_output/predictions.jsonl
+"""
+
+import argparse
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+
+from evaluations.turn_splitter import is_tool_response
+
+DEFAULT_SCALES = (100, 1_000, 10_000, 100_000)
+
+# 합계(total_seconds)에 들어가는 파이프라인 단계 (synthesize는 제외)
+PIPELINE_STAGES = (
+    "split_conversations",
+    "replay",
+    "score_steps",
+    "group_turn_passes",
+    "evaluate_multi_turn",
+)
+
+
+def split_turns(conversation: dict) -> list[list[dict]]:
+    """
+    대화의 messages를 턴 단위로 나눈다 (turn_splitter.split_conversations와 같은 경계).
+
+    턴은 실제 user 발화와 그 뒤의 assistant / tool_response 메시지로 이루어진다.
+    """
+    turns: list[list[dict]] = []
+    for index, msg in enumerate(conversation.get("messages", [])):
+        if not turns or (msg["role"] == "user" and not is_tool_response(msg) and index > 0):
+            turns.append([])
+        turns[-1].append(msg)
+    return turns
+
+
+def synthesize_conversations(
+    source: list[dict],
+    num_conversations: int,
+    seed: int = 0,
+) -> tuple[list[dict], list[list[tuple[int, int]]]]:
+    """
+    원본 대화의 턴을 재조합해 num_conversations개 합성 대화를 만든다.
+
+    메시지 dict는 원본 객체를 그대로 공유하므로 규모가 커져도 대화당 메시지 참조 리스트만 늘어난다.
+
+    Returns
+    -------
+    (합성 대화 리스트, 대화별 턴 출처 [(원본 conversation_id, 원본 turn_index), ...])
+    """
+    rng = random.Random(seed)
+    pool: list[tuple[list[dict], tuple[int, int]]] = []
+    turn_counts: list[int] = []
+    for conv_id, conversation in enumerate(source):
+        turns = split_turns(conversation)
+        turn_counts.append(len(turns))
+        pool.extend((turn, (conv_id, turn_idx)) for turn_idx, turn in enumerate(turns))
+    if not pool:
+        raise ValueError("원본 데이터셋에 턴이 없습니다")
+
+    conversations: list[dict] = []
+    turn_sources: list[list[tuple[int, int]]] = []
+    for _ in range(num_conversations):
+        template = rng.choice(source)
+        picked = [rng.choice(pool) for _ in range(max(1, rng.choice(turn_counts)))]
+        conversations.append({
+            "system_prompt": template.get("system_prompt", ""),
+            "tools": template.get("tools", []),
+            "messages": [msg for turn, _ in picked for msg in turn],
+        })
+        turn_sources.append([origin for _, origin in picked])
+    return conversations, turn_sources
+
+
+def _replay_predictions(
+    inference_inputs: list,
+    turn_sources: list[list[tuple[int, int]]],
+    source_predictions: dict[tuple[int, int, int], str],
+) -> dict[tuple[int, int, int], str]:
+    """원본 predictions를 합성 대화의 (conversation_id, turn_index, step_index)로 옮긴다."""
+    predictions = {}
+    for inp in inference_inputs:
+        conv_id, turn_idx = turn_sources[inp.conversation_id][inp.turn_index]
+        predictions[(inp.conversation_id, inp.turn_index, inp.step_index)] = (
+            source_predictions[(conv_id, turn_idx, inp.step_index)]
+        )
+    return predictions
+
+
+def _peak_rss_mb() -> float:
+    """현재 프로세스의 peak RSS (MB). ru_maxrss 단위는 Linux KB, macOS byte."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_scale(
+    dataset_path: str,
+    num_conversations: int,
+    seed: int = 0,
+    replay: str = "gt",
+    workers: int = 1,
+) -> dict:
+    """
+    합성 대화 num_conversations개로 split → replay → 스코어링을 실행하고 단계별 측정값을 반환한다.
+
+    peak RSS를 규모별로 재려면 새 프로세스에서 호출한다 (run_benchmark가 spawn 프로세스로 실행).
+    """
+    from evaluations.backends import ReplayBackend
+    from evaluations.metrics import score_steps
+    from evaluations.multi_turn_metrics import evaluate_multi_turn
+    from evaluations.pipeline import load_conversations
+    from evaluations.prediction_log import make_record, record_key
+    from evaluations.schema_checker import ToolCheckerIndex
+    from evaluations.scorer import _group_turn_passes
+    from evaluations.turn_splitter import split_conversations
+
+    source = load_conversations(dataset_path)
+    source_predictions = None
+    if replay != "gt":
+        with open(replay, encoding="utf-8") as f:
+            source_predictions = {
+                record_key(record): record["prediction"]
+                for record in map(json.loads, filter(str.strip, f))
+            }
+    baseline_rss = _peak_rss_mb()
+
+    seconds: dict[str, float] = {}
+
+    def _timed(stage: str, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        seconds[stage] = time.perf_counter() - start
+        return result
+
+    conversations, turn_sources = _timed(
+        "synthesize", synthesize_conversations, source, num_conversations, seed
+    )
+    inference_inputs = _timed("split_conversations", split_conversations, conversations)
+    # 합성 대화는 원본 대화의 tools 객체를 공유하므로 원본 tool 세트 수만큼만 컴파일된다
+    tool_checkers = ToolCheckerIndex.from_conversations(conversations)
+
+    def _replay() -> list[dict]:
+        predictions = None
+        if source_predictions is not None:
+            predictions = _replay_predictions(inference_inputs, turn_sources, source_predictions)
+        backend = ReplayBackend(replay, predictions=predictions)
+        budgets = [0] * len(inference_inputs)
+        outputs = backend.generate(inference_inputs, budgets)
+        return [make_record(inp, pred) for inp, pred in zip(inference_inputs, outputs)]
+
+    records = _timed("replay", _replay)
+    step_results, tc_results = _timed(
+        "score_steps",
+        score_steps,
+        [r["gt_response"] for r in records],
+        [r["prediction"] for r in records],
+        tool_schemas=tool_checkers.for_records(records),
+        workers=workers,
+    )
+    conv_turn_passes = _timed("group_turn_passes", _group_turn_passes, records, step_results)
+    mt_results = _timed("evaluate_multi_turn", evaluate_multi_turn, conv_turn_passes, tc_results)
+
+    steps = len(inference_inputs)
+    total = sum(seconds[stage] for stage in PIPELINE_STAGES)
+    return {
+        "conversations": num_conversations,
+        "turns": sum(len(passes) for passes in conv_turn_passes),
+        "steps": steps,
+        "tool_call_steps": sum(inp.is_tool_call for inp in inference_inputs),
+        "stages": {
+            stage: {
+                "seconds": round(elapsed, 6),
+                "steps_per_sec": round(steps / elapsed, 1) if elapsed > 0 else None,
+            }
+            for stage, elapsed in seconds.items()
+        },
+        "total_seconds": round(total, 6),
+        "steps_per_sec": round(steps / total, 1) if total > 0 else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "baseline_rss_mb": round(baseline_rss, 1),
+        "turn_level_accuracy": mt_results.turn_level_accuracy,
+    }
+
+
+def _git_commit() -> dict:
+    """리포트에 기록할 git commit과 작업 트리 변경 여부 (git이 없으면 None)."""
+    repo_root = Path(__file__).resolve().parent.parent
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=repo_root, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=repo_root, capture_output=True, text=True, check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": bool(status.strip())}
+
+
+def run_benchmark(
+    dataset_path: str,
+    scales: list[int],
+    seed: int = 0,
+    replay: str = "gt",
+    workers: int = 1,
+) -> dict:
+    """규모별로 run_scale을 새 spawn 프로세스에서 실행하고 리포트 dict를 만든다."""
+    report = {
+        **_git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "dataset": dataset_path,
+        "seed": seed,
+        "replay": replay,
+        "workers": workers,
+        "scales": [],
+    }
+    for num_conversations in scales:
+        print(f"[benchmark] 대화 {num_conversations:,}개 실행 중...", flush=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            result = executor.submit(
+                run_scale, dataset_path, num_conversations, seed, replay, workers
+            ).result()
+        print(
+            f"  step {result['steps']:,}개, {result['total_seconds']:.2f}s, "
+            f"{result['steps_per_sec']:,.0f} steps/s, peak RSS {result['peak_rss_mb']:.0f}MB"
+        )
+        report["scales"].append(result)
+    return report
+
+
+def format_report(report: dict, baseline: dict | None = None) -> str:
+    """
+    규모·단계별 측정값 표.
+
+    baseline을 넘기면 같은 대화 수의 측정값 대비 속도 비(baseline 시간 / 현재 시간, 1보다 크면 빨라짐)를 붙인다.
+    """
+    baseline_scales = {s["conversations"]: s for s in (baseline or {}).get("scales", [])}
+    stages = ("synthesize", *PIPELINE_STAGES)
+    header = f"{'conversations':>13} {'steps':>9} " + " ".join(f"{stage:>20}" for stage in stages)
+    header += f" {'total':>10} {'steps/s':>10} {'peak_rss':>9}"
+    lines = [header]
+    for scale in report["scales"]:
+        base = baseline_scales.get(scale["conversations"])
+        cells = []
+        for stage in stages:
+            elapsed = scale["stages"][stage]["seconds"]
+            cell = f"{elapsed:.3f}s"
+            if base is not None and stage in base["stages"] and elapsed > 0:
+                cell += f" (x{base['stages'][stage]['seconds'] / elapsed:.2f})"
+            cells.append(f"{cell:>20}")
+        total = f"{scale['total_seconds']:.3f}s"
+        if base is not None and scale["total_seconds"] > 0:
+            total += f" (x{base['total_seconds'] / scale['total_seconds']:.2f})"
+        lines.append(
+            f"{scale['conversations']:>13,} {scale['steps']:>9,} " + " ".join(cells)
+            + f" {total:>10} {scale['steps_per_sec'] or 0:>10,.0f} {scale['peak_rss_mb']:>7.0f}MB"
+        )
+    if baseline is not None:
+        lines.append(f"(xN: baseline {str(baseline.get('commit'))[:12]} 대비 속도 비)")
+        # 합성 조건이 다르면 같은 대화 수라도 step 구성이 달라 비교가 무의미하다
+        mismatched = [key for key in ("dataset", "seed", "replay") if baseline.get(key) != report.get(key)]
+        if mismatched:
+            lines.append(f"경고: baseline과 합성 조건이 다릅니다: {', '.join(mismatched)}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="평가 파이프라인 확장성 벤치마크 (split → replay → 스코어링)")
+    parser.add_argument(
+        "--dataset",
+        default="eval_data/dataset.jsonl",
+        help="합성에 쓸 원본 평가 데이터셋 경로 또는 HuggingFace ID",
+    )
+    parser.add_argument(
+        "--scales",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SCALES),
+        help="합성 대화 수 목록 (기본값: 100 1000 10000 100000)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="합성 난수 시드")
+    parser.add_argument(
+        "--replay",
+        default="gt",
+        help="replay 예측 출처: gt 또는 원본 데이터셋에 대한 predictions.jsonl 경로 (기본값: gt)",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="score_steps 프로세스 수 (기본값: 1)")
+    parser.add_argument("--output", default="eval_benchmark.json", help="JSON 리포트 저장 경로")
+    parser.add_argument("--baseline", default=None, help="비교할 이전 리포트 JSON (예: 다른 commit의 결과)")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        dataset_path=args.dataset,
+        scales=args.scales,
+        seed=args.seed,
+        replay=args.replay,
+        workers=args.workers,
+    )
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"리포트 저장: {output_path}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(format_report(report, baseline))
+
+
+if __name__ == "__main__":
+    main()
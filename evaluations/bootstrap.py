@@ -0,0 +1,73 @@
+"""
+대화 단위 cluster bootstrap.
+
+같은 대화의 step / 턴은 서로 상관되어 있으므로 step이 아닌 대화를 재표본 단위로 사용한다.
+모든 지표를 "대화별 분자 합 / 대화별 분모 합" 형태로 만들어 두면,
+재표본 한 번은 대화별 등장 횟수 가중치와 통계량 행렬의 곱으로 계산된다.
+
+  ratio[b, m] = (W[b] @ numerators[:, m]) / (W[b] @ denominators[:, m])
+
+W는 (B × 대화 수) 등장 횟수 행렬이며 _CHUNK_SIZE개씩 나눠 만들어 메모리를 제한한다.
+"""
+
+import numpy as np
+
+# 한 번에 만드는 재표본 가중치 행 수 (메모리 = chunk × 대화 수)
+_CHUNK_SIZE = 256
+
+
+def _resample_weights(rng: np.random.Generator, num_clusters: int, size: int) -> np.ndarray:
+    """대화를 복원 추출한 (size, num_clusters) 등장 횟수 행렬."""
+    draws = rng.integers(0, num_clusters, size=(size, num_clusters))
+    draws += (np.arange(size) * num_clusters)[:, None]
+    counts = np.bincount(draws.ravel(), minlength=size * num_clusters)
+    return counts.reshape(size, num_clusters).astype(np.float64)
+
+
+def ratio_of_sums(numerators: np.ndarray, denominators: np.ndarray) -> np.ndarray:
+    """분모가 0인 위치는 NaN으로 두는 비율."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominators > 0, numerators / denominators, np.nan)
+
+
+def cluster_bootstrap_ratios(
+    numerators: np.ndarray,
+    denominators: np.ndarray,
+    n_bootstrap: int,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    대화 단위 재표본으로 비율 지표의 bootstrap 분포를 만든다.
+
+    Parameters
+    ----------
+    numerators, denominators : (C, ...) 대화별 분자 / 분모 (뒤쪽 축은 지표, run 등 임의 모양)
+    n_bootstrap : 재표본 수
+    seed : 난수 시드 (같은 시드와 대화 수면 같은 재표본)
+
+    Returns
+    -------
+    (n_bootstrap, ...) 재표본별 비율 (분모가 0이면 NaN)
+    """
+    rng = np.random.default_rng(seed)
+    num_clusters = numerators.shape[0]
+    trailing_shape = numerators.shape[1:]
+    flat_num = numerators.reshape(num_clusters, -1)
+    flat_den = denominators.reshape(num_clusters, -1)
+
+    samples = np.empty((n_bootstrap, flat_num.shape[1]))
+    for start in range(0, n_bootstrap, _CHUNK_SIZE):
+        size = min(_CHUNK_SIZE, n_bootstrap - start)
+        weights = _resample_weights(rng, num_clusters, size)
+        samples[start:start + size] = ratio_of_sums(weights @ flat_num, weights @ flat_den)
+    return samples.reshape(n_bootstrap, *trailing_shape)
+
+
+def percentile_interval(samples: np.ndarray, confidence: float = 0.95) -> tuple[np.ndarray, np.ndarray]:
+    """bootstrap 분포(첫 축)의 percentile 신뢰구간. 모든 재표본이 NaN인 위치는 NaN."""
+    alpha = (1 - confidence) / 2
+    with np.errstate(invalid="ignore"):
+        valid = ~np.all(np.isnan(samples), axis=0)
+        filled = np.where(valid, samples, 0.0)
+        low, high = np.nanquantile(filled, [alpha, 1 - alpha], axis=0)
+    return np.where(valid, low, np.nan), np.where(valid, high, np.nan)
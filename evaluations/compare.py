@@ -0,0 +1,350 @@
+"""
+다중 run 비교 + 유의성 검정.
+
+각 run의 step 테이블(step_results.parquet)을 (conversation_id, turn_index, step_index)로 정렬·교집합한 뒤
+첫 번째 run을 기준으로 나머지 run의 지표 차이를 계산한다.
+
+  - Tool Call Level 7단계 acc + MultiTurnResults 지표의 delta
+  - paired McNemar 검정 (step / turn / 대화 단위 pass 여부가 있는 지표)
+    format 이후 조건부 단계는 두 run 모두 평가 대상인 step만 쓰므로, run별 전체 비율로 계산한
+    delta·신뢰구간과 모집단이 다르다 (mcnemar_population / n_mcnemar 컬럼에 표시)
+  - paired bootstrap 신뢰구간 (대화 단위 재표본, NumPy 행렬 연산으로 모든 run·지표를 한 번에 계산)
+
+모든 지표를 "대화별 분자 합 / 대화별 분모 합" 형태로 만들어 두면 bootstrap 한 번은
+재표본 가중치 행렬(B × 대화 수)과 통계량 행렬(대화 수 × 지표·run)의 곱 하나로 끝난다.
+
+실행:
+    python -m evaluations.compare \\
+        eval_output/base eval_output/lora-1 eval_output/lora-2 api_output/gpt-4o \\
+        --n-bootstrap 2000 --output comparison.csv
+"""
+
+import argparse
+import math
+
+import numpy as np
+
+from evaluations.bootstrap import cluster_bootstrap_ratios, percentile_interval, ratio_of_sums
+from evaluations.metrics import STAGE_FIELDS
+from evaluations.multi_turn_metrics import MULTI_TURN_METRICS, conversation_turn_statistics
+from evaluations.step_table import KEY_COLUMNS, resolve_step_table_path, run_names
+
+STAGE_METRICS = [f"{stage}_acc" for stage, _ in STAGE_FIELDS]
+# 분모가 0일 때 표시값 (EvalResults / MultiTurnResults와 동일한 N/A 규칙)
+_NA_VALUES = {
+    "param_hallucination_acc": -1.0,
+    "argument_type_acc": -1.0,
+    "first_failure_turn_avg": -1.0,
+}
+# McNemar 검정 모집단 (mcnemar_population 컬럼 값 → format_comparison 표시 라벨)
+_MCNEMAR_POPULATIONS = {
+    "all_steps": "전체 step",
+    "both_evaluated_steps": "양쪽 평가 step",
+    "turns": "턴",
+    "conversations": "대화",
+}
+
+
+def _load_step_arrays(run) -> dict[str, np.ndarray]:
+    """step 테이블을 NumPy 배열로 읽는다 (단계 판정은 pass / 평가 대상 여부 두 배열로 분리)."""
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    field_names = [field_name for _, field_name in STAGE_FIELDS]
+    table = pq.read_table(
+        resolve_step_table_path(run),
+        columns=[*KEY_COLUMNS, "is_tool_label", *field_names],
+    )
+    arrays = {name: table.column(name).to_numpy() for name in KEY_COLUMNS}
+    arrays["is_tool_label"] = table.column("is_tool_label").to_numpy(zero_copy_only=False)
+    arrays["passed"] = np.stack(
+        [pc.fill_null(table.column(name), False).to_numpy(zero_copy_only=False) for name in field_names],
+        axis=1,
+    )
+    arrays["evaluated"] = np.stack(
+        [pc.is_valid(table.column(name)).to_numpy(zero_copy_only=False) for name in field_names],
+        axis=1,
+    )
+    return arrays
+
+
+def _align_runs(runs_arrays: list[dict[str, np.ndarray]]) -> tuple[np.ndarray, list[np.ndarray]]:
+    """
+    모든 run에 공통으로 있는 step 키를 (conversation_id, turn_index, step_index) 순으로 정렬해 반환한다.
+
+    세 키를 하나의 int64로 묶어 1차원 정수 연산(unique / intersect1d / searchsorted)으로 정렬한다.
+
+    Returns
+    -------
+    (공통 키 배열 (n, 3), run별 공통 키 위치 인덱스 리스트)
+    """
+    turn_base = max(int(arrays["turn_index"].max(initial=0)) for arrays in runs_arrays) + 1
+    step_base = max(int(arrays["step_index"].max(initial=0)) for arrays in runs_arrays) + 1
+    max_conv = max(int(arrays["conversation_id"].max(initial=0)) for arrays in runs_arrays)
+    if (max_conv + 1) * turn_base * step_base >= 2 ** 63:
+        raise ValueError("step 키 범위가 너무 커서 int64 하나로 묶을 수 없습니다.")
+
+    def _pack(arrays: dict[str, np.ndarray]) -> np.ndarray:
+        return (
+            arrays["conversation_id"].astype(np.int64) * turn_base
+            + arrays["turn_index"].astype(np.int64)
+        ) * step_base + arrays["step_index"].astype(np.int64)
+
+    keyed = []
+    for arrays in runs_arrays:
+        packed = _pack(arrays)
+        # 중복 키는 마지막 레코드를 사용 (finalize_records와 동일한 규칙)
+        unique_keys, first_index = np.unique(packed[::-1], return_index=True)
+        keyed.append((unique_keys, len(packed) - 1 - first_index))
+
+    common = keyed[0][0]
+    for unique_keys, _ in keyed[1:]:
+        common = np.intersect1d(common, unique_keys, assume_unique=True)
+
+    positions = [rows[np.searchsorted(unique_keys, common)] for unique_keys, rows in keyed]
+
+    conv_turn, step = np.divmod(common, step_base)
+    conv, turn = np.divmod(conv_turn, turn_base)
+    return np.stack([conv, turn, step], axis=1), positions
+
+
+def _conversation_starts(conv_ids: np.ndarray) -> np.ndarray:
+    """정렬된 conversation_id 배열에서 대화별 시작 위치."""
+    return np.flatnonzero(np.r_[True, conv_ids[1:] != conv_ids[:-1]])
+
+
+def _turn_passes(
+    keys: np.ndarray,
+    is_tool: np.ndarray,
+    passed: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    정렬된 step에서 턴별 pass 여부를 run마다 계산한다 (scorer의 turn pass 규칙과 동일).
+
+    tool step이 있는 턴은 tool step이 모두 value 단계까지 통과해야 pass, 없으면 모든 step이 relevance 통과.
+
+    Parameters
+    ----------
+    keys : (n, 3) 정렬된 step 키
+    is_tool : (n,) GT가 tool call인지 여부 (run 공통)
+    passed : (n, 7, R) 단계별 pass 여부
+
+    Returns
+    -------
+    (턴별 conversation_id (T,), 턴별 pass 여부 (T, R))
+    """
+    turn_starts = np.flatnonzero(
+        np.r_[True, (keys[1:, 0] != keys[:-1, 0]) | (keys[1:, 1] != keys[:-1, 1])]
+    )
+    tool_fail = (is_tool[:, None] & ~passed[:, -1, :]).astype(np.int32)
+    relevance_fail = (~passed[:, 0, :]).astype(np.int32)
+    has_tool = np.add.reduceat(is_tool.astype(np.int32), turn_starts) > 0
+    tool_fail_count = np.add.reduceat(tool_fail, turn_starts, axis=0)
+    relevance_fail_count = np.add.reduceat(relevance_fail, turn_starts, axis=0)
+    turn_pass = np.where(has_tool[:, None], tool_fail_count == 0, relevance_fail_count == 0)
+    return keys[turn_starts, 0], turn_pass
+
+
+def _conversation_statistics(
+    keys: np.ndarray,
+    is_tool: np.ndarray,
+    passed: np.ndarray,
+    evaluated: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, dict]:
+    """
+    지표별 대화 단위 분자/분모 행렬과 McNemar용 paired 결과를 만든다.
+
+    Returns
+    -------
+    numerators, denominators : (C, M, R) — M = 7단계 + MultiTurn 5개 지표
+    paired : {지표명: ((n, R) bool pass 행렬, 평가 대상 마스크 (n, R) 또는 None, McNemar 모집단)}
+    """
+    step_conv_starts = _conversation_starts(keys[:, 0])
+
+    # Tool Call Level: 단계별 (pass & 평가 대상) / 평가 대상
+    stage_num = np.add.reduceat((passed & evaluated).astype(np.float64), step_conv_starts, axis=0)
+    stage_den = np.add.reduceat(evaluated.astype(np.float64), step_conv_starts, axis=0)
+
+    # Turn / Conversation Level
+    turn_convs, turn_pass = _turn_passes(keys, is_tool, passed)
+    turn_num, turn_den = conversation_turn_statistics(turn_pass, _conversation_starts(turn_convs))
+
+    numerators = np.concatenate([stage_num, turn_num], axis=1)
+    denominators = np.concatenate([stage_den, turn_den], axis=1)
+
+    # relevance는 모든 step이 평가 대상, format 이후 단계는 이전 단계를 통과한 step만 평가 대상
+    paired = {
+        metric: (
+            passed[:, index, :],
+            evaluated[:, index, :],
+            "all_steps" if index == 0 else "both_evaluated_steps",
+        )
+        for index, metric in enumerate(STAGE_METRICS)
+    }
+    paired["turn_level_accuracy"] = (turn_pass, None, "turns")
+    paired["conversation_success_rate"] = (turn_num[:, 1, :] > 0, None, "conversations")
+    return numerators, denominators, paired
+
+
+def mcnemar_test(baseline_pass: np.ndarray, other_pass: np.ndarray) -> tuple[int, int, float]:
+    """
+    paired 이진 결과에 대한 McNemar 검정.
+
+    불일치 쌍이 25개 미만이면 exact binomial, 이상이면 연속성 보정 카이제곱 근사를 사용한다.
+
+    Returns
+    -------
+    (기준만 pass 수, 비교 run만 pass 수, 양측 p-value)
+    """
+    only_baseline = int(np.count_nonzero(baseline_pass & ~other_pass))
+    only_other = int(np.count_nonzero(~baseline_pass & other_pass))
+    discordant = only_baseline + only_other
+    if discordant == 0:
+        return only_baseline, only_other, 1.0
+
+    if discordant < 25:
+        tail = sum(math.comb(discordant, i) for i in range(min(only_baseline, only_other) + 1))
+        return only_baseline, only_other, min(1.0, 2 * tail / 2 ** discordant)
+
+    statistic = (abs(only_baseline - only_other) - 1) ** 2 / discordant
+    return only_baseline, only_other, math.erfc(math.sqrt(statistic / 2))
+
+
+def compare_runs(
+    runs: list[str],
+    n_bootstrap: int = 2000,
+    confidence: float = 0.95,
+    seed: int = 0,
+):
+    """
+    첫 번째 run을 기준으로 나머지 run의 지표 차이와 유의성을 계산한다.
+
+    Parameters
+    ----------
+    runs : run 디렉토리 또는 step_results.parquet 경로 리스트 (2개 이상, 첫 번째가 기준)
+    n_bootstrap : bootstrap 재표본 수 (0이면 신뢰구간 생략)
+    confidence : 신뢰수준
+    seed : bootstrap 난수 시드
+
+    Returns
+    -------
+    (run, metric) 행과 value / baseline / delta / ci_low / ci_high /
+    mcnemar_population / n_mcnemar / only_baseline / only_run / p_mcnemar 컬럼을 가진 DataFrame.
+    delta와 ci는 run별 전체 평가 대상으로 계산한 비율의 차이이고, McNemar는 mcnemar_population 단위
+    n_mcnemar개 쌍에 대한 검정이다. 조건부 단계(format ~ value)는 두 run 모두 평가 대상인 step만
+    쌍이 되므로 (both_evaluated_steps) 두 결과가 다른 모집단을 보고 있을 수 있다.
+    """
+    import pandas as pd
+
+    if len(runs) < 2:
+        raise ValueError("비교하려면 run이 2개 이상 필요합니다.")
+
+    names = run_names(runs)
+    runs_arrays = [_load_step_arrays(run) for run in runs]
+    keys, positions = _align_runs(runs_arrays)
+    if len(keys) == 0:
+        raise ValueError("모든 run에 공통으로 있는 step이 없습니다.")
+
+    dropped = [len(arrays["conversation_id"]) - len(keys) for arrays in runs_arrays]
+    if any(dropped):
+        print(f"  공통 step {len(keys)}개로 정렬 (run별 제외: {dict(zip(names, dropped))})")
+
+    is_tool = runs_arrays[0]["is_tool_label"][positions[0]]
+    passed = np.stack([arrays["passed"][pos] for arrays, pos in zip(runs_arrays, positions)], axis=2)
+    evaluated = np.stack([arrays["evaluated"][pos] for arrays, pos in zip(runs_arrays, positions)], axis=2)
+
+    numerators, denominators, paired = _conversation_statistics(keys, is_tool, passed, evaluated)
+    values = ratio_of_sums(numerators.sum(axis=0), denominators.sum(axis=0))
+
+    if n_bootstrap > 0:
+        # 모든 run·지표에 같은 재표본을 적용하므로 기준 run과의 차이가 paired bootstrap이 된다
+        samples = cluster_bootstrap_ratios(numerators, denominators, n_bootstrap, seed)
+        ci_low, ci_high = percentile_interval(samples - samples[:, :, :1], confidence)
+    else:
+        ci_low = ci_high = np.full(values.shape, np.nan)
+
+    metrics = [*STAGE_METRICS, *MULTI_TURN_METRICS]
+    rows = []
+    for run_index, name in enumerate(names):
+        for metric_index, metric in enumerate(metrics):
+            value = values[metric_index, run_index]
+            baseline = values[metric_index, 0]
+            row = {
+                "run": name,
+                "metric": metric,
+                "value": _NA_VALUES.get(metric, 0.0) if np.isnan(value) else value,
+                "baseline": _NA_VALUES.get(metric, 0.0) if np.isnan(baseline) else baseline,
+                "delta": value - baseline,
+                "ci_low": ci_low[metric_index, run_index],
+                "ci_high": ci_high[metric_index, run_index],
+                "mcnemar_population": None,
+                "n_mcnemar": None,
+                "only_baseline": None,
+                "only_run": None,
+                "p_mcnemar": None,
+            }
+            if run_index > 0 and metric in paired:
+                outcome, mask, population = paired[metric]
+                both = np.ones(len(outcome), dtype=bool) if mask is None else mask[:, 0] & mask[:, run_index]
+                row["mcnemar_population"] = population
+                row["n_mcnemar"] = int(np.count_nonzero(both))
+                (row["only_baseline"], row["only_run"], row["p_mcnemar"]) = mcnemar_test(
+                    outcome[both, 0], outcome[both, run_index],
+                )
+            rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+def format_comparison(table) -> str:
+    """
+    compare_runs 결과를 run별 블록 텍스트로 만든다 (acc 계열은 %p, first_failure_turn_avg는 턴 수).
+
+    McNemar 결과에는 검정한 모집단과 쌍 수를 붙인다 (예: "McNemar[양쪽 평가 step 120]").
+    """
+    import pandas as pd
+
+    lines = []
+    for run_index, (name, group) in enumerate(table.groupby("run", sort=False)):
+        lines.append(f"[{name}]" + (" (기준)" if run_index == 0 else ""))
+        for row in group.itertuples(index=False):
+            scale = 1 if row.metric == "first_failure_turn_avg" else 100
+            line = f"  {row.metric:<28} {row.value * scale:8.2f}"
+            if run_index > 0:
+                line += f"  Δ {row.delta * scale:+7.2f}"
+                if not pd.isna(row.ci_low):
+                    line += f"  CI [{row.ci_low * scale:+7.2f}, {row.ci_high * scale:+7.2f}]"
+                if not pd.isna(row.p_mcnemar):
+                    population = _MCNEMAR_POPULATIONS[row.mcnemar_population]
+                    line += (
+                        f"  McNemar[{population} {row.n_mcnemar:.0f}] p={row.p_mcnemar:.4f}"
+                        f" ({row.only_baseline:.0f}/{row.only_run:.0f})"
+                    )
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="여러 run의 step 테이블 비교 + 유의성 검정")
+    parser.add_argument("runs", nargs="+", help="run 디렉토리 또는 step_results.parquet 경로 (첫 번째가 기준)")
+    parser.add_argument("--n-bootstrap", type=int, default=2000, help="bootstrap 재표본 수 (0이면 생략)")
+    parser.add_argument("--confidence", type=float, default=0.95, help="신뢰수준")
+    parser.add_argument("--seed", type=int, default=0, help="bootstrap 난수 시드")
+    parser.add_argument("--output", default=None, help="비교 테이블 CSV 저장 경로")
+    args = parser.parse_args()
+
+    table = compare_runs(
+        runs=args.runs,
+        n_bootstrap=args.n_bootstrap,
+        confidence=args.confidence,
+        seed=args.seed,
+    )
+    print(format_comparison(table))
+
+    if args.output:
+        table.to_csv(args.output, index=False, encoding="utf-8")
+        print(f"CSV 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
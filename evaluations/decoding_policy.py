@@ -0,0 +1,168 @@
+"""
+step 유형별 디코딩 정책 (stop sequence + step별 생성 토큰 예산).
+
+모든 step을 같은 max_new_tokens와 <|im_end|> stop만으로 생성하면
+끝나지 않는 텍스트 응답이 예산 전체를 쓰고, tool call도 </tool_call> 뒤까지 생성을 이어간다.
+스코어링은 예측의 "<tool_call> 포함 여부"와 "첫 <tool_call>...</tool_call> 블록"만 보므로
+GT step 유형(InferenceInput.is_tool_call)에 따라 아래 stop에서 멈춰도 판정은 바뀌지 않는다.
+
+  tool_call step : </tool_call>에서 정지 (첫 블록 완성 시점)
+  text step      : <tool_call>에서 정지 (이 시점에 relevance 실패가 확정)
+
+토큰 예산은 그렇지 않다. 예산에 걸려 잘린 step은 정책 없이 생성했을 때와 판정이 달라질 수 있다.
+  - text step이 예산 이후에야 <tool_call>을 냈다면 relevance 실패 대신 통과로 바뀐다
+  - tool_call step이 긴 서두 뒤에 <tool_call>을 냈다면 블록 전에 잘려 relevance / format 실패로 바뀐다
+그래서 예산에 걸린 step(finish_reason == "length")의 키를 유형별로 기록해 두고,
+점수 비교는 이 step들을 제외하고 보거나 margin을 늘려 예산 도달을 0으로 만든 뒤 해야 한다.
+
+stop 문자열은 예측에 포함시킨다 (vLLM include_stop_str_in_output).
+OpenAI API는 일치한 stop 문자열을 잘라내고 어떤 stop에서 멈췄는지 알려주지 않아
+문자열을 복원할 수 없으므로 API runner는 stop 없이 토큰 예산만 적용한다.
+
+토큰 예산은 eval 세트 GT 응답 길이의 유형별 최댓값 × margin으로 정하고 max_new_tokens를 넘지 않는다.
+토크나이저가 없으면 UTF-8 바이트 수(byte-level BPE 토큰 수의 상한)로 길이를 센다.
+예산에 걸린 생성 수와 step 키를 유형별로 리포트해 margin이 충분한지 확인한다.
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Callable
+
+STEP_TYPES = ("tool_call", "text")
+
+END_OF_TURN = "<|im_end|>"
+_TOOL_CALL_OPEN = "<tool_call>"
+_TOOL_CALL_CLOSE = "</tool_call>"
+
+# 유형별 stop sequence (vLLM runner용)
+_TYPE_STOPS = {
+    "tool_call": (END_OF_TURN, _TOOL_CALL_CLOSE),
+    "text": (END_OF_TURN, _TOOL_CALL_OPEN),
+}
+
+
+def step_type(inp) -> str:
+    """InferenceInput의 GT 유형 ("tool_call" / "text")."""
+    return "tool_call" if inp.is_tool_call else "text"
+
+
+def utf8_length(text: str) -> int:
+    """UTF-8 바이트 수 (byte-level BPE 토크나이저의 토큰 수 상한)."""
+    return len(text.encode("utf-8"))
+
+
+def _percentile(sorted_values: list[int], q: float) -> int:
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+@dataclass
+class DecodingPolicy:
+    """step 유형별 토큰 예산과 stop sequence."""
+
+    max_tokens: dict[str, int]
+    stop: dict[str, tuple[str, ...]]
+    margin: float = 1.5
+    length_unit: str = "tokens"
+    gt_length_stats: dict[str, dict] = field(default_factory=dict)
+
+    def budget(self, inp) -> int:
+        return self.max_tokens[step_type(inp)]
+
+    def stop_sequences(self, inp) -> tuple[str, ...]:
+        return self.stop[step_type(inp)]
+
+    def to_dict(self) -> dict:
+        return {
+            "max_tokens": dict(self.max_tokens),
+            "stop": {name: list(stops) for name, stops in self.stop.items()},
+            "margin": self.margin,
+            "length_unit": self.length_unit,
+            "gt_length_stats": self.gt_length_stats,
+        }
+
+
+def build_decoding_policy(
+    inference_inputs: list,
+    max_new_tokens: int,
+    count_tokens: Callable[[str], int] | None = None,
+    margin: float = 1.5,
+    min_budget: int = 16,
+    stop_sequences: bool = True,
+) -> DecodingPolicy:
+    """
+    eval 세트 GT 응답 길이로 유형별 토큰 예산을 정한다.
+
+    Parameters
+    ----------
+    inference_inputs : 전체 InferenceInput 리스트 (resume으로 일부만 추론해도 전체 기준)
+    max_new_tokens : 예산 상한
+    count_tokens : 텍스트 → 토큰 수 함수 (None이면 utf8_length)
+    margin : GT 최대 길이에 곱하는 안전 계수
+    min_budget : 예산 하한
+    stop_sequences : False면 stop을 <|im_end|>만 사용 (API runner)
+
+    Returns
+    -------
+    DecodingPolicy
+    """
+    length_fn = count_tokens or utf8_length
+    lengths: dict[str, list[int]] = {name: [] for name in STEP_TYPES}
+    for inp in inference_inputs:
+        lengths[step_type(inp)].append(length_fn(inp.gt_response))
+
+    max_tokens = {}
+    stats = {}
+    for name in STEP_TYPES:
+        values = sorted(lengths[name])
+        longest = values[-1] if values else max_new_tokens
+        max_tokens[name] = min(max_new_tokens, max(min_budget, math.ceil(longest * margin)))
+        stats[name] = {
+            "count": len(values),
+            "p50": _percentile(values, 0.5),
+            "p95": _percentile(values, 0.95),
+            "max": values[-1] if values else 0,
+        }
+
+    stops = _TYPE_STOPS if stop_sequences else {name: (END_OF_TURN,) for name in STEP_TYPES}
+    return DecodingPolicy(
+        max_tokens=max_tokens,
+        stop=dict(stops),
+        margin=margin,
+        length_unit="tokens" if count_tokens is not None else "utf8_bytes",
+        gt_length_stats=stats,
+    )
+
+
+def budget_hit_report(inputs: list, finish_reasons: dict[int, str]) -> dict:
+    """
+    유형별 생성 수와 예산에 걸린(finish_reason == "length") 생성 수·step 키.
+
+    finish_reasons는 실제로 생성한 step의 {inputs 인덱스: finish_reason}이다 (캐시 히트 제외).
+    예산에 걸린 step은 잘린 위치에 따라 relevance / format 판정이 정책 없이 생성한 경우와 달라질 수 있으므로
+    [conversation_id, turn_index, step_index] 리스트로 남긴다.
+    """
+    report = {name: {"generations": 0, "budget_hits": 0, "budget_hit_steps": []} for name in STEP_TYPES}
+    for index, reason in sorted(finish_reasons.items()):
+        inp = inputs[index]
+        counts = report[step_type(inp)]
+        counts["generations"] += 1
+        if reason == "length":
+            counts["budget_hits"] += 1
+            counts["budget_hit_steps"].append([inp.conversation_id, inp.turn_index, inp.step_index])
+    return report
+
+
+def strip_end_of_turn(text: str) -> str:
+    """include_stop_str_in_output으로 남은 끝의 <|im_end|>를 제거한다 (기존 예측과 같은 형태)."""
+    return text[:-len(END_OF_TURN)] if text.endswith(END_OF_TURN) else text
+
+
+def format_policy(policy: DecodingPolicy) -> str:
+    """콘솔 출력용 한 줄 요약."""
+    return ", ".join(
+        f"{name} 예산 {policy.max_tokens[name]} (GT max {policy.gt_length_stats[name]['max']} "
+        f"{policy.length_unit}) stop {list(policy.stop[name])}"
+        for name in STEP_TYPES
+    )
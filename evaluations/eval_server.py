@@ -0,0 +1,403 @@
+"""
+평가 서버 (모델 상주 데몬).
+
+베이스 모델을 한 번만 로드해 두고 HTTP / Unix socket으로 평가 job을 받아
+큐에 쌓은 뒤 기존 runner 파이프라인(분할 → 추론 → 스코어링)으로 차례대로 실행한다.
+job마다 LoRA 어댑터, 데이터셋, 출력 디렉토리, 샘플링 설정을 바꿀 수 있어
+체크포인트 sweep처럼 짧은 평가를 반복할 때 모델 로드 시간을 매번 치르지 않는다.
+
+엔진은 generate 인터페이스만 맞추면 교체할 수 있다.
+  vllm : VLLMEngine (enable_lora=True, prefix caching 활성)
+  stub : StubEngine (모델 없이 고정 응답, CPU에서 서버·큐·job 수명주기 확인용)
+
+API (JSON):
+  POST /jobs           job 등록 → {"job_id": ..., "status": "queued", ...}
+  GET  /jobs           전체 job 목록
+  GET  /jobs/<job_id>  job 상태 (queued / running / succeeded / failed)
+  GET  /health         엔진·큐 상태
+
+실행:
+    # vLLM 엔진으로 서버 시작 (127.0.0.1:8765)
+    python -m evaluations.eval_server \\
+        --model Qwen/Qwen2.5-7B-Instruct \\
+        --max-model-len 8192
+
+    # Unix socket으로 서버 시작
+    python -m evaluations.eval_server \\
+        --model Qwen/Qwen2.5-7B-Instruct \\
+        --socket /tmp/eval_server.sock
+
+    # 모델 없이 stub 엔진으로 시작 (CPU)
+    python -m evaluations.eval_server --engine stub --model stub
+
+    # job 등록
+    curl -X POST localhost:8765/jobs -d '{
+        "dataset_path": "eval_data/dataset.jsonl",
+        "output_dir": "eval_output/ckpt-1000",
+        "lora_path": "outputs/checkpoint-1000"
+    }'
+    curl --unix-socket /tmp/eval_server.sock localhost/jobs/1
+"""
+
+import argparse
+import http.server
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+import traceback
+from dataclasses import asdict, dataclass, field
+from typing import Callable
+
+# POST /jobs에서 받는 필드 → run_evaluation 인자 (dataset_path, output_dir는 필수)
+_JOB_FIELDS = (
+    "dataset_path",
+    "output_dir",
+    "lora_path",
+    "max_new_tokens",
+    "seed",
+    "inference_only",
+    "cache_path",
+    "resume",
+    "prefix_schedule",
+    "pretokenize",
+    "decoding_policy",
+    "budget_margin",
+    "length_buckets",
+    "skip_oversized",
+    "num_shards",
+    "shard_id",
+)
+
+
+class StubEngine:
+    """
+    모델 없이 고정 응답을 돌려주는 엔진 (서버·큐·job 수명주기를 CPU에서 확인하는 용도).
+
+    responder를 지정하면 프롬프트마다 responder(prompt)를 응답으로 사용한다.
+    """
+
+    backend = "stub"
+    max_model_len = None
+
+    def __init__(self, model_name: str = "stub", responder: Callable[[str], str] | None = None):
+        self.model_name = model_name
+        self.responder = responder or (lambda prompt: "")
+
+    def get_tokenizer(self):
+        """토크나이저가 없으므로 runner의 프롬프트 길이 검사를 건너뛴다."""
+        return None
+
+    def generate(
+        self,
+        prompts: list[str],
+        max_new_tokens: int,
+        lora_path: str | None = None,
+        seed: int = 42,
+        on_result: Callable[[int, str], None] | None = None,
+        waves: list[list[int]] | None = None,
+        inference_stats: dict | None = None,
+        prompt_token_ids: list[list[int]] | None = None,
+        sampling_overrides: list[dict] | None = None,
+        finish_reasons: dict[int, str] | None = None,
+        batches: list[list[int]] | None = None,
+        token_counts: dict[int, tuple[int, int]] | None = None,
+    ) -> list[str]:
+        predictions = []
+        for index, prompt in enumerate(prompts):
+            predictions.append(self.responder(prompt))
+            if on_result is not None:
+                on_result(index, predictions[index])
+        return predictions
+
+
+@dataclass
+class EvalJob:
+    """평가 job 하나의 요청 내용과 상태."""
+
+    job_id: str
+    dataset_path: str
+    output_dir: str
+    lora_path: str | list[str] | None = None
+    max_new_tokens: int = 512
+    seed: int = 42
+    inference_only: bool = False
+    cache_path: str | None = None
+    resume: bool = False
+    prefix_schedule: bool = False
+    pretokenize: bool = False
+    decoding_policy: bool = False
+    budget_margin: float = 1.5
+    length_buckets: bool = False
+    skip_oversized: bool = False
+    num_shards: int = 1
+    shard_id: int = 0
+    status: str = "queued"
+    error: str | None = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    def run_kwargs(self) -> dict:
+        """run_evaluation에 넘길 인자."""
+        return {name: getattr(self, name) for name in _JOB_FIELDS}
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class EvalJobQueue:
+    """
+    평가 job 큐. 워커 스레드 하나가 job을 등록 순서대로 하나씩 실행한다.
+
+    엔진(모델)은 워커 스레드만 사용하므로 GPU 메모리에는 항상 한 벌만 올라간다.
+
+    Parameters
+    ----------
+    engine : generate 인터페이스를 가진 엔진 (VLLMEngine, StubEngine 등)
+    run_job : job 실행 함수 (기본: runner.run_evaluation에 엔진을 넘겨 실행)
+    """
+
+    def __init__(self, engine, run_job: Callable[[EvalJob], None] | None = None):
+        self.engine = engine
+        self.run_job = run_job or self._run_evaluation
+        self._jobs: dict[str, EvalJob] = {}
+        self._queue: queue.Queue[EvalJob | None] = queue.Queue()
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._worker = threading.Thread(target=self._work, name="eval-worker", daemon=True)
+        self._worker.start()
+
+    def _run_evaluation(self, job: EvalJob) -> None:
+        from evaluations.runner import run_evaluation
+
+        run_evaluation(model_name=self.engine.model_name, engine=self.engine, **job.run_kwargs())
+
+    def submit(self, request: dict) -> EvalJob:
+        """요청 dict를 검증해 job으로 등록한다. 알 수 없는 필드나 필수 필드 누락은 ValueError."""
+        unknown = set(request) - set(_JOB_FIELDS)
+        if unknown:
+            raise ValueError(f"알 수 없는 job 필드: {sorted(unknown)}")
+        missing = [name for name in ("dataset_path", "output_dir") if not request.get(name)]
+        if missing:
+            raise ValueError(f"필수 job 필드 누락: {missing}")
+
+        with self._lock:
+            job = EvalJob(job_id=str(self._next_id), **request)
+            self._next_id += 1
+            self._jobs[job.job_id] = job
+        self._queue.put(job)
+        print(f"[eval_server] job {job.job_id} 등록: {job.dataset_path} → {job.output_dir}")
+        return job
+
+    def get(self, job_id: str) -> EvalJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> list[EvalJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def pending(self) -> int:
+        """대기 중(queued)인 job 수."""
+        return sum(1 for job in self.jobs() if job.status == "queued")
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            job.status = "running"
+            job.started_at = time.time()
+            print(f"[eval_server] job {job.job_id} 시작 (lora: {job.lora_path})")
+            try:
+                self.run_job(job)
+            except Exception:
+                job.error = traceback.format_exc()
+                job.status = "failed"
+                print(f"[eval_server] job {job.job_id} 실패:\n{job.error}")
+            else:
+                job.status = "succeeded"
+            job.finished_at = time.time()
+            print(
+                f"[eval_server] job {job.job_id} {job.status} "
+                f"({job.finished_at - job.started_at:.1f}s)"
+            )
+
+    def join(self) -> None:
+        """등록된 job을 모두 마친 뒤 워커를 종료한다."""
+        self._queue.put(None)
+        self._worker.join()
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """JSON API 요청 처리. self.server.job_queue를 사용한다."""
+
+    def _send_json(self, status: int, payload) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        job_queue: EvalJobQueue = self.server.job_queue
+        path = self.path.rstrip("/")
+        if path == "/health":
+            self._send_json(200, {
+                "model": job_queue.engine.model_name,
+                "backend": job_queue.engine.backend,
+                "pending": job_queue.pending(),
+            })
+        elif path == "/jobs":
+            self._send_json(200, [job.to_dict() for job in job_queue.jobs()])
+        elif path.startswith("/jobs/"):
+            job = job_queue.get(path[len("/jobs/"):])
+            if job is None:
+                self._send_json(404, {"error": f"job이 없습니다: {path}"})
+            else:
+                self._send_json(200, job.to_dict())
+        else:
+            self._send_json(404, {"error": f"알 수 없는 경로: {self.path}"})
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") != "/jobs":
+            self._send_json(404, {"error": f"알 수 없는 경로: {self.path}"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("job 요청은 JSON 객체여야 합니다")
+            job = self.server.job_queue.submit(request)
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        self._send_json(202, job.to_dict())
+
+    def address_string(self) -> str:
+        # Unix socket은 client_address가 빈 문자열
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args) -> None:
+        print(f"[eval_server] {self.address_string()} {format % args}")
+
+
+class _HTTPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self) -> None:
+        socketserver.UnixStreamServer.server_bind(self)
+        # BaseHTTPRequestHandler가 참조하는 속성
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+def make_server(
+    job_queue: EvalJobQueue,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    socket_path: str | None = None,
+):
+    """
+    job 큐를 노출하는 HTTP 서버를 만든다 (serve_forever는 호출하는 쪽에서 실행).
+
+    socket_path를 지정하면 TCP 대신 해당 경로의 Unix socket에서 요청을 받는다.
+    """
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = _UnixHTTPServer(socket_path, _Handler)
+    else:
+        server = _HTTPServer((host, port), _Handler)
+    server.job_queue = job_queue
+    return server
+
+
+def load_engine(
+    engine: str,
+    model_name: str,
+    max_model_len: int | None = None,
+    seed: int = 42,
+    max_loras: int | None = None,
+):
+    """이름으로 엔진을 만든다 (vllm이면 이 시점에 모델을 로드)."""
+    if engine == "stub":
+        return StubEngine(model_name)
+    if engine == "vllm":
+        from evaluations.runner import VLLMEngine
+
+        return VLLMEngine(
+            model_name,
+            max_model_len=max_model_len,
+            seed=seed,
+            enable_lora=True,
+            enable_prefix_caching=True,
+            max_loras=max_loras,
+        )
+    raise ValueError(f"알 수 없는 엔진: {engine}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모델 상주 평가 서버")
+    parser.add_argument("--model", required=True, help="모델 경로 또는 HuggingFace ID")
+    parser.add_argument(
+        "--engine",
+        choices=["vllm", "stub"],
+        default="vllm",
+        help="추론 엔진 (stub: 모델 없이 빈 응답, CPU 확인용)",
+    )
+    parser.add_argument(
+        "--max-model-len",
+        type=int,
+        default=None,
+        help="vLLM에 명시적으로 전달할 최대 컨텍스트 길이 (예: 8192)",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="엔진 랜덤 시드 (기본값: 42)")
+    parser.add_argument(
+        "--max-loras",
+        type=int,
+        default=None,
+        help="GPU에 동시에 올리는 LoRA 어댑터 수 (lora_path 리스트 job의 sweep용)",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP 바인드 주소")
+    parser.add_argument("--port", type=int, default=8765, help="HTTP 포트")
+    parser.add_argument(
+        "--socket",
+        default=None,
+        help="Unix socket 경로 (지정하면 TCP 대신 사용)",
+    )
+    args = parser.parse_args()
+
+    print(f"엔진 로드: {args.engine} ({args.model})")
+    engine = load_engine(
+        args.engine,
+        args.model,
+        max_model_len=args.max_model_len,
+        seed=args.seed,
+        max_loras=args.max_loras,
+    )
+    job_queue = EvalJobQueue(engine)
+    server = make_server(job_queue, host=args.host, port=args.port, socket_path=args.socket)
+    address = args.socket or f"http://{args.host}:{args.port}"
+    print(f"평가 서버 대기 중: {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("종료 요청: 등록된 job을 모두 마친 뒤 종료합니다")
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+        job_queue.join()
+
+
+if __name__ == "__main__":
+    main()
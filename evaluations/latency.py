@@ -0,0 +1,192 @@
+"""
+스트리밍 응답 지연 시간 측정 + step 유형·함수별 분위수 집계.
+
+api_runner --stream-latency는 chat completions를 stream=True로 요청해 step마다
+아래 세 시점을 재고 predictions.jsonl 레코드의 latency 필드에 초 단위로 기록한다.
+
+  ttft      : 요청 시작 → 첫 content 토큰 (time to first token)
+  tool_call : 요청 시작 → 누적 응답에 처음 </tool_call>이 나온 chunk (없으면 null)
+  total     : 요청 시작 → 스트림 종료
+
+scorer는 latency가 있는 레코드를 모아 전체 / step 유형(tool_call, text) / GT 함수명별
+p50 / p90 / p99를 eval_results.json의 latency 섹션에 기록한다 (캐시 히트 step은 측정값이 없어 제외).
+
+실행 (predictions 파일만으로 리포트):
+    python -m evaluations.latency eval_output_api/predictions.jsonl
+    python -m evaluations.latency eval_output_api/predictions.jsonl --output latency.json
+"""
+
+import argparse
+import json
+import math
+import time
+
+from datagen.tool_parsing import parse_tool_call
+from evaluations.decoding_policy import STEP_TYPES
+
+LATENCY_METRICS = ("ttft", "tool_call", "total")
+PERCENTILES = (50, 90, 99)
+
+_TOOL_CALL_CLOSE = "</tool_call>"
+
+
+class StreamTimer:
+    """
+    스트림 chunk가 도착할 때마다 on_text로 넘겨 ttft / tool_call / total을 잰다.
+
+    시작 시각은 생성 시점(요청 직전)이다. rate limit 재시도 시에는 새 타이머를 만든다.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.ttft: float | None = None
+        self.tool_call: float | None = None
+        self._text = ""
+
+    def on_text(self, delta: str) -> None:
+        if not delta:
+            return
+        now = time.perf_counter() - self.start
+        if self.ttft is None:
+            self.ttft = now
+        if self.tool_call is None:
+            # 태그가 chunk 경계에 걸칠 수 있어 직전 chunk 끝부분과 이어서 찾는다
+            tail = self._text[-(len(_TOOL_CALL_CLOSE) - 1):]
+            if _TOOL_CALL_CLOSE in tail + delta:
+                self.tool_call = now
+        self._text += delta
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def finish(self) -> dict:
+        """predictions.jsonl latency 필드 ({"ttft", "tool_call", "total"}, 초)."""
+        total = time.perf_counter() - self.start
+        return {
+            "ttft": _round(self.ttft),
+            "tool_call": _round(self.tool_call),
+            "total": _round(total),
+        }
+
+
+def _round(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds, 6)
+
+
+def _percentile(sorted_values: list[float], q: int) -> float:
+    """nearest-rank 분위수."""
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _distribution(values: list[float]) -> dict:
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    stats = {"count": len(values), "mean": round(sum(values) / len(values), 6)}
+    stats.update({f"p{q}": _percentile(values, q) for q in PERCENTILES})
+    return stats
+
+
+def _group_stats(latencies: list[dict]) -> dict:
+    stats = {"steps": len(latencies)}
+    for metric in LATENCY_METRICS:
+        stats[metric] = _distribution([lat[metric] for lat in latencies if lat.get(metric) is not None])
+    return stats
+
+
+def _gt_function_name(gt_response: str) -> str | None:
+    parsed = parse_tool_call(gt_response)
+    return parsed["name"] if parsed is not None else None
+
+
+def summarize_latency(records: list[dict]) -> dict | None:
+    """
+    latency 필드가 있는 레코드로 분위수 요약을 만든다 (하나도 없으면 None).
+
+    Returns
+    -------
+    {
+      "steps": 측정 step 수,
+      "overall": {"steps", "ttft": {"count", "mean", "p50", "p90", "p99"}, "tool_call": {...}, "total": {...}},
+      "by_step_type": {"tool_call": {...}, "text": {...}},
+      "by_function": {GT 함수명: {...}},   # tool_call step만
+    }
+    """
+    measured = [r for r in records if r.get("latency")]
+    if not measured:
+        return None
+
+    by_type: dict[str, list[dict]] = {step_type: [] for step_type in STEP_TYPES}
+    by_function: dict[str, list[dict]] = {}
+    for record in measured:
+        by_type["tool_call" if record["is_tool_call"] else "text"].append(record["latency"])
+        if record["is_tool_call"]:
+            name = _gt_function_name(record["gt_response"])
+            if name is not None:
+                by_function.setdefault(name, []).append(record["latency"])
+
+    return {
+        "steps": len(measured),
+        "overall": _group_stats([r["latency"] for r in measured]),
+        "by_step_type": {step_type: _group_stats(group) for step_type, group in by_type.items() if group},
+        "by_function": {name: _group_stats(by_function[name]) for name in sorted(by_function)},
+    }
+
+
+def flatten_latency(summary: dict) -> dict:
+    """eval_results.csv 컬럼 (latency_<범위>_<지표>_p<q>, 범위는 all / tool_call / text)."""
+    groups = {"all": summary["overall"], **summary["by_step_type"]}
+    flat = {}
+    for group_name, stats in groups.items():
+        for metric in LATENCY_METRICS:
+            for q in PERCENTILES:
+                flat[f"latency_{group_name}_{metric}_p{q}"] = stats[metric].get(f"p{q}")
+    return flat
+
+
+def format_latency(summary: dict) -> str:
+    """터미널 출력용 표 (전체 / step 유형 / 함수별 행, 값은 ms)."""
+    header = f"{'구분':<28} {'steps':>6}" + "".join(
+        f" {metric + ' p' + str(q):>14}" for metric in LATENCY_METRICS for q in PERCENTILES
+    )
+    lines = ["=== Streaming Latency (ms) ===", header]
+
+    def _row(label: str, stats: dict) -> str:
+        cells = []
+        for metric in LATENCY_METRICS:
+            for q in PERCENTILES:
+                value = stats[metric].get(f"p{q}")
+                cells.append(f" {value * 1000:>14.1f}" if value is not None else f" {'-':>14}")
+        return f"{label:<28} {stats['steps']:>6}" + "".join(cells)
+
+    lines.append(_row("전체", summary["overall"]))
+    for step_type, stats in summary["by_step_type"].items():
+        lines.append(_row(f"step={step_type}", stats))
+    for name, stats in summary["by_function"].items():
+        lines.append(_row(f"fn={name}", stats))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="predictions.jsonl latency 필드 분위수 리포트")
+    parser.add_argument("predictions", help="--stream-latency로 생성한 predictions.jsonl 경로")
+    parser.add_argument("--output", default=None, help="요약 JSON 저장 경로 (선택)")
+    args = parser.parse_args()
+
+    with open(args.predictions, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    summary = summarize_latency(records)
+    if summary is None:
+        print("latency가 기록된 레코드가 없습니다 (api_runner --stream-latency로 생성한 파일인지 확인)")
+        return
+    print(format_latency(summary))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
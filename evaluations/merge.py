@@ -0,0 +1,261 @@
+"""
+샤드별 predictions 파일 병합 + 완전성 검증 + 스코어링.
+
+runner / api_runner를 --num-shards K --shard-id i로 나눠 실행하면 샤드마다
+predictions.shard-{i}-of-{K}.jsonl이 저장된다 (evaluations.sharding).
+이 모듈은 샤드 파일을 모아 데이터셋의 모든 (conversation_id, turn_index, step_index)가
+정확히 한 번씩 있는지 확인한 뒤 predictions.jsonl로 합치고 score_predictions를 호출한다.
+
+검증 항목:
+  - 누락 step    : 데이터셋에 있지만 어떤 샤드에도 없는 step (샤드 미실행·중단)
+  - 중복 step    : 두 번 이상 기록된 step (같은 샤드를 다른 디렉토리에서 두 번 실행 등)
+  - 알 수 없는 step: 데이터셋에 없는 step (다른 데이터셋으로 실행한 샤드)
+  - 샤드 불일치  : 파일명의 샤드 수가 서로 다르거나, 레코드가 해시상 다른 샤드에 속하는 경우
+
+실행:
+    # 디렉토리를 넘기면 그 안의 predictions.shard-*-of-*.jsonl을 모두 읽는다
+    python -m evaluations.merge eval_output \\
+        --dataset eval_data/dataset.jsonl \\
+        --output eval_output
+
+    # 머신별 디렉토리 / 개별 파일도 섞어서 지정 가능
+    python -m evaluations.merge node0/eval_output node1/eval_output/predictions.shard-00001-of-00002.jsonl \\
+        --dataset eval_data/dataset.jsonl \\
+        --output eval_output_merged
+"""
+
+import argparse
+import json
+from collections import Counter
+from pathlib import Path
+
+from evaluations.perf import PerfRecorder
+from evaluations.pipeline import load_conversations
+from evaluations.prediction_log import input_key, record_key
+from evaluations.sharding import PREDICTIONS_FILENAME, parse_shard_filename, shard_of
+
+# 검증 에러 메시지에 보여주는 예시 step 수
+_MAX_EXAMPLES = 3
+
+
+def find_shard_files(inputs: list[str]) -> list[Path]:
+    """
+    디렉토리는 그 안의 샤드 predictions 파일로, 파일은 그대로 펼친다 (중복 경로는 한 번만).
+
+    Raises
+    ------
+    FileNotFoundError
+        경로가 없거나 샤드 파일을 하나도 찾지 못한 경우
+    """
+    paths: list[Path] = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            # glob은 .partial.jsonl 로그도 잡으므로 샤드 파일명 형식으로 한 번 더 거른다
+            paths.extend(
+                sorted(p for p in path.glob("predictions.shard-*-of-*.jsonl") if parse_shard_filename(p))
+            )
+        elif path.is_file():
+            paths.append(path)
+        else:
+            raise FileNotFoundError(f"경로가 없습니다: {item}")
+    paths = list(dict.fromkeys(path.resolve() for path in paths))
+    if not paths:
+        raise FileNotFoundError(f"샤드 predictions 파일이 없습니다: {inputs}")
+    return paths
+
+
+def _read_records(path: Path) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def merge_shards(paths: list[Path], inference_inputs: list) -> list[dict]:
+    """
+    샤드 파일의 레코드를 합쳐 (conversation_id, turn_index, step_index) 순으로 정렬한다.
+
+    Parameters
+    ----------
+    paths : 샤드 predictions 파일 경로 리스트
+    inference_inputs : 데이터셋 전체의 split_conversations 결과 (기대하는 step 목록)
+
+    Returns
+    -------
+    정렬된 predictions.jsonl 레코드 리스트
+
+    Raises
+    ------
+    ValueError
+        누락·중복·알 수 없는 step이 있거나 샤드 구성이 맞지 않는 경우 (문제를 모두 모아 한 번에 보고)
+    """
+    problems: list[str] = []
+    records: list[dict] = []
+    shard_counts: set[int] = set()
+    shard_ids: set[int] = set()
+
+    for path in paths:
+        shard_records = _read_records(path)
+        parsed = parse_shard_filename(path)
+        if parsed is not None:
+            shard_id, num_shards = parsed
+            shard_counts.add(num_shards)
+            shard_ids.add(shard_id)
+            misplaced = [r for r in shard_records if shard_of(r["conversation_id"], num_shards) != shard_id]
+            if misplaced:
+                problems.append(
+                    f"{path.name}: 다른 샤드에 속하는 레코드 {len(misplaced)}개 "
+                    f"(예: {[record_key(r) for r in misplaced[:_MAX_EXAMPLES]]})"
+                )
+        print(f"  {path}: {len(shard_records)}개")
+        records.extend(shard_records)
+
+    if len(shard_counts) > 1:
+        problems.append(f"샤드 수가 서로 다른 파일이 섞여 있습니다: {sorted(shard_counts)}")
+    elif shard_counts:
+        missing_shards = sorted(set(range(next(iter(shard_counts)))) - shard_ids)
+        if missing_shards:
+            problems.append(f"없는 샤드: {missing_shards}")
+
+    counts = Counter(record_key(r) for r in records)
+    expected = {input_key(inp) for inp in inference_inputs}
+    duplicated = sorted(key for key, count in counts.items() if count > 1)
+    missing = sorted(expected - counts.keys())
+    unknown = sorted(counts.keys() - expected)
+    if duplicated:
+        problems.append(f"중복 step {len(duplicated)}개 (예: {duplicated[:_MAX_EXAMPLES]})")
+    if missing:
+        problems.append(f"누락 step {len(missing)}개 (예: {missing[:_MAX_EXAMPLES]})")
+    if unknown:
+        problems.append(f"데이터셋에 없는 step {len(unknown)}개 (예: {unknown[:_MAX_EXAMPLES]})")
+    if problems:
+        raise ValueError("샤드 병합 검증 실패:\n  - " + "\n  - ".join(problems))
+
+    return sorted(records, key=record_key)
+
+
+def run_merge(
+    inputs: list[str],
+    dataset_path: str,
+    output_dir: str,
+    model_name: str = "",
+    inference_only: bool = False,
+    workers: int = 1,
+    step_table: bool = True,
+    n_bootstrap: int = 0,
+    confidence: float = 0.95,
+) -> None:
+    """
+    샤드 predictions를 검증·병합해 output_dir/predictions.jsonl로 저장하고 스코어링한다.
+
+    Parameters
+    ----------
+    inputs : 샤드 predictions 파일 또는 그 파일들이 있는 디렉토리 리스트
+    dataset_path : 샤드 실행에 쓴 평가 데이터셋 경로 또는 HuggingFace ID
+    output_dir : 병합 predictions와 평가 결과 저장 디렉토리
+    inference_only : True이면 predictions.jsonl 저장 후 스코어링 생략
+    나머지 인자는 score_predictions와 같다.
+    """
+    from evaluations.schema_checker import ToolCheckerIndex
+    from evaluations.scorer import score_predictions
+    from evaluations.turn_splitter import split_conversations
+
+    perf = PerfRecorder()
+    print(f"[1/3] 데이터셋 로드: {dataset_path}")
+    with perf.stage("load"):
+        conversations = load_conversations(dataset_path)
+    with perf.stage("split"):
+        inference_inputs = split_conversations(conversations)
+    print(f"  총 대화 수: {len(conversations)}, 총 InferenceInput 수: {len(inference_inputs)}")
+
+    paths = find_shard_files(inputs)
+    print(f"[2/3] 샤드 {len(paths)}개 병합")
+    with perf.stage("merge"):
+        records = merge_shards(paths, inference_inputs)
+
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    pred_path = output_path / PREDICTIONS_FILENAME
+    with perf.stage("save"):
+        with open(pred_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(f"  예측 저장: {pred_path} ({len(records)}개)")
+
+    if inference_only:
+        print(perf.summary())
+        print("--inference-only 지정: 스코어링 생략")
+        return
+
+    print("[3/3] 메트릭 계산")
+    tool_schemas = None
+    if any(conv.get("tools") for conv in conversations):
+        tool_schemas = ToolCheckerIndex.from_conversations(conversations)
+
+    score_predictions(
+        records=records,
+        tool_schemas=tool_schemas,
+        output_dir=output_path,
+        model_name=model_name,
+        dataset_name=dataset_path,
+        workers=workers,
+        step_table=step_table,
+        n_bootstrap=n_bootstrap,
+        confidence=confidence,
+        perf=perf,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="샤드 predictions 병합 + 완전성 검증 + 스코어링")
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="샤드 predictions 파일 또는 predictions.shard-*-of-*.jsonl이 있는 디렉토리",
+    )
+    parser.add_argument(
+        "--dataset",
+        required=True,
+        help="샤드 실행에 쓴 평가 데이터셋 경로 또는 HuggingFace ID",
+    )
+    parser.add_argument("--output", default="eval_output", help="결과 저장 디렉토리")
+    parser.add_argument("--model", default="", help="결과 JSON에 기록할 모델명 (선택)")
+    parser.add_argument(
+        "--inference-only",
+        action="store_true",
+        help="병합한 predictions.jsonl 저장까지만 수행하고 스코어링 생략",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="step 평가 프로세스 수 (기본 1: 현재 프로세스에서 평가)",
+    )
+    parser.add_argument(
+        "--bootstrap",
+        type=int,
+        default=0,
+        help="대화 단위 cluster bootstrap 재표본 수 (0이면 신뢰구간 생략)",
+    )
+    parser.add_argument("--confidence", type=float, default=0.95, help="bootstrap 신뢰구간 신뢰수준")
+    parser.add_argument(
+        "--no-step-table",
+        action="store_true",
+        help="step_results.parquet (step 단위 결과 테이블) 저장 생략",
+    )
+    args = parser.parse_args()
+
+    run_merge(
+        inputs=args.inputs,
+        dataset_path=args.dataset,
+        output_dir=args.output,
+        model_name=args.model,
+        inference_only=args.inference_only,
+        workers=args.workers,
+        step_table=not args.no_step_table,
+        n_bootstrap=args.bootstrap,
+        confidence=args.confidence,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -12,9 +12,22 @@ eval/eval_plan.md 기준 단계별 의존 체인 micro acc를 계산한다.
   7. Argument Value
 """
 
-import json
-import re
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from datagen.tool_parsing import has_tool_call_tag, parse_tool_call
+from evaluations.schema_checker import ToolChecker, compile_tool_schemas
+
+# (단계명, StepEvaluation 필드명) — 의존 체인 순서
+STAGE_FIELDS = (
+    ("relevance_detection", "relevance_pass"),
+    ("format_compliance", "format_pass"),
+    ("function_matching", "function_pass"),
+    ("param_hallucination", "hallucination_pass"),
+    ("required_params", "required_pass"),
+    ("argument_type", "type_pass"),
+    ("argument_value", "value_pass"),
+)
 
 
 def _parse_tool_call(text: str) -> dict | None:
@@ -24,88 +37,16 @@ def _parse_tool_call(text: str) -> dict | None:
     - 없으면 None
     - JSON 파싱 실패 시 None
     - name/arguments 필드 중 하나라도 없으면 None
-    """
-    match = re.search(r"<tool_call>(.*?)</tool_call>", text, re.DOTALL)
-    if not match:
-        return None
-
-    try:
-        parsed = json.loads(match.group(1).strip())
-    except (json.JSONDecodeError, ValueError):
-        return None
 
-    if "name" not in parsed or "arguments" not in parsed:
-        return None
-
-    if not isinstance(parsed.get("arguments"), dict):
-        return None
-
-    return parsed
+    파싱은 datagen.tool_parsing 공통 파서(컴파일된 정규식 + content memo)를 사용한다.
+    반환 dict는 memo와 공유되므로 수정하지 않는다.
+    """
+    return parse_tool_call(text)
 
 
 def _has_tool_call_tag(text: str) -> bool:
     """텍스트에 <tool_call> 태그가 존재하는지 확인한다."""
-    return "<tool_call>" in text
-
-
-def _normalize_schema(tool_schemas: dict | None, function_name: str) -> dict | None:
-    if not tool_schemas:
-        return None
-    return tool_schemas.get(function_name)
-
-
-def _fill_defaults(args: dict, schema: dict | None) -> dict:
-    """생략된 파라미터에 스키마의 기본값을 채워 API가 실제로 받는 상태를 재현한다.
-
-    - 스키마에 default가 정의된 파라미터가 args에 없으면 default 값을 채움
-    - required가 아닌 파라미터가 args에 없으면 None으로 채움
-    """
-    if schema is None:
-        return dict(args)
-
-    properties = schema.get("properties") or {}
-    required = set(schema.get("required") or [])
-    filled = dict(args)
-
-    for key, prop in properties.items():
-        if key in filled:
-            continue
-        if "default" in prop:
-            filled[key] = prop["default"]
-        elif key not in required:
-            filled[key] = None
-
-    return filled
-
-
-def _expected_python_type(type_name: str):
-    return {
-        "string": str,
-        "integer": int,
-        "number": (int, float),
-        "boolean": bool,
-        "array": list,
-        "object": dict,
-    }.get(type_name)
-
-
-def _matches_type(value, type_name: str | None) -> bool:
-    if type_name is None:
-        return True
-
-    # None은 optional 파라미터의 "값 미지정"을 의미하므로 허용
-    if value is None:
-        return True
-
-    expected = _expected_python_type(type_name)
-    if expected is None:
-        return True
-
-    if type_name == "integer":
-        return isinstance(value, int) and not isinstance(value, bool)
-    if type_name == "number":
-        return isinstance(value, (int, float)) and not isinstance(value, bool)
-    return isinstance(value, expected)
+    return has_tool_call_tag(text)
 
 
 @dataclass
@@ -120,11 +61,23 @@ class StepEvaluation:
     required_pass: bool | None = None
     type_pass: bool | None = None
     value_pass: bool | None = None
+    # drill-down용 부가 정보 (집계에는 사용하지 않음)
+    function_name: str | None = None
+    predicted_function: str | None = None
+    mismatched_keys: tuple[str, ...] = ()
 
     @property
     def tool_call_pass(self) -> bool:
         return self.value_pass is True
 
+    @property
+    def first_failed_stage(self) -> str | None:
+        """처음 실패한 단계명 (STAGE_FIELDS 기준, 실패가 없으면 None)."""
+        for stage, field_name in STAGE_FIELDS:
+            if getattr(self, field_name) is False:
+                return stage
+        return None
+
 
 @dataclass
 class EvalResults:
@@ -158,8 +111,12 @@ class EvalResults:
     argument_type_denominator: int = 0
     argument_value_denominator: int = 0
 
+    # 대화 단위 cluster bootstrap 신뢰구간 (stage_confidence_intervals로 채움)
+    confidence_level: float = 0.95
+    confidence_intervals: dict[str, tuple[float, float]] = field(default_factory=dict)
+
     def to_dict(self) -> dict:
-        return {
+        result = {
             "relevance_detection_acc": self.relevance_detection_acc,
             "format_compliance_acc": self.format_compliance_acc,
             "function_matching_acc": self.function_matching_acc,
@@ -185,6 +142,12 @@ class EvalResults:
             "argument_type_denominator": self.argument_type_denominator,
             "argument_value_denominator": self.argument_value_denominator,
         }
+        if self.confidence_intervals:
+            result["confidence_level"] = self.confidence_level
+            result["confidence_intervals"] = {
+                name: list(interval) for name, interval in self.confidence_intervals.items()
+            }
+        return result
 
     def summary(self) -> str:
         def _fmt(acc: float, num: int, den: int) -> str:
@@ -192,25 +155,36 @@ class EvalResults:
                 return "N/A"
             return f"{acc * 100:.2f}% ({num}/{den})"
 
+        def _ci(name: str) -> str:
+            if name not in self.confidence_intervals:
+                return ""
+            low, high = self.confidence_intervals[name]
+            return f" [{self.confidence_level * 100:.0f}% CI {low * 100:.2f}–{high * 100:.2f}%]"
+
         return (
             f"[EvalResults] total={self.total_samples} "
             f"(tool_call={self.total_tool_calls}, non_tool_call={self.total_non_tool_calls})\n"
-            f"  1. relevance_detection_acc: {_fmt(self.relevance_detection_acc, self.relevance_detection_numerator, self.relevance_detection_denominator)} - TC 필요 여부 판단\n"
-            f"  2. format_compliance_acc:   {_fmt(self.format_compliance_acc, self.format_compliance_numerator, self.format_compliance_denominator)} - JSON 형식 유효성\n"
-            f"  3. function_matching_acc:   {_fmt(self.function_matching_acc, self.function_matching_numerator, self.function_matching_denominator)} - 함수명 일치\n"
-            f"  4. param_hallucination_acc: {_fmt(self.param_hallucination_acc, self.param_hallucination_numerator, self.param_hallucination_denominator)} - 스키마 외 파라미터 없음\n"
-            f"  5. required_params_acc:     {_fmt(self.required_params_acc, self.required_params_numerator, self.required_params_denominator)} - 필수 파라미터 포함\n"
-            f"  6. argument_type_acc:       {_fmt(self.argument_type_acc, self.argument_type_numerator, self.argument_type_denominator)} - 파라미터 타입 일치\n"
-            f"  7. argument_value_acc:      {_fmt(self.argument_value_acc, self.argument_value_numerator, self.argument_value_denominator)} - 파라미터 값 일치"
+            f"  1. relevance_detection_acc: {_fmt(self.relevance_detection_acc, self.relevance_detection_numerator, self.relevance_detection_denominator)}{_ci('relevance_detection_acc')} - TC 필요 여부 판단\n"
+            f"  2. format_compliance_acc:   {_fmt(self.format_compliance_acc, self.format_compliance_numerator, self.format_compliance_denominator)}{_ci('format_compliance_acc')} - JSON 형식 유효성\n"
+            f"  3. function_matching_acc:   {_fmt(self.function_matching_acc, self.function_matching_numerator, self.function_matching_denominator)}{_ci('function_matching_acc')} - 함수명 일치\n"
+            f"  4. param_hallucination_acc: {_fmt(self.param_hallucination_acc, self.param_hallucination_numerator, self.param_hallucination_denominator)}{_ci('param_hallucination_acc')} - 스키마 외 파라미터 없음\n"
+            f"  5. required_params_acc:     {_fmt(self.required_params_acc, self.required_params_numerator, self.required_params_denominator)}{_ci('required_params_acc')} - 필수 파라미터 포함\n"
+            f"  6. argument_type_acc:       {_fmt(self.argument_type_acc, self.argument_type_numerator, self.argument_type_denominator)}{_ci('argument_type_acc')} - 파라미터 타입 일치\n"
+            f"  7. argument_value_acc:      {_fmt(self.argument_value_acc, self.argument_value_numerator, self.argument_value_denominator)}{_ci('argument_value_acc')} - 파라미터 값 일치"
         )
 
 
 def evaluate_function_call_step(
     label: str,
     prediction: str,
-    tool_schemas: dict | None = None,
+    tool_schemas: dict | ToolChecker | None = None,
 ) -> StepEvaluation:
-    """한 step을 계획서 기준 단계별로 평가한다."""
+    """
+    한 step을 계획서 기준 단계별로 평가한다.
+
+    tool_schemas는 {함수명: {properties, required}} 스키마 또는 미리 컴파일한 ToolChecker
+    (dict는 schema_checker의 해시 캐시로 컴파일한다).
+    """
     label_tc = _parse_tool_call(label)
     pred_tc = _parse_tool_call(prediction)
 
@@ -221,6 +195,8 @@ def evaluate_function_call_step(
     step = StepEvaluation(
         is_tool_label=label_is_tool,
         relevance_pass=(label_is_tool == pred_has_tag),
+        function_name=label_tc["name"] if label_is_tool else None,
+        predicted_function=pred_tc["name"] if pred_is_tool else None,
     )
 
     if not label_is_tool:
@@ -243,128 +219,315 @@ def evaluate_function_call_step(
     if not step.function_pass:
         return step
 
-    schema = _normalize_schema(tool_schemas, label_name)
+    tool_checker = compile_tool_schemas(tool_schemas)
+    checker = tool_checker.get(label_name) if tool_checker is not None else None
     label_args = label_tc.get("arguments") or {}
     pred_args = pred_tc.get("arguments") or {}
 
-    if schema is None:
+    if checker is None:
         step.hallucination_pass = None
-        required_keys = set(label_args.keys())
-        allowed_properties = None
+        required_keys = label_args.keys()
     else:
-        properties = schema.get("properties") or {}
-        allowed_properties = set(properties.keys())
-        step.hallucination_pass = set(pred_args.keys()).issubset(allowed_properties)
+        unknown_keys = checker.unknown_keys(pred_args)
+        step.hallucination_pass = not unknown_keys
         if not step.hallucination_pass:
+            step.mismatched_keys = tuple(sorted(unknown_keys))
             return step
-        required_keys = set(schema.get("required") or [])
+        required_keys = checker.required
 
-    step.required_pass = required_keys.issubset(set(pred_args.keys()))
+    missing_keys = required_keys - pred_args.keys()
+    step.required_pass = not missing_keys
     if not step.required_pass:
+        step.mismatched_keys = tuple(sorted(missing_keys))
         return step
 
-    if schema is None:
+    if checker is None:
         step.type_pass = None
     else:
-        properties = schema.get("properties") or {}
-        step.type_pass = all(
-            _matches_type(pred_args[key], (properties.get(key) or {}).get("type"))
-            for key in pred_args
-        )
+        wrong_types = checker.wrong_types(pred_args)
+        step.type_pass = not wrong_types
         if not step.type_pass:
+            step.mismatched_keys = tuple(sorted(wrong_types))
             return step
 
-    # Value: 양쪽에 기본값을 채운 뒤 exact match로 비교한다.
-    norm_label = _fill_defaults(label_args, schema)
-    norm_pred = _fill_defaults(pred_args, schema)
+    # Value: 양쪽에 기본값을 채운 뒤 exact match로 비교한다 (API가 실제로 받는 상태 재현).
+    if checker is None:
+        norm_label, norm_pred = label_args, pred_args
+    else:
+        norm_label = checker.fill_defaults(label_args)
+        norm_pred = checker.fill_defaults(pred_args)
     step.value_pass = norm_pred == norm_label
+    if not step.value_pass:
+        step.mismatched_keys = tuple(sorted(
+            key for key in norm_label.keys() | norm_pred.keys()
+            if key not in norm_label or key not in norm_pred or norm_label[key] != norm_pred[key]
+        ))
     return step
 
 
-def evaluate_function_calls(
+class EvalAccumulator:
+    """
+    StepEvaluation을 하나씩 받아 7단계 분자/분모를 누적하는 온라인 집계기.
+
+    evaluate_function_calls의 단계별 대상 필터링을 step 단위 증분으로 옮긴 것으로,
+    전체 step 리스트를 메모리에 두지 않고도 같은 EvalResults를 만든다.
+    merge()로 다른 집계기(예: 다른 shard)의 카운터를 합칠 수 있다.
+    """
+
+    _COUNTERS = (
+        "total_samples",
+        "total_tool_calls",
+        "relevance_num", "relevance_den",
+        "format_num", "format_den",
+        "function_num", "function_den",
+        "halluc_num", "halluc_den",
+        "required_num", "required_den",
+        "type_num", "type_den",
+        "value_num", "value_den",
+    )
+
+    def __init__(self):
+        for name in self._COUNTERS:
+            setattr(self, name, 0)
+
+    def add(self, result: StepEvaluation) -> None:
+        self.total_samples += 1
+        self.total_tool_calls += result.is_tool_label
+        self.relevance_den += 1
+        self.relevance_num += result.relevance_pass
+
+        # 2. format: 정답이 TC이고 relevance를 통과한 step
+        if not (result.is_tool_label and result.relevance_pass):
+            return
+        self.format_den += 1
+        if result.format_pass is not True:
+            return
+        self.format_num += 1
+
+        # 3. function
+        self.function_den += 1
+        if result.function_pass is not True:
+            return
+        self.function_num += 1
+
+        # 4. hallucination (스키마가 없으면 N/A → 분모 제외, 다음 단계는 진행)
+        if result.hallucination_pass is not None:
+            self.halluc_den += 1
+            self.halluc_num += result.hallucination_pass is True
+        if result.hallucination_pass is False:
+            return
+
+        # 5. required
+        self.required_den += 1
+        if result.required_pass is not True:
+            return
+        self.required_num += 1
+
+        # 6. type (스키마가 없으면 N/A)
+        if result.type_pass is not None:
+            self.type_den += 1
+            self.type_num += result.type_pass is True
+        if result.type_pass is False:
+            return
+
+        # 7. value
+        self.value_den += 1
+        self.value_num += result.value_pass is True
+
+    def merge(self, other: "EvalAccumulator") -> None:
+        for name in self._COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def result(self) -> EvalResults:
+        if self.total_samples == 0:
+            return EvalResults()
+
+        def _ratio(num: int, den: int, na_value: float = 0.0) -> float:
+            return num / den if den > 0 else na_value
+
+        return EvalResults(
+            relevance_detection_acc=_ratio(self.relevance_num, self.relevance_den),
+            format_compliance_acc=_ratio(self.format_num, self.format_den),
+            function_matching_acc=_ratio(self.function_num, self.function_den),
+            param_hallucination_acc=_ratio(self.halluc_num, self.halluc_den, -1.0),
+            required_params_acc=_ratio(self.required_num, self.required_den),
+            argument_type_acc=_ratio(self.type_num, self.type_den, -1.0),
+            argument_value_acc=_ratio(self.value_num, self.value_den),
+            total_samples=self.total_samples,
+            total_tool_calls=self.total_tool_calls,
+            total_non_tool_calls=self.total_samples - self.total_tool_calls,
+            relevance_detection_numerator=self.relevance_num,
+            format_compliance_numerator=self.format_num,
+            function_matching_numerator=self.function_num,
+            param_hallucination_numerator=self.halluc_num,
+            required_params_numerator=self.required_num,
+            argument_type_numerator=self.type_num,
+            argument_value_numerator=self.value_num,
+            relevance_detection_denominator=self.relevance_den,
+            format_compliance_denominator=self.format_den,
+            function_matching_denominator=self.function_den,
+            param_hallucination_denominator=self.halluc_den,
+            required_params_denominator=self.required_den,
+            argument_type_denominator=self.type_den,
+            argument_value_denominator=self.value_den,
+        )
+
+
+def _step_checkers(tool_schemas, num_steps: int) -> list[ToolChecker | None]:
+    """
+    단일 스키마(모든 step 공통) 또는 step별 스키마 리스트를 step별 ToolChecker로 펼친다.
+
+    step별 리스트에서 같은 dict 객체는 이 호출 안에서 한 번만 컴파일한다.
+    """
+    if isinstance(tool_schemas, list):
+        if len(tool_schemas) != num_steps:
+            raise ValueError(f"step별 tool_schemas({len(tool_schemas)})와 step 수({num_steps})가 다릅니다.")
+        compiled: dict[int, ToolChecker | None] = {}
+        checkers = []
+        for schemas in tool_schemas:
+            if id(schemas) not in compiled:
+                compiled[id(schemas)] = compile_tool_schemas(schemas)
+            checkers.append(compiled[id(schemas)])
+        return checkers
+    return [compile_tool_schemas(tool_schemas)] * num_steps
+
+
+def evaluate_step_shard(
     labels: list[str],
     predictions: list[str],
-    tool_schemas: dict | None = None,
-) -> EvalResults:
-    """step 리스트를 계획서 기준 micro acc로 집계한다."""
+    tool_schemas: dict | ToolChecker | list | None = None,
+) -> tuple[list[StepEvaluation], EvalAccumulator]:
+    """
+    step 묶음을 한 번씩만 평가해 step 결과와 부분 집계기를 함께 반환한다 (프로세스 풀 작업 단위).
+
+    tool_schemas는 모든 step 공통 스키마(dict / ToolChecker) 또는 labels와 같은 길이의 step별 리스트.
+    """
+    accumulator = EvalAccumulator()
+    step_results = []
+    checkers = _step_checkers(tool_schemas, len(labels))
+    for label, pred, checker in zip(labels, predictions, checkers):
+        step_result = evaluate_function_call_step(label, pred, tool_schemas=checker)
+        accumulator.add(step_result)
+        step_results.append(step_result)
+    return step_results, accumulator
+
+
+def score_steps(
+    labels: list[str],
+    predictions: list[str],
+    tool_schemas: dict | ToolChecker | list | None = None,
+    workers: int = 1,
+) -> tuple[list[StepEvaluation], EvalResults]:
+    """
+    각 step을 한 번만 평가해 step 결과 리스트와 집계된 EvalResults를 함께 반환한다.
+
+    workers > 1이면 입력을 연속 구간 shard로 나눠 프로세스 풀에서 평가하고,
+    shard별 부분 카운터를 합친다. 카운터는 정수이므로 결과는 workers 수와 무관하게 동일하다.
+
+    Parameters
+    ----------
+    labels : GT 응답 리스트
+    predictions : 모델 예측 리스트
+    tool_schemas : {함수명: {properties, required}} 형태의 스키마 또는 ToolChecker (없으면 None).
+        대화마다 tool 구성이 다르면 labels와 같은 길이의 step별 리스트 (ToolCheckerIndex.for_records)
+    workers : 평가 프로세스 수 (1이면 현재 프로세스에서 평가)
+
+    Returns
+    -------
+    (입력 순서의 StepEvaluation 리스트, EvalResults)
+    """
     if len(labels) != len(predictions):
         raise ValueError(
             f"labels({len(labels)})와 predictions({len(predictions)}) 길이가 다릅니다."
         )
 
-    if not labels:
-        return EvalResults()
-
-    step_results = [
-        evaluate_function_call_step(label, pred, tool_schemas=tool_schemas)
-        for label, pred in zip(labels, predictions)
-    ]
-
-    total_samples = len(step_results)
-    total_tool_calls = sum(result.is_tool_label for result in step_results)
-    total_non_tool_calls = total_samples - total_tool_calls
-
-    relevance_den = total_samples
-    relevance_num = sum(result.relevance_pass for result in step_results)
-
-    format_targets = [
-        result for result in step_results
-        if result.is_tool_label and result.relevance_pass
-    ]
-    format_den = len(format_targets)
-    format_num = sum(result.format_pass is True for result in format_targets)
-
-    function_targets = [result for result in format_targets if result.format_pass is True]
-    function_den = len(function_targets)
-    function_num = sum(result.function_pass is True for result in function_targets)
-
-    halluc_targets = [result for result in function_targets if result.function_pass is True]
-    halluc_defined = [result for result in halluc_targets if result.hallucination_pass is not None]
-    halluc_den = len(halluc_defined)
-    halluc_num = sum(result.hallucination_pass is True for result in halluc_defined)
-
-    required_targets = [
-        result for result in halluc_targets
-        if result.hallucination_pass is not False
-    ]
-    required_den = len(required_targets)
-    required_num = sum(result.required_pass is True for result in required_targets)
-
-    type_targets = [result for result in required_targets if result.required_pass is True]
-    type_defined = [result for result in type_targets if result.type_pass is not None]
-    type_den = len(type_defined)
-    type_num = sum(result.type_pass is True for result in type_defined)
-
-    value_targets = [result for result in type_targets if result.type_pass is not False]
-    value_den = len(value_targets)
-    value_num = sum(result.value_pass is True for result in value_targets)
-
-    def _ratio(num: int, den: int, na_value: float = 0.0) -> float:
-        return num / den if den > 0 else na_value
-
-    return EvalResults(
-        relevance_detection_acc=_ratio(relevance_num, relevance_den),
-        format_compliance_acc=_ratio(format_num, format_den),
-        function_matching_acc=_ratio(function_num, function_den),
-        param_hallucination_acc=_ratio(halluc_num, halluc_den, -1.0),
-        required_params_acc=_ratio(required_num, required_den),
-        argument_type_acc=_ratio(type_num, type_den, -1.0),
-        argument_value_acc=_ratio(value_num, value_den),
-        total_samples=total_samples,
-        total_tool_calls=total_tool_calls,
-        total_non_tool_calls=total_non_tool_calls,
-        relevance_detection_numerator=relevance_num,
-        format_compliance_numerator=format_num,
-        function_matching_numerator=function_num,
-        param_hallucination_numerator=halluc_num,
-        required_params_numerator=required_num,
-        argument_type_numerator=type_num,
-        argument_value_numerator=value_num,
-        relevance_detection_denominator=relevance_den,
-        format_compliance_denominator=format_den,
-        function_matching_denominator=function_den,
-        param_hallucination_denominator=halluc_den,
-        required_params_denominator=required_den,
-        argument_type_denominator=type_den,
-        argument_value_denominator=value_den,
+    if workers <= 1 or len(labels) < 2:
+        step_results, accumulator = evaluate_step_shard(labels, predictions, tool_schemas)
+        return step_results, accumulator.result()
+
+    # 스키마는 부모 프로세스에서 한 번 컴파일해 shard마다 step별 checker로 넘긴다
+    checkers = _step_checkers(tool_schemas, len(labels))
+    # worker 간 부하 편차를 줄이도록 worker당 4개 shard로 나눈다
+    shard_size = -(-len(labels) // (workers * 4))
+    step_results = []
+    accumulator = EvalAccumulator()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                evaluate_step_shard,
+                labels[start:start + shard_size],
+                predictions[start:start + shard_size],
+                checkers[start:start + shard_size],
+            )
+            for start in range(0, len(labels), shard_size)
+        ]
+        for future in futures:
+            shard_results, shard_accumulator = future.result()
+            step_results.extend(shard_results)
+            accumulator.merge(shard_accumulator)
+
+    return step_results, accumulator.result()
+
+
+def evaluate_function_calls(
+    labels: list[str],
+    predictions: list[str],
+    tool_schemas: dict | ToolChecker | list | None = None,
+) -> EvalResults:
+    """step 리스트를 계획서 기준 micro acc로 집계한다."""
+    _, results = score_steps(labels, predictions, tool_schemas=tool_schemas)
+    return results
+
+
+def stage_confidence_intervals(
+    conversation_ids: list[int],
+    step_results: list[StepEvaluation],
+    n_bootstrap: int,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> dict[str, tuple[float, float]]:
+    """
+    7단계 acc에 대한 대화 단위 cluster bootstrap 신뢰구간.
+
+    단계별 분모는 "해당 단계 판정이 None이 아닌 step", 분자는 "판정이 True인 step"으로
+    EvalAccumulator의 의존 체인 필터링과 같다. 대화별 분자/분모 합을 재표본한다.
+
+    Parameters
+    ----------
+    conversation_ids : step별 conversation_id (step_results와 같은 순서)
+    step_results : StepEvaluation 리스트
+    n_bootstrap : 재표본 수
+    confidence : 신뢰수준
+    seed : 난수 시드
+    """
+    import numpy as np
+
+    from evaluations.bootstrap import cluster_bootstrap_ratios, percentile_interval
+
+    if not step_results or n_bootstrap <= 0:
+        return {}
+
+    field_names = [field_name for _, field_name in STAGE_FIELDS]
+    evaluated = np.array(
+        [[getattr(step, name) is not None for name in field_names] for step in step_results],
+        dtype=np.float64,
+    )
+    passed = np.array(
+        [[getattr(step, name) is True for name in field_names] for step in step_results],
+        dtype=np.float64,
     )
+
+    conv_ids = np.asarray(conversation_ids)
+    order = np.argsort(conv_ids, kind="stable")
+    sorted_ids = conv_ids[order]
+    conv_starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    numerators = np.add.reduceat(passed[order], conv_starts, axis=0)
+    denominators = np.add.reduceat(evaluated[order], conv_starts, axis=0)
+
+    samples = cluster_bootstrap_ratios(numerators, denominators, n_bootstrap, seed)
+    low, high = percentile_interval(samples, confidence)
+    return {
+        f"{stage}_acc": (float(low[index]), float(high[index]))
+        for index, (stage, _) in enumerate(STAGE_FIELDS)
+        if not np.isnan(low[index])
+    }
@@ -5,10 +5,20 @@ Turn pass 여부가 먼저 계산된 상태를 입력으로 받아
 eval/eval_plan.md 기준 Turn / Conversation Level 지표를 집계한다.
 """
 
+from array import array
 from dataclasses import dataclass, field
 
 from evaluations.metrics import EvalResults
 
+# bootstrap 신뢰구간을 계산하는 MultiTurnResults 지표 (conversation_turn_statistics 순서)
+MULTI_TURN_METRICS = (
+    "turn_level_accuracy",
+    "conversation_success_rate",
+    "conversation_progress_rate",
+    "first_failure_turn_avg",
+    "error_cascade_rate",
+)
+
 
 @dataclass
 class MultiTurnResults:
@@ -30,8 +40,12 @@ class MultiTurnResults:
 
     aggregated: EvalResults = field(default_factory=EvalResults)
 
+    # 대화 단위 cluster bootstrap 신뢰구간 (n_bootstrap > 0일 때만 채워짐)
+    confidence_level: float = 0.95
+    confidence_intervals: dict[str, tuple[float, float]] = field(default_factory=dict)
+
     def to_dict(self) -> dict:
-        return {
+        result = {
             "turn_level_accuracy": self.turn_level_accuracy,
             "conversation_success_rate": self.conversation_success_rate,
             "conversation_progress_rate": self.conversation_progress_rate,
@@ -39,88 +53,227 @@ class MultiTurnResults:
             "error_cascade_rate": self.error_cascade_rate,
             "total_conversations": self.total_conversations,
             "total_turns": self.total_turns,
-            "aggregated": self.aggregated.to_dict(),
         }
+        if self.confidence_intervals:
+            result["confidence_level"] = self.confidence_level
+            result["confidence_intervals"] = {
+                name: list(interval) for name, interval in self.confidence_intervals.items()
+            }
+        result["aggregated"] = self.aggregated.to_dict()
+        return result
 
     def summary(self) -> str:
+        def _ci(name: str, scale: float = 100.0, unit: str = "%") -> str:
+            if name not in self.confidence_intervals:
+                return ""
+            low, high = self.confidence_intervals[name]
+            return f" [{self.confidence_level * 100:.0f}% CI {low * scale:.2f}–{high * scale:.2f}{unit}]"
+
         return (
             f"[MultiTurnResults] conversations={self.total_conversations}, turns={self.total_turns}\n"
-            f"  turn_level_accuracy:       {self.turn_level_accuracy * 100:.2f}% ({self.turn_pass_total}/{self.total_turns}) - 턴 단위 정답률\n"
-            f"  conversation_success_rate: {self.conversation_success_rate * 100:.2f}% ({self.conversation_successes}/{self.total_conversations}) - 대화 전체 성공률\n"
-            f"  conversation_progress_rate:{self.conversation_progress_rate * 100:.2f}% - 대화별 평균 진행률\n"
-            f"  first_failure_turn_avg:    {self.first_failure_turn_avg:.2f} - 첫 실패 턴 평균\n"
-            f"  error_cascade_rate:        {self.error_cascade_rate * 100:.2f}% ({self.cascade_hits}/{self.cascade_opportunities}) - 연속 실패 비율"
+            f"  turn_level_accuracy:       {self.turn_level_accuracy * 100:.2f}% ({self.turn_pass_total}/{self.total_turns}){_ci('turn_level_accuracy')} - 턴 단위 정답률\n"
+            f"  conversation_success_rate: {self.conversation_success_rate * 100:.2f}% ({self.conversation_successes}/{self.total_conversations}){_ci('conversation_success_rate')} - 대화 전체 성공률\n"
+            f"  conversation_progress_rate:{self.conversation_progress_rate * 100:.2f}%{_ci('conversation_progress_rate')} - 대화별 평균 진행률\n"
+            f"  first_failure_turn_avg:    {self.first_failure_turn_avg:.2f}{_ci('first_failure_turn_avg', 1.0, '')} - 첫 실패 턴 평균\n"
+            f"  error_cascade_rate:        {self.error_cascade_rate * 100:.2f}% ({self.cascade_hits}/{self.cascade_opportunities}){_ci('error_cascade_rate')} - 연속 실패 비율"
         )
 
 
-def evaluate_multi_turn(
-    conv_turn_passes: list[list[bool]],
-    aggregated: EvalResults | None = None,
-) -> MultiTurnResults:
+class MultiTurnAccumulator:
     """
-    대화별 turn pass/fail 결과를 받아 Turn / Conversation Level 지표를 계산한다.
+    대화 단위 turn pass 결과를 하나씩 받아 Turn / Conversation Level 지표를 누적하는 집계기.
 
-    Parameters
-    ----------
-    conv_turn_passes : conv_turn_passes[i][j] = i번째 대화 j번째 턴의 pass 여부
-    aggregated : 전체 step에 대한 Tool Call Level 집계 결과
+    대화 순서대로 add_conversation()을 호출하면 evaluate_multi_turn과 같은 결과를 만든다.
+    progress rate는 sum()과 같은 합산 결과를 내도록 대화당 float 하나(8바이트)만 array로 보관하고,
+    나머지는 정수 카운터로만 누적한다.
     """
-    if not conv_turn_passes:
-        return MultiTurnResults(aggregated=aggregated or EvalResults())
 
-    total_turns = sum(len(turns) for turns in conv_turn_passes)
-    if total_turns == 0:
-        return MultiTurnResults(
-            total_conversations=len(conv_turn_passes),
-            aggregated=aggregated or EvalResults(),
-        )
+    def __init__(self):
+        self.total_conversations = 0
+        self.total_turns = 0
+        self.turn_pass_total = 0
+        self.conversation_successes = 0
+        self.progress_rates = array("d")
+        self.first_failure_sum = 0
+        self.first_failure_count = 0
+        self.cascade_opportunities = 0
+        self.cascade_hits = 0
 
-    turn_pass_total = 0
-    conversation_successes = 0
-    progress_rates = []
-    first_failures = []
-    cascade_opportunities = 0
-    cascade_hits = 0
+    def add_conversation(self, turn_results: list[bool]) -> None:
+        self.total_conversations += 1
+        self.total_turns += len(turn_results)
 
-    for turn_results in conv_turn_passes:
         if not turn_results:
-            progress_rates.append(0.0)
-            continue
+            self.progress_rates.append(0.0)
+            return
 
         pass_count = sum(turn_results)
-        turn_pass_total += pass_count
+        self.turn_pass_total += pass_count
 
         if all(turn_results):
-            conversation_successes += 1
+            self.conversation_successes += 1
 
-        progress_rates.append(pass_count / len(turn_results))
+        self.progress_rates.append(pass_count / len(turn_results))
 
         for index, passed in enumerate(turn_results):
             if not passed:
-                first_failures.append(index)
+                self.first_failure_sum += index
+                self.first_failure_count += 1
                 break
 
         for index in range(1, len(turn_results)):
             if not turn_results[index - 1]:
-                cascade_opportunities += 1
+                self.cascade_opportunities += 1
                 if not turn_results[index]:
-                    cascade_hits += 1
-
-    return MultiTurnResults(
-        turn_level_accuracy=turn_pass_total / total_turns,
-        conversation_success_rate=conversation_successes / len(conv_turn_passes),
-        conversation_progress_rate=sum(progress_rates) / len(progress_rates),
-        first_failure_turn_avg=(
-            sum(first_failures) / len(first_failures) if first_failures else -1.0
-        ),
-        error_cascade_rate=(
-            cascade_hits / cascade_opportunities if cascade_opportunities > 0 else 0.0
-        ),
-        total_conversations=len(conv_turn_passes),
-        total_turns=total_turns,
-        turn_pass_total=turn_pass_total,
-        conversation_successes=conversation_successes,
-        cascade_hits=cascade_hits,
-        cascade_opportunities=cascade_opportunities,
-        aggregated=aggregated or EvalResults(),
+                    self.cascade_hits += 1
+
+    def result(self, aggregated: EvalResults | None = None) -> MultiTurnResults:
+        if self.total_conversations == 0:
+            return MultiTurnResults(aggregated=aggregated or EvalResults())
+
+        if self.total_turns == 0:
+            return MultiTurnResults(
+                total_conversations=self.total_conversations,
+                aggregated=aggregated or EvalResults(),
+            )
+
+        return MultiTurnResults(
+            turn_level_accuracy=self.turn_pass_total / self.total_turns,
+            conversation_success_rate=self.conversation_successes / self.total_conversations,
+            conversation_progress_rate=sum(self.progress_rates) / len(self.progress_rates),
+            first_failure_turn_avg=(
+                self.first_failure_sum / self.first_failure_count
+                if self.first_failure_count else -1.0
+            ),
+            error_cascade_rate=(
+                self.cascade_hits / self.cascade_opportunities
+                if self.cascade_opportunities > 0 else 0.0
+            ),
+            total_conversations=self.total_conversations,
+            total_turns=self.total_turns,
+            turn_pass_total=self.turn_pass_total,
+            conversation_successes=self.conversation_successes,
+            cascade_hits=self.cascade_hits,
+            cascade_opportunities=self.cascade_opportunities,
+            aggregated=aggregated or EvalResults(),
+        )
+
+
+def conversation_turn_statistics(turn_pass, conv_starts):
+    """
+    평탄화된 턴 pass 행렬에서 MultiTurn 지표별 대화 단위 분자/분모를 계산한다.
+
+    각 지표는 (대화별 분자 합) / (대화별 분모 합)으로 표현되어 cluster bootstrap에 그대로 쓸 수 있다.
+
+    Parameters
+    ----------
+    turn_pass : (T, R) bool — 대화 순·턴 순으로 평탄화한 턴 pass 여부 (R = run 수, 단일 run이면 1)
+    conv_starts : (C,) 각 대화의 첫 턴 위치 (빈 대화 없음)
+
+    Returns
+    -------
+    numerators, denominators : (C, 5, R) — MULTI_TURN_METRICS 순서
+    """
+    import numpy as np
+
+    num_turns, run_count = turn_pass.shape
+    turn_counts = np.diff(np.r_[conv_starts, num_turns])
+
+    turns_per_conv = np.repeat(turn_counts[:, None].astype(np.float64), run_count, axis=1)
+    pass_per_conv = np.add.reduceat(turn_pass.astype(np.float64), conv_starts, axis=0)
+    success = (pass_per_conv == turns_per_conv).astype(np.float64)
+    progress = pass_per_conv / turns_per_conv
+    ones = np.ones_like(success)
+
+    # 대화 내 턴 위치 (0부터)
+    position = np.arange(num_turns) - np.repeat(conv_starts, turn_counts)
+    failed = ~turn_pass
+    no_failure = np.iinfo(np.int64).max
+    first_failure = np.minimum.reduceat(
+        np.where(failed, position[:, None], no_failure), conv_starts, axis=0,
     )
+    has_failure = (first_failure != no_failure).astype(np.float64)
+    first_failure = np.where(has_failure > 0, first_failure, 0).astype(np.float64)
+
+    previous_failed = np.roll(failed, 1, axis=0)
+    previous_failed[conv_starts] = False
+    cascade_opportunities = np.add.reduceat(previous_failed.astype(np.float64), conv_starts, axis=0)
+    cascade_hits = np.add.reduceat((previous_failed & failed).astype(np.float64), conv_starts, axis=0)
+
+    numerators = np.stack([pass_per_conv, success, progress, first_failure, cascade_hits], axis=1)
+    denominators = np.stack([turns_per_conv, ones, ones, has_failure, cascade_opportunities], axis=1)
+    return numerators, denominators
+
+
+def multi_turn_confidence_intervals(
+    conv_turn_passes: list[list[bool]],
+    n_bootstrap: int,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> dict[str, tuple[float, float]]:
+    """
+    대화를 재표본 단위로 하는 cluster bootstrap 신뢰구간.
+
+    턴 pass를 하나의 NumPy 행렬로 평탄화해 대화별 분자/분모를 만든 뒤 재표본 전체를 행렬 곱으로 계산한다.
+    턴이 없는 대화는 conversation_success_rate / conversation_progress_rate의 분모에만 포함된다.
+    """
+    import numpy as np
+
+    from evaluations.bootstrap import cluster_bootstrap_ratios, percentile_interval
+
+    if not conv_turn_passes or n_bootstrap <= 0:
+        return {}
+
+    lengths = np.array([len(turns) for turns in conv_turn_passes])
+    non_empty = lengths > 0
+    numerators = np.zeros((len(conv_turn_passes), len(MULTI_TURN_METRICS)))
+    denominators = np.zeros_like(numerators)
+    denominators[:, 1:3] = 1.0
+
+    if non_empty.any():
+        turn_pass = np.fromiter(
+            (passed for turns in conv_turn_passes for passed in turns), dtype=bool, count=lengths.sum(),
+        )[:, None]
+        conv_starts = np.r_[0, np.cumsum(lengths[non_empty])[:-1]]
+        conv_num, conv_den = conversation_turn_statistics(turn_pass, conv_starts)
+        numerators[non_empty] = conv_num[:, :, 0]
+        denominators[non_empty] = conv_den[:, :, 0]
+
+    samples = cluster_bootstrap_ratios(numerators, denominators, n_bootstrap, seed)
+    low, high = percentile_interval(samples, confidence)
+    return {
+        name: (float(low[index]), float(high[index]))
+        for index, name in enumerate(MULTI_TURN_METRICS)
+        if not np.isnan(low[index])
+    }
+
+
+def evaluate_multi_turn(
+    conv_turn_passes: list[list[bool]],
+    aggregated: EvalResults | None = None,
+    n_bootstrap: int = 0,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> MultiTurnResults:
+    """
+    대화별 turn pass/fail 결과를 받아 Turn / Conversation Level 지표를 계산한다.
+
+    Parameters
+    ----------
+    conv_turn_passes : conv_turn_passes[i][j] = i번째 대화 j번째 턴의 pass 여부
+    aggregated : 전체 step에 대한 Tool Call Level 집계 결과
+    n_bootstrap : 0보다 크면 대화 단위 cluster bootstrap 신뢰구간을 함께 계산
+    confidence : 신뢰수준
+    seed : bootstrap 난수 시드
+    """
+    accumulator = MultiTurnAccumulator()
+    for turn_results in conv_turn_passes:
+        accumulator.add_conversation(turn_results)
+    results = accumulator.result(aggregated)
+
+    if n_bootstrap > 0:
+        results.confidence_level = confidence
+        results.confidence_intervals = multi_turn_confidence_intervals(
+            conv_turn_passes, n_bootstrap, confidence, seed,
+        )
+    return results
@@ -0,0 +1,99 @@
+"""
+평가 실행 단계별 wall time / 처리량 계측.
+
+runner·api_runner(evaluations.pipeline), scorer, merge가 같은 PerfRecorder에 단계 시간과 카운터를 쌓고,
+score_predictions가 eval_results.json의 perf 섹션과 eval_results.csv의 perf_* 컬럼으로 기록한다.
+
+  stages      : 단계별 wall time (초). 같은 이름의 단계를 여러 번 재면 합산한다.
+  counters    : steps, generated_steps, prompt_tokens, completion_tokens 등 정수 카운터
+  파생 지표    : steps_per_sec (전체 step / 전체 시간),
+                inference_steps_per_sec (실제 생성한 step / inference 시간),
+                generated_tokens_per_sec (completion 토큰 / inference 시간)
+
+사용:
+    perf = PerfRecorder()
+    with perf.stage("load"):
+        conversations = load_conversations(path)
+    perf.count("steps", len(inputs))
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class PerfRecorder:
+    """단계별 wall time과 정수 카운터를 모으는 경량 계측기."""
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """with 블록의 wall time을 name 단계에 더한다 (예외로 빠져나와도 기록)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_token_counts(self, token_counts: dict[int, tuple[int, int]]) -> None:
+        """백엔드가 기록한 {입력 인덱스: (prompt 토큰 수, completion 토큰 수)}를 합산한다."""
+        if not token_counts:
+            return
+        self.count("prompt_tokens", sum(prompt for prompt, _ in token_counts.values()))
+        self.count("completion_tokens", sum(completion for _, completion in token_counts.values()))
+
+    def copy(self) -> "PerfRecorder":
+        """지금까지의 측정값을 복사한 새 계측기 (LoRA sweep에서 어댑터별 스코어링 시간을 따로 잴 때)."""
+        clone = PerfRecorder()
+        clone.stages = dict(self.stages)
+        clone.counters = dict(self.counters)
+        return clone
+
+    def to_dict(self) -> dict:
+        """eval_results.json perf 섹션."""
+        total = sum(self.stages.values())
+        inference = self.stages.get("inference", 0.0)
+        steps = self.counters.get("steps")
+        generated_steps = self.counters.get("generated_steps")
+        completion_tokens = self.counters.get("completion_tokens")
+        return {
+            "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "total_seconds": round(total, 6),
+            **self.counters,
+            "steps_per_sec": _rate(steps, total),
+            "inference_steps_per_sec": _rate(generated_steps, inference),
+            "generated_tokens_per_sec": _rate(completion_tokens, inference),
+        }
+
+    def summary(self) -> str:
+        stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.stages.items())
+        perf = self.to_dict()
+        rates = [
+            f"{label} {perf[key]:,.1f}"
+            for key, label in (
+                ("steps_per_sec", "steps/s"),
+                ("inference_steps_per_sec", "생성 steps/s"),
+                ("generated_tokens_per_sec", "생성 tokens/s"),
+            )
+            if perf[key] is not None
+        ]
+        return f"[perf] 총 {perf['total_seconds']:.2f}s ({stages})" + (f" | {', '.join(rates)}" if rates else "")
+
+
+def _rate(count: int | None, seconds: float) -> float | None:
+    if count is None or seconds <= 0:
+        return None
+    return round(count / seconds, 3)
+
+
+def flatten_perf(perf: dict) -> dict:
+    """perf 섹션을 eval_results.csv 컬럼(perf_<단계>_seconds, perf_<카운터>)으로 펼친다."""
+    flat = {f"perf_{name}_seconds": seconds for name, seconds in perf["stages"].items()}
+    flat.update({f"perf_{key}": value for key, value in perf.items() if key != "stages"})
+    return flat
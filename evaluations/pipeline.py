@@ -0,0 +1,440 @@
+"""
+백엔드 공통 평가 파이프라인.
+
+데이터 로드 → 싱글턴 분할 → 샤드 선택 → resume → 디코딩 정책 → 백엔드 추론 전 검사
+→ 예측 캐시 + 백엔드 생성 (완료 step은 partial 로그에 즉시 기록) → predictions 저장 → 스코어링.
+추론 호출만 InferenceBackend(evaluations.backends)로 바뀌고 나머지 흐름은 모든 백엔드가 공유한다.
+runner(vLLM)와 api_runner(OpenAI)의 run_evaluation도 이 파이프라인을 사용한다.
+variants가 있는 백엔드(여러 LoRA 어댑터를 실은 VLLMBackend)는 입력마다 variant별 요청을 만들어 한 번에 추론하고,
+예측 로그·predictions·평가 결과를 variant별 디렉토리에 나눠 저장한다.
+
+실행:
+    # GT를 그대로 예측으로 돌려 모델 외 구간(분할·캐시·로그·스코어링) 처리량 측정 (GPU 불필요)
+    python -m evaluations.pipeline --backend replay --replay gt \\
+        --dataset eval_data/dataset.jsonl \\
+        --output eval_output_replay
+
+    # 기존 predictions.jsonl 재생 (다른 디코딩 정책 예산·샤드 구성으로 다시 흘려보내기)
+    python -m evaluations.pipeline --backend replay --replay eval_output/predictions.jsonl \\
+        --dataset eval_data/dataset.jsonl \\
+        --output eval_output_replay
+
+    # transformers로 CPU에서 작은 모델 평가
+    python -m evaluations.pipeline --backend hf \\
+        --model Qwen/Qwen2.5-0.5B-Instruct \\
+        --dataset eval_data/dataset.jsonl \\
+        --output eval_output_hf --max-new-tokens 64
+"""
+
+import argparse
+import json
+import os
+from contextlib import ExitStack
+from pathlib import Path
+
+from evaluations.backends import BACKENDS, InferenceBackend, capabilities, load_backend
+from evaluations.decoding_policy import (
+    DecodingPolicy,
+    budget_hit_report,
+    build_decoding_policy,
+    format_policy,
+)
+from evaluations.perf import PerfRecorder
+from evaluations.prediction_cache import PredictionCache, cached_inference
+from evaluations.prediction_log import (
+    PredictionLog,
+    finalize_records,
+    input_key,
+    load_partial_records,
+    make_record,
+    record_key,
+)
+from evaluations.sharding import prediction_filenames, select_shard
+
+
+def load_conversations(dataset_path: str) -> list[dict]:
+    """JSONL 파일 또는 HuggingFace 데이터셋 ID에서 대화 목록을 로드한다."""
+    if os.path.exists(dataset_path):
+        with open(dataset_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    else:
+        # HuggingFace 데이터셋 ID로 간주
+        from datasets import load_dataset
+        ds = load_dataset(dataset_path, split="test")
+        return list(ds)
+
+
+def save_predictions(
+    records: list[dict],
+    output_dir: Path,
+    filename: str = "predictions.jsonl",
+) -> Path:
+    """predictions.jsonl 저장 (샤드 실행이면 filename에 샤드 파일명)."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    pred_path = output_dir / filename
+
+    with open(pred_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    return pred_path
+
+
+def variant_output_dirs(variants: list[str], output_path: Path) -> list[Path]:
+    """variant(어댑터 경로)별 결과 디렉토리 (디렉토리명, 겹치면 상위 디렉토리명을 붙임)."""
+    names: list[str] = []
+    for variant in variants:
+        path = Path(variant.rstrip("/"))
+        name = path.name
+        if name in names:
+            name = f"{path.parent.name}_{path.name}"
+        if name in names:
+            raise ValueError(f"variant 결과 디렉토리 이름이 겹칩니다: {variant}")
+        names.append(name)
+    return [output_path / name for name in names]
+
+
+def shard_inputs(inference_inputs: list, num_shards: int, shard_id: int) -> list:
+    """샤드 실행이면 shard_id 샤드의 입력만 남긴다."""
+    print(f"  총 InferenceInput 수: {len(inference_inputs)}")
+    sharded = select_shard(inference_inputs, num_shards, shard_id)
+    if num_shards > 1:
+        conversation_count = len({inp.conversation_id for inp in sharded})
+        print(f"  샤드 {shard_id}/{num_shards}: 대화 {conversation_count}개, InferenceInput {len(sharded)}개")
+    return sharded
+
+
+def pending_indices(inference_inputs: list, partial_path: Path, resume: bool) -> list[int]:
+    """추론할 입력 인덱스 (resume이면 predictions.partial.jsonl에 기록된 step 제외)."""
+    if not resume:
+        return list(range(len(inference_inputs)))
+    completed = {record_key(record) for record in load_partial_records(partial_path)}
+    pending = [i for i, inp in enumerate(inference_inputs) if input_key(inp) not in completed]
+    print(
+        f"  --resume: 완료 step {len(inference_inputs) - len(pending)}개 건너뜀, "
+        f"남은 step {len(pending)}개"
+    )
+    return pending
+
+
+def step_budgets(
+    inference_inputs: list,
+    max_new_tokens: int,
+    policy: DecodingPolicy | None,
+) -> list[int]:
+    """입력별 최대 생성 토큰 수 (정책이 있으면 step 유형별 예산)."""
+    if policy is None:
+        return [max_new_tokens] * len(inference_inputs)
+    return [policy.budget(inp) for inp in inference_inputs]
+
+
+def record_budget_hits(
+    policy: DecodingPolicy,
+    inputs: list,
+    finish_reasons: dict[int, str],
+    inference_stats: dict,
+) -> None:
+    """예산에 걸린 생성 수를 출력하고 inference_stats["decoding"]에 기록한다."""
+    hits = budget_hit_report(inputs, finish_reasons)
+    for name, counts in hits.items():
+        print(
+            f"  {name} step 예산 도달: {counts['budget_hits']}/{counts['generations']} "
+            f"(max_tokens={policy.max_tokens[name]})"
+        )
+    inference_stats["decoding"] = {**policy.to_dict(), "budget_hits": hits}
+
+
+def score_run(
+    records: list[dict],
+    conversations: list[dict],
+    output_path: Path,
+    model_name: str,
+    dataset_path: str,
+    cache_stats: dict | None,
+    inference_stats: dict | None,
+    perf: PerfRecorder | None = None,
+) -> None:
+    """
+    대화별 tool 스키마로 records를 스코어링해 output_path에 결과를 저장한다 (perf에 스코어링 단계 추가).
+
+    스키마는 대화마다 자기 tools로 컴파일하므로(ToolCheckerIndex) 대화별 tool 구성이 달라도 된다.
+    """
+    from evaluations.schema_checker import ToolCheckerIndex
+    from evaluations.scorer import score_predictions
+
+    tool_schemas = None
+    if any(conv.get("tools") for conv in conversations):
+        tool_schemas = ToolCheckerIndex.from_conversations(conversations)
+
+    score_predictions(
+        records=records,
+        tool_schemas=tool_schemas,
+        output_dir=output_path,
+        model_name=model_name,
+        dataset_name=dataset_path,
+        cache_stats=cache_stats,
+        inference_stats=inference_stats,
+        perf=perf,
+    )
+
+
+def run_pipeline(
+    backend: InferenceBackend,
+    dataset_path: str,
+    output_dir: str,
+    max_new_tokens: int = 512,
+    inference_only: bool = False,
+    cache_path: str | None = None,
+    resume: bool = False,
+    decoding_policy: bool = False,
+    budget_margin: float = 1.5,
+    num_shards: int = 1,
+    shard_id: int = 0,
+) -> None:
+    """
+    backend로 전체 평가 파이프라인을 실행한다.
+
+    1. 데이터 로드 → 싱글턴 분할 → 샤드 선택
+    2. 백엔드 추론 (완료 step은 predictions.partial.jsonl에 즉시 기록)
+    3. 정렬·중복 제거한 predictions.jsonl 저장
+    4. 메트릭 계산 + 결과 저장 (inference_only=True 또는 샤드 실행이면 생략)
+
+    단계별 wall time과 토큰·step 처리량은 PerfRecorder로 재서 eval_results.json의 perf 섹션에 기록한다
+    (스코어링을 생략하면 요약만 출력).
+
+    backend.variants(예: LoRA 어댑터 경로 리스트)가 있으면 (variant, 입력) 요청을 모아 한 번에 추론하고,
+    partial 로그·--resume·predictions·평가 결과는 variant마다 output_dir/<variant 디렉토리명>에 따로 둔다.
+    이때 cache_keys / generate에는 요청별 variant 인덱스를 variants 인자로 넘긴다.
+    캐시·추론 통계와 perf의 추론 단계는 전체 기준, 스코어링 단계는 variant별이다.
+    스트리밍 지연 시간을 재는 백엔드(OpenAIBackend stream_latency)는 레코드의 latency 필드에 step별 측정값을 남긴다.
+
+    Parameters
+    ----------
+    backend : InferenceBackend 구현 (evaluations.backends.load_backend 등)
+    dataset_path : 평가 데이터셋 경로 또는 HuggingFace ID
+    output_dir : 결과 저장 디렉토리
+    max_new_tokens : 최대 생성 토큰 수
+    inference_only : True이면 predictions.jsonl 저장 후 스코어링 생략
+    cache_path : 예측 캐시 SQLite 경로 (None이면 캐시 미사용)
+    resume : True이면 partial 로그에 기록된 step을 건너뛰고 나머지만 추론
+    decoding_policy : True이면 GT 길이 기반 step 유형별 토큰 예산으로 생성
+        (backend.supports_stop이면 step 유형별 stop sequence도 적용)
+    budget_margin : 토큰 예산 = GT 유형별 최대 길이 × budget_margin (max_new_tokens 이하)
+    num_shards, shard_id : num_shards > 1이면 conversation_id 해시로 나눈 shard_id 샤드만 추론하고
+        샤드 predictions 파일만 저장한다 (스코어링은 evaluations.merge로 샤드를 합친 뒤 수행)
+    """
+    from evaluations.turn_splitter import split_conversations
+
+    output_path = Path(output_dir)
+    perf = PerfRecorder()
+
+    # 1. 데이터 로드 및 싱글턴 분할
+    print(f"[1/4] 데이터셋 로드: {dataset_path}")
+    with perf.stage("load"):
+        conversations = load_conversations(dataset_path)
+    print(f"  총 대화 수: {len(conversations)}")
+
+    with perf.stage("split"):
+        all_inputs = split_conversations(conversations)
+        inference_inputs = shard_inputs(all_inputs, num_shards, shard_id)
+    predictions_filename, partial_filename = prediction_filenames(num_shards, shard_id)
+
+    # 2. 백엔드 추론 (variant가 없는 백엔드는 output_dir 하나를 쓰는 variant 0으로 본다)
+    print(f"[2/4] 추론 시작: {backend.model_name} (backend={backend.name})")
+    variants = getattr(backend, "variants", None)
+    variant_dirs = variant_output_dirs(variants, output_path) if variants else [output_path]
+    pending_by_variant = []
+    for variant, variant_dir in zip(variants or [None], variant_dirs):
+        if variant is not None:
+            print(f"  {variant} → {variant_dir}")
+        pending_by_variant.append(pending_indices(inference_inputs, variant_dir / partial_filename, resume))
+    pending = sorted(set().union(*pending_by_variant))
+    perf.count("steps", len(inference_inputs) * len(variant_dirs))
+    inference_stats: dict = {"backend": capabilities(backend)}
+    with perf.stage("prepare"):
+        policy = None
+        if decoding_policy:
+            # 예산은 resume·샤드 여부와 관계없이 eval 세트 전체 GT 길이로 정한다
+            policy = build_decoding_policy(
+                all_inputs,
+                max_new_tokens,
+                count_tokens=backend.token_counter(),
+                margin=budget_margin,
+                stop_sequences=backend.supports_stop,
+            )
+            print(f"  디코딩 정책: {format_policy(policy)}")
+        skipped = backend.prepare(
+            inference_inputs,
+            pending,
+            step_budgets(inference_inputs, max_new_tokens, policy),
+            inference_stats,
+        )
+    skipped_set = set(skipped)
+    # 요청 = (variant 인덱스, 입력 인덱스)
+    requests = [(v, i) for v, indices in enumerate(pending_by_variant) for i in indices if i not in skipped_set]
+    skipped_requests = [(v, i) for v, indices in enumerate(pending_by_variant) for i in indices if i in skipped_set]
+    pending_inputs = [inference_inputs[i] for _, i in requests]
+    request_variants = [v for v, _ in requests] if variants else None
+    budgets = step_budgets(pending_inputs, max_new_tokens, policy)
+    stops = None
+    if policy is not None and backend.supports_stop:
+        stops = [policy.stop_sequences(inp) for inp in pending_inputs]
+
+    cache = PredictionCache(cache_path) if cache_path else None
+    finish_reasons: dict[int, str] = {}
+    token_counts: dict[int, tuple[int, int]] = {}
+    latencies: dict[int, dict] = {}
+    predictions: list[str] = []
+    with ExitStack() as stack:
+        prediction_logs = [
+            stack.enter_context(PredictionLog(variant_dir / partial_filename, resume=resume))
+            for variant_dir in variant_dirs
+        ]
+        for variant_index, index in skipped_requests:
+            prediction_logs[variant_index].write(make_record(inference_inputs[index], ""))
+        if pending_inputs:
+
+            def _variant_kwargs(indices: list[int]) -> dict:
+                if request_variants is None:
+                    return {}
+                return {"variants": [request_variants[i] for i in indices]}
+
+            def _infer(indices: list[int], notify) -> list[str]:
+                batch_reasons: dict[int, str] = {}
+                batch_tokens: dict[int, tuple[int, int]] = {}
+                batch_latencies: dict[int, dict] = {}
+
+                def _notify(position: int, prediction: str) -> None:
+                    # 레코드를 쓰기 전에 지연 시간을 입력 인덱스로 옮겨 둔다
+                    if position in batch_latencies:
+                        latencies[indices[position]] = batch_latencies[position]
+                    notify(position, prediction)
+
+                outputs = backend.generate(
+                    [pending_inputs[i] for i in indices],
+                    [budgets[i] for i in indices],
+                    stops=[stops[i] for i in indices] if stops is not None else None,
+                    on_result=_notify,
+                    finish_reasons=batch_reasons,
+                    inference_stats=inference_stats,
+                    token_counts=batch_tokens,
+                    latencies=batch_latencies,
+                    **_variant_kwargs(indices),
+                )
+                finish_reasons.update(
+                    (indices[position], reason) for position, reason in batch_reasons.items()
+                )
+                token_counts.update(
+                    (indices[position], counts) for position, counts in batch_tokens.items()
+                )
+                perf.count("generated_steps", len(indices))
+                return outputs
+
+            # 프롬프트 렌더링이 필요한 백엔드는 prepare에서 한 번 렌더링해 두고 여기서는 키만 해시한다
+            with perf.stage("prompt_build"):
+                keys = backend.cache_keys(
+                    pending_inputs, budgets, stops, **_variant_kwargs(range(len(pending_inputs)))
+                )
+
+            def _write(index: int, prediction: str) -> None:
+                record = make_record(pending_inputs[index], prediction)
+                if index in latencies:
+                    record["latency"] = latencies[index]
+                prediction_logs[requests[index][0]].write(record)
+
+            with perf.stage("inference"):
+                predictions = cached_inference(keys, cache, _infer, on_result=_write)
+    perf.add_token_counts(token_counts)
+    if policy is not None:
+        record_budget_hits(policy, pending_inputs, finish_reasons, inference_stats)
+    cache_stats = None
+    if cache is not None:
+        cache_stats = cache.stats()
+        cache.close()
+    print(f"  추론 완료: {len(predictions)}개 예측")
+
+    # 3. 예측 저장 (partial 로그를 정렬·중복 제거)
+    variant_records = []
+    with perf.stage("save"):
+        for variant_dir in variant_dirs:
+            records = finalize_records(variant_dir / partial_filename, inference_inputs)
+            pred_path = save_predictions(records, variant_dir, predictions_filename)
+            print(f"[3/4] 예측 저장: {pred_path}")
+            variant_records.append(records)
+
+    if num_shards > 1:
+        print(perf.summary())
+        print("샤드 실행: 스코어링 생략 (python -m evaluations.merge로 샤드를 합친 뒤 스코어링)")
+        return
+    if inference_only:
+        print(perf.summary())
+        print("--inference-only 지정: 스코어링 생략")
+        return
+
+    # 4. 메트릭 계산
+    print("[4/4] 메트릭 계산")
+    for variant, variant_dir, records in zip(variants or [None], variant_dirs, variant_records):
+        if variant is not None:
+            print(f"\n=== {variant} ===")
+        score_run(
+            records,
+            conversations,
+            variant_dir,
+            backend.model_name,
+            dataset_path,
+            cache_stats=cache_stats,
+            inference_stats=inference_stats,
+            perf=perf.copy() if variants else perf,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="백엔드 공통 Function Calling 평가 파이프라인")
+    parser.add_argument("--backend", choices=BACKENDS, required=True, help="추론 백엔드")
+    parser.add_argument("--model", default="", help="모델 경로·ID (replay는 불필요)")
+    parser.add_argument("--lora", default=None, help="LoRA 어댑터 경로 (vllm / hf)")
+    parser.add_argument(
+        "--replay",
+        default="gt",
+        help="replay 백엔드 예측 출처: gt 또는 predictions.jsonl 경로 (기본값: gt)",
+    )
+    parser.add_argument("--dataset", default="eval_data/dataset.jsonl", help="평가 데이터셋 경로 또는 HuggingFace ID")
+    parser.add_argument("--output", default="eval_output", help="결과 저장 디렉토리")
+    parser.add_argument("--max-new-tokens", type=int, default=512, help="최대 생성 토큰 수")
+    parser.add_argument(
+        "--inference-only",
+        action="store_true",
+        help="predictions.jsonl 저장까지만 수행하고 스코어링 생략",
+    )
+    parser.add_argument("--cache", default=None, help="예측 캐시 SQLite 경로")
+    parser.add_argument("--resume", action="store_true", help="partial 로그의 완료 step을 건너뛰고 이어서 추론")
+    parser.add_argument(
+        "--decoding-policy",
+        action="store_true",
+        help="GT 길이 기반 step 유형별 토큰 예산 (+ 백엔드가 지원하면 stop sequence)",
+    )
+    parser.add_argument("--budget-margin", type=float, default=1.5, help="--decoding-policy 토큰 예산의 안전 계수")
+    parser.add_argument("--num-shards", type=int, default=1, help="conversation_id 해시 샤드 수")
+    parser.add_argument("--shard-id", type=int, default=0, help="이 프로세스가 추론할 샤드 번호")
+    args = parser.parse_args()
+    if args.backend != "replay" and not args.model:
+        parser.error(f"--backend {args.backend}에는 --model이 필요합니다.")
+
+    backend = load_backend(args.backend, args.model, lora_path=args.lora, replay=args.replay)
+    run_pipeline(
+        backend,
+        dataset_path=args.dataset,
+        output_dir=args.output,
+        max_new_tokens=args.max_new_tokens,
+        inference_only=args.inference_only,
+        cache_path=args.cache,
+        resume=args.resume,
+        decoding_policy=args.decoding_policy,
+        budget_margin=args.budget_margin,
+        num_shards=args.num_shards,
+        shard_id=args.shard_id,
+    )
+
+
+if __name__ == "__main__":
+    main()
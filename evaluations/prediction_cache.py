@@ -0,0 +1,201 @@
+"""
+content-addressed 예측 캐시.
+
+(backend, model, LoRA 어댑터 해시, 프롬프트/messages, max_new_tokens, seed, temperature)
+조합의 해시를 키로 생성 결과를 SQLite에 저장한다.
+runner / api_runner가 동일 조건의 step을 다시 추론하지 않도록 캐시 미스만 백엔드로 보낸다.
+
+사용 예:
+    cache = PredictionCache("eval_cache/predictions.sqlite")
+    keys = [make_cache_key(backend="vllm", model=model_name, prompt=p, ...) for p in prompts]
+    predictions = cached_inference(
+        keys, cache, lambda idx, on_result: run_backend([prompts[i] for i in idx], on_result),
+    )
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Callable
+
+# LoRA 어댑터 디렉토리에서 해시에 포함할 파일 (가중치 + 설정)
+_ADAPTER_FILE_PREFIXES = ("adapter_model", "adapter_config")
+
+
+def hash_lora_adapter(lora_path: str | None) -> str | None:
+    """
+    LoRA 어댑터의 내용 해시를 계산한다.
+
+    같은 경로에 다른 체크포인트를 덮어써도 캐시가 무효화되도록 경로가 아닌 파일 내용을 해싱한다.
+    로컬 디렉토리가 아니면(HuggingFace ID 등) 경로 문자열을 그대로 해싱한다.
+    """
+    if not lora_path:
+        return None
+
+    digest = hashlib.sha256()
+    path = Path(lora_path)
+    if not path.is_dir():
+        digest.update(lora_path.encode("utf-8"))
+        return digest.hexdigest()
+
+    for file_path in sorted(path.iterdir()):
+        if not file_path.is_file() or not file_path.name.startswith(_ADAPTER_FILE_PREFIXES):
+            continue
+        digest.update(file_path.name.encode("utf-8"))
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(
+    backend: str,
+    model: str,
+    prompt: str | list[dict],
+    max_new_tokens: int,
+    temperature: float = 0.0,
+    seed: int | None = None,
+    lora_hash: str | None = None,
+    stop: list[str] | None = None,
+) -> str:
+    """
+    추론 조건 전체를 정규화된 JSON으로 직렬화한 뒤 sha256 키를 만든다.
+
+    stop은 기본(<|im_end|>)과 다른 stop sequence를 쓸 때만 지정한다 (기존 캐시 키 유지).
+    """
+    payload = {
+        "backend": backend,
+        "model": model,
+        "lora": lora_hash,
+        "prompt": prompt,
+        "max_new_tokens": max_new_tokens,
+        "temperature": temperature,
+        "seed": seed,
+    }
+    if stop is not None:
+        payload["stop"] = list(stop)
+    serialized = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class PredictionCache:
+    """키 → 생성 텍스트를 저장하는 SQLite 기반 영속 캐시."""
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            "key TEXT PRIMARY KEY, prediction TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: list[str]) -> dict[str, str]:
+        """저장된 키만 {key: prediction}으로 반환하고 hit/miss 카운터를 갱신한다."""
+        found: dict[str, str] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        # SQLite 바인딩 변수 개수 제한(기본 999)을 넘지 않도록 나눠서 조회
+        for start in range(0, len(unique_keys), 500):
+            chunk = unique_keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT key, prediction FROM predictions WHERE key IN ({placeholders})",
+                chunk,
+            )
+            found.update(rows.fetchall())
+
+        hit_count = sum(key in found for key in keys)
+        self.hits += hit_count
+        self.misses += len(keys) - hit_count
+        return found
+
+    def put_many(self, items: list[tuple[str, str]]) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO predictions (key, prediction) VALUES (?, ?)",
+            items,
+        )
+        self._conn.commit()
+
+    def stats(self) -> dict:
+        return {"path": str(self.path), "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def cached_inference(
+    keys: list[str],
+    cache: PredictionCache | None,
+    infer_misses: Callable[[list[int], Callable[[int, str], None]], list[str]],
+    on_result: Callable[[int, str], None] | None = None,
+    flush_every: int = 32,
+) -> list[str]:
+    """
+    캐시 히트는 그대로 사용하고, 미스 인덱스만 infer_misses로 추론한다.
+
+    미스 예측은 완료 콜백이 올 때마다 모아 flush_every개마다 캐시에 기록하므로
+    (PredictionLog와 같은 방식) 추론 도중 중단돼도 그때까지 생성한 예측은 캐시에 남는다.
+
+    Parameters
+    ----------
+    keys : 입력별 캐시 키 (입력 순서와 동일)
+    cache : PredictionCache (None이면 전체를 추론)
+    infer_misses : (미스 인덱스 리스트, 완료 콜백)을 받아 같은 순서의 예측 리스트를 반환하는 함수.
+        완료 콜백은 (미스 리스트 내 위치, 예측)으로 호출한다.
+    on_result : 예측이 확정될 때마다 (입력 인덱스, 예측)으로 호출되는 콜백 (히트 포함)
+    flush_every : 캐시에 한 번에 기록하는 미스 예측 수
+
+    Returns
+    -------
+    keys와 같은 순서의 예측 리스트
+    """
+    def _notify(index: int, prediction: str) -> None:
+        if on_result is not None:
+            on_result(index, prediction)
+
+    if cache is None:
+        all_indices = list(range(len(keys)))
+        return infer_misses(all_indices, _notify)
+
+    found = cache.get_many(keys)
+    miss_indices = [i for i, key in enumerate(keys) if key not in found]
+    print(f"  캐시 히트: {len(keys) - len(miss_indices)}개 / 미스: {len(miss_indices)}개")
+
+    predictions = [found.get(key) for key in keys]
+    for index, prediction in enumerate(predictions):
+        if prediction is not None:
+            _notify(index, prediction)
+
+    if miss_indices:
+        stored: set[int] = set()
+        buffer: list[tuple[str, str]] = []
+
+        def _flush() -> None:
+            if buffer:
+                cache.put_many(buffer)
+                buffer.clear()
+
+        def _on_miss(position: int, prediction: str) -> None:
+            index = miss_indices[position]
+            _notify(index, prediction)
+            if index not in stored:
+                stored.add(index)
+                buffer.append((keys[index], prediction))
+                if len(buffer) >= flush_every:
+                    _flush()
+
+        try:
+            generated = infer_misses(miss_indices, _on_miss)
+        finally:
+            _flush()
+        for index, prediction in zip(miss_indices, generated):
+            predictions[index] = prediction
+        # 완료 콜백을 부르지 않는 백엔드의 예측도 기록한다
+        cache.put_many([(keys[i], predictions[i]) for i in miss_indices if i not in stored])
+
+    return predictions
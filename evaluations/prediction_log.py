@@ -0,0 +1,131 @@
+"""
+append-only 예측 로그.
+
+추론이 끝난 step을 즉시 predictions.partial.jsonl에 한 줄씩 추가하고 일정 개수마다 fsync한다.
+API 장애나 OOM으로 중간에 종료돼도 완료된 step은 보존되며, --resume으로 재실행하면
+(conversation_id, turn_index, step_index) 기준으로 완료된 step을 건너뛴다.
+추론이 끝나면 정렬·중복 제거된 레코드를 predictions.jsonl로 저장해 스코어링에 사용한다.
+"""
+
+import json
+import os
+from pathlib import Path
+
+PARTIAL_FILENAME = "predictions.partial.jsonl"
+
+
+def record_key(record: dict) -> tuple[int, int, int]:
+    """레코드(또는 동일 필드를 가진 dict)의 (conversation_id, turn_index, step_index) 키."""
+    return (record["conversation_id"], record["turn_index"], record["step_index"])
+
+
+def input_key(inp) -> tuple[int, int, int]:
+    """InferenceInput의 (conversation_id, turn_index, step_index) 키."""
+    return (inp.conversation_id, inp.turn_index, inp.step_index)
+
+
+def make_record(inp, prediction: str) -> dict:
+    """InferenceInput과 예측 텍스트로 predictions.jsonl 레코드를 만든다."""
+    return {
+        "conversation_id": inp.conversation_id,
+        "turn_index": inp.turn_index,
+        "step_index": inp.step_index,
+        "is_tool_call": inp.is_tool_call,
+        "gt_response": inp.gt_response,
+        "prediction": prediction,
+    }
+
+
+def load_partial_records(path: Path) -> list[dict]:
+    """
+    partial 로그를 읽는다.
+
+    비정상 종료로 마지막 줄이 잘린 경우 해당 줄은 무시한다.
+    """
+    if not path.exists():
+        return []
+
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+class PredictionLog:
+    """완료된 레코드를 append-only로 기록하고 fsync_every개마다 디스크에 동기화한다."""
+
+    def __init__(self, path: Path, resume: bool = False, fsync_every: int = 32):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        if resume:
+            self._truncate_partial_line()
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        self._pending = 0
+
+    def _truncate_partial_line(self) -> None:
+        """잘린 마지막 줄이 있으면 제거해 이후 append가 새 줄에서 시작하도록 한다."""
+        if not self.path.exists():
+            return
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._pending += 1
+        if self._pending >= self.fsync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+
+    def __enter__(self) -> "PredictionLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def finalize_records(path: Path, inference_inputs: list) -> list[dict]:
+    """
+    partial 로그를 (conversation_id, turn_index, step_index) 순으로 정렬·중복 제거한다.
+
+    같은 키가 여러 번 기록된 경우 마지막 기록을 사용하고,
+    현재 inference_inputs에 없는 키(데이터셋 변경 등)는 제외한다.
+
+    Raises
+    ------
+    ValueError
+        inference_inputs 중 로그에 기록되지 않은 step이 있는 경우
+    """
+    expected = {input_key(inp) for inp in inference_inputs}
+    latest: dict[tuple[int, int, int], dict] = {}
+    for record in load_partial_records(path):
+        key = record_key(record)
+        if key in expected:
+            latest[key] = record
+
+    missing = expected - latest.keys()
+    if missing:
+        raise ValueError(
+            f"{len(missing)}개 step의 예측이 {path}에 없습니다 (예: {sorted(missing)[:3]})"
+        )
+
+    return [latest[key] for key in sorted(latest)]
@@ -0,0 +1,96 @@
+"""
+prefix cache를 고려한 vLLM 프롬프트 스케줄링.
+
+split_conversations 결과는 같은 system 프롬프트(tools JSON 포함)와 점점 길어지는 GT 히스토리를
+공유한다. 같은 대화의 step k 프롬프트는 step k-1 프롬프트를 prefix로 포함하므로,
+step 깊이별 wave로 나눠 앞 wave를 먼저 생성하면 뒤 wave의 prefill이 vLLM automatic prefix
+caching(APC)에 그대로 히트한다.
+
+  wave 0: 각 대화의 첫 step        (대화 순)
+  wave 1: 각 대화의 두 번째 step   (대화 순)
+  ...
+
+GPU 없이 검증할 수 있도록 스케줄 계획과 prefix 재사용 추정은 순수 함수로 둔다.
+"""
+
+from collections import defaultdict
+from typing import Hashable, Sequence
+
+# vLLM 기본 KV cache block 크기 (APC는 block 단위로 재사용된다)
+DEFAULT_BLOCK_SIZE = 16
+
+
+def plan_prefix_waves(inference_inputs: list) -> list[list[int]]:
+    """
+    InferenceInput 리스트를 prefix 공유 순서의 wave로 나눈다.
+
+    대화 내 step 깊이(턴을 가로질러 센 순번)가 같은 입력끼리 한 wave로 묶고,
+    wave 안에서는 conversation_id 순으로 정렬한다.
+
+    Returns
+    -------
+    wave별 inference_inputs 인덱스 리스트
+    """
+    per_conversation: dict[int, list[int]] = defaultdict(list)
+    for index, inp in enumerate(inference_inputs):
+        per_conversation[inp.conversation_id].append(index)
+
+    waves: list[list[int]] = []
+    for conv_id in sorted(per_conversation):
+        ordered = sorted(
+            per_conversation[conv_id],
+            key=lambda i: (inference_inputs[i].turn_index, inference_inputs[i].step_index),
+        )
+        for depth, index in enumerate(ordered):
+            if depth == len(waves):
+                waves.append([])
+            waves[depth].append(index)
+
+    return waves
+
+
+def estimate_prefix_reuse(
+    sequences: Sequence[Sequence[Hashable]],
+    waves: list[list[int]],
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> dict:
+    """
+    wave 순서로 처리할 때 prefix cache로 건너뛰는 prefill 양을 추정한다.
+
+    vLLM APC처럼 block 단위 체인 해시로 재사용 여부를 판정하고,
+    같은 wave 안에서 동시에 계산되는 block은 재사용하지 않는다고 보수적으로 가정한다.
+    토큰 id 리스트뿐 아니라 문자열(문자 단위)도 입력으로 받을 수 있다.
+
+    Returns
+    -------
+    {"prompt_tokens", "cached_tokens", "prefill_tokens", "hit_ratio"}
+    """
+    seen: set[int] = set()
+    prompt_tokens = 0
+    cached_tokens = 0
+
+    for wave in waves:
+        wave_hashes: list[int] = []
+        for index in wave:
+            sequence = sequences[index]
+            prompt_tokens += len(sequence)
+
+            chain = 0
+            reusing = True
+            # 마지막 토큰은 항상 계산해야 하므로 완전한 block만 재사용 대상
+            full_blocks = (len(sequence) - 1) // block_size
+            for start in range(0, full_blocks * block_size, block_size):
+                chain = hash((chain, tuple(sequence[start:start + block_size])))
+                if reusing and chain in seen:
+                    cached_tokens += block_size
+                else:
+                    reusing = False
+                wave_hashes.append(chain)
+        seen.update(wave_hashes)
+
+    return {
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "prefill_tokens": prompt_tokens - cached_tokens,
+        "hit_ratio": cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+    }
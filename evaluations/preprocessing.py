@@ -5,6 +5,150 @@ HuggingFace 데이터셋 또는 로컬 JSONL을 평가 입력 형식으로 변
 """
 
 import re
+from typing import Callable
+
+IM_START = "<|im_start|>"
+IM_END = "<|im_end|>"
+ASSISTANT_HEADER = f"{IM_START}assistant\n"
+
+_ASSISTANT_SPAN_PATTERN = re.compile(
+    r"(<\|im_start\|>assistant\n)(.*?)(<\|im_end\|>)",
+    re.DOTALL,
+)
+
+
+def _render_message(msg: dict) -> str:
+    return f"{IM_START}{msg['role']}\n{msg.get('content', '')}{IM_END}"
+
+
+class RenderedConversation:
+    """
+    대화 전체를 ChatML로 한 번만 렌더링하고 메시지 경계 offset을 기록한다.
+
+    messages[:k] 프롬프트는 text[:ends[k - 1]] + "\n" + ASSISTANT_HEADER 이므로
+    step마다 히스토리를 다시 렌더링하지 않고 slice 한 번으로 만든다.
+    """
+
+    __slots__ = ("text", "ends")
+
+    def __init__(self, messages: list[dict]):
+        parts = [_render_message(msg) for msg in messages]
+        self.text = "\n".join(parts)
+
+        # ends[k] = k번째 메시지 렌더링이 끝나는 문자 offset (구분자 "\n" 제외)
+        self.ends: list[int] = []
+        offset = 0
+        for part in parts:
+            offset += len(part)
+            self.ends.append(offset)
+            offset += 1
+
+    def prompt(self, num_messages: int) -> str:
+        """앞 num_messages개 메시지 + assistant 헤더로 된 생성용 프롬프트."""
+        if num_messages == 0:
+            return ASSISTANT_HEADER
+        return self.text[:self.ends[num_messages - 1]] + "\n" + ASSISTANT_HEADER
+
+
+class TokenizedConversation:
+    """
+    RenderedConversation의 토큰 id 버전.
+
+    메시지 세그먼트별로 토큰화한 결과를 segment_cache에 보관해
+    여러 대화가 공유하는 system 프롬프트(tools JSON 포함)는 한 번만 토큰화한다.
+    세그먼트 경계가 항상 <|im_start|> / <|im_end|> special token과 맞닿아 있으므로
+    세그먼트별 토큰화를 이어 붙인 결과는 전체 문자열 토큰화 결과와 같다.
+    """
+
+    __slots__ = ("token_ids", "ends", "_separator", "_header")
+
+    def __init__(
+        self,
+        messages: list[dict],
+        encode: Callable[[str], list[int]],
+        segment_cache: dict[str, list[int]] | None = None,
+    ):
+        cache = segment_cache if segment_cache is not None else {}
+
+        def _encode(text: str) -> list[int]:
+            ids = cache.get(text)
+            if ids is None:
+                ids = encode(text)
+                cache[text] = ids
+            return ids
+
+        self._separator = _encode("\n")
+        self._header = _encode(ASSISTANT_HEADER)
+        self.token_ids: list[int] = []
+        self.ends: list[int] = []
+        for index, msg in enumerate(messages):
+            if index > 0:
+                self.token_ids.extend(self._separator)
+            self.token_ids.extend(_encode(_render_message(msg)))
+            self.ends.append(len(self.token_ids))
+
+    def prompt_token_ids(self, num_messages: int) -> list[int]:
+        """앞 num_messages개 메시지 + assistant 헤더의 토큰 id."""
+        if num_messages == 0:
+            return list(self._header)
+        return self.token_ids[:self.ends[num_messages - 1]] + self._separator + self._header
+
+
+def render_step_prompts(inference_inputs: list) -> list[str]:
+    """
+    InferenceInput 리스트의 ChatML 프롬프트를 만든다.
+
+    대화(ConversationContext)마다 한 번만 렌더링하고 각 step은 slice로 만든다.
+    """
+    rendered: dict[int, RenderedConversation] = {}
+    prompts = []
+    for inp in inference_inputs:
+        conversation = rendered.get(id(inp.context))
+        if conversation is None:
+            conversation = RenderedConversation(
+                [inp.context.system_msg, *inp.context.messages]
+            )
+            rendered[id(inp.context)] = conversation
+        prompts.append(conversation.prompt(inp.num_messages))
+    return prompts
+
+
+def tokenize_step_prompts(
+    inference_inputs: list,
+    encode: Callable[[str], list[int]],
+    encode_batch: Callable[[list[str]], list[list[int]]] | None = None,
+) -> list[list[int]]:
+    """
+    render_step_prompts의 토큰 id 버전. 메시지 세그먼트 토큰화 결과를 대화 간에 공유한다.
+
+    encode_batch를 지정하면 중복 없는 세그먼트 전체를 한 번의 batch 호출로 먼저 토큰화한다
+    (fast tokenizer는 batch 입력을 병렬로 처리한다).
+    """
+    segment_cache: dict[str, list[int]] = {}
+    if encode_batch is not None:
+        segments = dict.fromkeys(["\n", ASSISTANT_HEADER])
+        seen_contexts: set[int] = set()
+        for inp in inference_inputs:
+            if id(inp.context) in seen_contexts:
+                continue
+            seen_contexts.add(id(inp.context))
+            for msg in [inp.context.system_msg, *inp.context.messages]:
+                segments[_render_message(msg)] = None
+        texts = list(segments)
+        segment_cache.update(zip(texts, encode_batch(texts)))
+    tokenized: dict[int, TokenizedConversation] = {}
+    prompt_ids = []
+    for inp in inference_inputs:
+        conversation = tokenized.get(id(inp.context))
+        if conversation is None:
+            conversation = TokenizedConversation(
+                [inp.context.system_msg, *inp.context.messages],
+                encode,
+                segment_cache,
+            )
+            tokenized[id(inp.context)] = conversation
+        prompt_ids.append(conversation.prompt_token_ids(inp.num_messages))
+    return prompt_ids
 
 
 def to_chatml(data) -> str:
@@ -14,12 +158,7 @@ def to_chatml(data) -> str:
     else:
         messages = data
 
-    parts = []
-    for msg in messages:
-        role = msg["role"]
-        content = msg.get("content", "")
-        parts.append(f"<|im_start|>{role}\n{content}<|im_end|>")
-    return "\n".join(parts)
+    return RenderedConversation(messages).text
 
 
 def extract_examples(chatml: str) -> list[dict]:
@@ -29,18 +168,14 @@ def extract_examples(chatml: str) -> list[dict]:
     각 assistant 턴에 대해:
     - input: 해당 assistant 턴 직전까지의 전체 컨텍스트 + '<|im_start|>assistant\\n'
     - label: assistant 턴의 실제 응답 텍스트
+
+    input은 assistant 헤더 끝까지의 slice 한 번으로 만든다.
+    messages가 있다면 RenderedConversation.prompt()가 문자열 재탐색 없이 더 빠르다.
     """
-    pattern = re.compile(
-        r"(<\|im_start\|>assistant\n)(.*?)(<\|im_end\|>)",
-        re.DOTALL,
-    )
-    examples = []
-    for match in pattern.finditer(chatml):
-        start = match.start()
-        label = match.group(2)
-        input_text = chatml[:start] + match.group(1)
-        examples.append({"input": input_text, "label": label})
-    return examples
+    return [
+        {"input": chatml[:match.end(1)], "label": match.group(2)}
+        for match in _ASSISTANT_SPAN_PATTERN.finditer(chatml)
+    ]
 
 
 def format_conversations(sample: dict) -> dict:
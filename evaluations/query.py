@@ -0,0 +1,133 @@
+"""
+step 테이블(step_results.parquet) 조회 CLI.
+
+여러 run의 step 테이블을 (conversation_id, turn_index, step_index)로 조인해
+특정 단계에서 실패한 step을 run별로 나란히 보여준다.
+predictions 재파싱이나 evaluate_function_call_step 재실행 없이 Parquet만 읽는다.
+
+실행:
+    # 다섯 run 중 하나라도 argument_value 단계에서 실패한 step
+    python -m evaluations.query \\
+        eval_output/base eval_output/lora-1 eval_output/lora-2 api_output/gpt-4o api_output/gpt-4o-mini \\
+        --failed-at argument_value
+
+    # 모든 run에서 실패한 step만, 특정 함수로 한정해 CSV로 저장
+    python -m evaluations.query eval_output/base eval_output/lora-1 \\
+        --match all --function get_cart --output failures.csv
+"""
+
+import argparse
+
+from evaluations.metrics import STAGE_FIELDS
+from evaluations.step_table import KEY_COLUMNS, load_step_table, run_names
+
+STAGE_NAMES = [stage for stage, _ in STAGE_FIELDS]
+_QUERY_COLUMNS = [*KEY_COLUMNS, "function_name", "first_failed_stage", "mismatched_keys"]
+
+
+def query_failures(
+    runs: list[str],
+    failed_at: str | None = None,
+    match: str = "any",
+    function_name: str | None = None,
+    conversation_id: int | None = None,
+):
+    """
+    여러 run의 step 테이블에서 실패 step을 찾아 run별 결과를 한 행으로 조인한다.
+
+    Parameters
+    ----------
+    runs : run 디렉토리 또는 step_results.parquet 경로 리스트
+    failed_at : 이 단계에서 처음 실패한 step만 대상 (None이면 어느 단계든 실패한 step)
+    match : "any"면 하나 이상의 run에서 실패, "all"이면 모든 run에서 실패한 step
+    function_name : GT 함수명 필터
+    conversation_id : 대화 ID 필터
+
+    Returns
+    -------
+    키 컬럼 + function_name + run별 first_failed_stage / mismatched_keys 컬럼을 가진 DataFrame
+    """
+    import pandas as pd
+
+    if match not in ("any", "all"):
+        raise ValueError(f"match는 'any' 또는 'all'이어야 합니다: {match}")
+
+    names = run_names(runs)
+    frames = []
+    for name, run in zip(names, runs):
+        table = load_step_table(run, columns=_QUERY_COLUMNS)
+        if function_name is not None:
+            table = table[table["function_name"] == function_name]
+        if conversation_id is not None:
+            table = table[table["conversation_id"] == conversation_id]
+        frames.append(table.assign(run=name))
+
+    steps = pd.concat(frames, ignore_index=True)
+    if failed_at is None:
+        failed = steps["first_failed_stage"].notna()
+    else:
+        failed = steps["first_failed_stage"] == failed_at
+
+    key_columns = list(KEY_COLUMNS)
+    fail_counts = failed.groupby([steps[c] for c in key_columns]).sum()
+    required = 1 if match == "any" else len(runs)
+    selected = fail_counts[fail_counts >= required].index
+
+    steps = steps.set_index(key_columns)
+    steps = steps[steps.index.isin(selected)]
+    steps["mismatched_keys"] = steps["mismatched_keys"].map(
+        lambda keys: ",".join(keys) if keys is not None and len(keys) else ""
+    )
+
+    # run 순서대로 (run:stage, run:keys) 컬럼을 나란히 붙인다 (run에 없는 step은 빈 값)
+    result = steps.groupby(level=key_columns)[["function_name"]].first()
+    for name in names:
+        run_steps = steps.loc[steps["run"] == name, ["first_failed_stage", "mismatched_keys"]]
+        result = result.join(
+            run_steps.rename(columns={
+                "first_failed_stage": f"{name}:stage",
+                "mismatched_keys": f"{name}:keys",
+            }),
+            how="left",
+        )
+    return result.reset_index().sort_values(key_columns, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="step 테이블 기반 실패 step 조회")
+    parser.add_argument("runs", nargs="+", help="run 디렉토리 또는 step_results.parquet 경로")
+    parser.add_argument(
+        "--failed-at",
+        choices=STAGE_NAMES,
+        default=None,
+        help="이 단계에서 처음 실패한 step만 조회 (기본: 어느 단계든 실패)",
+    )
+    parser.add_argument(
+        "--match",
+        choices=["any", "all"],
+        default="any",
+        help="any: 하나 이상의 run에서 실패 / all: 모든 run에서 실패",
+    )
+    parser.add_argument("--function", default=None, help="GT 함수명 필터")
+    parser.add_argument("--conversation-id", type=int, default=None, help="대화 ID 필터")
+    parser.add_argument("--output", default=None, help="결과 CSV 저장 경로 (없으면 출력만)")
+    args = parser.parse_args()
+
+    result = query_failures(
+        runs=args.runs,
+        failed_at=args.failed_at,
+        match=args.match,
+        function_name=args.function,
+        conversation_id=args.conversation_id,
+    )
+    print(f"조회된 step 수: {len(result)}")
+
+    if args.output:
+        result.to_csv(args.output, index=False, encoding="utf-8")
+        print(f"CSV 저장: {args.output}")
+    else:
+        print(result.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -22,102 +22,637 @@ GT 히스토리 기반 싱글턴 분할 → vLLM batch 추론 → 메트릭 계
         --dataset eval_data/dataset.jsonl \\
         --output eval_output \\
         --inference-only
+
+    # 예측 캐시 사용 (동일 조건 step은 재추론하지 않음)
+    python -m evaluations.runner \\
+        --model Qwen/Qwen2.5-7B-Instruct \\
+        --dataset eval_data/dataset.jsonl \\
+        --output eval_output \\
+        --cache eval_cache/predictions.sqlite
+
+    # 중단된 실행 이어서 수행 (predictions.partial.jsonl의 완료 step은 건너뜀)
+    python -m evaluations.runner \\
+        --model Qwen/Qwen2.5-7B-Instruct \\
+        --dataset eval_data/dataset.jsonl \\
+        --output eval_output \\
+        --resume
+
+    # prefix cache 인식 스케줄링 (APC 활성화 + step 깊이별 wave 생성)
+    python -m evaluations.runner \\
+        --model Qwen/Qwen2.5-7B-Instruct \\
+        --dataset eval_data/dataset.jsonl \\
+        --output eval_output \\
+        --prefix-schedule
+
+    # 체크포인트 LoRA sweep (한 엔진에서 평가, 결과는 eval_output/checkpoint-*/)
+    python -m evaluations.runner \\
+        --model Qwen/Qwen2.5-7B-Instruct \\
+        --lora 'outputs/default/checkpoint-*' \\
+        --dataset eval_data/dataset.jsonl \\
+        --output eval_output
+
+    # step 유형별 stop sequence + GT 길이 기반 토큰 예산 (디코딩 시간 단축, 예산에 걸린 step은 판정이 바뀔 수 있음)
+    python -m evaluations.runner \\
+        --model Qwen/Qwen2.5-7B-Instruct \\
+        --dataset eval_data/dataset.jsonl \\
+        --output eval_output \\
+        --decoding-policy
+
+    # 프롬프트 토큰 길이로 max_model_len 자동 결정 + 길이순 batch 생성
+    python -m evaluations.runner \\
+        --model Qwen/Qwen2.5-7B-Instruct \\
+        --dataset eval_data/dataset.jsonl \\
+        --output eval_output \\
+        --max-model-len auto \\
+        --length-buckets
+
+    # 4개 샤드로 나눠 실행 (머신마다 --shard-id 0~3) 후 합쳐서 스코어링
+    python -m evaluations.runner \\
+        --model Qwen/Qwen2.5-7B-Instruct \\
+        --dataset eval_data/dataset.jsonl \\
+        --output eval_output \\
+        --num-shards 4 --shard-id 0
+    python -m evaluations.merge eval_output \\
+        --dataset eval_data/dataset.jsonl \\
+        --output eval_output
 """
 
 import argparse
+import glob
 import json
 import os
-from pathlib import Path
+import re
+from functools import lru_cache
+from typing import Callable
+
+from evaluations.decoding_policy import strip_end_of_turn
+from evaluations.pipeline import run_pipeline
+from evaluations.prediction_cache import hash_lora_adapter, make_cache_key
+from evaluations.prediction_log import input_key
+from evaluations.preprocessing import render_step_prompts, tokenize_step_prompts
+from evaluations.prefix_schedule import estimate_prefix_reuse, plan_prefix_waves
+from evaluations.token_lengths import (
+    LengthCheck,
+    bucket_waves,
+    check_prompt_lengths,
+    length_summary,
+    plan_length_batches,
+)
+
+# 예측 로그 스트리밍 시 한 번에 vLLM에 넘기는 프롬프트 수
+_STREAM_CHUNK_SIZE = 256
+
+# LoRA sweep에서 --max-loras를 지정하지 않았을 때 GPU에 동시에 올리는 어댑터 수 상한
+_DEFAULT_MAX_LORAS = 4
+
+# --length-buckets에서 generate 호출 하나에 넘기는 프롬프트 수 (vLLM 기본 max_num_seqs와 같음)
+_LENGTH_BATCH_SIZE = 256
+
+
+class VLLMEngine:
+    """
+    vLLM LLM 인스턴스를 한 번 만들어 여러 generate 호출(평가 job)에서 재사용하는 엔진.
 
+    enable_lora=True로 만들면 job마다 다른 LoRA 어댑터를 LoRARequest로 바꿔 끼울 수 있다.
+    어댑터 경로별 LoRA id는 엔진 수명 동안 고정된다.
+    max_loras는 한 batch에서 동시에 GPU에 올리는 어댑터 수로, 넘치는 어댑터는 vLLM이 교체하며 처리한다.
+    """
 
-def _build_chatml_prompt(messages: list[dict]) -> str:
+    backend = "vllm"
+
+    def __init__(
+        self,
+        model_name: str,
+        max_model_len: int | None = None,
+        seed: int = 42,
+        enable_lora: bool = False,
+        enable_prefix_caching: bool = False,
+        max_loras: int | None = None,
+    ):
+        from vllm import LLM
+
+        llm_kwargs = {
+            "model": model_name,
+            "trust_remote_code": True,
+            "enable_lora": enable_lora,
+            "max_lora_rank": 128,
+            "seed": seed,
+        }
+        if max_model_len is not None:
+            llm_kwargs["max_model_len"] = max_model_len
+        if enable_prefix_caching:
+            llm_kwargs["enable_prefix_caching"] = True
+        if enable_lora and max_loras is not None:
+            llm_kwargs["max_loras"] = max_loras
+
+        self.model_name = model_name
+        self.llm = LLM(**llm_kwargs)
+        self._lora_requests: dict[str, object] = {}
+        # 엔진이 실제로 사용하는 컨텍스트 길이 (지정하지 않았으면 vLLM이 모델 설정에서 정한 값)
+        model_config = getattr(getattr(self.llm, "llm_engine", None), "model_config", None)
+        self.max_model_len = getattr(model_config, "max_model_len", max_model_len)
+
+    def get_tokenizer(self):
+        return self.llm.get_tokenizer()
+
+    def _lora_request(self, lora_path: str | None):
+        from vllm.lora.request import LoRARequest
+
+        if not lora_path:
+            return None
+        if lora_path not in self._lora_requests:
+            lora_id = len(self._lora_requests) + 1
+            self._lora_requests[lora_path] = LoRARequest(f"eval_lora_{lora_id}", lora_id, lora_path)
+        return self._lora_requests[lora_path]
+
+    def generate(
+        self,
+        prompts: list[str],
+        max_new_tokens: int,
+        lora_path: str | list[str | None] | None = None,
+        seed: int = 42,
+        on_result: Callable[[int, str], None] | None = None,
+        waves: list[list[int]] | None = None,
+        inference_stats: dict | None = None,
+        prompt_token_ids: list[list[int]] | None = None,
+        sampling_overrides: list[dict] | None = None,
+        finish_reasons: dict[int, str] | None = None,
+        batches: list[list[int]] | None = None,
+        token_counts: dict[int, tuple[int, int]] | None = None,
+    ) -> list[str]:
+        """
+        프롬프트 전체를 batch 생성한다.
+
+        waves가 있으면 wave 단위로, batches가 있으면 그 단위로, on_result만 있으면
+        _STREAM_CHUNK_SIZE 단위로, 모두 없으면 한 번의 generate 호출로 생성한다.
+        lora_path가 리스트면 프롬프트별 LoRARequest를 같은 batch에 섞어 보낸다.
+        sampling_overrides가 있으면 프롬프트별 SamplingParams(step별 max_tokens·stop)로 생성하고,
+        finish_reasons에는 {프롬프트 인덱스: finish_reason}을,
+        token_counts에는 {프롬프트 인덱스: (prompt 토큰 수, completion 토큰 수)}를 기록한다.
+        """
+        from vllm import SamplingParams
+
+        base_params = {
+            "temperature": 0.0,
+            "max_tokens": max_new_tokens,
+            "stop": ["<|im_end|>"],
+            "seed": seed,
+        }
+        sampling_params = SamplingParams(**base_params)
+        if sampling_overrides is not None:
+            # 같은 (max_tokens, stop) 조합은 SamplingParams 하나를 공유한다
+            params_by_override: dict[str, object] = {}
+            prompt_params = []
+            for override in sampling_overrides:
+                override_key = json.dumps(override, sort_keys=True)
+                if override_key not in params_by_override:
+                    params_by_override[override_key] = SamplingParams(**{**base_params, **override})
+                prompt_params.append(params_by_override[override_key])
+        if isinstance(lora_path, list):
+            lora_requests = [self._lora_request(path) for path in lora_path]
+        else:
+            lora_request = self._lora_request(lora_path)
+
+        if waves is not None:
+            batches = waves
+        elif batches is None and on_result is not None:
+            batches = [
+                list(range(start, min(start + _STREAM_CHUNK_SIZE, len(prompts))))
+                for start in range(0, len(prompts), _STREAM_CHUNK_SIZE)
+            ]
+        elif batches is None:
+            batches = [list(range(len(prompts)))]
+
+        if prompt_token_ids is not None:
+            engine_inputs = [{"prompt_token_ids": ids} for ids in prompt_token_ids]
+        else:
+            engine_inputs = prompts
+
+        predictions: list[str | None] = [None] * len(prompts)
+        output_token_ids: list[list[int]] = [[] for _ in prompts]
+        cached_tokens = 0
+        has_cached_count = True
+        for batch in batches:
+            if isinstance(lora_path, list):
+                lora_request = [lora_requests[i] for i in batch]
+            if sampling_overrides is not None:
+                sampling_params = [prompt_params[i] for i in batch]
+            outputs = self.llm.generate(
+                [engine_inputs[i] for i in batch], sampling_params, lora_request=lora_request
+            )
+            for index, output in zip(batch, outputs):
+                completion = output.outputs[0]
+                predictions[index] = completion.text
+                if sampling_overrides is not None:
+                    predictions[index] = strip_end_of_turn(completion.text)
+                if finish_reasons is not None:
+                    finish_reasons[index] = getattr(completion, "finish_reason", None) or ""
+                output_token_ids[index] = output.prompt_token_ids or []
+                if token_counts is not None:
+                    token_counts[index] = (
+                        len(output_token_ids[index]),
+                        len(getattr(completion, "token_ids", None) or []),
+                    )
+                if isinstance(lora_path, list):
+                    # prefix cache는 어댑터별로 분리되므로 추정에서도 어댑터가 다르면 다른 토큰으로 본다
+                    output_token_ids[index] = [(lora_path[index], t) for t in output_token_ids[index]]
+                # num_cached_tokens는 vLLM 버전에 따라 없을 수 있다.
+                num_cached = getattr(output, "num_cached_tokens", None)
+                if num_cached is None:
+                    has_cached_count = False
+                else:
+                    cached_tokens += num_cached
+                if on_result is not None:
+                    on_result(index, predictions[index])
+
+        if waves is not None:
+            # vLLM이 실제 히트 수를 주면 그 값을, 아니면 block 해시 시뮬레이션 추정치를 사용
+            estimate = estimate_prefix_reuse(output_token_ids, waves)
+            prompt_tokens = estimate["prompt_tokens"]
+            saved = cached_tokens if has_cached_count else estimate["cached_tokens"]
+            prefix_stats = {
+                "waves": len(waves),
+                "prompt_tokens": prompt_tokens,
+                "prefill_tokens_saved": saved,
+                "hit_ratio": saved / prompt_tokens if prompt_tokens else 0.0,
+                "source": "vllm" if has_cached_count else "estimated",
+            }
+            print(
+                f"  prefix cache: wave {len(waves)}개, 히트율 {prefix_stats['hit_ratio'] * 100:.2f}%, "
+                f"절약한 prefill 토큰 {saved}/{prompt_tokens} ({prefix_stats['source']})"
+            )
+            if inference_stats is not None:
+                inference_stats["prefix_cache"] = prefix_stats
+
+        return predictions
+
+
+def expand_lora_paths(patterns: list[str]) -> list[str]:
     """
-    messages 리스트를 ChatML 프롬프트 문자열로 변환한다.
+    --lora 인자를 어댑터 경로 리스트로 펼친다.
 
-    마지막에 '<|im_start|>assistant\n'을 붙여 모델이 이어서 생성하도록 한다.
+    glob 패턴(예: outputs/run1/checkpoint-*)은 일치하는 디렉토리를 숫자 인식 순서
+    (checkpoint-500 < checkpoint-1000)로 펼치고, 중복 경로는 처음 한 번만 남긴다.
     """
-    parts = []
-    for msg in messages:
-        role = msg["role"]
-        content = msg.get("content", "")
-        parts.append(f"<|im_start|>{role}\n{content}<|im_end|>")
-    parts.append("<|im_start|>assistant\n")
-    return "\n".join(parts)
-
-
-def _load_conversations(dataset_path: str) -> list[dict]:
-    """JSONL 파일 또는 HuggingFace 데이터셋 ID에서 대화 목록을 로드한다."""
-    if os.path.exists(dataset_path):
-        with open(dataset_path, encoding="utf-8") as f:
-            return [json.loads(line) for line in f if line.strip()]
-    else:
-        # HuggingFace 데이터셋 ID로 간주
-        from datasets import load_dataset
-        ds = load_dataset(dataset_path, split="test")
-        return list(ds)
-
-
-def _run_vllm_inference(
-    prompts: list[str],
-    model_name: str,
-    max_new_tokens: int = 512,
-    lora_path: str | None = None,
-    max_model_len: int | None = None,
-    seed: int = 42,
-) -> list[str]:
+    def _natural_key(path: str) -> list:
+        return [int(token) if token.isdigit() else token for token in re.split(r"(\d+)", path)]
+
+    paths: list[str] = []
+    for pattern in patterns:
+        if any(char in pattern for char in "*?["):
+            matches = sorted((m for m in glob.glob(pattern) if os.path.isdir(m)), key=_natural_key)
+            if not matches:
+                raise FileNotFoundError(f"LoRA 어댑터 패턴과 일치하는 디렉토리가 없습니다: {pattern}")
+            paths.extend(matches)
+        else:
+            paths.append(pattern)
+    return list(dict.fromkeys(paths))
+
+
+@lru_cache(maxsize=None)
+def _auto_tokenizer(model_name: str):
+    from transformers import AutoTokenizer
+
+    return AutoTokenizer.from_pretrained(model_name, trust_remote_code=True)
+
+
+def _load_tokenizer(model_name: str, engine=None):
     """
-    vLLM을 사용해 batch 추론을 수행한다.
+    프롬프트 길이 검사·사전 토큰화에 쓸 토크나이저.
 
-    Parameters
-    ----------
-    prompts : ChatML 프롬프트 리스트
-    model_name : 모델 경로 또는 HuggingFace ID
-    max_new_tokens : 최대 생성 토큰 수
-    lora_path : LoRA 어댑터 경로 (None이면 베이스 모델만 사용)
+    엔진이 있으면 엔진의 토크나이저를 쓰고(StubEngine처럼 None이면 길이 검사를 건너뜀),
+    없으면 모델 경로에서 AutoTokenizer를 로드한다 (모델별 1회).
+    """
+    if engine is not None:
+        get_tokenizer = getattr(engine, "get_tokenizer", None)
+        return get_tokenizer() if get_tokenizer is not None else None
+    return _auto_tokenizer(model_name)
+
+
+def _model_context_limit(model_name: str, engine=None) -> int | None:
+    """모델이 허용하는 최대 컨텍스트 길이 (엔진이 있으면 엔진 설정, 없으면 모델 config)."""
+    if engine is not None:
+        return getattr(engine, "max_model_len", None)
+    from transformers import AutoConfig
+
+    config = AutoConfig.from_pretrained(model_name, trust_remote_code=True)
+    return getattr(config, "max_position_embeddings", None)
+
+
+def _tokenize_prompts(tokenizer, inference_inputs: list) -> list[list[int]]:
+    """중복 없는 메시지 세그먼트를 batch로 한 번 토큰화한 뒤 step 프롬프트 토큰 id를 조립한다."""
+    prompt_token_ids = tokenize_step_prompts(
+        inference_inputs,
+        lambda text: tokenizer.encode(text, add_special_tokens=False),
+        lambda texts: tokenizer(texts, add_special_tokens=False)["input_ids"],
+    )
+    print(f"  프롬프트 토큰화 완료: {sum(len(ids) for ids in prompt_token_ids)} 토큰")
+    return prompt_token_ids
+
+
+def _check_prompt_lengths(
+    inference_inputs: list,
+    prompt_lengths: list[int],
+    budgets: list[int],
+    max_model_len: int | str | None,
+    model_limit: int | None,
+    target_indices: list[int],
+    skip_oversized: bool,
+) -> tuple[LengthCheck, list[int]]:
+    """
+    eval 세트 전체 길이로 max_model_len을 정하고, 이번에 추론할 step 중 초과 step을 보고한다.
 
     Returns
     -------
-    생성된 텍스트 리스트 (프롬프트 제외)
+    (LengthCheck, 건너뛸 입력 인덱스 리스트)
+
+    Raises
+    ------
+    ValueError
+        추론할 step 중 프롬프트가 max_model_len 이상인 step이 있고 skip_oversized=False인 경우
     """
-    from vllm import LLM, SamplingParams
-    from vllm.lora.request import LoRARequest
-
-    llm_kwargs = {
-        "model": model_name,
-        "trust_remote_code": True,
-        "enable_lora": lora_path is not None,
-        "max_lora_rank": 128,
-        "seed": seed,
-    }
-    if max_model_len is not None:
-        llm_kwargs["max_model_len"] = max_model_len
-
-    llm = LLM(**llm_kwargs)
-    sampling_params = SamplingParams(
-        temperature=0.0,
-        max_tokens=max_new_tokens,
-        stop=["<|im_end|>"],
-        seed=seed,
-    )
+    check = check_prompt_lengths(prompt_lengths, budgets, max_model_len, model_limit)
+    print(f"  max_model_len: {check.max_model_len} ({check.source})")
+    targets = set(target_indices)
+    at_risk = [i for i in check.truncation_risk if i in targets]
+    if at_risk:
+        print(
+            f"  경고: 프롬프트 + 생성 예산이 max_model_len을 넘는 step {len(at_risk)}개 "
+            f"(생성이 예산보다 일찍 잘릴 수 있음)"
+        )
+    oversized = [i for i in check.oversized if i in targets]
+    if oversized:
+        examples = ", ".join(
+            f"{input_key(inference_inputs[i])}={prompt_lengths[i]}토큰" for i in oversized[:3]
+        )
+        message = f"프롬프트가 max_model_len({check.max_model_len}) 이상인 step {len(oversized)}개: {examples}"
+        if not skip_oversized:
+            raise ValueError(f"{message} — --max-model-len을 늘리거나 --skip-oversized로 건너뛰세요")
+        print(f"  --skip-oversized: {message} → 빈 예측으로 기록")
+    return check, oversized
+
+
+def _prepare_prompt_lengths(
+    tokenizer,
+    model_name: str,
+    engine,
+    inference_inputs: list,
+    target_indices: list[int],
+    budgets: list[int],
+    max_model_len: int | str | None,
+    skip_oversized: bool,
+    inference_stats: dict,
+) -> tuple[list[list[int]] | None, int | None, list[int]]:
+    """
+    추론 전에 전체 프롬프트를 토큰화해 길이를 검사하고 inference_stats["token_lengths"]에 기록한다.
 
-    lora_request = None
-    if lora_path:
-        lora_request = LoRARequest("eval_lora", 1, lora_path)
+    Returns
+    -------
+    (전체 프롬프트 토큰 id (토크나이저가 없으면 None), 엔진에 넘길 max_model_len, 건너뛸 입력 인덱스)
+    """
+    if tokenizer is None:
+        if max_model_len == "auto":
+            raise ValueError("토크나이저가 없는 엔진에서는 max_model_len='auto'를 사용할 수 없습니다")
+        print("  토크나이저가 없는 엔진: 프롬프트 길이 검사 생략")
+        return None, max_model_len, []
+
+    prompt_token_ids = _tokenize_prompts(tokenizer, inference_inputs)
+    prompt_lengths = [len(ids) for ids in prompt_token_ids]
+    check, skipped = _check_prompt_lengths(
+        inference_inputs,
+        prompt_lengths,
+        budgets,
+        max_model_len,
+        _model_context_limit(model_name, engine),
+        target_indices,
+        skip_oversized,
+    )
+    inference_stats["token_lengths"] = _token_length_stats(
+        tokenizer, inference_inputs, prompt_lengths, check
+    )
+    if max_model_len == "auto":
+        max_model_len = check.max_model_len
+    return prompt_token_ids, max_model_len, skipped
+
+
+def _token_length_stats(
+    tokenizer,
+    inference_inputs: list,
+    prompt_lengths: list[int],
+    check: LengthCheck,
+) -> dict:
+    """eval_results.json inference.token_lengths에 기록할 길이 분포와 검사 결과."""
+    gt_token_ids = tokenizer([inp.gt_response for inp in inference_inputs], add_special_tokens=False)
+    summary = length_summary(prompt_lengths)
+    print(
+        f"  프롬프트 토큰 길이: p50 {summary['p50']}, p95 {summary['p95']}, max {summary['max']}"
+    )
+    return {
+        "max_model_len": check.max_model_len,
+        "max_model_len_source": check.source,
+        "prompt": summary,
+        "gt_response": length_summary([len(ids) for ids in gt_token_ids["input_ids"]]),
+        "oversized_steps": [list(input_key(inference_inputs[i])) for i in check.oversized],
+        "truncation_risk_steps": len(check.truncation_risk),
+    }
 
-    outputs = llm.generate(prompts, sampling_params, lora_request=lora_request)
-    return [output.outputs[0].text for output in outputs]
 
+class VLLMBackend:
+    """
+    vLLM InferenceBackend (evaluations.backends).
 
-def _save_predictions(records: list[dict], output_dir: Path) -> Path:
-    """predictions.jsonl 저장."""
-    output_dir.mkdir(parents=True, exist_ok=True)
-    pred_path = output_dir / "predictions.jsonl"
+    prepare에서 프롬프트 토큰 길이를 검사하고(max_model_len "auto" 결정, 초과 step 건너뛰기)
+    남은 입력의 프롬프트를 한 번 렌더링해 둔다. cache_keys와 generate는 그 프롬프트를 공유한다.
+    엔진은 첫 generate 호출 때 띄우므로 캐시가 전부 히트하면 모델을 로드하지 않는다.
+    engine을 넘기면 그 엔진으로 생성한다.
 
-    with open(pred_path, "w", encoding="utf-8") as f:
-        for record in records:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    lora_path에 경로를 2개 이상 넘기면 variants(어댑터 경로 리스트)가 되어, run_pipeline이
+    입력마다 어댑터별 요청을 만들고 한 엔진(enable_lora=True, max_loras=k)에서 요청별 LoRARequest로
+    섞어 생성한다. 베이스 모델은 sweep당 한 번만 로드된다.
+    """
 
-    return pred_path
+    supports_token_ids = True
+    supports_lora = True
+    supports_logprobs = False
+    supports_streaming = False
+    supports_stop = True
+
+    def __init__(
+        self,
+        model_name: str,
+        lora_path: str | list[str] | None = None,
+        max_model_len: int | str | None = None,
+        seed: int = 42,
+        prefix_schedule: bool = False,
+        pretokenize: bool = False,
+        length_buckets: bool = False,
+        skip_oversized: bool = False,
+        max_loras: int | None = None,
+        engine=None,
+    ):
+        # StubEngine처럼 backend 이름을 가진 엔진은 그 이름으로 캐시 키를 나눈다
+        self.name = getattr(engine, "backend", "vllm")
+        self.model_name = model_name
+        self.variants: list[str] | None = None
+        if isinstance(lora_path, (list, tuple)):
+            if len(lora_path) > 1:
+                self.variants = list(lora_path)
+                lora_path = None
+            else:
+                lora_path = lora_path[0] if lora_path else None
+        if self.variants and max_loras is None:
+            max_loras = min(len(self.variants), _DEFAULT_MAX_LORAS)
+        self.lora_path = lora_path
+        self.max_loras = max_loras
+        self.max_model_len = max_model_len
+        self.seed = seed
+        self.prefix_schedule = prefix_schedule
+        self.pretokenize = pretokenize
+        self.length_buckets = length_buckets
+        self.skip_oversized = skip_oversized
+        self.engine = engine
+        self._tokenizer = None
+        self._token_ids: dict[tuple[int, int, int], list[int]] = {}
+        self._prompts: dict[tuple[int, int, int], str] = {}
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            self._tokenizer = _load_tokenizer(self.model_name, self.engine)
+        return self._tokenizer
+
+    def token_counter(self) -> Callable[[str], int] | None:
+        tokenizer = self.tokenizer
+        if tokenizer is None:
+            return None
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+
+    def prepare(self, inference_inputs, pending, budgets, inference_stats) -> list[int]:
+        if self.variants:
+            print(f"  LoRA 어댑터 {len(self.variants)}개 (max_loras={self.max_loras})")
+        elif self.lora_path:
+            print(f"  LoRA 어댑터: {self.lora_path}")
+        all_token_ids, self.max_model_len, skipped = _prepare_prompt_lengths(
+            self.tokenizer,
+            self.model_name,
+            self.engine,
+            inference_inputs,
+            pending,
+            budgets,
+            self.max_model_len,
+            self.skip_oversized,
+            inference_stats,
+        )
+        if (self.pretokenize or self.length_buckets) and all_token_ids is None:
+            raise ValueError("토크나이저가 없는 엔진에서는 --pretokenize / --length-buckets를 사용할 수 없습니다")
+        if all_token_ids is not None:
+            self._token_ids = {
+                input_key(inp): ids for inp, ids in zip(inference_inputs, all_token_ids)
+            }
+        # 생성할 입력의 프롬프트만 렌더링해 cache_keys / generate가 같이 쓴다
+        skipped_set = set(skipped)
+        to_render = [inference_inputs[i] for i in pending if i not in skipped_set]
+        self._prompts = {
+            input_key(inp): prompt for inp, prompt in zip(to_render, render_step_prompts(to_render))
+        }
+        return skipped
+
+    def _lora_paths(self, count: int, variants: list[int] | None) -> list[str | None]:
+        """요청별 LoRA 어댑터 경로 (variants가 없으면 모두 lora_path)."""
+        if variants is None:
+            return [self.lora_path] * count
+        return [self.variants[v] for v in variants]
+
+    def cache_keys(self, inference_inputs, budgets, stops, variants=None) -> list[str]:
+        lora_paths = self._lora_paths(len(inference_inputs), variants)
+        lora_hashes = {path: hash_lora_adapter(path) for path in set(lora_paths)}
+        return [
+            make_cache_key(
+                backend=self.name,
+                model=self.model_name,
+                prompt=self._prompts[input_key(inp)],
+                max_new_tokens=budget,
+                temperature=0.0,
+                seed=self.seed,
+                lora_hash=lora_hashes[lora_path],
+                stop=list(stops[i]) if stops is not None else None,
+            )
+            for i, (inp, budget, lora_path) in enumerate(zip(inference_inputs, budgets, lora_paths))
+        ]
+
+    def _prefix_waves(self, inference_inputs, variants: list[int] | None) -> list[list[int]]:
+        """step 깊이별 wave. 어댑터가 섞이면 어댑터마다 wave를 만들어 같은 깊이끼리 합친다
+        (prefix 캐시는 어댑터별로 분리됨)."""
+        if variants is None:
+            return plan_prefix_waves(inference_inputs)
+        groups: dict[int, list[int]] = {}
+        for position, variant in enumerate(variants):
+            groups.setdefault(variant, []).append(position)
+        waves: list[list[int]] = []
+        for positions in groups.values():
+            for depth, wave in enumerate(plan_prefix_waves([inference_inputs[p] for p in positions])):
+                if depth == len(waves):
+                    waves.append([])
+                waves[depth].extend(positions[w] for w in wave)
+        return waves
+
+    def generate(
+        self,
+        inference_inputs,
+        budgets,
+        stops=None,
+        on_result=None,
+        finish_reasons=None,
+        inference_stats=None,
+        token_counts=None,
+        latencies=None,
+        variants=None,
+    ) -> list[str]:
+        prompts = [self._prompts[input_key(inp)] for inp in inference_inputs]
+        prompt_token_ids = None
+        if self.pretokenize:
+            prompt_token_ids = [self._token_ids[input_key(inp)] for inp in inference_inputs]
+        waves = self._prefix_waves(inference_inputs, variants) if self.prefix_schedule else None
+        batches = None
+        if self.length_buckets:
+            lengths = [len(self._token_ids[input_key(inp)]) for inp in inference_inputs]
+            if waves is not None:
+                waves = bucket_waves(waves, lengths, _LENGTH_BATCH_SIZE)
+            else:
+                batches = plan_length_batches(lengths, _LENGTH_BATCH_SIZE)
+        # 디코딩 정책이 없으면 모든 입력이 같은 예산이므로 기본 SamplingParams 하나로 생성한다
+        sampling_overrides = None
+        if stops is not None:
+            sampling_overrides = [
+                {"max_tokens": budget, "stop": list(stop), "include_stop_str_in_output": True}
+                for budget, stop in zip(budgets, stops)
+            ]
+        elif len(set(budgets)) > 1:
+            sampling_overrides = [{"max_tokens": budget} for budget in budgets]
+
+        if self.engine is None:
+            self.engine = VLLMEngine(
+                self.model_name,
+                max_model_len=self.max_model_len,
+                seed=self.seed,
+                enable_lora=self.lora_path is not None or self.variants is not None,
+                enable_prefix_caching=self.prefix_schedule,
+                max_loras=self.max_loras,
+            )
+        return self.engine.generate(
+            prompts,
+            max(budgets),
+            lora_path=self._lora_paths(len(prompts), variants) if variants is not None else self.lora_path,
+            seed=self.seed,
+            on_result=on_result,
+            waves=waves,
+            inference_stats=inference_stats,
+            prompt_token_ids=prompt_token_ids,
+            sampling_overrides=sampling_overrides,
+            finish_reasons=finish_reasons,
+            batches=batches,
+            token_counts=token_counts,
+        )
 
 
 def run_evaluation(
@@ -126,16 +661,28 @@ def run_evaluation(
     output_dir: str,
     max_new_tokens: int = 512,
     inference_only: bool = False,
-    lora_path: str | None = None,
-    max_model_len: int | None = None,
+    lora_path: str | list[str] | None = None,
+    max_model_len: int | str | None = None,
     seed: int = 42,
+    cache_path: str | None = None,
+    resume: bool = False,
+    prefix_schedule: bool = False,
+    pretokenize: bool = False,
+    max_loras: int | None = None,
+    engine=None,
+    decoding_policy: bool = False,
+    budget_margin: float = 1.5,
+    length_buckets: bool = False,
+    skip_oversized: bool = False,
+    num_shards: int = 1,
+    shard_id: int = 0,
 ) -> None:
     """
-    전체 평가 파이프라인 실행.
+    전체 평가 파이프라인 실행 (VLLMBackend로 evaluations.pipeline.run_pipeline 호출).
 
     1. 데이터 로드 → 싱글턴 분할
-    2. vLLM batch 추론
-    3. predictions.jsonl 저장
+    2. 프롬프트 토큰 길이 검사 → vLLM batch 추론 (완료 step은 predictions.partial.jsonl에 즉시 기록)
+    3. 정렬·중복 제거한 predictions.jsonl 저장
     4. 메트릭 계산 + 결과 저장 (inference_only=True이면 생략)
 
     Parameters
@@ -145,74 +692,66 @@ def run_evaluation(
     output_dir : 결과 저장 디렉토리
     max_new_tokens : 최대 생성 토큰 수
     inference_only : True이면 predictions.jsonl 저장 후 스코어링 생략
-    lora_path : LoRA 어댑터 경로 (None이면 베이스 모델만 사용)
+    lora_path : LoRA 어댑터 경로 (None이면 베이스 모델만 사용).
+        경로가 2개 이상인 리스트면 한 엔진에서 모든 어댑터를 평가하고
+        어댑터별 결과를 output_dir/<어댑터 디렉토리명>에 저장한다 (VLLMBackend.variants).
+    max_model_len : vLLM 최대 컨텍스트 길이. "auto"면 max(프롬프트 토큰 수 + 생성 예산)을
+        256 단위로 올린 값, None이면 모델 설정값 (엔진을 넘기면 엔진 설정을 따른다)
+    cache_path : 예측 캐시 SQLite 경로 (None이면 캐시 미사용)
+    resume : True이면 predictions.partial.jsonl에 기록된 step을 건너뛰고 나머지만 추론
+    prefix_schedule : True이면 automatic prefix caching을 켜고 step 깊이별 wave로 생성
+    pretokenize : True이면 메시지 세그먼트 단위로 캐시하며 토큰화한 id를 vLLM에 직접 전달
+    max_loras : LoRA sweep에서 GPU에 동시에 올리는 어댑터 수 (None이면 min(어댑터 수, 4))
+    engine : 이미 로드된 엔진 (evaluations.eval_server처럼 모델을 상주시키는 경우).
+        None이면 추론 단계에서 vLLM 엔진을 새로 띄운다.
+    decoding_policy : True이면 step 유형별 stop sequence와 GT 길이 기반 토큰 예산으로 생성
+        (evaluations.decoding_policy). stop은 판정을 바꾸지 않지만 토큰 예산에 걸려 잘린 step은
+        relevance / format 판정이 달라질 수 있어 inference.decoding.budget_hits에 step 키를 기록한다
+    budget_margin : 토큰 예산 = GT 유형별 최대 길이 × budget_margin (max_new_tokens 이하)
+    length_buckets : True이면 프롬프트를 토큰 길이순 batch로 나눠 생성
+        (prefix_schedule과 함께 쓰면 wave 순서를 유지하고 wave 안에서 나눈다)
+    skip_oversized : True이면 프롬프트가 max_model_len 이상인 step을 빈 예측으로 기록하고 건너뛴다
+        (False면 추론 전에 ValueError)
+    num_shards, shard_id : num_shards > 1이면 conversation_id 해시로 나눈 shard_id 샤드만 추론하고
+        샤드 predictions 파일만 저장한다 (스코어링은 evaluations.merge로 샤드를 합친 뒤 수행)
     """
-    from evaluations.turn_splitter import split_conversations
-    from evaluations.preprocessing import extract_tool_schemas
-    from evaluations.scorer import score_predictions
-
-    output_path = Path(output_dir)
-
-    # 1. 데이터 로드 및 싱글턴 분할
-    print(f"[1/4] 데이터셋 로드: {dataset_path}")
-    conversations = _load_conversations(dataset_path)
-    print(f"  총 대화 수: {len(conversations)}")
-
-    inference_inputs = split_conversations(conversations)
-    print(f"  총 InferenceInput 수: {len(inference_inputs)}")
-
-    # 2. 프롬프트 생성 및 vLLM 추론
-    print(f"[2/4] vLLM 추론 시작: {model_name}")
-    prompts = [_build_chatml_prompt(inp.messages) for inp in inference_inputs]
-    if lora_path:
-        print(f"  LoRA 어댑터: {lora_path}")
-    if max_model_len is not None:
-        print(f"  max_model_len: {max_model_len}")
-    predictions = _run_vllm_inference(
-        prompts,
+    backend = VLLMBackend(
         model_name,
-        max_new_tokens,
         lora_path=lora_path,
         max_model_len=max_model_len,
         seed=seed,
+        prefix_schedule=prefix_schedule,
+        pretokenize=pretokenize,
+        length_buckets=length_buckets,
+        skip_oversized=skip_oversized,
+        max_loras=max_loras,
+        engine=engine,
     )
-    print(f"  추론 완료: {len(predictions)}개 예측")
-
-    # 3. 예측 저장
-    records = [
-        {
-            "conversation_id": inp.conversation_id,
-            "turn_index": inp.turn_index,
-            "step_index": inp.step_index,
-            "is_tool_call": inp.is_tool_call,
-            "gt_response": inp.gt_response,
-            "prediction": pred,
-        }
-        for inp, pred in zip(inference_inputs, predictions)
-    ]
-    pred_path = _save_predictions(records, output_path)
-    print(f"[3/4] 예측 저장: {pred_path}")
-
-    if inference_only:
-        print("--inference-only 지정: 스코어링 생략")
-        return
-
-    # 4. 메트릭 계산
-    print("[4/4] 메트릭 계산")
-
-    tool_schemas = None
-    if conversations and conversations[0].get("tools"):
-        tool_schemas = extract_tool_schemas(conversations[0]["tools"])
-
-    score_predictions(
-        records=records,
-        tool_schemas=tool_schemas,
-        output_dir=output_path,
-        model_name=model_name,
-        dataset_name=dataset_path,
+    run_pipeline(
+        backend,
+        dataset_path,
+        output_dir,
+        max_new_tokens=max_new_tokens,
+        inference_only=inference_only,
+        cache_path=cache_path,
+        resume=resume,
+        decoding_policy=decoding_policy,
+        budget_margin=budget_margin,
+        num_shards=num_shards,
+        shard_id=shard_id,
     )
 
 
+def _max_model_len_arg(value: str) -> int | str:
+    """--max-model-len 인자: 정수 또는 "auto"."""
+    if value == "auto":
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"정수 또는 auto여야 합니다: {value}") from None
+
+
 def main():
     parser = argparse.ArgumentParser(description="GT 히스토리 기반 Function Calling 평가")
     parser.add_argument("--model", required=True, help="모델 경로 또는 HuggingFace ID")
@@ -239,14 +778,50 @@ def main():
     )
     parser.add_argument(
         "--lora",
+        nargs="+",
         default=None,
-        help="LoRA 어댑터 경로 (지정하면 베이스 모델에 LoRA를 적용하여 추론)",
+        help=(
+            "LoRA 어댑터 경로 (지정하면 베이스 모델에 LoRA를 적용하여 추론). "
+            "여러 경로나 glob(예: 'outputs/run1/checkpoint-*')을 주면 한 엔진에서 sweep하고 "
+            "어댑터별 결과를 output/<어댑터 디렉토리명>에 저장"
+        ),
     )
     parser.add_argument(
-        "--max-model-len",
+        "--max-loras",
         type=int,
         default=None,
-        help="vLLM에 명시적으로 전달할 최대 컨텍스트 길이 (예: 8192)",
+        help=f"LoRA sweep에서 GPU에 동시에 올리는 어댑터 수 (기본: min(어댑터 수, {_DEFAULT_MAX_LORAS}))",
+    )
+    parser.add_argument(
+        "--max-model-len",
+        type=_max_model_len_arg,
+        default=None,
+        help=(
+            "vLLM에 명시적으로 전달할 최대 컨텍스트 길이 (예: 8192). "
+            "auto면 프롬프트 토큰 수 + 생성 예산의 최댓값으로 자동 결정"
+        ),
+    )
+    parser.add_argument(
+        "--skip-oversized",
+        action="store_true",
+        help="프롬프트가 max_model_len 이상인 step을 빈 예측으로 기록하고 건너뜀 (기본: 추론 전 에러)",
+    )
+    parser.add_argument(
+        "--num-shards",
+        type=int,
+        default=1,
+        help="eval 세트를 conversation_id 해시로 나눌 샤드 수 (샤드별 예측은 evaluations.merge로 합침)",
+    )
+    parser.add_argument(
+        "--shard-id",
+        type=int,
+        default=0,
+        help="이 프로세스가 추론할 샤드 번호 (0 ~ num_shards-1)",
+    )
+    parser.add_argument(
+        "--length-buckets",
+        action="store_true",
+        help="프롬프트를 토큰 길이순 batch로 나눠 생성 (batch 안 길이를 고르게)",
     )
     parser.add_argument(
         "--seed",
@@ -254,6 +829,40 @@ def main():
         default=42,
         help="추론 재현성을 위한 랜덤 시드 (기본값: 42)",
     )
+    parser.add_argument(
+        "--cache",
+        default=None,
+        help="예측 캐시 SQLite 경로 (지정하면 동일 조건의 step은 재추론하지 않음)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="output 디렉토리의 predictions.partial.jsonl에 기록된 step을 건너뛰고 이어서 추론",
+    )
+    parser.add_argument(
+        "--prefix-schedule",
+        action="store_true",
+        help="automatic prefix caching을 켜고 대화별 step 깊이 순 wave로 생성 (prefill 재사용)",
+    )
+    parser.add_argument(
+        "--pretokenize",
+        action="store_true",
+        help="프롬프트를 메시지 세그먼트 단위로 캐시하며 토큰화해 vLLM에 토큰 id로 전달",
+    )
+    parser.add_argument(
+        "--decoding-policy",
+        action="store_true",
+        help=(
+            "step 유형별 stop sequence와 GT 길이 기반 step별 토큰 예산으로 생성 (디코딩 시간 단축, "
+            "예산에 걸려 잘린 step은 relevance / format 판정이 달라질 수 있음)"
+        ),
+    )
+    parser.add_argument(
+        "--budget-margin",
+        type=float,
+        default=1.5,
+        help="--decoding-policy 토큰 예산의 안전 계수 (GT 유형별 최대 길이 × margin, 기본값: 1.5)",
+    )
     args = parser.parse_args()
 
     run_evaluation(
@@ -262,9 +871,20 @@ def main():
         output_dir=args.output,
         max_new_tokens=args.max_new_tokens,
         inference_only=args.inference_only,
-        lora_path=args.lora,
+        lora_path=expand_lora_paths(args.lora) if args.lora else None,
         max_model_len=args.max_model_len,
         seed=args.seed,
+        cache_path=args.cache,
+        resume=args.resume,
+        prefix_schedule=args.prefix_schedule,
+        pretokenize=args.pretokenize,
+        max_loras=args.max_loras,
+        decoding_policy=args.decoding_policy,
+        budget_margin=args.budget_margin,
+        length_buckets=args.length_buckets,
+        skip_oversized=args.skip_oversized,
+        num_shards=args.num_shards,
+        shard_id=args.shard_id,
     )
 
 
@@ -0,0 +1,219 @@
+"""
+함수별 tool 스키마를 미리 컴파일한 checker.
+
+evaluate_function_call_step은 step마다 스키마 dict에서 properties 키 집합, required 집합,
+파라미터별 타입을 다시 꺼내고 기본값 채우기도 정답·예측 양쪽에서 properties를 순회했다.
+이 모듈은 함수 스키마 하나를 아래 값을 미리 계산한 FunctionChecker로 바꾼다.
+
+  allowed  : 허용 파라미터 frozenset (param_hallucination)
+  required : 필수 파라미터 frozenset (required_params)
+  types    : (파라미터, 타입 판정 함수) 튜플 (argument_type, None 값은 항상 통과)
+  defaults : 생략 시 채울 (파라미터, 기본값) 템플릿 (argument_value, default가 없는 optional은 None)
+
+checker는 스키마 내용 해시(sha256)로 캐시하므로 같은 스키마는 한 번만 컴파일한다.
+ToolCheckerIndex는 대화마다 자기 tools로 컴파일한 ToolChecker를 conversation_id로 찾아 주므로
+대화마다 tool 구성이 다른 데이터셋도 각 대화의 스키마로 채점한다 (tools가 같은 대화는 같은 객체 공유).
+
+사용 예:
+    index = ToolCheckerIndex.from_conversations(conversations)
+    checker = index.for_conversation(record["conversation_id"])   # ToolChecker | None
+    evaluate_function_call_step(label, prediction, tool_schemas=checker)
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Callable
+
+
+def _is_string(value) -> bool:
+    return isinstance(value, str)
+
+
+def _is_integer(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_boolean(value) -> bool:
+    return isinstance(value, bool)
+
+
+def _is_array(value) -> bool:
+    return isinstance(value, list)
+
+
+def _is_object(value) -> bool:
+    return isinstance(value, dict)
+
+
+# JSON Schema type → 판정 함수 (없는 타입명은 판별 불가로 보고 검사하지 않음).
+# 프로세스 풀로 넘길 수 있도록 lambda가 아닌 모듈 함수로 둔다.
+_TYPE_PREDICATES: dict[str, Callable[[object], bool]] = {
+    "string": _is_string,
+    "integer": _is_integer,
+    "number": _is_number,
+    "boolean": _is_boolean,
+    "array": _is_array,
+    "object": _is_object,
+}
+
+
+def schema_digest(schema) -> str:
+    """스키마 내용 해시 (키 순서와 무관)."""
+    canonical = json.dumps(schema, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class FunctionChecker:
+    """함수 하나의 컴파일된 스키마."""
+
+    name: str
+    allowed: frozenset[str]
+    required: frozenset[str]
+    types: tuple[tuple[str, Callable[[object], bool]], ...]
+    defaults: tuple[tuple[str, object], ...]
+
+    @classmethod
+    def compile(cls, name: str, schema: dict) -> "FunctionChecker":
+        """{"properties": {...}, "required": [...]} 스키마를 컴파일한다."""
+        properties = schema.get("properties") or {}
+        required = frozenset(schema.get("required") or [])
+        types = []
+        defaults = []
+        for key, prop in properties.items():
+            prop = prop if isinstance(prop, dict) else {}
+            type_name = prop.get("type")
+            if isinstance(type_name, str) and type_name in _TYPE_PREDICATES:
+                types.append((key, _TYPE_PREDICATES[type_name]))
+            if "default" in prop:
+                defaults.append((key, prop["default"]))
+            elif key not in required:
+                defaults.append((key, None))
+        return cls(
+            name=name,
+            allowed=frozenset(properties),
+            required=required,
+            types=tuple(types),
+            defaults=tuple(defaults),
+        )
+
+    def unknown_keys(self, args: dict) -> set[str]:
+        """스키마에 없는 파라미터."""
+        return args.keys() - self.allowed
+
+    def missing_keys(self, args: dict) -> set[str]:
+        """빠진 필수 파라미터."""
+        return self.required - args.keys()
+
+    def wrong_types(self, args: dict) -> list[str]:
+        """타입이 맞지 않는 파라미터 (None은 optional 파라미터의 "값 미지정"으로 보고 허용)."""
+        return [
+            key for key, is_valid in self.types
+            if key in args and args[key] is not None and not is_valid(args[key])
+        ]
+
+    def fill_defaults(self, args: dict) -> dict:
+        """생략된 파라미터에 기본값(default가 없는 optional은 None)을 채운 새 dict."""
+        filled = dict(self.defaults)
+        filled.update(args)
+        return filled
+
+
+@dataclass(frozen=True)
+class ToolChecker:
+    """tool 세트 하나(함수명 → FunctionChecker)의 컴파일 결과."""
+
+    digest: str
+    functions: dict[str, FunctionChecker]
+
+    def get(self, name: str) -> FunctionChecker | None:
+        return self.functions.get(name)
+
+    def __len__(self) -> int:
+        return len(self.functions)
+
+
+# 스키마 해시 → 컴파일 결과 (프로세스 내 공유)
+_FUNCTION_CACHE: dict[str, FunctionChecker] = {}
+_TOOL_SET_CACHE: dict[str, ToolChecker] = {}
+
+
+def compile_tool_schemas(tool_schemas: dict | ToolChecker | None) -> ToolChecker | None:
+    """
+    extract_tool_schemas 형식({함수명: {properties, required}})을 ToolChecker로 컴파일한다.
+
+    이미 ToolChecker면 그대로, 비어 있으면 None을 반환한다.
+    같은 내용의 스키마는 해시 캐시에서 같은 객체를 돌려준다. dict는 호출마다 내용을 해싱하므로
+    호출 사이에 같은 dict를 수정해도 수정된 스키마로 컴파일된다 (반복 채점은 ToolChecker를 넘길 것).
+    """
+    if tool_schemas is None or isinstance(tool_schemas, ToolChecker):
+        return tool_schemas
+    if not tool_schemas:
+        return None
+
+    digest = schema_digest(tool_schemas)
+    checker = _TOOL_SET_CACHE.get(digest)
+    if checker is None:
+        functions = {}
+        for name, schema in tool_schemas.items():
+            function_digest = schema_digest([name, schema])
+            function = _FUNCTION_CACHE.get(function_digest)
+            if function is None:
+                function = _FUNCTION_CACHE[function_digest] = FunctionChecker.compile(name, schema)
+            functions[name] = function
+        checker = _TOOL_SET_CACHE[digest] = ToolChecker(digest, functions)
+    return checker
+
+
+class ToolCheckerIndex:
+    """
+    conversation_id → 그 대화의 tools로 컴파일한 ToolChecker.
+
+    tools가 없는 대화(또는 범위 밖 conversation_id)는 None이며, 이 경우
+    param_hallucination / argument_type은 N/A로 처리된다.
+    """
+
+    def __init__(self, checkers: list[ToolChecker | None]):
+        self.checkers = checkers
+
+    @classmethod
+    def from_conversations(cls, conversations: list[dict]) -> "ToolCheckerIndex":
+        """load_conversations 순서(= conversation_id)대로 대화별 tools를 컴파일한다."""
+        from evaluations.preprocessing import extract_tool_schemas
+
+        # 같은 tools 객체(합성 데이터 등)는 해싱 없이 재사용, 다른 객체는 내용 해시로 공유
+        by_object: dict[int, ToolChecker | None] = {}
+        by_digest: dict[str, ToolChecker | None] = {}
+        checkers = []
+        for conversation in conversations:
+            tools = conversation.get("tools")
+            if not tools:
+                checkers.append(None)
+                continue
+            if id(tools) not in by_object:
+                digest = schema_digest(tools)
+                if digest not in by_digest:
+                    by_digest[digest] = compile_tool_schemas(extract_tool_schemas(tools))
+                by_object[id(tools)] = by_digest[digest]
+            checkers.append(by_object[id(tools)])
+        return cls(checkers)
+
+    def for_conversation(self, conversation_id: int) -> ToolChecker | None:
+        if 0 <= conversation_id < len(self.checkers):
+            return self.checkers[conversation_id]
+        return None
+
+    def for_records(self, records) -> list[ToolChecker | None]:
+        """레코드 순서대로 step별 ToolChecker 리스트 (score_steps의 step별 tool_schemas)."""
+        return [self.for_conversation(record["conversation_id"]) for record in records]
+
+    def describe(self) -> str:
+        """로그용 요약 (서로 다른 tool 세트 수, 함수 수)."""
+        tool_sets = {checker.digest: checker for checker in self.checkers if checker is not None}
+        functions = {name for checker in tool_sets.values() for name in checker.functions}
+        return f"대화 {len(self.checkers)}개, tool 세트 {len(tool_sets)}종, 함수 {len(functions)}개"
@@ -9,56 +9,193 @@ API 기반 모델(GPT, Claude 등)의 결과나 기존 predictions.jsonl 재평
         --predictions eval_output/predictions.jsonl \\
         --dataset eval_data/dataset.jsonl \\
         --output eval_output
+
+    # 대용량 predictions.jsonl은 --stream으로 일정한 메모리에서 스코어링
+    python -m evaluations.scorer \\
+        --predictions eval_output/predictions.jsonl \\
+        --dataset eval_data/dataset.jsonl \\
+        --output eval_output --stream
 """
 
 import argparse
 import csv
+import heapq
 import json
 import os
-from collections import defaultdict
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from operator import itemgetter
 from pathlib import Path
+from typing import Iterable, Iterator
+
+from evaluations.latency import flatten_latency, format_latency, summarize_latency
+from evaluations.perf import PerfRecorder, flatten_perf
+from evaluations.schema_checker import ToolCheckerIndex
+
+
+# 스트리밍 스코어링 시 한 번에 평가하는 step 수 (프로세스 풀 작업 단위)
+_STREAM_BATCH_SIZE = 4096
+
+# 외부 정렬 시 한 번에 메모리에 올려 정렬하는 step 수 (run 파일 하나의 크기)
+_SORT_CHUNK_SIZE = 500_000
+
+
+class _UnsortedPredictions(Exception):
+    """스트리밍 입력이 conversation_id 오름차순이 아님을 알리는 내부 신호 (외부 정렬로 전환)."""
+
+
+def _turn_step_flags(conv_id: int, turn_idx: int, step_result) -> tuple[int, int, bool, bool, bool]:
+    """turn pass 계산에 필요한 필드만 남긴 step 요약."""
+    return (
+        conv_id,
+        turn_idx,
+        step_result.is_tool_label,
+        step_result.tool_call_pass,
+        step_result.relevance_pass,
+    )
+
+
+def _stream_turn_passes(step_flags: Iterable[tuple]) -> Iterator[list[bool]]:
+    """
+    conversation_id 오름차순으로 들어오는 step 요약에서 대화별 turn pass/fail을 순서대로 만든다.
+
+    현재 대화의 턴별 상태(tool step 존재 여부, tool step 전체 통과, 전체 relevance 통과)만 유지하고,
+    conversation_id가 바뀌는 즉시 이전 대화의 결과를 내보낸다.
+
+    Raises
+    ------
+    _UnsortedPredictions
+        conversation_id가 감소하는 경우
+    """
+    current_conv = None
+    turns: dict[int, list[bool]] = {}
+
+    for conv_id, turn_idx, is_tool_label, tool_call_pass, relevance_pass in step_flags:
+        if conv_id != current_conv:
+            if current_conv is not None:
+                if conv_id < current_conv:
+                    raise _UnsortedPredictions(f"conversation_id {conv_id} < {current_conv}")
+                yield _finish_turns(turns)
+            current_conv = conv_id
+            turns = {}
+
+        state = turns.setdefault(turn_idx, [False, True, True])
+        if is_tool_label:
+            state[0] = True
+            state[1] = state[1] and tool_call_pass
+        state[2] = state[2] and relevance_pass
+
+    if current_conv is not None:
+        yield _finish_turns(turns)
+
+
+def _finish_turns(turns: dict[int, list[bool]]) -> list[bool]:
+    """tool step이 있는 턴은 tool step 전체 통과, 없으면 전체 step relevance 통과를 pass로 본다."""
+    return [
+        tool_all_pass if has_tool else relevance_all_pass
+        for has_tool, tool_all_pass, relevance_all_pass in (turns[t] for t in sorted(turns))
+    ]
+
+
+def _external_sort(step_flags: Iterable[tuple], work_dir: str) -> Iterator[tuple]:
+    """
+    step 요약을 conversation_id 기준으로 외부 정렬한다.
+
+    _SORT_CHUNK_SIZE개씩 정렬한 run 파일을 work_dir에 쓰고 heapq.merge로 병합한다.
+    """
+    run_paths = []
+    chunk = []
+
+    def _flush() -> None:
+        chunk.sort(key=itemgetter(0))
+        run_path = os.path.join(work_dir, f"run-{len(run_paths):05d}.tsv")
+        with open(run_path, "w", encoding="utf-8") as f:
+            for conv_id, turn_idx, *flags in chunk:
+                f.write(f"{conv_id}\t{turn_idx}\t" + "\t".join("1" if x else "0" for x in flags) + "\n")
+        run_paths.append(run_path)
+        chunk.clear()
+
+    for flags in step_flags:
+        chunk.append(flags)
+        if len(chunk) >= _SORT_CHUNK_SIZE:
+            _flush()
+    if chunk:
+        _flush()
+
+    def _read_run(run_path: str) -> Iterator[tuple]:
+        with open(run_path, encoding="utf-8") as f:
+            for line in f:
+                conv_id, turn_idx, is_tool, tool_pass, relevance_pass = line.rstrip("\n").split("\t")
+                yield (int(conv_id), int(turn_idx),
+                       is_tool == "1", tool_pass == "1", relevance_pass == "1")
+
+    yield from heapq.merge(*(_read_run(path) for path in run_paths), key=itemgetter(0))
 
 
 def _group_turn_passes(records: list[dict], step_results) -> list[list[bool]]:
     """step 평가 결과를 turn pass/fail로 집계한다."""
-    grouped = defaultdict(lambda: defaultdict(list))
+    step_flags = sorted(
+        (
+            _turn_step_flags(record["conversation_id"], record["turn_index"], step_result)
+            for record, step_result in zip(records, step_results)
+        ),
+        key=itemgetter(0),
+    )
+    return list(_stream_turn_passes(step_flags))
 
-    for record, step_result in zip(records, step_results):
-        conv_id = record["conversation_id"]
-        turn_idx = record["turn_index"]
-        step_idx = record["step_index"]
-        grouped[conv_id][turn_idx].append((step_idx, step_result))
 
-    if not grouped:
-        return []
+def _step_schemas(records: list[dict], tool_schemas):
+    """ToolCheckerIndex면 레코드의 conversation_id로 step별 ToolChecker 리스트를, 아니면 그대로 반환한다."""
+    if isinstance(tool_schemas, ToolCheckerIndex):
+        return tool_schemas.for_records(records)
+    return tool_schemas
 
-    conv_turn_passes = []
 
-    for conv_id in sorted(grouped.keys()):
-        turn_dict = grouped[conv_id]
-        turn_passes = []
+def describe_tool_schemas(tool_schemas) -> str:
+    """로그용 스키마 요약."""
+    if isinstance(tool_schemas, ToolCheckerIndex):
+        return tool_schemas.describe()
+    return f"함수 {len(tool_schemas) if tool_schemas else 0}개"
 
-        for turn_idx in sorted(turn_dict.keys()):
-            steps = [
-                step_result
-                for _, step_result in sorted(turn_dict[turn_idx], key=lambda item: item[0])
-            ]
-            tool_steps = [step for step in steps if step.is_tool_label]
-            if tool_steps:
-                turn_passes.append(all(step.tool_call_pass for step in tool_steps))
-            else:
-                turn_passes.append(all(step.relevance_pass for step in steps))
-        conv_turn_passes.append(turn_passes)
 
-    return conv_turn_passes
+def score_records(records: list[dict], tool_schemas: dict | ToolCheckerIndex | None, workers: int = 1):
+    """
+    파일 저장·출력 없이 레코드의 Tool Call / Turn·Conversation 메트릭만 계산한다.
+
+    학습 중 평가 콜백처럼 결과를 메모리에서 바로 쓰는 경우에 사용한다.
+
+    Returns
+    -------
+    (EvalResults, MultiTurnResults)
+    """
+    from evaluations.metrics import score_steps
+    from evaluations.multi_turn_metrics import evaluate_multi_turn
+
+    step_results, tc_results = score_steps(
+        [r["gt_response"] for r in records],
+        [r["prediction"] for r in records],
+        tool_schemas=_step_schemas(records, tool_schemas),
+        workers=workers,
+    )
+    mt_results = evaluate_multi_turn(_group_turn_passes(records, step_results), aggregated=tc_results)
+    return tc_results, mt_results
 
 
 def score_predictions(
     records: list[dict],
-    tool_schemas: dict | None,
+    tool_schemas: dict | ToolCheckerIndex | None,
     output_dir: Path,
     model_name: str = "",
     dataset_name: str = "",
+    cache_stats: dict | None = None,
+    inference_stats: dict | None = None,
+    workers: int = 1,
+    step_table: bool = True,
+    n_bootstrap: int = 0,
+    confidence: float = 0.95,
+    perf: PerfRecorder | None = None,
 ) -> None:
     """
     predictions.jsonl 레코드들로 메트릭을 계산하고 결과를 저장한다.
@@ -69,40 +206,99 @@ def score_predictions(
         각 레코드는 conversation_id, turn_index, step_index,
         is_tool_call, gt_response, prediction 필드를 가진다.
     tool_schemas : {함수명: {properties, required}} 형태의 스키마 (없으면 None)
+        또는 대화별 스키마를 conversation_id로 찾는 ToolCheckerIndex.
         None이면 param_hallucination, argument_type 메트릭은 N/A로 처리된다.
     output_dir : 결과 저장 경로
     model_name : eval_results.json에 기록할 모델명
     dataset_name : eval_results.json에 기록할 데이터셋명
+    cache_stats : 예측 캐시 hit/miss 통계 (지정하면 eval_results.json의 cache 섹션에 기록)
+    inference_stats : 추론 백엔드 통계 (지정하면 eval_results.json의 inference 섹션에 기록)
+    workers : step 평가 프로세스 수 (1이면 현재 프로세스에서 평가)
+    step_table : True면 step 단위 결과를 step_results.parquet로 함께 저장
+    n_bootstrap : 0보다 크면 대화 단위 cluster bootstrap 신뢰구간을 함께 계산
+    confidence : bootstrap 신뢰수준
+    perf : 추론 단계까지 측정한 PerfRecorder (None이면 스코어링 단계만 측정).
+        스코어링 단계 시간을 더해 eval_results.json의 perf 섹션에 기록한다.
+
+    레코드에 latency 필드(api_runner --stream-latency)가 있으면 step 유형·GT 함수별 분위수를
+    eval_results.json의 latency 섹션에 함께 기록한다.
     """
-    from evaluations.metrics import evaluate_function_calls, evaluate_function_call_step
+    from evaluations.metrics import score_steps, stage_confidence_intervals
     from evaluations.multi_turn_metrics import evaluate_multi_turn
 
+    perf = perf or PerfRecorder()
+    perf.counters.setdefault("steps", len(records))
     output_dir.mkdir(parents=True, exist_ok=True)
 
     labels = [r["gt_response"] for r in records]
     predictions = [r["prediction"] for r in records]
 
-    # Tool Call Level
-    tc_results = evaluate_function_calls(labels, predictions, tool_schemas=tool_schemas)
+    # Tool Call Level (step마다 한 번만 평가하고 step 결과를 turn 집계에 재사용)
+    with perf.stage("score_steps"):
+        step_results, tc_results = score_steps(
+            labels, predictions, tool_schemas=_step_schemas(records, tool_schemas), workers=workers,
+        )
+    if n_bootstrap > 0:
+        with perf.stage("bootstrap"):
+            tc_results.confidence_level = confidence
+            tc_results.confidence_intervals = stage_confidence_intervals(
+                [r["conversation_id"] for r in records], step_results, n_bootstrap, confidence,
+            )
     print(tc_results.summary())
 
-    step_results = [
-        evaluate_function_call_step(label, pred, tool_schemas=tool_schemas)
-        for label, pred in zip(labels, predictions)
-    ]
+    if step_table:
+        from evaluations.step_table import STEP_TABLE_FILENAME, StepTableWriter
+
+        with perf.stage("step_table"):
+            keys = [(r["conversation_id"], r["turn_index"], r["step_index"]) for r in records]
+            with StepTableWriter(output_dir / STEP_TABLE_FILENAME) as writer:
+                writer.write(keys, step_results)
+        print(f"step 테이블 저장: {writer.path}")
 
     # Turn/Conversation Level
-    conv_turn_passes = _group_turn_passes(records, step_results)
-    mt_results = evaluate_multi_turn(conv_turn_passes, aggregated=tc_results)
+    with perf.stage("turn_aggregation"):
+        conv_turn_passes = _group_turn_passes(records, step_results)
+        mt_results = evaluate_multi_turn(
+            conv_turn_passes, aggregated=tc_results, n_bootstrap=n_bootstrap, confidence=confidence,
+        )
     print(mt_results.summary())
+    latency = summarize_latency(records)
+    if latency is not None:
+        print(format_latency(latency))
+    print(perf.summary())
+
+    _write_results(
+        output_dir, model_name, dataset_name, tc_results, mt_results,
+        cache_stats=cache_stats, inference_stats=inference_stats, perf=perf.to_dict(), latency=latency,
+    )
 
-    # 결과 저장
+
+def _write_results(
+    output_dir: Path,
+    model_name: str,
+    dataset_name: str,
+    tc_results,
+    mt_results,
+    cache_stats: dict | None = None,
+    inference_stats: dict | None = None,
+    perf: dict | None = None,
+    latency: dict | None = None,
+) -> None:
+    """eval_results.json / eval_results.csv를 저장한다."""
     results = {
         "model": model_name,
         "dataset": dataset_name,
         "tool_call_level": tc_results.to_dict(),
         "multi_turn": mt_results.to_dict(),
     }
+    if cache_stats is not None:
+        results["cache"] = cache_stats
+    if inference_stats is not None:
+        results["inference"] = inference_stats
+    if perf is not None:
+        results["perf"] = perf
+    if latency is not None:
+        results["latency"] = latency
 
     result_json_path = output_dir / "eval_results.json"
     with open(result_json_path, "w", encoding="utf-8") as f:
@@ -112,9 +308,21 @@ def score_predictions(
     result_csv_path = output_dir / "eval_results.csv"
     flat_result = {
         "model": model_name,
-        **{f"tc_{k}": v for k, v in tc_results.to_dict().items()},
-        **{f"mt_{k}": v for k, v in mt_results.to_dict().items() if k != "aggregated"},
+        **{f"tc_{k}": v for k, v in tc_results.to_dict().items() if not k.startswith("confidence_")},
+        **{
+            f"mt_{k}": v for k, v in mt_results.to_dict().items()
+            if k != "aggregated" and not k.startswith("confidence_")
+        },
     }
+    # 신뢰구간은 지표별 하한/상한 컬럼으로 펼친다
+    for prefix, metric_results in (("tc", tc_results), ("mt", mt_results)):
+        for name, (low, high) in metric_results.confidence_intervals.items():
+            flat_result[f"{prefix}_{name}_ci_low"] = low
+            flat_result[f"{prefix}_{name}_ci_high"] = high
+    if perf is not None:
+        flat_result.update(flatten_perf(perf))
+    if latency is not None:
+        flat_result.update(flatten_latency(latency))
     with open(result_csv_path, "w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=list(flat_result.keys()))
         writer.writeheader()
@@ -122,29 +330,200 @@ def score_predictions(
     print(f"CSV 저장: {result_csv_path}")
 
 
+def _iter_predictions(predictions_path: str | Path) -> Iterator[dict]:
+    """predictions.jsonl을 한 줄씩 읽는다."""
+    with open(predictions_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _iter_scored_batches(
+    predictions_path: str | Path,
+    tool_schemas: dict | ToolCheckerIndex | None,
+    workers: int = 1,
+) -> Iterator[tuple[list[tuple[int, int]], list, object]]:
+    """
+    predictions.jsonl을 _STREAM_BATCH_SIZE개씩 읽어 평가한 결과를 파일 순서대로 내보낸다.
+
+    workers > 1이면 배치를 프로세스 풀에 넘기되, 메모리가 일정하도록 진행 중인 배치를 workers * 2개로 제한한다.
+
+    Yields
+    ------
+    ([(conversation_id, turn_index, step_index)], StepEvaluation 리스트, 배치 EvalAccumulator)
+    """
+    from evaluations.metrics import evaluate_step_shard
+
+    per_conversation = isinstance(tool_schemas, ToolCheckerIndex)
+
+    def _batches() -> Iterator[tuple[list, list[str], list[str], object]]:
+        keys, labels, predictions = [], [], []
+
+        def _batch():
+            if per_conversation:
+                return keys, labels, predictions, [tool_schemas.for_conversation(key[0]) for key in keys]
+            return keys, labels, predictions, tool_schemas
+
+        for record in _iter_predictions(predictions_path):
+            keys.append((record["conversation_id"], record["turn_index"], record["step_index"]))
+            labels.append(record["gt_response"])
+            predictions.append(record["prediction"])
+            if len(keys) >= _STREAM_BATCH_SIZE:
+                yield _batch()
+                keys, labels, predictions = [], [], []
+        if keys:
+            yield _batch()
+
+    if workers <= 1:
+        for keys, labels, predictions, schemas in _batches():
+            yield (keys, *evaluate_step_shard(labels, predictions, schemas))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for keys, labels, predictions, schemas in _batches():
+            pending.append((keys, executor.submit(evaluate_step_shard, labels, predictions, schemas)))
+            if len(pending) >= workers * 2:
+                keys, future = pending.popleft()
+                yield (keys, *future.result())
+        while pending:
+            keys, future = pending.popleft()
+            yield (keys, *future.result())
+
+
+def _stream_accumulate(
+    predictions_path: str | Path,
+    tool_schemas: dict | ToolCheckerIndex | None,
+    presorted: bool,
+    workers: int = 1,
+    step_table_path: Path | None = None,
+):
+    """
+    predictions.jsonl을 한 번 읽으며 Tool Call Level / Turn·Conversation Level 집계기를 채운다.
+
+    presorted=False면 step 요약을 외부 정렬한 뒤 대화별로 묶는다.
+    step_table_path를 지정하면 평가한 배치를 step 테이블에 파일 순서대로 이어 쓴다.
+    """
+    from evaluations.metrics import EvalAccumulator
+    from evaluations.multi_turn_metrics import MultiTurnAccumulator
+
+    tc_accumulator = EvalAccumulator()
+    mt_accumulator = MultiTurnAccumulator()
+
+    with ExitStack() as stack:
+        step_table = None
+        if step_table_path is not None:
+            from evaluations.step_table import StepTableWriter
+
+            step_table = stack.enter_context(StepTableWriter(step_table_path))
+
+        def _step_flags() -> Iterator[tuple]:
+            for keys, step_results, batch_accumulator in _iter_scored_batches(
+                predictions_path, tool_schemas, workers,
+            ):
+                tc_accumulator.merge(batch_accumulator)
+                if step_table is not None:
+                    step_table.write(keys, step_results)
+                for (conv_id, turn_idx, _), step_result in zip(keys, step_results):
+                    yield _turn_step_flags(conv_id, turn_idx, step_result)
+
+        if presorted:
+            for turn_passes in _stream_turn_passes(_step_flags()):
+                mt_accumulator.add_conversation(turn_passes)
+        else:
+            work_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="eval_sort_"))
+            for turn_passes in _stream_turn_passes(_external_sort(_step_flags(), work_dir)):
+                mt_accumulator.add_conversation(turn_passes)
+
+    return tc_accumulator, mt_accumulator
+
+
+def score_prediction_file(
+    predictions_path: str | Path,
+    tool_schemas: dict | ToolCheckerIndex | None,
+    output_dir: Path,
+    model_name: str = "",
+    dataset_name: str = "",
+    workers: int = 1,
+    step_table: bool = True,
+    perf: PerfRecorder | None = None,
+) -> None:
+    """
+    predictions.jsonl을 스트리밍으로 읽어 score_predictions와 같은 결과를 저장한다.
+
+    레코드를 리스트로 올리지 않고 step마다 온라인 집계기를 갱신하며,
+    현재 대화의 턴 상태만 유지하다가 대화가 끝나면 turn pass를 바로 집계한다.
+    conversation_id 오름차순이 아닌 파일은 한 번 더 읽으며 step 요약을 외부 정렬한다.
+    (run_evaluation이 저장하는 predictions.jsonl은 항상 정렬되어 있다.)
+    latency 분위수는 전체 값을 모아야 하므로 스트리밍 모드에서는 계산하지 않는다 (python -m evaluations.latency 사용).
+
+    Parameters
+    ----------
+    predictions_path : predictions.jsonl 파일 경로
+    tool_schemas : {함수명: {properties, required}} 형태의 스키마 또는 ToolCheckerIndex (없으면 None)
+    output_dir : 결과 저장 경로
+    model_name : eval_results.json에 기록할 모델명
+    dataset_name : eval_results.json에 기록할 데이터셋명
+    workers : step 평가 프로세스 수 (1이면 현재 프로세스에서 평가)
+    step_table : True면 step 단위 결과를 step_results.parquet로 함께 저장
+    perf : PerfRecorder (None이면 새로 만든다). 파일 읽기·step 평가·turn 집계가 한 번의 스트리밍으로
+        겹쳐 진행되므로 스코어링 전체를 score_stream 단계 하나로 기록한다.
+    """
+    from evaluations.step_table import STEP_TABLE_FILENAME
+
+    perf = perf or PerfRecorder()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    step_table_path = output_dir / STEP_TABLE_FILENAME if step_table else None
+
+    with perf.stage("score_stream"):
+        try:
+            tc_accumulator, mt_accumulator = _stream_accumulate(
+                predictions_path, tool_schemas, presorted=True, workers=workers,
+                step_table_path=step_table_path,
+            )
+        except _UnsortedPredictions:
+            print("  conversation_id 순으로 정렬되지 않은 입력입니다. 외부 정렬 후 다시 집계합니다.")
+            tc_accumulator, mt_accumulator = _stream_accumulate(
+                predictions_path, tool_schemas, presorted=False, workers=workers,
+                step_table_path=step_table_path,
+            )
+    perf.counters.setdefault("steps", tc_accumulator.total_samples)
+    print(f"  총 레코드 수: {tc_accumulator.total_samples}")
+    if step_table_path is not None:
+        print(f"step 테이블 저장: {step_table_path}")
+
+    tc_results = tc_accumulator.result()
+    print(tc_results.summary())
+
+    mt_results = mt_accumulator.result(aggregated=tc_results)
+    print(mt_results.summary())
+    print(perf.summary())
+
+    _write_results(output_dir, model_name, dataset_name, tc_results, mt_results, perf=perf.to_dict())
+
+
 def _load_predictions(predictions_path: str) -> list[dict]:
     """predictions.jsonl 파일을 로드한다."""
     with open(predictions_path, encoding="utf-8") as f:
         return [json.loads(line) for line in f if line.strip()]
 
 
-def _load_tool_schemas_from_dataset(dataset_path: str) -> dict | None:
-    """데이터셋 파일의 첫 번째 대화에서 tool_schemas를 추출한다."""
-    from evaluations.preprocessing import extract_tool_schemas
+def _load_tool_schemas_from_dataset(dataset_path: str) -> ToolCheckerIndex | None:
+    """
+    데이터셋의 대화별 tools를 컴파일해 conversation_id → 스키마 index를 만든다.
 
+    대화마다 tool 구성이 달라도 각 step은 자기 대화의 스키마로 채점된다
+    (tools가 있는 대화가 하나도 없으면 None).
+    """
     if os.path.exists(dataset_path):
         with open(dataset_path, encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    conv = json.loads(line)
-                    if conv.get("tools"):
-                        return extract_tool_schemas(conv["tools"])
+            conversations = [json.loads(line) for line in f if line.strip()]
     else:
         from datasets import load_dataset
-        ds = load_dataset(dataset_path, split="test")
-        if len(ds) > 0 and ds[0].get("tools"):
-            return extract_tool_schemas(ds[0]["tools"])
-    return None
+        conversations = list(load_dataset(dataset_path, split="test"))
+    if not any(conv.get("tools") for conv in conversations):
+        return None
+    return ToolCheckerIndex.from_conversations(conversations)
 
 
 def main():
@@ -165,15 +544,67 @@ def main():
         default="",
         help="결과 JSON에 기록할 모델명 (선택)",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="predictions.jsonl을 메모리에 올리지 않고 스트리밍으로 스코어링 (대용량 파일용)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="step 평가 프로세스 수 (기본 1: 현재 프로세스에서 평가)",
+    )
+    parser.add_argument(
+        "--bootstrap",
+        type=int,
+        default=0,
+        help="대화 단위 cluster bootstrap 재표본 수 (0이면 신뢰구간 생략, --stream과 함께 사용 불가)",
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        help="bootstrap 신뢰구간 신뢰수준",
+    )
+    parser.add_argument(
+        "--no-step-table",
+        action="store_true",
+        help="step_results.parquet (step 단위 결과 테이블) 저장 생략",
+    )
     args = parser.parse_args()
+    if args.stream and args.bootstrap > 0:
+        parser.error("--bootstrap은 대화별 결과를 모두 보관해야 하므로 --stream과 함께 사용할 수 없습니다.")
+
+    perf = PerfRecorder()
+    if args.stream:
+        print(f"tool_schemas 추출: {args.dataset}")
+        with perf.stage("load"):
+            tool_schemas = _load_tool_schemas_from_dataset(args.dataset)
+        print(f"  추출된 스키마: {describe_tool_schemas(tool_schemas)}")
+
+        print(f"predictions 스트리밍 스코어링: {args.predictions}")
+        score_prediction_file(
+            predictions_path=args.predictions,
+            tool_schemas=tool_schemas,
+            output_dir=Path(args.output),
+            model_name=args.model,
+            dataset_name=args.dataset or "",
+            workers=args.workers,
+            step_table=not args.no_step_table,
+            perf=perf,
+        )
+        return
 
     print(f"predictions 로드: {args.predictions}")
-    records = _load_predictions(args.predictions)
+    with perf.stage("load"):
+        records = _load_predictions(args.predictions)
     print(f"  총 레코드 수: {len(records)}")
 
     print(f"tool_schemas 추출: {args.dataset}")
-    tool_schemas = _load_tool_schemas_from_dataset(args.dataset)
-    print(f"  추출된 함수 수: {len(tool_schemas) if tool_schemas else 0}")
+    with perf.stage("load"):
+        tool_schemas = _load_tool_schemas_from_dataset(args.dataset)
+    print(f"  추출된 스키마: {describe_tool_schemas(tool_schemas)}")
 
     score_predictions(
         records=records,
@@ -181,6 +612,11 @@ def main():
         output_dir=Path(args.output),
         model_name=args.model,
         dataset_name=args.dataset or "",
+        workers=args.workers,
+        step_table=not args.no_step_table,
+        n_bootstrap=args.bootstrap,
+        confidence=args.confidence,
+        perf=perf,
     )
 
 
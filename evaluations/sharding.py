@@ -0,0 +1,67 @@
+"""
+대화 단위 결정적 샤딩 (--num-shards K --shard-id i).
+
+split_conversations 결과를 conversation_id의 안정 해시(CRC32)로 K개 샤드에 나눈다.
+같은 대화의 모든 turn/step은 같은 샤드에 들어가므로 샤드별 예측을 합치면 턴 집계가 그대로 성립한다.
+Python hash()와 달리 프로세스·머신·PYTHONHASHSEED와 관계없이 같은 샤드에 배정된다.
+
+샤드마다 예측 파일을 따로 쓰므로 여러 샤드가 같은 --output 디렉토리를 공유해도 된다.
+
+  predictions.shard-00000-of-00004.jsonl          : 샤드 0의 정렬된 예측
+  predictions.shard-00000-of-00004.partial.jsonl  : 샤드 0의 append-only 로그 (--resume용)
+
+합치기·누락 검증·스코어링은 evaluations.merge가 담당한다.
+"""
+
+import re
+import zlib
+from pathlib import Path
+
+from evaluations.prediction_log import PARTIAL_FILENAME
+
+PREDICTIONS_FILENAME = "predictions.jsonl"
+
+_SHARD_FILENAME_PATTERN = re.compile(r"^predictions\.shard-(\d+)-of-(\d+)\.jsonl$")
+
+
+def shard_of(conversation_id: int, num_shards: int) -> int:
+    """conversation_id가 배정되는 샤드 번호."""
+    return zlib.crc32(str(conversation_id).encode("utf-8")) % num_shards
+
+
+def select_shard(inference_inputs: list, num_shards: int, shard_id: int) -> list:
+    """
+    inference_inputs 중 shard_id 샤드에 속한 입력만 원래 순서대로 반환한다.
+
+    Raises
+    ------
+    ValueError
+        num_shards < 1 이거나 shard_id가 [0, num_shards) 범위 밖인 경우
+    """
+    if num_shards < 1:
+        raise ValueError(f"num_shards는 1 이상이어야 합니다: {num_shards}")
+    if not 0 <= shard_id < num_shards:
+        raise ValueError(f"shard_id는 0 이상 {num_shards} 미만이어야 합니다: {shard_id}")
+    if num_shards == 1:
+        return list(inference_inputs)
+    return [inp for inp in inference_inputs if shard_of(inp.conversation_id, num_shards) == shard_id]
+
+
+def prediction_filenames(num_shards: int = 1, shard_id: int = 0) -> tuple[str, str]:
+    """
+    (predictions 파일명, partial 로그 파일명).
+
+    샤드가 1개면 기존 이름(predictions.jsonl, predictions.partial.jsonl)을 그대로 쓴다.
+    """
+    if num_shards == 1:
+        return PREDICTIONS_FILENAME, PARTIAL_FILENAME
+    stem = f"predictions.shard-{shard_id:05d}-of-{num_shards:05d}"
+    return f"{stem}.jsonl", f"{stem}.partial.jsonl"
+
+
+def parse_shard_filename(path: str | Path) -> tuple[int, int] | None:
+    """샤드 predictions 파일명에서 (shard_id, num_shards)를 읽는다 (샤드 파일이 아니면 None)."""
+    match = _SHARD_FILENAME_PATTERN.match(Path(path).name)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
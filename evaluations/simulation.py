@@ -0,0 +1,489 @@
+"""
+자유 실행(free-running) 멀티턴 시뮬레이션 평가.
+
+GT 히스토리 분할(turn_splitter)은 매 step 입력에 정답 히스토리를 넣으므로 모델이 자기 실수를
+보지 못하고, 앞 턴의 오류가 뒤 턴으로 번지는 효과가 드러나지 않는다. 이 모듈은 gold 대화의
+user 발화만 스크립트로 재생하고, assistant 응답과 tool 결과는 모델 출력으로 채워 나간다.
+
+  1. 대화마다 gold user 발화를 하나 넣고 모델 응답을 생성한다.
+  2. 응답에 <tool_call>이 있으면 executor가 함수를 실행해 <tool_response>를 붙이고 다시 생성한다.
+     텍스트 응답(또는 턴당 최대 step 도달)이면 다음 gold user 발화로 넘어간다.
+  3. 모든 대화를 lockstep으로 진행한다. 라운드마다 진행 중인 대화의 다음 step을 모아 백엔드를
+     한 번 호출하고, 그 라운드의 tool call은 asyncio로 동시에 실행한다.
+
+executor:
+  gold : 같은 대화의 gold tool_call과 name·arguments가 같으면 gold tool_response를 돌려주고,
+         다르면 datagen.tool_specs stub을 실행한다 (모델이 gold 경로를 벗어난 뒤에만 결과가 달라짐).
+  stub : 항상 datagen.tool_specs의 async stub을 실행한다 (고정 목업 응답).
+
+스코어링은 턴 안의 모델 step을 같은 위치의 gold step과 맞춰 predictions.jsonl 레코드로 만든 뒤
+기존 score_predictions(score_steps + evaluate_multi_turn)를 그대로 사용한다.
+모델이 gold보다 일찍 턴을 끝내면 남은 gold step은 빈 예측으로, 더 길게 이어가면 초과 step은
+transcript에만 남기고 통계(extra_steps)로 집계한다.
+
+실행:
+    python -m evaluations.simulation --backend vllm --model Qwen/Qwen2.5-7B-Instruct \\
+        --lora outputs/checkpoint-1000 \\
+        --dataset eval_data/dataset.jsonl --output eval_output_sim
+
+    # 모델 없이 확인 (gold 응답 재생 + gold executor = GT 대화 재현, 모든 메트릭 100%)
+    python -m evaluations.simulation --backend replay --dataset eval_data/dataset.jsonl --output eval_output_sim
+"""
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from datagen.tool_parsing import find_tool_response, parse_tool_call
+from evaluations.backends import BACKENDS, InferenceBackend, capabilities, load_backend
+from evaluations.perf import PerfRecorder
+from evaluations.pipeline import load_conversations, save_predictions, score_run
+from evaluations.prediction_cache import PredictionCache, cached_inference
+from evaluations.prediction_log import make_record
+from evaluations.turn_splitter import ConversationContext, InferenceInput, is_tool_response
+
+EXECUTORS = ("gold", "stub")
+TRANSCRIPT_FILENAME = "simulation.jsonl"
+
+# 모델이 tool_call을 끝없이 이어갈 때 턴을 강제로 끝내는 step 수
+_DEFAULT_MAX_STEPS_PER_TURN = 8
+
+
+def _tool_response(body: str) -> dict:
+    return {"role": "user", "content": f"<tool_response>\n{body}\n</tool_response>"}
+
+
+def _error_body(message: str) -> str:
+    return json.dumps({"error": message}, ensure_ascii=False)
+
+
+def _call_key(call: dict) -> str:
+    return json.dumps({"name": call["name"], "arguments": call["arguments"]}, ensure_ascii=False, sort_keys=True)
+
+
+class StubToolExecutor:
+    """datagen.tool_specs의 async stub을 이름으로 호출한다 (실패는 {"error": ...} 응답)."""
+
+    def __init__(self):
+        from datagen import tool_specs
+
+        self.functions = {spec["name"]: getattr(tool_specs, spec["name"]) for spec in tool_specs.tools}
+        self.calls = 0
+        self.errors = 0
+
+    async def execute(self, conversation_id: int, call: dict | None, turn_index: int, step_index: int) -> str:
+        """tool_response 본문(JSON 문자열)을 반환한다."""
+        self.calls += 1
+        if call is None:
+            self.errors += 1
+            return _error_body("tool_call을 파싱할 수 없습니다 (name / arguments 확인)")
+        function = self.functions.get(call["name"])
+        if function is None:
+            self.errors += 1
+            return _error_body(f"알 수 없는 함수: {call['name']}")
+        try:
+            result = await function(**call["arguments"])
+        except (TypeError, ValueError, AttributeError) as e:
+            self.errors += 1
+            return _error_body(f"{call['name']} 호출 실패: {e}")
+        return json.dumps(result, ensure_ascii=False, default=str)
+
+
+class GoldReplayExecutor:
+    """
+    모델의 tool_call이 같은 대화의 gold tool_call과 같으면 gold tool_response를 돌려준다.
+
+    같은 (턴, step) 위치의 gold 호출을 먼저 보고, 없으면 대화 안의 첫 번째 일치 호출을 쓴다
+    (같은 호출이 여러 번 나오는 get_cart 등은 위치가 맞아야 당시 상태의 응답을 재생한다).
+    일치하는 gold 호출이 없으면 fallback(StubToolExecutor)으로 실행한다.
+    """
+
+    def __init__(self, conversations: list[dict], fallback: StubToolExecutor | None = None):
+        self.fallback = fallback or StubToolExecutor()
+        self.replayed = 0
+        # {conversation_id: {(turn, step): (호출 키, 응답 본문)}}, {conversation_id: {호출 키: 응답 본문}}
+        self._by_position: dict[int, dict[tuple[int, int], tuple[str, str]]] = {}
+        self._by_call: dict[int, dict[str, str]] = {}
+        for conversation_id, conversation in enumerate(conversations):
+            positions, calls = {}, {}
+            for turn_index, step_index, call, body in _gold_tool_calls(conversation.get("messages", [])):
+                positions[(turn_index, step_index)] = (_call_key(call), body)
+                calls.setdefault(_call_key(call), body)
+            self._by_position[conversation_id] = positions
+            self._by_call[conversation_id] = calls
+
+    @property
+    def calls(self) -> int:
+        return self.replayed + self.fallback.calls
+
+    @property
+    def errors(self) -> int:
+        return self.fallback.errors
+
+    async def execute(self, conversation_id: int, call: dict | None, turn_index: int, step_index: int) -> str:
+        if call is not None:
+            key = _call_key(call)
+            gold = self._by_position[conversation_id].get((turn_index, step_index))
+            body = gold[1] if gold is not None and gold[0] == key else self._by_call[conversation_id].get(key)
+            if body is not None:
+                self.replayed += 1
+                return body
+        return await self.fallback.execute(conversation_id, call, turn_index, step_index)
+
+
+def _gold_tool_calls(messages: list[dict]):
+    """gold 메시지에서 (turn, step, tool_call, tool_response 본문)을 순서대로 꺼낸다."""
+    turn_index, step_index = 0, 0
+    for index, message in enumerate(messages):
+        if message["role"] == "user" and not is_tool_response(message):
+            if index > 0:
+                turn_index += 1
+                step_index = 0
+        elif message["role"] == "assistant":
+            call = parse_tool_call(message["content"])
+            following = messages[index + 1] if index + 1 < len(messages) else None
+            response = find_tool_response(following["content"]) if following is not None else None
+            if call is not None and response is not None:
+                yield turn_index, step_index, call, response.raw
+            step_index += 1
+
+
+def make_executor(name: str, conversations: list[dict]):
+    """이름으로 tool executor를 만든다."""
+    if name == "gold":
+        return GoldReplayExecutor(conversations)
+    if name == "stub":
+        return StubToolExecutor()
+    raise ValueError(f"알 수 없는 executor: {name} (사용 가능: {', '.join(EXECUTORS)})")
+
+
+class SimulationInput(InferenceInput):
+    """
+    시뮬레이션 중인 대화의 다음 step 입력.
+
+    context.messages는 지금까지 시뮬레이션된 히스토리이고 gt_index는 그 길이이므로
+    messages / 프롬프트 렌더링은 InferenceInput과 같다. 정답은 같은 위치의 gold step 응답이다
+    (gold보다 긴 턴의 초과 step은 빈 문자열, is_tool_call=False).
+    """
+
+    __slots__ = ("_gt_response",)
+
+    def __init__(self, context, conversation_id, turn_index, step_index, gt_response: str, is_tool_call: bool):
+        super().__init__(
+            context, conversation_id, turn_index, step_index,
+            gt_index=len(context.messages), is_tool_call=is_tool_call,
+        )
+        self._gt_response = gt_response
+
+    @property
+    def gt_response(self) -> str:
+        return self._gt_response
+
+
+class _ConversationState:
+    """대화 하나의 시뮬레이션 진행 상태."""
+
+    def __init__(self, conversation_id: int, conversation: dict):
+        messages = conversation.get("messages", [])
+        self.conversation_id = conversation_id
+        self.context = ConversationContext(
+            system_msg={"role": "system", "content": conversation.get("system_prompt", "")},
+            messages=[],
+            tools=conversation.get("tools", []),
+        )
+        # 턴별 gold user 발화와 gold assistant 응답 목록
+        self.user_turns: list[dict] = []
+        self.gold_steps: list[list[str]] = []
+        for message in messages:
+            if message["role"] == "user" and not is_tool_response(message):
+                self.user_turns.append(message)
+                self.gold_steps.append([])
+            elif message["role"] == "assistant" and self.gold_steps:
+                self.gold_steps[-1].append(message["content"])
+        self.model_steps: list[list[str]] = []
+        self.turn_index = -1
+        self.step_index = 0
+        self.done = False
+        self.next_turn()
+
+    def next_turn(self) -> None:
+        self.turn_index += 1
+        self.step_index = 0
+        if self.turn_index >= len(self.user_turns):
+            self.done = True
+            return
+        self.context.messages.append(self.user_turns[self.turn_index])
+        self.model_steps.append([])
+
+    def next_input(self) -> SimulationInput:
+        gold = self.gold_steps[self.turn_index]
+        gt_response = gold[self.step_index] if self.step_index < len(gold) else ""
+        return SimulationInput(
+            self.context,
+            self.conversation_id,
+            self.turn_index,
+            self.step_index,
+            gt_response=gt_response,
+            is_tool_call="<tool_call>" in gt_response,
+        )
+
+    def add_prediction(self, prediction: str) -> None:
+        self.context.messages.append({"role": "assistant", "content": prediction})
+        self.model_steps[self.turn_index].append(prediction)
+
+    def add_tool_response(self, body: str) -> None:
+        self.context.messages.append(_tool_response(body))
+        self.step_index += 1
+
+    def records(self) -> list[dict]:
+        """gold step 위치별 predictions.jsonl 레코드 (모델이 일찍 끝낸 step은 빈 예측)."""
+        records = []
+        for turn_index, (gold, model) in enumerate(zip(self.gold_steps, self.model_steps)):
+            for step_index, gt_response in enumerate(gold):
+                inp = SimulationInput(
+                    self.context, self.conversation_id, turn_index, step_index,
+                    gt_response=gt_response, is_tool_call="<tool_call>" in gt_response,
+                )
+                records.append(make_record(inp, model[step_index] if step_index < len(model) else ""))
+        return records
+
+    def transcript(self) -> dict:
+        return {
+            "conversation_id": self.conversation_id,
+            "gold_steps_per_turn": [len(gold) for gold in self.gold_steps],
+            "model_steps_per_turn": [len(model) for model in self.model_steps],
+            "messages": self.context.messages,
+        }
+
+
+async def _execute_calls(executor, calls: list[tuple[_ConversationState, dict | None]]) -> list[str]:
+    return await asyncio.gather(*(
+        executor.execute(state.conversation_id, call, state.turn_index, state.step_index)
+        for state, call in calls
+    ))
+
+
+def simulate_conversations(
+    backend: InferenceBackend,
+    conversations: list[dict],
+    executor,
+    max_new_tokens: int = 512,
+    max_steps_per_turn: int = _DEFAULT_MAX_STEPS_PER_TURN,
+    cache: PredictionCache | None = None,
+    perf: PerfRecorder | None = None,
+) -> tuple[list[dict], list[dict], dict]:
+    """
+    모든 대화를 lockstep으로 자유 실행한다.
+
+    Parameters
+    ----------
+    backend : InferenceBackend 구현 (라운드마다 진행 중인 대화의 step을 모아 generate 한 번 호출)
+    conversations : gold 대화 리스트 (user 발화와 정답 step만 사용)
+    executor : execute(conversation_id, tool_call, turn_index, step_index) 코루틴을 가진 tool executor
+    max_new_tokens : step당 최대 생성 토큰 수
+    max_steps_per_turn : 턴당 최대 모델 step 수 (넘으면 tool_call이어도 턴을 끝냄)
+    cache : 예측 캐시 (프롬프트가 같은 step은 재생성하지 않음)
+    perf : 지정하면 inference / tool_execution 단계 시간과 step 수를 기록
+
+    Returns
+    -------
+    (gold step 위치별 레코드, 대화별 transcript, 시뮬레이션 통계)
+    """
+    perf = perf or PerfRecorder()
+    states = [_ConversationState(conversation_id, conv) for conversation_id, conv in enumerate(conversations)]
+    rounds = 0
+    model_steps = 0
+    max_step_hits = 0
+
+    while True:
+        active = [state for state in states if not state.done]
+        if not active:
+            break
+        rounds += 1
+        inputs = [state.next_input() for state in active]
+        budgets = [max_new_tokens] * len(inputs)
+
+        def _infer(indices: list[int], notify) -> list[str]:
+            return backend.generate(
+                [inputs[i] for i in indices], [budgets[i] for i in indices], on_result=notify,
+            )
+
+        with perf.stage("prompt_build"):
+            keys = backend.cache_keys(inputs, budgets, None)
+        with perf.stage("inference"):
+            predictions = cached_inference(keys, cache, _infer)
+        model_steps += len(inputs)
+
+        calls: list[tuple[_ConversationState, dict | None]] = []
+        for state, prediction in zip(active, predictions):
+            state.add_prediction(prediction)
+            if "<tool_call>" not in prediction:
+                state.next_turn()
+            elif state.step_index + 1 >= max_steps_per_turn:
+                max_step_hits += 1
+                state.next_turn()
+            else:
+                calls.append((state, parse_tool_call(prediction)))
+
+        if calls:
+            with perf.stage("tool_execution"):
+                bodies = asyncio.run(_execute_calls(executor, calls))
+            for (state, _), body in zip(calls, bodies):
+                state.add_tool_response(body)
+        print(f"  라운드 {rounds}: 생성 {len(inputs)}개, tool 실행 {len(calls)}개")
+
+    records = [record for state in states for record in state.records()]
+    gold_total = sum(len(gold) for state in states for gold in state.gold_steps)
+    extra_steps = sum(
+        max(0, len(model) - len(gold))
+        for state in states for gold, model in zip(state.gold_steps, state.model_steps)
+    )
+    early_turns = sum(
+        len(model) < len(gold)
+        for state in states for gold, model in zip(state.gold_steps, state.model_steps)
+    )
+    stats = {
+        "executor": type(executor).__name__,
+        "rounds": rounds,
+        "model_steps": model_steps,
+        "gold_steps": gold_total,
+        "extra_steps": extra_steps,
+        "early_stopped_turns": early_turns,
+        "max_steps_per_turn": max_steps_per_turn,
+        "max_step_hits": max_step_hits,
+        "tool_calls": executor.calls,
+        "tool_errors": executor.errors,
+    }
+    if isinstance(executor, GoldReplayExecutor):
+        stats["tool_calls_replayed"] = executor.replayed
+    perf.count("generated_steps", model_steps)
+    return records, [state.transcript() for state in states], stats
+
+
+def run_simulation(
+    backend: InferenceBackend,
+    dataset_path: str,
+    output_dir: str,
+    executor: str = "gold",
+    max_new_tokens: int = 512,
+    max_steps_per_turn: int = _DEFAULT_MAX_STEPS_PER_TURN,
+    inference_only: bool = False,
+    cache_path: str | None = None,
+) -> None:
+    """
+    자유 실행 시뮬레이션 → predictions.jsonl / simulation.jsonl 저장 → 스코어링.
+
+    결과 형식은 run_pipeline과 같으므로 GT 히스토리 평가 결과와 evaluations.compare로 비교할 수 있다.
+    시뮬레이션 통계는 eval_results.json의 inference.simulation에 기록한다.
+    """
+    output_path = Path(output_dir)
+    perf = PerfRecorder()
+
+    print(f"[1/4] 데이터셋 로드: {dataset_path}")
+    with perf.stage("load"):
+        conversations = load_conversations(dataset_path)
+    print(f"  총 대화 수: {len(conversations)}")
+
+    print(f"[2/4] 시뮬레이션 시작: {backend.model_name} (backend={backend.name}, executor={executor})")
+    cache = PredictionCache(cache_path) if cache_path else None
+    records, transcripts, stats = simulate_conversations(
+        backend,
+        conversations,
+        make_executor(executor, conversations),
+        max_new_tokens=max_new_tokens,
+        max_steps_per_turn=max_steps_per_turn,
+        cache=cache,
+        perf=perf,
+    )
+    perf.count("steps", len(records))
+    cache_stats = None
+    if cache is not None:
+        cache_stats = cache.stats()
+        cache.close()
+    print(
+        f"  시뮬레이션 완료: 라운드 {stats['rounds']}회, 모델 step {stats['model_steps']}개 "
+        f"(gold {stats['gold_steps']}개, 초과 {stats['extra_steps']}개), "
+        f"tool 실행 {stats['tool_calls']}회 (에러 {stats['tool_errors']}회)"
+    )
+
+    with perf.stage("save"):
+        pred_path = save_predictions(records, output_path)
+        transcript_path = output_path / TRANSCRIPT_FILENAME
+        with open(transcript_path, "w", encoding="utf-8") as f:
+            for transcript in transcripts:
+                f.write(json.dumps(transcript, ensure_ascii=False) + "\n")
+    print(f"[3/4] 예측 저장: {pred_path}, transcript: {transcript_path}")
+
+    if inference_only:
+        print(perf.summary())
+        print("--inference-only 지정: 스코어링 생략")
+        return
+
+    print("[4/4] 메트릭 계산")
+    score_run(
+        records,
+        conversations,
+        output_path,
+        backend.model_name,
+        dataset_path,
+        cache_stats=cache_stats,
+        inference_stats={"backend": capabilities(backend), "simulation": stats},
+        perf=perf,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="자유 실행 멀티턴 시뮬레이션 평가")
+    parser.add_argument("--backend", choices=BACKENDS, required=True, help="추론 백엔드")
+    parser.add_argument("--model", default="", help="모델 경로·ID (replay는 불필요)")
+    parser.add_argument("--lora", default=None, help="LoRA 어댑터 경로 (vllm / hf)")
+    parser.add_argument("--dataset", default="eval_data/dataset.jsonl", help="평가 데이터셋 경로 또는 HuggingFace ID")
+    parser.add_argument("--output", default="eval_output_sim", help="결과 저장 디렉토리")
+    parser.add_argument(
+        "--executor",
+        choices=EXECUTORS,
+        default="gold",
+        help="tool 실행기 (gold: gold 호출과 같으면 gold 응답 재생, 아니면 stub / stub: 항상 stub)",
+    )
+    parser.add_argument("--max-new-tokens", type=int, default=512, help="최대 생성 토큰 수")
+    parser.add_argument(
+        "--max-steps-per-turn",
+        type=int,
+        default=_DEFAULT_MAX_STEPS_PER_TURN,
+        help=f"턴당 최대 모델 step 수 (기본값: {_DEFAULT_MAX_STEPS_PER_TURN})",
+    )
+    parser.add_argument(
+        "--inference-only",
+        action="store_true",
+        help="predictions.jsonl / simulation.jsonl 저장까지만 수행하고 스코어링 생략",
+    )
+    parser.add_argument("--cache", default=None, help="예측 캐시 SQLite 경로")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="openai 백엔드 라운드 내 최대 동시 요청 수",
+    )
+    args = parser.parse_args()
+    if args.backend != "replay" and not args.model:
+        parser.error(f"--backend {args.backend}에는 --model이 필요합니다.")
+    if args.max_steps_per_turn < 1:
+        parser.error("--max-steps-per-turn은 1 이상이어야 합니다.")
+
+    options = {"concurrency": args.concurrency} if args.backend == "openai" else {}
+    backend = load_backend(args.backend, args.model, lora_path=args.lora, **options)
+    run_simulation(
+        backend,
+        dataset_path=args.dataset,
+        output_dir=args.output,
+        executor=args.executor,
+        max_new_tokens=args.max_new_tokens,
+        max_steps_per_turn=args.max_steps_per_turn,
+        inference_only=args.inference_only,
+        cache_path=args.cache,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+step 단위 평가 결과 컬럼형 테이블 (Parquet).
+
+스코어러가 eval_results.json/csv와 함께 step_results.parquet를 저장한다.
+"여러 run에서 argument_value 단계에 실패한 step은?" 같은 질문을
+predictions 재파싱·재스코어링 없이 evaluations.query로 바로 조회하는 용도다.
+
+컬럼:
+  conversation_id, turn_index, step_index  — step 키
+  function_name, predicted_function        — GT / 예측 함수명
+  is_tool_label                            — GT가 tool call인지 여부
+  relevance_pass ~ value_pass              — 7단계 판정 (평가 대상이 아니면 null)
+  first_failed_stage                       — 처음 실패한 단계명 (metrics.STAGE_FIELDS 기준)
+  mismatched_keys                          — 실패 단계에서 문제가 된 argument 키 목록
+"""
+
+from pathlib import Path
+
+from evaluations.metrics import STAGE_FIELDS
+
+STEP_TABLE_FILENAME = "step_results.parquet"
+KEY_COLUMNS = ("conversation_id", "turn_index", "step_index")
+
+
+def _step_table_schema():
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("conversation_id", pa.int64()),
+            ("turn_index", pa.int32()),
+            ("step_index", pa.int32()),
+            ("function_name", pa.string()),
+            ("predicted_function", pa.string()),
+            ("is_tool_label", pa.bool_()),
+            *[(field_name, pa.bool_()) for _, field_name in STAGE_FIELDS],
+            ("first_failed_stage", pa.string()),
+            ("mismatched_keys", pa.list_(pa.string())),
+        ]
+    )
+
+
+def _as_name(value) -> str | None:
+    """함수명 컬럼 값 (JSON상 문자열이 아닌 name도 문자열로 저장)."""
+    return value if value is None or isinstance(value, str) else str(value)
+
+
+def build_step_columns(keys: list[tuple[int, int, int]], step_results: list) -> dict[str, list]:
+    """
+    (conversation_id, turn_index, step_index) 키와 StepEvaluation 리스트를 컬럼 dict로 변환한다.
+    """
+    columns = {
+        "conversation_id": [key[0] for key in keys],
+        "turn_index": [key[1] for key in keys],
+        "step_index": [key[2] for key in keys],
+        "function_name": [_as_name(step.function_name) for step in step_results],
+        "predicted_function": [_as_name(step.predicted_function) for step in step_results],
+        "is_tool_label": [step.is_tool_label for step in step_results],
+    }
+    for _, field_name in STAGE_FIELDS:
+        columns[field_name] = [getattr(step, field_name) for step in step_results]
+    columns["first_failed_stage"] = [step.first_failed_stage for step in step_results]
+    columns["mismatched_keys"] = [list(step.mismatched_keys) for step in step_results]
+    return columns
+
+
+class StepTableWriter:
+    """step 결과를 배치 단위로 Parquet 파일에 이어 쓴다 (스트리밍 스코어링에서도 메모리 일정)."""
+
+    def __init__(self, path: Path):
+        import pyarrow.parquet as pq
+
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._schema = _step_table_schema()
+        self._writer = pq.ParquetWriter(str(self.path), self._schema)
+        self.num_rows = 0
+
+    def write(self, keys: list[tuple[int, int, int]], step_results: list) -> None:
+        import pyarrow as pa
+
+        if not keys:
+            return
+        table = pa.Table.from_pydict(build_step_columns(keys, step_results), schema=self._schema)
+        self._writer.write_table(table)
+        self.num_rows += len(keys)
+
+    def close(self) -> None:
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._writer = None
+
+    def __enter__(self) -> "StepTableWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def resolve_step_table_path(run: str | Path) -> Path:
+    """run 디렉토리 또는 Parquet 파일 경로를 step 테이블 파일 경로로 변환한다."""
+    path = Path(run)
+    if path.is_dir():
+        path = path / STEP_TABLE_FILENAME
+    if not path.exists():
+        raise FileNotFoundError(f"step 테이블이 없습니다: {path} (scorer로 먼저 스코어링하세요)")
+    return path
+
+
+def run_names(runs: list[str | Path]) -> list[str]:
+    """run 경로를 표시용 이름으로 변환한다 (이름이 겹치면 상위 디렉토리까지 포함)."""
+    names = []
+    for run in runs:
+        path = Path(run)
+        if path.suffix == ".parquet":
+            path = path.parent
+        name = path.name
+        if name in names:
+            name = f"{path.parent.name}/{path.name}"
+        names.append(name)
+    return names
+
+
+def load_step_table(run: str | Path, columns: list[str] | None = None):
+    """step 테이블을 pandas DataFrame으로 로드한다."""
+    import pandas as pd
+
+    return pd.read_parquet(resolve_step_table_path(run), columns=columns)
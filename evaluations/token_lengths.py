@@ -0,0 +1,142 @@
+"""
+프롬프트 토큰 길이 검사 (max_model_len 결정, 초과 step 판정, 길이 bucket, 히스토그램).
+
+runner는 추론 전에 모든 프롬프트를 모델 토크나이저로 토큰화해 길이를 구한다.
+그 길이로 아래를 결정한다.
+
+  max_model_len  : "auto"면 max(프롬프트 길이 + step 생성 예산)을 _MODEL_LEN_MULTIPLE 단위로 올림
+                   (모델 한도를 넘지 않음)
+  oversized      : 프롬프트만으로 max_model_len 이상 → vLLM이 batch 전체를 거부하므로 미리 판정
+  truncation_risk: 프롬프트 + 생성 예산이 max_model_len 초과 → 생성이 예산보다 일찍 잘릴 수 있음
+  length bucket  : 길이순으로 정렬해 batch를 나눠 한 generate 호출 안의 프롬프트 길이를 고르게 함
+
+길이 분포는 2의 거듭제곱 구간 히스토그램으로 eval_results.json의 inference.token_lengths에 기록한다.
+"""
+
+from dataclasses import dataclass, field
+
+# max_model_len="auto"일 때 올림 단위
+_MODEL_LEN_MULTIPLE = 256
+
+# 히스토그램 첫 구간 상한 (이후 2배씩)
+_HISTOGRAM_FIRST_UPPER = 256
+
+
+def length_histogram(lengths: list[int]) -> list[dict]:
+    """
+    2의 거듭제곱 구간별 개수.
+
+    Returns
+    -------
+    [{"upper": 256, "count": n}, {"upper": 512, "count": n}, ...] (구간은 (이전 upper, upper])
+    """
+    if not lengths:
+        return []
+    upper = _HISTOGRAM_FIRST_UPPER
+    while upper < max(lengths):
+        upper *= 2
+    uppers = []
+    bound = _HISTOGRAM_FIRST_UPPER
+    while bound <= upper:
+        uppers.append(bound)
+        bound *= 2
+
+    counts = dict.fromkeys(uppers, 0)
+    for length in lengths:
+        for bound in uppers:
+            if length <= bound:
+                counts[bound] += 1
+                break
+    return [{"upper": bound, "count": count} for bound, count in counts.items()]
+
+
+def length_summary(lengths: list[int]) -> dict:
+    """개수·최소·p50·p95·최대·히스토그램."""
+    ordered = sorted(lengths)
+    if not ordered:
+        return {"count": 0, "min": 0, "p50": 0, "p95": 0, "max": 0, "histogram": []}
+    return {
+        "count": len(ordered),
+        "min": ordered[0],
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "max": ordered[-1],
+        "histogram": length_histogram(ordered),
+    }
+
+
+@dataclass
+class LengthCheck:
+    """프롬프트 길이 검사 결과 (인덱스는 검사에 넘긴 프롬프트 기준)."""
+
+    max_model_len: int | None
+    source: str
+    oversized: list[int] = field(default_factory=list)
+    truncation_risk: list[int] = field(default_factory=list)
+
+
+def check_prompt_lengths(
+    prompt_lengths: list[int],
+    budgets: list[int],
+    max_model_len: int | str | None,
+    model_limit: int | None = None,
+) -> LengthCheck:
+    """
+    max_model_len을 정하고 초과 step을 찾는다.
+
+    Parameters
+    ----------
+    prompt_lengths : 프롬프트별 토큰 수
+    budgets : 프롬프트별 최대 생성 토큰 수 (max_new_tokens 또는 DecodingPolicy 예산)
+    max_model_len : 정수면 그대로, "auto"면 필요한 최소 길이, None이면 모델 한도
+    model_limit : 모델 설정의 최대 컨텍스트 길이 (알 수 없으면 None)
+
+    Returns
+    -------
+    LengthCheck (source: "explicit" / "auto" / "model")
+    """
+    if max_model_len == "auto":
+        needed = max((length + budget for length, budget in zip(prompt_lengths, budgets)), default=0)
+        limit = -(-needed // _MODEL_LEN_MULTIPLE) * _MODEL_LEN_MULTIPLE
+        if model_limit is not None:
+            limit = min(limit, model_limit)
+        source = "auto"
+    elif max_model_len is not None:
+        limit = int(max_model_len)
+        source = "explicit"
+    else:
+        limit = model_limit
+        source = "model"
+
+    check = LengthCheck(max_model_len=limit, source=source)
+    if limit is None:
+        return check
+    for index, (length, budget) in enumerate(zip(prompt_lengths, budgets)):
+        if length >= limit:
+            check.oversized.append(index)
+        elif length + budget > limit:
+            check.truncation_risk.append(index)
+    return check
+
+
+def plan_length_batches(prompt_lengths: list[int], batch_size: int) -> list[list[int]]:
+    """프롬프트를 길이순으로 정렬해 batch_size개씩 나눈다 (짧은 batch부터)."""
+    order = sorted(range(len(prompt_lengths)), key=lambda i: prompt_lengths[i])
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+
+def bucket_waves(
+    waves: list[list[int]],
+    prompt_lengths: list[int],
+    batch_size: int,
+) -> list[list[int]]:
+    """
+    prefix wave 순서는 유지하고 각 wave 안을 길이순 batch로 나눈다.
+
+    wave k의 prefix는 앞 wave에서 이미 계산되므로 wave 안 순서를 바꿔도 prefix 재사용은 같다.
+    """
+    batches = []
+    for wave in waves:
+        ordered = sorted(wave, key=lambda i: prompt_lengths[i])
+        batches.extend(ordered[start:start + batch_size] for start in range(0, len(ordered), batch_size))
+    return batches
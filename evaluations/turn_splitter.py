@@ -14,48 +14,83 @@ GT 히스토리 기반 싱글턴 분할 모듈.
   Step N: [..., GT_tc(N-1), GT_tr(N-1)] → final response 예측
 """
 
-from dataclasses import dataclass, field
 
+class ConversationContext:
+    """한 대화의 InferenceInput들이 공유하는 원본 데이터 (system 메시지, 메시지 배열, tools)."""
 
-@dataclass
-class InferenceInput:
-    """한 step에 대한 추론 입력 단위."""
-
-    conversation_id: int        # 대화 인덱스
-    turn_index: int             # 대화 내 턴 인덱스 (real user 기준)
-    step_index: int             # 턴 내 step (sequential call용, 0부터)
-    messages: list[dict]        # 추론에 넘길 메시지 리스트 (system + GT history + current)
-    gt_response: str            # 이 step의 정답 assistant 응답
-    is_tool_call: bool          # 정답이 tool_call인지 여부
-    tools: list[dict] = field(default_factory=list)  # 함수 스키마
-
+    __slots__ = ("system_msg", "messages", "tools")
 
-def _is_tool_response(msg: dict) -> bool:
-    """user 메시지가 tool_response인지 판단."""
-    return msg.get("role") == "user" and "<tool_response>" in msg.get("content", "")
+    def __init__(self, system_msg: dict, messages: list[dict], tools: list[dict]):
+        self.system_msg = system_msg
+        self.messages = messages
+        self.tools = tools
 
 
-def _split_turns(messages: list[dict]) -> list[list[dict]]:
+class InferenceInput:
     """
-    메시지 리스트를 turn 단위로 분할한다.
+    한 step에 대한 추론 입력 단위.
 
-    turn 경계: tool_response가 아닌 실제 user 발화.
+    대화 원본을 ConversationContext로 공유하고 (대화 참조, 정답 메시지 위치)만 보관한다.
+    GT 히스토리 방식에서 step 입력은 항상 [system] + messages[:gt_index]이므로
+    messages는 접근 시점에 이 범위를 리스트로 만들어 반환한다.
     """
-    turns: list[list[dict]] = []
-    current: list[dict] = []
-
-    for msg in messages:
-        if msg["role"] == "user" and not _is_tool_response(msg):
-            if current:
-                turns.append(current)
-            current = [msg]
-        else:
-            current.append(msg)
-
-    if current:
-        turns.append(current)
 
-    return turns
+    __slots__ = (
+        "context",
+        "conversation_id",
+        "turn_index",
+        "step_index",
+        "gt_index",
+        "is_tool_call",
+    )
+
+    def __init__(
+        self,
+        context: ConversationContext,
+        conversation_id: int,       # 대화 인덱스
+        turn_index: int,            # 대화 내 턴 인덱스 (real user 기준)
+        step_index: int,            # 턴 내 step (sequential call용, 0부터)
+        gt_index: int,              # context.messages에서 이 step 정답 assistant 메시지의 위치
+        is_tool_call: bool,         # 정답이 tool_call인지 여부
+    ):
+        self.context = context
+        self.conversation_id = conversation_id
+        self.turn_index = turn_index
+        self.step_index = step_index
+        self.gt_index = gt_index
+        self.is_tool_call = is_tool_call
+
+    @property
+    def messages(self) -> list[dict]:
+        """추론에 넘길 메시지 리스트 (system + GT history + current)."""
+        return [self.context.system_msg, *self.context.messages[:self.gt_index]]
+
+    @property
+    def num_messages(self) -> int:
+        """messages를 만들지 않고 메시지 수만 반환한다."""
+        return self.gt_index + 1
+
+    @property
+    def gt_response(self) -> str:
+        """이 step의 정답 assistant 응답."""
+        return self.context.messages[self.gt_index]["content"]
+
+    @property
+    def tools(self) -> list[dict]:
+        """함수 스키마."""
+        return self.context.tools
+
+    def __repr__(self) -> str:
+        return (
+            f"InferenceInput(conversation_id={self.conversation_id}, "
+            f"turn_index={self.turn_index}, step_index={self.step_index}, "
+            f"gt_index={self.gt_index}, is_tool_call={self.is_tool_call})"
+        )
+
+
+def is_tool_response(msg: dict) -> bool:
+    """user 메시지가 tool_response인지 판단."""
+    return msg.get("role") == "user" and "<tool_response>" in msg.get("content", "")
 
 
 def split_conversations(conversations: list[dict]) -> list[InferenceInput]:
@@ -73,61 +108,38 @@ def split_conversations(conversations: list[dict]) -> list[InferenceInput]:
     Returns
     -------
     list[InferenceInput]
-        GT 히스토리 기반으로 분할된 step 단위 추론 입력 목록
+        GT 히스토리 기반으로 분할된 step 단위 추론 입력 목록.
+        같은 대화의 입력은 하나의 ConversationContext를 공유한다.
     """
     result: list[InferenceInput] = []
 
     for conv_id, conv in enumerate(conversations):
-        system_prompt = conv.get("system_prompt", "")
         messages = conv.get("messages", [])
-        tools = conv.get("tools", [])
-
-        system_msg = {"role": "system", "content": system_prompt}
-        turns = _split_turns(messages)
-
-        # GT 히스토리: 이전 턴들의 모든 메시지를 누적
-        gt_history: list[dict] = []
-
-        for turn_idx, turn_msgs in enumerate(turns):
-            # 현재 턴 처리용 누적 컨텍스트 (시스템 + GT history + 현재 턴의 지금까지 메시지)
-            current_context: list[dict] = gt_history.copy()
-
-            step_idx = 0
-            i = 0
-            while i < len(turn_msgs):
-                msg = turn_msgs[i]
-
-                if msg["role"] == "assistant":
-                    is_tc = "<tool_call>" in msg.get("content", "")
-
-                    result.append(InferenceInput(
-                        conversation_id=conv_id,
-                        turn_index=turn_idx,
-                        step_index=step_idx,
-                        messages=[system_msg] + current_context,
-                        gt_response=msg["content"],
-                        is_tool_call=is_tc,
-                        tools=tools,
-                    ))
-
-                    # assistant 메시지를 컨텍스트에 추가
-                    current_context = current_context + [msg]
-
-                    # 뒤따르는 user(tool_response)가 있으면 함께 컨텍스트에 추가
-                    if i + 1 < len(turn_msgs) and _is_tool_response(turn_msgs[i + 1]):
-                        current_context = current_context + [turn_msgs[i + 1]]
-                        i += 2
-                    else:
-                        i += 1
-
-                    step_idx += 1
-
-                else:
-                    # user(real) 또는 user(tool_response): 컨텍스트에 추가
-                    current_context = current_context + [msg]
-                    i += 1
-
-            # 현재 턴 전체를 GT 히스토리에 누적
-            gt_history = gt_history + turn_msgs
+        context = ConversationContext(
+            system_msg={"role": "system", "content": conv.get("system_prompt", "")},
+            messages=messages,
+            tools=conv.get("tools", []),
+        )
+
+        # 턴 경계: tool_response가 아닌 실제 user 발화 (첫 메시지 제외).
+        # 각 assistant 메시지가 하나의 step이며, 그 step의 입력은 항상
+        # 원본 messages[:index] (이전 턴 전체 + 현재 턴의 앞부분)이다.
+        turn_idx = 0
+        step_idx = 0
+        for index, msg in enumerate(messages):
+            if msg["role"] == "user" and not is_tool_response(msg):
+                if index > 0:
+                    turn_idx += 1
+                    step_idx = 0
+            elif msg["role"] == "assistant":
+                result.append(InferenceInput(
+                    context=context,
+                    conversation_id=conv_id,
+                    turn_index=turn_idx,
+                    step_index=step_idx,
+                    gt_index=index,
+                    is_tool_call="<tool_call>" in msg.get("content", ""),
+                ))
+                step_idx += 1
 
     return result
@@ -0,0 +1,43 @@
+"""공통 fixture: 로컬 OpenAI 호환 stub 서버 (evaluations.api_stub)."""
+
+import threading
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DATASET_PATH = REPO_ROOT / "eval_data" / "dataset.jsonl"
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    """
+    StubResponder를 받아 빈 포트에 stub 서버를 띄우고 OPENAI_BASE_URL을 그쪽으로 돌린다.
+
+    사용: server = stub_server(responder, batch_max_requests=10)   # 키워드 인자는 make_server로 전달
+    """
+    from evaluations.api_stub import make_server
+
+    servers = []
+
+    def _start(responder, **server_kwargs):
+        server = make_server(responder, port=0, **server_kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+        monkeypatch.setenv("OPENAI_API_KEY", "stub")
+        return server
+
+    yield _start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(scope="session")
+def step_inputs():
+    """eval 데이터셋 앞 3개 대화의 싱글턴 step 입력."""
+    from evaluations.pipeline import load_conversations
+    from evaluations.turn_splitter import split_conversations
+
+    return split_conversations(load_conversations(str(DATASET_PATH))[:3])
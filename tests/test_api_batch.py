@@ -0,0 +1,88 @@
+"""api_runner --mode batch 경로: 요청 생성 → 업로드·제출 → 폴링 → 결과 파싱 → custom_id 매핑을 stub Batch API로 검증한다."""
+
+import json
+
+import pytest
+
+pytest.importorskip("openai")
+
+from evaluations.api_batch import (  # noqa: E402
+    build_batch_requests,
+    make_custom_id,
+    run_batch_inference,
+    split_batch_requests,
+)
+from evaluations.api_stub import StubResponder, _messages_key  # noqa: E402
+
+
+def _responder(step_inputs, **kwargs) -> StubResponder:
+    responses = {_messages_key(inp.messages): inp.gt_response for inp in step_inputs}
+    return StubResponder(responses, **kwargs)
+
+
+def test_split_batch_requests_respects_count_and_size_limits(step_inputs):
+    requests = build_batch_requests(step_inputs, "stub")
+
+    by_count = split_batch_requests(requests, max_requests=7)
+    assert [len(part) for part in by_count[:-1]] == [7] * (len(by_count) - 1)
+    assert sum(len(part) for part in by_count) == len(requests)
+
+    max_bytes = max(len(json.dumps(r, ensure_ascii=False).encode("utf-8")) + 1 for r in requests) * 3
+    by_size = split_batch_requests(requests, max_bytes=max_bytes)
+    assert all(sum(len(line) for line in part) <= max_bytes for part in by_size)
+    assert [json.loads(line) for part in by_size for line in part] == requests
+
+    with pytest.raises(ValueError):
+        split_batch_requests(requests, max_bytes=10)
+
+
+def test_batch_round_trip_maps_results_by_custom_id(stub_server, step_inputs, tmp_path):
+    server = stub_server(_responder(step_inputs), batch_polls=2, batch_max_requests=10)
+    # 입력 순서를 뒤집어도 (stub 결과 파일도 입력과 다른 순서) custom_id로 원래 인덱스에 매핑되어야 한다
+    inputs = list(reversed(step_inputs))
+    budgets = [512] * len(inputs)
+    budgets[0] = 1
+    delivered, finish_reasons, token_counts = {}, {}, {}
+
+    predictions = run_batch_inference(
+        inputs, "stub", tmp_path, max_new_tokens=budgets, poll_interval=0,
+        on_result=delivered.__setitem__, finish_reasons=finish_reasons, token_counts=token_counts,
+        max_requests=10,
+    )
+
+    assert len(server.batches.batches) == -(-len(inputs) // 10)
+    assert predictions[1:] == [inp.gt_response for inp in inputs[1:]]
+    assert predictions[0] == inputs[0].gt_response[:4]
+    assert delivered == dict(enumerate(predictions))
+    assert finish_reasons[0] == "length"
+    assert all(finish_reasons[i] == "stop" for i in range(1, len(inputs)))
+    assert token_counts[0][1] == 1
+    assert set(token_counts) == set(range(len(inputs)))
+
+    status = json.loads((tmp_path / "batch_status.json").read_text(encoding="utf-8"))
+    assert [b["status"] for b in status["batches"]] == ["completed"] * len(server.batches.batches)
+    assert len(list(tmp_path.glob("batch_input.part-*.jsonl"))) == len(server.batches.batches)
+
+
+def test_batch_failed_requests_keep_successes(stub_server, step_inputs, tmp_path):
+    stub_server(_responder(step_inputs, error_prob=0.3, seed=0))
+    delivered = {}
+
+    with pytest.raises(RuntimeError, match="누락"):
+        run_batch_inference(step_inputs, "stub", tmp_path, poll_interval=0, on_result=delivered.__setitem__)
+
+    errors = json.loads((tmp_path / "batch_errors.json").read_text(encoding="utf-8"))
+    failed_ids = {error["custom_id"] for error in errors}
+    assert failed_ids and delivered
+    assert len(failed_ids) + len(delivered) == len(step_inputs)
+    for index, prediction in delivered.items():
+        assert make_custom_id(step_inputs[index]) not in failed_ids
+        assert prediction == step_inputs[index].gt_response
+
+
+def test_batch_over_limit_is_rejected_without_split(stub_server, step_inputs, tmp_path):
+    import openai
+
+    stub_server(_responder(step_inputs), batch_max_requests=10)
+    with pytest.raises(openai.BadRequestError):
+        run_batch_inference(step_inputs, "stub", tmp_path, poll_interval=0, max_requests=len(step_inputs))
@@ -0,0 +1,91 @@
+"""api_runner --concurrency 경로: AIMD rate 제어와 429 / 5xx 재시도를 로컬 stub 서버로 검증한다."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("openai")
+
+from evaluations.api_runner import _AIMDRateController, _run_api_inference_async  # noqa: E402
+from evaluations.api_stub import StubResponder, _messages_key  # noqa: E402
+
+
+def _responder(step_inputs, **kwargs) -> StubResponder:
+    responses = {_messages_key(inp.messages): inp.gt_response for inp in step_inputs}
+    return StubResponder(responses, **kwargs)
+
+
+def test_aimd_controller_decrease_pause_recovery():
+    async def _scenario():
+        controller = _AIMDRateController(max_limit=8)
+        started_at = await controller.acquire()
+        await controller.release()
+
+        # 429: 상한 절반으로 감소, retry-after만큼 대기
+        wait = controller.on_rate_limit({"retry-after": "0.2"}, attempt=0, started_at=started_at)
+        assert wait == pytest.approx(0.2)
+        assert controller.limit == 4.0
+
+        # 직전 감소 이전에 시작된 요청의 429는 같은 혼잡으로 보고 다시 줄이지 않는다
+        controller.on_rate_limit({"retry-after": "0.2"}, attempt=0, started_at=started_at)
+        assert controller.limit == 4.0
+        assert controller.rate_limit_hits == 2
+
+        # reset 시점까지 새 요청 시작 보류
+        begin = time.monotonic()
+        await controller.acquire()
+        assert time.monotonic() - begin >= 0.15
+        await controller.release()
+
+        # 성공마다 1/limit씩 늘어 max_limit까지 회복
+        for _ in range(40):
+            controller.on_success({})
+        assert controller.limit == 8.0
+
+        # 남은 요청 수가 in-flight 이하면 x-ratelimit-reset-requests까지 보류
+        controller.on_success({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "150ms"})
+        begin = time.monotonic()
+        await controller.acquire()
+        assert time.monotonic() - begin >= 0.1
+        await controller.release()
+
+    asyncio.run(_scenario())
+
+
+def test_concurrency_recovers_from_injected_429(stub_server, step_inputs):
+    # 창당 4건만 허용: 첫 동시 요청 8건 중 절반은 429 + reset 헤더를 받는다
+    responder = _responder(step_inputs, ttft=0.01, requests_per_window=4, window=0.2, retry_after=0.2)
+    stub_server(responder)
+    stats = {}
+
+    predictions = asyncio.run(_run_api_inference_async(
+        step_inputs, "stub", max_new_tokens=512, concurrency=8, inference_stats=stats,
+    ))
+
+    assert predictions == [inp.gt_response for inp in step_inputs]
+    assert responder.rate_limited > 0
+    assert stats["rate_limit"]["hits"] == responder.rate_limited
+    assert responder.served == len(step_inputs)
+
+
+def test_concurrency_retries_server_errors(stub_server, step_inputs):
+    # 처음 0.3초 동안은 모든 요청이 500 → 1초 백오프 후 재시도해 전부 성공해야 한다
+    responder = _responder(step_inputs, error_prob=1.0)
+    stub_server(responder)
+    recover = threading.Timer(0.3, lambda: setattr(responder, "error_prob", 0.0))
+    recover.start()
+    stats = {}
+
+    try:
+        predictions = asyncio.run(_run_api_inference_async(
+            step_inputs, "stub", max_new_tokens=512, concurrency=4, inference_stats=stats,
+        ))
+    finally:
+        recover.cancel()
+
+    assert predictions == [inp.gt_response for inp in step_inputs]
+    assert responder.server_errors > 0
+    assert stats["rate_limit"]["transient_retries"] == responder.server_errors
+    assert stats["rate_limit"]["hits"] == 0
@@ -0,0 +1,120 @@
+"""eval_server: StubEngine으로 HTTP 서버·job 큐·job 수명주기를 CPU에서 검증한다."""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from evaluations.eval_server import EvalJobQueue, StubEngine, make_server
+
+DATASET_PATH = Path(__file__).resolve().parents[1] / "eval_data" / "dataset.jsonl"
+
+
+def _request(server, method: str, path: str, payload=None) -> tuple[int, object]:
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{server.server_port}{path}", data=data, method=method,
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def _wait_finished(server, job_ids: list[str], timeout: float = 60.0) -> dict[str, dict]:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        jobs = {job_id: _request(server, "GET", f"/jobs/{job_id}")[1] for job_id in job_ids}
+        if all(job["status"] in ("succeeded", "failed") for job in jobs.values()):
+            return jobs
+        time.sleep(0.05)
+    raise TimeoutError(f"job이 끝나지 않았습니다: {job_ids}")
+
+
+@pytest.fixture
+def eval_server(tmp_path):
+    """첫 job을 gate가 열릴 때까지 붙잡아 두는 stub 평가 서버."""
+    gate = threading.Event()
+    snapshots = []
+
+    def _run_job(job):
+        # 실행 시작 시점의 전체 job 상태를 남긴다
+        snapshots.append({j.job_id: j.status for j in job_queue.jobs()})
+        if job.job_id == "1":
+            gate.wait(10)
+        job_queue._run_evaluation(job)
+
+    job_queue = EvalJobQueue(StubEngine("stub"), run_job=_run_job)
+    server = make_server(job_queue, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, gate, snapshots
+    gate.set()
+    server.shutdown()
+    server.server_close()
+    job_queue.join()
+
+
+@pytest.fixture
+def dataset_path(tmp_path):
+    path = tmp_path / "dataset.jsonl"
+    with open(DATASET_PATH, encoding="utf-8") as f:
+        path.write_text("".join(f.readlines()[:2]), encoding="utf-8")
+    return str(path)
+
+
+def test_jobs_run_in_order(eval_server, dataset_path, tmp_path):
+    server, gate, snapshots = eval_server
+    first = {"dataset_path": dataset_path, "output_dir": str(tmp_path / "job1")}
+    second = {"dataset_path": dataset_path, "output_dir": str(tmp_path / "job2"), "inference_only": True}
+    # 토크나이저가 없는 stub 엔진에서는 --pretokenize가 ValueError
+    failing = {"dataset_path": dataset_path, "output_dir": str(tmp_path / "job3"), "pretokenize": True}
+
+    statuses = [_request(server, "POST", "/jobs", payload) for payload in (first, second, failing)]
+    assert [status for status, _ in statuses] == [202, 202, 202]
+    # 첫 job은 응답 전에 워커가 집어 갈 수 있다
+    assert statuses[0][1]["status"] in ("queued", "running")
+    assert [job["status"] for _, job in statuses[1:]] == ["queued", "queued"]
+    job_ids = [job["job_id"] for _, job in statuses]
+
+    # 첫 job이 실행 중인 동안 나머지는 대기
+    while not snapshots:
+        time.sleep(0.01)
+    assert _request(server, "GET", f"/jobs/{job_ids[0]}")[1]["status"] == "running"
+    assert _request(server, "GET", f"/jobs/{job_ids[1]}")[1]["status"] == "queued"
+    assert _request(server, "GET", "/health")[1]["pending"] == 2
+    gate.set()
+
+    jobs = _wait_finished(server, job_ids)
+    assert [jobs[job_id]["status"] for job_id in job_ids] == ["succeeded", "succeeded", "failed"]
+    assert jobs[job_ids[0]]["error"] is None
+    assert "pretokenize" in jobs[job_ids[2]]["error"]
+    # 등록 순서대로 하나씩 실행: 이전 job이 끝난 뒤 다음 job 시작
+    for prev, cur in zip(job_ids, job_ids[1:]):
+        assert jobs[prev]["finished_at"] <= jobs[cur]["started_at"]
+    assert snapshots[1] == {"1": "succeeded", "2": "running", "3": "queued"}
+
+    assert (tmp_path / "job1" / "eval_results.json").exists()
+    assert (tmp_path / "job2" / "predictions.jsonl").exists()
+    assert not (tmp_path / "job2" / "eval_results.json").exists()
+
+
+@pytest.mark.parametrize(
+    "payload, message",
+    [
+        ({"dataset_path": "d.jsonl", "output_dir": "out", "model": "x"}, "알 수 없는 job 필드"),
+        ({"dataset_path": "d.jsonl"}, "필수 job 필드 누락"),
+        (["d.jsonl", "out"], "JSON 객체"),
+    ],
+)
+def test_invalid_job_rejected(eval_server, payload, message):
+    server, _, _ = eval_server
+    status, body = _request(server, "POST", "/jobs", payload)
+    assert status == 400
+    assert message in body["error"]
+    assert _request(server, "GET", "/jobs")[1] == []
+    assert _request(server, "GET", "/jobs/1")[0] == 404
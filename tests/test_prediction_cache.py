@@ -0,0 +1,32 @@
+"""cached_inference: 추론 도중 중단돼도 그때까지 생성한 예측이 캐시에 남는지 확인한다."""
+
+import pytest
+
+from evaluations.prediction_cache import PredictionCache, cached_inference
+
+
+def test_cached_inference_keeps_results_on_interrupt(tmp_path):
+    keys = [f"key-{i}" for i in range(100)]
+    cache = PredictionCache(str(tmp_path / "cache.sqlite"))
+
+    def _interrupted(indices, notify):
+        for position in range(40):
+            notify(position, f"pred-{indices[position]}")
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        cached_inference(keys, cache, _interrupted, flush_every=16)
+    found = cache.get_many(keys)
+    assert found == {f"key-{i}": f"pred-{i}" for i in range(40)}
+
+    # 다시 실행하면 남은 60개만 추론한다
+    requested = []
+
+    def _resume(indices, notify):
+        requested.extend(indices)
+        return [f"pred-{i}" for i in indices]
+
+    predictions = cached_inference(keys, cache, _resume)
+    assert requested == list(range(40, 100))
+    assert predictions == [f"pred-{i}" for i in range(100)]
+    cache.close()
@@ -0,0 +1,30 @@
+"""plan_prefix_waves: wave k에는 각 대화의 k번째 step만, 모든 인덱스는 정확히 한 번."""
+
+import random
+
+from evaluations.prefix_schedule import plan_prefix_waves
+
+
+def test_waves_group_steps_by_depth(step_inputs):
+    inputs = list(step_inputs)
+    random.Random(0).shuffle(inputs)
+
+    waves = plan_prefix_waves(inputs)
+
+    flat = [index for wave in waves for index in wave]
+    assert sorted(flat) == list(range(len(inputs)))
+
+    depth = {}
+    for conv_id in {inp.conversation_id for inp in inputs}:
+        ordered = sorted(
+            (i for i, inp in enumerate(inputs) if inp.conversation_id == conv_id),
+            key=lambda i: (inputs[i].turn_index, inputs[i].step_index),
+        )
+        depth.update((index, k) for k, index in enumerate(ordered))
+    for k, wave in enumerate(waves):
+        assert {depth[i] for i in wave} == {k}
+        assert sorted(wave) == sorted(index for index, d in depth.items() if d == k)
+        # wave 안은 conversation_id 순
+        conv_ids = [inputs[i].conversation_id for i in wave]
+        assert conv_ids == sorted(conv_ids)
+    assert len(waves) == max(depth.values()) + 1
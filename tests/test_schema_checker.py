@@ -0,0 +1,24 @@
+"""schema_checker: 같은 tool_schemas dict를 호출 사이에 수정하면 수정된 스키마로 채점해야 한다."""
+
+from evaluations.metrics import _step_checkers, evaluate_function_call_step
+from evaluations.schema_checker import compile_tool_schemas
+
+LABEL = '<tool_call>{"name": "search", "arguments": {"query": "a"}}</tool_call>'
+PREDICTION = '<tool_call>{"name": "search", "arguments": {"query": "a", "limit": 3}}</tool_call>'
+
+
+def test_mutated_schema_is_recompiled():
+    schemas = {"search": {"properties": {"query": {"type": "string"}}, "required": ["query"]}}
+    assert evaluate_function_call_step(LABEL, PREDICTION, tool_schemas=schemas).hallucination_pass is False
+
+    schemas["search"]["properties"]["limit"] = {"type": "integer"}
+    assert evaluate_function_call_step(LABEL, PREDICTION, tool_schemas=schemas).hallucination_pass is True
+
+
+def test_step_checkers_share_compiled_schema():
+    shared = {"search": {"properties": {"query": {"type": "string"}}, "required": ["query"]}}
+    other = {"lookup": {"properties": {}, "required": []}}
+    checkers = _step_checkers([shared, shared, other, None], 4)
+    assert checkers[0] is checkers[1] is compile_tool_schemas(shared)
+    assert checkers[2] is compile_tool_schemas(other)
+    assert checkers[3] is None
@@ -0,0 +1,76 @@
+"""api_runner --stream-latency: 지연을 주는 stub 스트림으로 step별 ttft / tool_call / total과 집계를 검증한다."""
+
+import asyncio
+from collections import Counter
+
+import pytest
+
+pytest.importorskip("openai")
+
+from datagen.tool_parsing import parse_tool_call  # noqa: E402
+from evaluations.api_runner import _generate_sequential, _run_api_inference_async  # noqa: E402
+from evaluations.api_stub import StubResponder, _messages_key  # noqa: E402
+from evaluations.latency import summarize_latency  # noqa: E402
+from evaluations.prediction_log import make_record  # noqa: E402
+
+TTFT = 0.05
+
+
+@pytest.fixture
+def streaming_stub(stub_server, step_inputs):
+    responses = {_messages_key(inp.messages): inp.gt_response for inp in step_inputs}
+    stub_server(StubResponder(responses, ttft=TTFT, token_delay=0.001, chunk_chars=8))
+
+
+def _check_latencies(step_inputs, predictions, latencies):
+    assert predictions == [inp.gt_response for inp in step_inputs]
+    assert sorted(latencies) == list(range(len(step_inputs)))
+    for index, inp in enumerate(step_inputs):
+        latency = latencies[index]
+        assert latency["ttft"] >= TTFT
+        assert latency["ttft"] <= latency["total"]
+        if "</tool_call>" in inp.gt_response:
+            assert latency["tool_call"] is not None
+            assert latency["ttft"] <= latency["tool_call"] <= latency["total"]
+        else:
+            assert latency["tool_call"] is None
+
+
+def _check_summary(step_inputs, predictions, latencies):
+    records = []
+    for index, (inp, prediction) in enumerate(zip(step_inputs, predictions)):
+        record = make_record(inp, prediction)
+        record["latency"] = latencies[index]
+        records.append(record)
+    summary = summarize_latency(records)
+
+    tool_steps = sum(inp.is_tool_call for inp in step_inputs)
+    assert summary["steps"] == len(step_inputs)
+    assert summary["overall"]["steps"] == len(step_inputs)
+    assert summary["by_step_type"]["tool_call"]["steps"] == tool_steps
+    assert summary["by_step_type"]["text"]["steps"] == len(step_inputs) - tool_steps
+    # text step에는 </tool_call>이 없으므로 tool_call 지연은 tool_call step에서만 집계된다
+    assert summary["by_step_type"]["tool_call"]["tool_call"]["count"] == tool_steps
+    assert summary["by_step_type"]["text"]["tool_call"] == {"count": 0}
+
+    functions = Counter(
+        parse_tool_call(inp.gt_response)["name"] for inp in step_inputs if inp.is_tool_call
+    )
+    assert {name: stats["steps"] for name, stats in summary["by_function"].items()} == dict(functions)
+    assert summary["overall"]["ttft"]["p50"] >= TTFT
+
+
+def test_stream_latency_concurrent(streaming_stub, step_inputs):
+    latencies = {}
+    predictions = asyncio.run(_run_api_inference_async(
+        step_inputs, "stub", max_new_tokens=512, concurrency=4, stream=True, latencies=latencies,
+    ))
+    _check_latencies(step_inputs, predictions, latencies)
+    _check_summary(step_inputs, predictions, latencies)
+
+
+def test_stream_latency_sequential(streaming_stub, step_inputs):
+    latencies = {}
+    predictions = _generate_sequential(step_inputs, "stub", 512, stream=True, latencies=latencies)
+    _check_latencies(step_inputs, predictions, latencies)
+    _check_summary(step_inputs, predictions, latencies)
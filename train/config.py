@@ -159,6 +159,20 @@ class TrainConfig:
     report_to: Optional[str] = field(
         default_factory=lambda: _get_str("TRAIN_REPORT_TO", "wandb")
     )
+    metric_for_best_model: str = field(
+        default_factory=lambda: _get_str("TRAIN_METRIC_FOR_BEST_MODEL", "eval_loss")
+    )
+
+    # ── 생성 기반 tool call 평가 (train.tool_eval) ───────
+    tool_eval_conversations: int = field(
+        default_factory=lambda: _get_int("TRAIN_TOOL_EVAL_CONVERSATIONS", 0)
+    )
+    tool_eval_max_new_tokens: int = field(
+        default_factory=lambda: _get_int("TRAIN_TOOL_EVAL_MAX_NEW_TOKENS", 256)
+    )
+    tool_eval_batch_size: int = field(
+        default_factory=lambda: _get_int("TRAIN_TOOL_EVAL_BATCH_SIZE", 8)
+    )
 
     # ── 유틸 메서드 ──────────────────────────────────────
 
@@ -216,8 +230,9 @@ class TrainConfig:
             sft_config.evaluation_strategy = self.eval_strategy
         sft_config.eval_steps = self.eval_steps
         sft_config.load_best_model_at_end = self.load_best_model_at_end
-        sft_config.metric_for_best_model = "eval_loss"
-        sft_config.greater_is_better = False
+        sft_config.metric_for_best_model = self.metric_for_best_model
+        # loss 계열만 낮을수록 좋고, tool call 지표(acc, rate)는 높을수록 좋다
+        sft_config.greater_is_better = not self.metric_for_best_model.endswith("loss")
         return sft_config
 
     def to_metadata_dict(self) -> dict:
@@ -251,4 +266,8 @@ class TrainConfig:
             "save_strategy": self.save_strategy,
             "save_steps": self.save_steps,
             "load_best_model_at_end": self.load_best_model_at_end,
+            "metric_for_best_model": self.metric_for_best_model,
+            "tool_eval_conversations": self.tool_eval_conversations,
+            "tool_eval_max_new_tokens": self.tool_eval_max_new_tokens,
+            "tool_eval_batch_size": self.tool_eval_batch_size,
         }
@@ -1,6 +1,6 @@
 """데이터셋 로드 및 전처리를 담당합니다."""
 
-from typing import Tuple
+from typing import List, Tuple
 
 from datasets import Dataset, load_dataset
 
@@ -18,6 +18,23 @@ def format_conversations(sample: dict) -> dict:
     }
 
 
+def _shuffled_split(
+    dataset_id: str,
+    test_ratio: float,
+    seed: int,
+) -> Tuple[Dataset, List[int], List[int]]:
+    """데이터셋을 seed 기준으로 셔플하고 (dataset, train 인덱스, eval 인덱스)를 반환합니다."""
+    dataset = load_dataset(dataset_id, split="train")
+    dataset = dataset.shuffle(seed=seed)
+
+    total_len = len(dataset)
+    eval_size = int(total_len * test_ratio)
+
+    eval_indices = list(range(eval_size))
+    train_indices = list(range(eval_size, total_len))
+    return dataset, train_indices, eval_indices
+
+
 def load_and_split(
     dataset_id: str,
     test_ratio: float = 0.2,
@@ -35,14 +52,7 @@ def load_and_split(
     Returns:
         (train_dataset, eval_dataset) 튜플
     """
-    dataset = load_dataset(dataset_id, split="train")
-    dataset = dataset.shuffle(seed=seed)
-
-    total_len = len(dataset)
-    eval_size = int(total_len * test_ratio)
-
-    eval_indices = list(range(eval_size))
-    train_indices = list(range(eval_size, total_len))
+    dataset, train_indices, eval_indices = _shuffled_split(dataset_id, test_ratio, seed)
 
     train_dataset = Dataset.from_list(
         [format_conversations(dataset[i]) for i in train_indices]
@@ -53,3 +63,16 @@ def load_and_split(
 
     print(f"데이터 분할 결과: Train {len(train_dataset)}개, Eval {len(eval_dataset)}개")
     return train_dataset, eval_dataset
+
+
+def load_eval_conversations(
+    dataset_id: str,
+    test_ratio: float = 0.2,
+    seed: int = 42,
+) -> List[dict]:
+    """load_and_split과 같은 validation 분할을 원본 형식(system_prompt, messages, tools)으로 반환합니다.
+
+    학습 중 생성 기반 tool call 평가(train.tool_eval)에서 evaluations.turn_splitter 입력으로 사용합니다.
+    """
+    dataset, _, eval_indices = _shuffled_split(dataset_id, test_ratio, seed)
+    return [dict(dataset[i]) for i in eval_indices]
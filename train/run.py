@@ -14,7 +14,7 @@ from trl import SFTTrainer
 
 from train.collator import ChatMLCollator
 from train.config import TrainConfig
-from train.data import load_and_split
+from train.data import load_and_split, load_eval_conversations
 
 
 def _save_train_metadata(config: TrainConfig) -> Path:
@@ -29,6 +29,44 @@ def _save_train_metadata(config: TrainConfig) -> Path:
     return metadata_path
 
 
+def _add_tool_eval_callback(trainer, tokenizer, config: TrainConfig) -> None:
+    """tool_eval_conversations > 0이면 eval마다 생성 기반 tool call 지표를 계산하는 콜백을 등록한다."""
+    metric = config.metric_for_best_model.removeprefix("eval_")
+    if config.tool_eval_conversations <= 0:
+        if metric != "loss":
+            raise ValueError(
+                f"metric_for_best_model={config.metric_for_best_model}은 "
+                "TRAIN_TOOL_EVAL_CONVERSATIONS > 0일 때만 사용할 수 있습니다."
+            )
+        return
+
+    from train.tool_eval import TOOL_EVAL_METRICS, ToolCallEvalCallback, ToolCallEvaluator
+
+    if metric != "loss" and metric not in TOOL_EVAL_METRICS:
+        raise ValueError(
+            f"알 수 없는 metric_for_best_model: {config.metric_for_best_model} "
+            f"(eval_loss 또는 {', '.join(TOOL_EVAL_METRICS)})"
+        )
+
+    evaluator = ToolCallEvaluator(
+        load_eval_conversations(
+            dataset_id=config.dataset_id,
+            test_ratio=config.test_ratio,
+            seed=config.data_seed,
+        ),
+        tokenizer,
+        num_conversations=config.tool_eval_conversations,
+        max_new_tokens=config.tool_eval_max_new_tokens,
+        batch_size=config.tool_eval_batch_size,
+        seed=config.data_seed,
+    )
+    print(
+        f"tool call 평가 콜백: 대화 {len(evaluator.conversations)}개, "
+        f"step {len(evaluator.prompts)}개 (best 체크포인트 기준: {config.metric_for_best_model})"
+    )
+    trainer.add_callback(ToolCallEvalCallback(trainer, evaluator))
+
+
 def main(config: TrainConfig | None = None) -> None:
     """학습 파이프라인을 실행합니다."""
     if config is None:
@@ -65,6 +103,7 @@ def main(config: TrainConfig | None = None) -> None:
         data_collator=collator,
         peft_config=peft_config,
     )
+    _add_tool_eval_callback(trainer, tokenizer, config)
 
     # ── 5. 학습 실행 ─────────────────────────────────────
     print("학습을 시작합니다...")
@@ -0,0 +1,264 @@
+"""학습 중 생성 기반 tool call 평가를 제공합니다.
+
+eval_loss만으로는 argument_value_acc나 relevance 회귀를 학습이 끝난 뒤 vLLM 평가에서야 알 수 있습니다.
+ToolCallEvalCallback은 eval_steps마다 eval 대화 일부를 evaluations.turn_splitter로 분할하고,
+학습 중인 (PEFT) 모델로 batch greedy 생성한 뒤 evaluations 메트릭으로 7단계 acc와
+Turn/Conversation 지표를 계산해 eval 로그에 남깁니다.
+계산한 지표는 eval metrics에 합쳐지므로 metric_for_best_model로 best 체크포인트를 고를 수 있습니다.
+
+모델 하나로 한 번만 평가하려면 (CPU + 작은 모델로도 동작):
+    python -m train.tool_eval \\
+        --model Qwen/Qwen2.5-0.5B-Instruct \\
+        --dataset eval_data/dataset.jsonl \\
+        --conversations 4 --max-new-tokens 64
+"""
+
+import argparse
+import json
+import random
+from collections import defaultdict
+from typing import Dict, List
+
+import torch
+from transformers import TrainerCallback
+
+from datagen.tool_parsing import find_tool_call
+from evaluations.metrics import STAGE_FIELDS
+from evaluations.prediction_log import make_record
+from evaluations.preprocessing import render_step_prompts
+from evaluations.schema_checker import ToolCheckerIndex
+from evaluations.scorer import score_records
+from evaluations.turn_splitter import split_conversations
+
+# best 체크포인트 선택(metric_for_best_model)에 쓸 수 있는 지표 (모두 높을수록 좋음)
+TOOL_EVAL_METRICS = (
+    *(f"{stage}_acc" for stage, _ in STAGE_FIELDS),
+    "turn_level_accuracy",
+    "conversation_success_rate",
+    "conversation_progress_rate",
+)
+
+
+def _first_function_name(conversation: dict) -> str:
+    """대화에서 처음 호출되는 GT 함수명 (tool call이 없으면 빈 문자열)."""
+    for msg in conversation.get("messages", []):
+        if msg.get("role") != "assistant":
+            continue
+        block = find_tool_call(msg.get("content", ""))
+        if block is None:
+            continue
+        if not block.ok or not isinstance(block.value, dict):
+            return ""
+        return str(block.value.get("name", ""))
+    return ""
+
+
+def stratified_sample(conversations: List[dict], n: int, seed: int = 42) -> List[dict]:
+    """처음 호출하는 GT 함수명으로 층을 나눠 대화 n개를 고릅니다.
+
+    층마다 seed로 섞은 뒤 라운드 로빈으로 뽑으므로 작은 n에서도 모든 함수가 고르게 포함됩니다.
+    선택된 대화는 원래 순서를 유지합니다.
+
+    Args:
+        conversations: 원본 형식 대화 리스트 (system_prompt, messages, tools)
+        n: 고를 대화 수 (대화 수 이상이면 전체)
+        seed: 층 내 셔플 seed
+
+    Returns:
+        선택된 대화 리스트
+    """
+    if n >= len(conversations):
+        return list(conversations)
+
+    rng = random.Random(seed)
+    strata: Dict[str, List[int]] = defaultdict(list)
+    for index, conversation in enumerate(conversations):
+        strata[_first_function_name(conversation)].append(index)
+    groups = [strata[key] for key in sorted(strata)]
+    for group in groups:
+        rng.shuffle(group)
+
+    selected: List[int] = []
+    depth = 0
+    while len(selected) < n:
+        for group in groups:
+            if depth < len(group) and len(selected) < n:
+                selected.append(group[depth])
+        depth += 1
+    return [conversations[i] for i in sorted(selected)]
+
+
+class ToolCallEvaluator:
+    """고정된 eval 대화 subset에 대해 생성 → 스코어링을 수행합니다.
+
+    분할·프롬프트 렌더링·tool 스키마 추출은 생성자에서 한 번만 하고,
+    evaluate(model)마다 batch greedy 생성과 메트릭 계산만 반복합니다.
+
+    Args:
+        conversations: 원본 형식 eval 대화 리스트
+        tokenizer: 학습 모델의 토크나이저
+        num_conversations: 평가에 쓸 대화 수 (stratified_sample)
+        max_new_tokens: step당 최대 생성 토큰 수
+        batch_size: generate batch 크기
+        seed: 대화 선택 seed
+    """
+
+    def __init__(
+        self,
+        conversations: List[dict],
+        tokenizer,
+        num_conversations: int = 16,
+        max_new_tokens: int = 256,
+        batch_size: int = 8,
+        seed: int = 42,
+    ):
+        self.tokenizer = tokenizer
+        self.max_new_tokens = max_new_tokens
+        self.batch_size = batch_size
+
+        self.conversations = stratified_sample(conversations, num_conversations, seed=seed)
+        self.inference_inputs = split_conversations(self.conversations)
+        self.prompts = render_step_prompts(self.inference_inputs)
+        # 샘플 대화마다 자기 tools 스키마로 채점 (conversation_id = self.conversations 인덱스)
+        self.tool_schemas = None
+        if any(conv.get("tools") for conv in self.conversations):
+            self.tool_schemas = ToolCheckerIndex.from_conversations(self.conversations)
+
+        # vLLM 평가와 같이 <|im_end|>에서 생성을 멈춘다
+        self.stop_token_ids = [
+            token_id
+            for token_id in (
+                tokenizer.convert_tokens_to_ids("<|im_end|>"),
+                tokenizer.eos_token_id,
+            )
+            if token_id is not None and token_id != tokenizer.unk_token_id
+        ]
+
+    def _decode(self, token_ids: List[int]) -> str:
+        """첫 stop 토큰 앞까지 디코딩합니다."""
+        for index, token_id in enumerate(token_ids):
+            if token_id in self.stop_token_ids:
+                token_ids = token_ids[:index]
+                break
+        return self.tokenizer.decode(token_ids, skip_special_tokens=False)
+
+    @torch.no_grad()
+    def generate(self, model) -> List[str]:
+        """모든 step 프롬프트를 길이순 batch로 greedy 생성합니다 (반환은 프롬프트 순서)."""
+        tokenizer = self.tokenizer
+        padding_side, pad_token = tokenizer.padding_side, tokenizer.pad_token
+        tokenizer.padding_side = "left"
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+
+        was_training = model.training
+        model.eval()
+        order = sorted(range(len(self.prompts)), key=lambda i: len(self.prompts[i]))
+        predictions = [""] * len(self.prompts)
+        try:
+            for start in range(0, len(order), self.batch_size):
+                batch = order[start:start + self.batch_size]
+                encoded = tokenizer(
+                    [self.prompts[i] for i in batch],
+                    return_tensors="pt",
+                    padding=True,
+                    add_special_tokens=False,
+                ).to(model.device)
+                outputs = model.generate(
+                    **encoded,
+                    max_new_tokens=self.max_new_tokens,
+                    do_sample=False,
+                    use_cache=True,
+                    pad_token_id=tokenizer.pad_token_id,
+                    eos_token_id=self.stop_token_ids,
+                )
+                new_tokens = outputs[:, encoded["input_ids"].shape[1]:].tolist()
+                for index, token_ids in zip(batch, new_tokens):
+                    predictions[index] = self._decode(token_ids)
+        finally:
+            tokenizer.padding_side, tokenizer.pad_token = padding_side, pad_token
+            if was_training:
+                model.train()
+        return predictions
+
+    def evaluate(self, model, metric_key_prefix: str = "eval") -> Dict[str, float]:
+        """생성 후 스코어링해 {f"{prefix}_{지표}": 값} dict를 반환합니다.
+
+        best 체크포인트 비교에서 지표가 빠지지 않도록 N/A(-1.0, 분모 0)는 0.0으로 기록합니다.
+        """
+        predictions = self.generate(model)
+        records = [make_record(inp, pred) for inp, pred in zip(self.inference_inputs, predictions)]
+        tc_results, mt_results = score_records(records, self.tool_schemas)
+
+        values = {**tc_results.to_dict(), **mt_results.to_dict()}
+        return {f"{metric_key_prefix}_{name}": max(values[name], 0.0) for name in TOOL_EVAL_METRICS}
+
+
+class ToolCallEvalCallback(TrainerCallback):
+    """eval 시점마다 ToolCallEvaluator를 실행해 tool call 지표를 eval metrics와 로그에 추가합니다.
+
+    Trainer.evaluate가 반환하는 metrics dict에 지표를 합치므로
+    metric_for_best_model="argument_value_acc"처럼 지정하면 이 지표로 best 체크포인트를 고릅니다.
+    로그(wandb 등)에 남기려면 trainer 참조가 필요하므로 생성 후 trainer.add_callback으로 등록합니다.
+
+        callback = ToolCallEvalCallback(trainer, evaluator)
+        trainer.add_callback(callback)
+    """
+
+    def __init__(self, trainer, evaluator: ToolCallEvaluator):
+        self.trainer = trainer
+        self.evaluator = evaluator
+
+    def on_evaluate(self, args, state, control, model=None, metrics=None, **kwargs):
+        if model is None:
+            model = self.trainer.model
+        tool_metrics = self.evaluator.evaluate(model)
+        if metrics is not None:
+            metrics.update(tool_metrics)
+        # Trainer.log는 전달한 dict에 epoch를 추가하므로 사본을 넘긴다
+        self.trainer.log(dict(tool_metrics))
+        print(
+            f"[tool eval] step {state.global_step}: "
+            + ", ".join(f"{name[len('eval_'):]}={value:.4f}" for name, value in tool_metrics.items())
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="생성 기반 tool call 평가 (학습 콜백과 같은 경로로 1회 실행)")
+    parser.add_argument("--model", required=True, help="모델 경로 또는 HuggingFace ID")
+    parser.add_argument("--lora", default=None, help="PEFT 어댑터 경로 (선택)")
+    parser.add_argument("--dataset", default="eval_data/dataset.jsonl", help="평가 데이터셋 JSONL 경로")
+    parser.add_argument("--conversations", type=int, default=16, help="평가 대화 수")
+    parser.add_argument("--max-new-tokens", type=int, default=256, help="step당 최대 생성 토큰 수")
+    parser.add_argument("--batch-size", type=int, default=8, help="generate batch 크기")
+    parser.add_argument("--seed", type=int, default=42, help="대화 선택 seed")
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu")
+    args = parser.parse_args()
+
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    with open(args.dataset, encoding="utf-8") as f:
+        conversations = [json.loads(line) for line in f if line.strip()]
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForCausalLM.from_pretrained(args.model).to(args.device)
+    if args.lora:
+        from peft import PeftModel
+
+        model = PeftModel.from_pretrained(model, args.lora)
+
+    evaluator = ToolCallEvaluator(
+        conversations,
+        tokenizer,
+        num_conversations=args.conversations,
+        max_new_tokens=args.max_new_tokens,
+        batch_size=args.batch_size,
+        seed=args.seed,
+    )
+    print(f"평가 대화 {len(evaluator.conversations)}개, step {len(evaluator.prompts)}개")
+    for name, value in evaluator.evaluate(model).items():
+        print(f"  {name}: {value:.4f}")
+
+
+if __name__ == "__main__":
+    main()